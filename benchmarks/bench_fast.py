@@ -0,0 +1,104 @@
+"""
+Benchmark the resource read path against the client fast path on large items.
+
+This runs a tiny local HTTP server (in its own process) that answers every
+GetItem call with the same large item, then times ``Table.get_item`` against
+``dynamo.fast_tables[...].get``.  It also times the item decoding step on its
+own.
+
+Run with::
+
+    $ python benchmarks/bench_fast.py
+"""
+from __future__ import print_function
+
+import json
+from multiprocessing import Process, Queue
+from timeit import timeit
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from boto3.dynamodb.types import TypeDeserializer
+from flask import Flask
+from flask_dynamo import Dynamo, codec
+
+
+NUMBER = 50
+ATTRIBUTES = 500
+
+
+def make_item():
+    item = {'id': 'bench'}
+    for i in range(ATTRIBUTES):
+        item['n{}'.format(i)] = i * 1.5
+        item['s{}'.format(i)] = 'value-{}'.format(i)
+        item['m{}'.format(i)] = {'a': i, 'b': ['x', 'y', i]}
+    return codec.serialize_item(item)
+
+
+WIRE_ITEM = make_item()
+BODY = json.dumps({'Item': WIRE_ITEM}).encode('utf-8')
+
+
+class ItemHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-amz-json-1.0')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(ports):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ItemHandler)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def make_app(port):
+    app = Flask(__name__)
+    app.config['AWS_ACCESS_KEY_ID'] = 'bench'
+    app.config['AWS_SECRET_ACCESS_KEY'] = 'bench'
+    app.config['DYNAMO_ENABLE_LOCAL'] = True
+    app.config['DYNAMO_LOCAL_HOST'] = '127.0.0.1'
+    app.config['DYNAMO_LOCAL_PORT'] = port
+    app.config['DYNAMO_FAST_FLOATS'] = True
+    return app
+
+
+def report(name, seconds):
+    print('{:<24} {:8.2f} ms/item'.format(name, seconds / NUMBER * 1000))
+
+
+def main():
+    deserializer = TypeDeserializer()
+    print('{} attributes per item'.format(len(WIRE_ITEM)))
+    report('TypeDeserializer', timeit(lambda: {k: deserializer.deserialize(v) for k, v in WIRE_ITEM.items()}, number=NUMBER))
+    report('codec (Decimal)', timeit(lambda: codec.deserialize_item(WIRE_ITEM), number=NUMBER))
+    report('codec (float)', timeit(lambda: codec.deserialize_item(WIRE_ITEM, use_float=True), number=NUMBER))
+
+    ports = Queue()
+    server = Process(target=serve, args=(ports,))
+    server.daemon = True
+    server.start()
+    app = make_app(ports.get())
+    dynamo = Dynamo(app)
+
+    with app.app_context():
+        table = dynamo.tables['bench']
+        fast_table = dynamo.fast_tables['bench']
+        key = {'id': 'bench'}
+        report('Table.get_item', timeit(lambda: table.get_item(Key=key), number=NUMBER))
+        report('fast_tables get', timeit(lambda: fast_table.get(key), number=NUMBER))
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
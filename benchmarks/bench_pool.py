@@ -0,0 +1,109 @@
+"""
+Benchmark throughput under concurrency for different connection pool sizes.
+
+This starts a tiny local HTTP server (in its own process, so it doesn't
+compete for the GIL) that answers every DynamoDB request with an empty JSON
+document after a fixed delay, then hammers it with a pool of threads sharing
+one flask-dynamo connection.  Requests beyond the pool size open (and then
+throw away) extra connections, so small pools pay for a TCP handshake on
+most calls.
+
+Run with::
+
+    $ python benchmarks/bench_pool.py
+"""
+from __future__ import print_function
+
+import time
+from multiprocessing import Process, Queue
+from threading import Thread
+
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from BaseHTTPServer import HTTPServer
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+from flask import Flask
+from flask_dynamo import Dynamo
+
+
+LATENCY = 0.01
+THREADS = 32
+CALLS_PER_THREAD = 20
+POOL_SIZES = (4, 10, 32)
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(LATENCY)
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-amz-json-1.0')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_app(port, pool_size):
+    app = Flask(__name__)
+    app.config['AWS_ACCESS_KEY_ID'] = 'bench'
+    app.config['AWS_SECRET_ACCESS_KEY'] = 'bench'
+    app.config['DYNAMO_ENABLE_LOCAL'] = True
+    app.config['DYNAMO_LOCAL_HOST'] = '127.0.0.1'
+    app.config['DYNAMO_LOCAL_PORT'] = port
+    app.config['DYNAMO_MAX_POOL_CONNECTIONS'] = pool_size
+    return app
+
+
+def run(port, pool_size):
+    app = make_app(port, pool_size)
+    dynamo = Dynamo(app)
+    with app.app_context():
+        table = dynamo.connection.Table('bench')
+
+    def worker():
+        for _ in range(CALLS_PER_THREAD):
+            table.get_item(Key={'id': 'x'})
+
+    threads = [Thread(target=worker) for _ in range(THREADS)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return THREADS * CALLS_PER_THREAD / (time.time() - start)
+
+
+def serve(ports):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main():
+    ports = Queue()
+    server = Process(target=serve, args=(ports,))
+    server.daemon = True
+    server.start()
+    port = ports.get()
+
+    print('{} threads, {:.0f}ms server latency'.format(THREADS, LATENCY * 1000))
+    for pool_size in POOL_SIZES:
+        print('max_pool_connections={:3d}: {:8.1f} calls/s'.format(pool_size, run(port, pool_size)))
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
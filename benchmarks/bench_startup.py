@@ -0,0 +1,80 @@
+"""
+Benchmark app startup: import time (not counting Flask), init_app time and
+memory use.
+
+Each measurement runs in a fresh interpreter, with and without
+``DYNAMO_WARM_TABLES`` (which builds the boto3 session, resource and client
+up front, like flask-dynamo used to).
+
+Run with::
+
+    $ python benchmarks/bench_startup.py
+"""
+from __future__ import print_function
+
+import json
+import subprocess
+import sys
+from statistics import median
+
+
+RUNS = 5
+
+CHILD = '''
+import json, resource, sys
+from time import perf_counter
+
+from flask import Flask
+started = perf_counter()
+from flask_dynamo import Dynamo
+imported = perf_counter()
+
+app = Flask(__name__)
+app.config['AWS_ACCESS_KEY_ID'] = 'bench'
+app.config['AWS_SECRET_ACCESS_KEY'] = 'bench'
+app.config['AWS_REGION'] = 'us-east-1'
+app.config['DYNAMO_WARM_TABLES'] = {warm}
+app.config['DYNAMO_TABLES'] = [
+    dict(
+        TableName='users',
+        KeySchema=[dict(AttributeName='username', KeyType='HASH')],
+        AttributeDefinitions=[dict(AttributeName='username', AttributeType='S')],
+        ProvisionedThroughput=dict(ReadCapacityUnits=5, WriteCapacityUnits=5),
+    ),
+]
+Dynamo(app)
+initialized = perf_counter()
+
+print(json.dumps({{
+    'import': imported - started,
+    'init': initialized - imported,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'boto3': 'boto3' in sys.modules,
+}}))
+'''
+
+
+def measure(warm):
+    runs = [
+        json.loads(subprocess.check_output([sys.executable, '-c', CHILD.format(warm=warm)]))
+        for _ in range(RUNS)
+    ]
+    return dict(
+        (name, median(run[name] for run in runs)) for name in ('import', 'init', 'rss')
+    ), runs[0]['boto3']
+
+
+def main():
+    for label, warm in (('lazy', False), ('warm', True)):
+        result, boto3_loaded = measure(warm)
+        print('{}: import {:7.1f} ms, init_app {:7.1f} ms, max RSS {:6.1f} MB, boto3 imported: {}'.format(
+            label,
+            result['import'] * 1000,
+            result['init'] * 1000,
+            result['rss'] / 1024.0,
+            boto3_loaded,
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark cached vs. uncached table lookups.
+
+Run with::
+
+    $ python benchmarks/bench_tables.py
+"""
+from __future__ import print_function
+
+from timeit import timeit
+
+from flask import Flask
+from flask_dynamo import Dynamo
+
+
+NUMBER = 20000
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['AWS_ACCESS_KEY_ID'] = 'bench'
+    app.config['AWS_SECRET_ACCESS_KEY'] = 'bench'
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='users',
+            KeySchema=[dict(AttributeName='username', KeyType='HASH')],
+            AttributeDefinitions=[dict(AttributeName='username', AttributeType='S')],
+            ProvisionedThroughput=dict(ReadCapacityUnits=5, WriteCapacityUnits=5),
+        ),
+    ]
+    return app
+
+
+def main():
+    app = make_app()
+    dynamo = Dynamo(app)
+
+    with app.app_context():
+        connection = dynamo.connection
+        uncached = timeit(lambda: connection.Table('users'), number=NUMBER)
+        cached = timeit(lambda: dynamo.tables['users'], number=NUMBER)
+
+    print('uncached: {:8.2f} us/lookup'.format(uncached / NUMBER * 1e6))
+    print('cached:   {:8.2f} us/lookup'.format(cached / NUMBER * 1e6))
+    print('speedup:  {:8.1f}x'.format(uncached / cached))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+"""Benchmarks for creating and destroying tables."""
+
+
+import pytest
+from flask_dynamo import Dynamo
+
+from conftest import make_app
+
+
+TABLES = 10
+
+
+@pytest.mark.benchmark(group='admin')
+def test_create_and_destroy_all(benchmark, endpoint):
+    app = make_app(endpoint, tables=TABLES)
+    dynamo = Dynamo(app)
+
+    def create_and_destroy():
+        dynamo.create_all(wait=True)
+        dynamo.destroy_all(wait=True)
+
+    with app.app_context():
+        benchmark.pedantic(create_and_destroy, rounds=5)
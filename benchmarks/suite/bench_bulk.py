@@ -0,0 +1,53 @@
+"""Benchmarks for batch operations and scans."""
+
+
+import pytest
+
+from conftest import ITEMS
+
+
+@pytest.mark.benchmark(group='batch')
+def test_batch_get(benchmark, app, dynamo):
+    keys = [{'id': str(i)} for i in range(0, ITEMS, 2)]
+    with app.app_context():
+        benchmark(lambda: list(dynamo.batch_get(dynamo.table_name, keys)))
+
+
+@pytest.mark.benchmark(group='batch')
+def test_batch_write(benchmark, app, dynamo):
+    items = [{'id': str(i), 'name': 'user {}'.format(i), 'visits': i} for i in range(100)]
+    with app.app_context():
+        benchmark(dynamo.batch_write, dynamo.table_name, put_items=items)
+
+
+@pytest.mark.benchmark(group='scan')
+def test_scan(benchmark, app, dynamo):
+    def scan():
+        table = dynamo.tables[dynamo.table_name]
+        kwargs = {'Limit': 100}
+        items = []
+        while True:
+            response = table.scan(**kwargs)
+            items.extend(response['Items'])
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    with app.app_context():
+        assert len(benchmark(scan)) == ITEMS
+
+
+@pytest.mark.benchmark(group='scan')
+def test_parallel_scan(benchmark, app, dynamo):
+    with app.app_context():
+        scan = lambda: list(dynamo.tables.parallel_scan(dynamo.table_name, segments=4, Limit=100))
+        assert len(benchmark(scan)) == ITEMS
+
+
+@pytest.mark.benchmark(group='scan')
+def test_iter_scan(benchmark, app, dynamo):
+    def scan():
+        return sum(1 for _ in dynamo.tables.iter_scan(dynamo.table_name, page_size=100))
+
+    with app.app_context():
+        assert benchmark(scan) == ITEMS
@@ -0,0 +1,57 @@
+"""Benchmarks for table lookups and session / connection setup."""
+
+
+import pytest
+from flask_dynamo import Dynamo
+
+from conftest import make_app
+
+
+@pytest.mark.benchmark(group='lookup')
+def test_get_table(benchmark, app):
+    dynamo = Dynamo(app)
+    table_name = app.config['DYNAMO_TABLES'][0]['TableName']
+    with app.app_context():
+        dynamo.get_table(table_name)
+        benchmark(dynamo.get_table, table_name)
+
+
+@pytest.mark.benchmark(group='lookup')
+def test_get_table_outside_app_context(benchmark, app):
+    dynamo = Dynamo(app)
+    table_name = app.config['DYNAMO_TABLES'][0]['TableName']
+    dynamo.get_table(table_name)
+    benchmark(dynamo.get_table, table_name)
+
+
+@pytest.mark.benchmark(group='setup')
+def test_init_app(benchmark, endpoint):
+    benchmark(lambda: Dynamo(make_app(endpoint)))
+
+
+@pytest.mark.benchmark(group='setup')
+def test_session(benchmark, app):
+    Dynamo(app)
+    benchmark(Dynamo._init_session, app)
+
+
+@pytest.mark.benchmark(group='setup')
+def test_connection(benchmark, app):
+    dynamo = Dynamo(app)
+
+    def connect():
+        dynamo._get_ctx(app).scope.clear()
+        return dynamo._connection(app=app)
+
+    benchmark(connect)
+
+
+@pytest.mark.benchmark(group='setup')
+def test_client(benchmark, app):
+    dynamo = Dynamo(app)
+
+    def connect():
+        dynamo._get_ctx(app).scope.clear()
+        return dynamo._client(app=app)
+
+    benchmark(connect)
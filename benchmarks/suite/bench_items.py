@@ -0,0 +1,63 @@
+"""Benchmarks for single item round-trips."""
+
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import ITEMS, THREADS
+
+
+CALLS_PER_THREAD = 20
+
+
+@pytest.mark.benchmark(group='get_item')
+def test_get_item(benchmark, app, dynamo):
+    with app.app_context():
+        table = dynamo.tables[dynamo.table_name]
+        benchmark(table.get_item, Key={'id': '1'})
+
+
+@pytest.mark.benchmark(group='get_item')
+def test_fast_get(benchmark, app, dynamo):
+    with app.app_context():
+        table = dynamo.fast_tables[dynamo.table_name]
+        benchmark(table.get, {'id': '1'})
+
+
+@pytest.mark.benchmark(group='put_item')
+def test_put_item(benchmark, app, dynamo):
+    with app.app_context():
+        table = dynamo.tables[dynamo.table_name]
+        benchmark(table.put_item, Item={'id': '1', 'name': 'user 1', 'visits': 2})
+
+
+@pytest.mark.benchmark(group='put_item')
+def test_fast_put(benchmark, app, dynamo):
+    with app.app_context():
+        table = dynamo.fast_tables[dynamo.table_name]
+        benchmark(table.put, {'id': '1', 'name': 'user 1', 'visits': 2})
+
+
+@pytest.mark.benchmark(group='concurrent')
+def test_concurrent_get_item(benchmark, app, dynamo):
+    def worker(thread):
+        with app.app_context():
+            table = dynamo.tables[dynamo.table_name]
+            for i in range(CALLS_PER_THREAD):
+                table.get_item(Key={'id': str((thread * CALLS_PER_THREAD + i) % ITEMS)})
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        benchmark(lambda: list(pool.map(worker, range(THREADS))))
+
+
+@pytest.mark.benchmark(group='concurrent')
+def test_concurrent_fast_get(benchmark, app, dynamo):
+    def worker(thread):
+        with app.app_context():
+            table = dynamo.fast_tables[dynamo.table_name]
+            for i in range(CALLS_PER_THREAD):
+                table.get({'id': str((thread * CALLS_PER_THREAD + i) % ITEMS)})
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        benchmark(lambda: list(pool.map(worker, range(THREADS))))
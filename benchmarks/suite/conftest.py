@@ -0,0 +1,102 @@
+"""
+Fixtures for the benchmark suite.
+
+The suite measures the overhead flask-dynamo adds on top of DynamoDB, using
+pytest-benchmark and the fake DynamoDB endpoint from ``tests/``.  The fake
+runs in its own process, so it doesn't compete with the client for the GIL.
+
+Run with::
+
+    $ pip install pytest-benchmark
+    $ python -m pytest benchmarks/suite --benchmark-autosave
+
+Then, after a change, compare against the last saved run (and fail on big
+regressions) with::
+
+    $ python -m pytest benchmarks/suite --benchmark-compare --benchmark-compare-fail=mean:15%
+
+``--benchmark-json=results.json`` writes the raw results out for other tools.
+"""
+import os
+import sys
+from multiprocessing import Process, Queue
+from threading import Event
+from uuid import uuid4
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'tests'))
+
+from fakedynamo import FakeDynamo  # noqa: E402
+from flask_dynamo import Dynamo  # noqa: E402
+
+
+#: The number of items loaded into the table before each benchmark.
+ITEMS = 500
+
+#: The number of threads used by concurrent benchmarks.
+THREADS = 8
+
+
+def _serve(ports):
+    fake = FakeDynamo().start()
+    ports.put(fake.port)
+    Event().wait()
+
+
+@pytest.fixture(scope='session')
+def endpoint():
+    """The port of a fake DynamoDB endpoint running in another process."""
+    ports = Queue()
+    process = Process(target=_serve, args=(ports,))
+    process.daemon = True
+    process.start()
+    try:
+        yield ports.get(timeout=10)
+    finally:
+        process.terminate()
+        process.join()
+
+
+def make_table(table_name):
+    return dict(
+        TableName=table_name,
+        KeySchema=[dict(AttributeName='id', KeyType='HASH')],
+        AttributeDefinitions=[dict(AttributeName='id', AttributeType='S')],
+        ProvisionedThroughput=dict(ReadCapacityUnits=5, WriteCapacityUnits=5),
+    )
+
+
+def make_app(port, tables=1, **config):
+    app = Flask(__name__)
+    app.config['AWS_ACCESS_KEY_ID'] = 'bench'
+    app.config['AWS_SECRET_ACCESS_KEY'] = 'bench'
+    app.config['DYNAMO_ENABLE_LOCAL'] = True
+    app.config['DYNAMO_LOCAL_HOST'] = '127.0.0.1'
+    app.config['DYNAMO_LOCAL_PORT'] = port
+    app.config['DYNAMO_MAX_POOL_CONNECTIONS'] = THREADS
+    app.config['DYNAMO_TABLES'] = [make_table('bench-{}'.format(uuid4().hex)) for _ in range(tables)]
+    app.config.update(config)
+    return app
+
+
+@pytest.fixture
+def app(endpoint):
+    return make_app(endpoint)
+
+
+@pytest.fixture
+def dynamo(app):
+    """A Dynamo with one table (``dynamo.table_name``) full of items."""
+    dynamo = Dynamo(app)
+    with app.app_context():
+        dynamo.create_all()
+        dynamo.table_name = dynamo.tables.keys()[0]
+        dynamo.batch_write(dynamo.table_name, put_items=[
+            {'id': str(i), 'name': 'user {}'.format(i), 'visits': i} for i in range(ITEMS)
+        ])
+        try:
+            yield dynamo
+        finally:
+            dynamo.destroy_all()
@@ -7,4 +7,15 @@ __email__ = 'r@rdegges.com'
 
 
 from .manager import Dynamo
-from .errors import ConfigurationError
+from .errors import (
+    ConfigurationError, InvalidCursorError, InvalidKeyError, InvalidTransactionError, UnprocessedItemsError,
+    WriteBufferFullError,
+)
+
+
+def __getattr__(name):
+    # AsyncDynamo pulls in asyncio, so only import it if it's asked for.
+    if name == 'AsyncDynamo':
+        from .aio import AsyncDynamo
+        return AsyncDynamo
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
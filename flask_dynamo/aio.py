@@ -0,0 +1,324 @@
+"""Asyncio support."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from weakref import finalize
+
+from .errors import ConfigurationError
+from .manager import Dynamo
+
+
+async def _run(executor, func, *args, **kwargs):
+    # Copy the caller's context, so the Flask app / request context (and
+    # anything else kept in contextvars, like request stats) goes along.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(copy_context().run, func, *args, **kwargs))
+
+
+_DONE = object()
+
+
+class AsyncIterator(object):
+    """
+    Wraps a blocking iterator (eg: an
+    :class:`~flask_dynamo.paginate.ItemIterator`) for ``async for``, fetching
+    each item on the thread pool.
+
+    Other attributes (eg: ``cursor``) are passed straight through.
+    """
+
+    def __init__(self, iterator, executor):
+        self._iterator = iterator
+        self._executor = executor
+
+    def __getattr__(self, name):
+        return getattr(self._iterator, name)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        value = await _run(self._executor, next, self._iterator, _DONE)
+        if value is _DONE:
+            raise StopAsyncIteration
+        return value
+
+    async def aclose(self):
+        """Stop iterating early (eg: to stop a parallel scan's threads)."""
+        close = getattr(self._iterator, 'close', None)
+        if close is not None:
+            await _run(self._executor, close)
+
+
+class AsyncTable(object):
+    """
+    A boto3 Table whose methods return awaitables.
+
+    Every method call runs on the extension's thread pool, so it never blocks
+    the event loop.  Plain attributes (eg: ``name``) are passed straight
+    through.
+    """
+
+    def __init__(self, table, executor):
+        self._table = table
+        self._executor = executor
+
+    def __getattr__(self, name):
+        attr = getattr(self._table, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await _run(self._executor, attr, *args, **kwargs)
+        return call
+
+
+class AsyncTransaction(object):
+    """
+    A :class:`~flask_dynamo.transaction.Transaction` for coroutines.
+
+    Actions are added exactly as usual (that doesn't touch the network), and
+    the transaction is committed on the thread pool when an ``async with``
+    block finishes, or when :meth:`commit` is awaited.
+    """
+
+    def __init__(self, transaction, executor):
+        self._transaction = transaction
+        self._executor = executor
+
+    def __getitem__(self, table_name):
+        return self._transaction[table_name]
+
+    def __len__(self):
+        return len(self._transaction)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.commit()
+
+    async def commit(self):
+        await _run(self._executor, self._transaction.commit)
+
+
+class AsyncLazyTables(object):
+    """Manages async access to Dynamo Tables."""
+
+    def __init__(self, tables, executor):
+        """
+        :param obj tables: The :class:`~flask_dynamo.manager.DynamoLazyTables`
+            to wrap.
+        :param obj executor: The ``concurrent.futures`` executor blocking
+            calls run on.
+        """
+        self._tables = tables
+        self._executor = executor
+
+    def __getitem__(self, name):
+        """Get the :class:`AsyncTable` for a table by name."""
+        return AsyncTable(self._tables[name], self._executor)
+
+    def keys(self):
+        """The table names in our config."""
+        return self._tables.keys()
+
+    def items(self):
+        """The table tuples (name, AsyncTable)."""
+        for table_name in self.keys():
+            yield (table_name, self[table_name])
+
+    def warm(self):
+        """Build every table up front (this blocks, it's meant for startup)."""
+        self._tables.warm()
+
+    def schema(self, table_name):
+        """Get the :class:`~flask_dynamo.schema.TableSchema` for a table."""
+        return self._tables.schema(table_name)
+
+    def transaction(self, max_retries=5):
+        """Start an :class:`AsyncTransaction`."""
+        return AsyncTransaction(self._tables.transaction(max_retries=max_retries), self._executor)
+
+    def buffer(self, table_name):
+        """
+        Get the :class:`~flask_dynamo.buffer.WriteBuffer` for a table.
+
+        Buffered writes don't touch the network, so it's fine to call them
+        from a coroutine -- unless the buffer is full, when they block.
+        """
+        return self._tables.buffer(table_name)
+
+    async def flush_buffers(self, wait=True):
+        """See :meth:`~flask_dynamo.manager.DynamoLazyTables.flush_buffers`."""
+        await _run(self._executor, self._tables.flush_buffers, wait=wait)
+
+    def invalidate(self, table_name=None):
+        """See :meth:`~flask_dynamo.manager.DynamoLazyTables.invalidate`."""
+        self._tables.invalidate(table_name)
+
+    async def create_all(self, wait=False):
+        await _run(self._executor, self._tables.create_all, wait=wait)
+
+    async def sync_all(self, dry_run=False, force=False, wait=False):
+        return await _run(self._executor, self._tables.sync_all, dry_run=dry_run, force=force, wait=wait)
+
+    async def destroy_all(self, wait=False):
+        await _run(self._executor, self._tables.destroy_all, wait=wait)
+
+    def _stream(self, iterator):
+        return AsyncIterator(iterator, self._executor)
+
+    def iter_query(self, table_name, **kwargs):
+        """
+        Lazily iterate over the items matching a query, with ``async for``.
+        The :class:`AsyncIterator` has the same ``cursor`` as a blocking one.
+
+        See :meth:`~flask_dynamo.manager.DynamoLazyTables.iter_query`.
+        """
+        return self._stream(self._tables.iter_query(table_name, **kwargs))
+
+    def iter_scan(self, table_name, **kwargs):
+        """
+        Lazily iterate over every item in a table, with ``async for``.
+
+        See :meth:`~flask_dynamo.manager.DynamoLazyTables.iter_scan`.
+        """
+        return self._stream(self._tables.iter_scan(table_name, **kwargs))
+
+    def parallel_scan(self, table_name, **kwargs):
+        """
+        Scan a whole table using several threads, as an async stream.
+
+        See :meth:`~flask_dynamo.manager.DynamoLazyTables.parallel_scan`.
+        """
+        return self._stream(self._tables.parallel_scan(table_name, **kwargs))
+
+    def batch_get(self, table_name, keys, **kwargs):
+        """
+        Fetch many items from a table by key, as an async stream.
+
+        See :meth:`~flask_dynamo.manager.DynamoLazyTables.batch_get`.
+        """
+        return self._stream(self._tables.batch_get(table_name, keys, **kwargs))
+
+    def batch_get_many(self, request_items, **kwargs):
+        """
+        Fetch many items from several tables, as an async stream.
+
+        See :meth:`~flask_dynamo.manager.DynamoLazyTables.batch_get_many`.
+        """
+        return self._stream(self._tables.batch_get_many(request_items, **kwargs))
+
+    async def batch_write(self, table_name, put_items=(), delete_keys=()):
+        """See :meth:`~flask_dynamo.manager.DynamoLazyTables.batch_write`."""
+        await _run(self._executor, self._tables.batch_write, table_name, put_items=put_items, delete_keys=delete_keys)
+
+    async def batch_write_many(self, request_items, **kwargs):
+        """See :meth:`~flask_dynamo.manager.DynamoLazyTables.batch_write_many`."""
+        await _run(self._executor, self._tables.batch_write_many, request_items, **kwargs)
+
+    async def transact_get(self, requests, **kwargs):
+        """See :meth:`~flask_dynamo.manager.DynamoLazyTables.transact_get`."""
+        return await _run(self._executor, self._tables.transact_get, requests, **kwargs)
+
+    async def export_table(self, table_name, path, **kwargs):
+        """See :meth:`~flask_dynamo.manager.DynamoLazyTables.export_table`."""
+        return await _run(self._executor, self._tables.export_table, table_name, path, **kwargs)
+
+    async def import_table(self, table_name, path, **kwargs):
+        """See :meth:`~flask_dynamo.manager.DynamoLazyTables.import_table`."""
+        return await _run(self._executor, self._tables.import_table, table_name, path, **kwargs)
+
+
+class AsyncDynamo(Dynamo):
+    """
+    DynamoDB engine manager for async views.
+
+    This takes exactly the same settings as :class:`~flask_dynamo.Dynamo`,
+    but ``tables``, ``create_all``, ``destroy_all``, the batch, iterator and
+    import / export helpers are all async.  Blocking boto3 calls run on a
+    thread pool per app, sized by ``DYNAMO_ASYNC_WORKERS``, so a single worker
+    can have many DynamoDB round-trips in flight at once.
+    """
+
+    def init_app(self, app):
+        """
+        Initialize this extension.
+
+        :param obj app: The Flask application.
+        """
+        super(AsyncDynamo, self).init_app(app)
+        ctx = self._get_ctx(app)
+        ctx.executor = ThreadPoolExecutor(
+            max_workers=app.config['DYNAMO_ASYNC_WORKERS'],
+            thread_name_prefix='flask-dynamo',
+        )
+        # Shut the pool down along with the app, or at exit.
+        finalize(ctx, ctx.executor.shutdown, wait=False)
+        ctx.tables = AsyncLazyTables(ctx.tables, ctx.executor)
+
+    @staticmethod
+    def _init_settings(app):
+        """Initialize all of the extension settings."""
+        Dynamo._init_settings(app)
+        app.config.setdefault('DYNAMO_ASYNC_WORKERS', None)
+
+    @staticmethod
+    def _check_settings(app):
+        """
+        Check all user-specified settings to ensure they're correct.
+
+        :raises: ConfigurationError
+        """
+        Dynamo._check_settings(app)
+        workers = app.config['DYNAMO_ASYNC_WORKERS']
+        if workers is not None and (isinstance(workers, bool) or not isinstance(workers, int) or workers < 1):
+            raise ConfigurationError('DYNAMO_ASYNC_WORKERS must be a positive integer.')
+
+    async def create_all(self, wait=False):
+        """
+        Create all user-specified DynamoDB tables.
+
+        See :meth:`~flask_dynamo.Dynamo.create_all`.
+        """
+        await self.tables.create_all(wait=wait)
+
+    async def sync_all(self, dry_run=False, force=False, wait=False):
+        """
+        Create or update all user-specified DynamoDB tables.
+
+        See :meth:`~flask_dynamo.Dynamo.sync_all`.
+        """
+        return await self.tables.sync_all(dry_run=dry_run, force=force, wait=wait)
+
+    async def destroy_all(self, wait=False):
+        """
+        Destroy all user-specified DynamoDB tables.
+
+        See :meth:`~flask_dynamo.Dynamo.destroy_all`.
+        """
+        await self.tables.destroy_all(wait=wait)
+
+    async def batch_write(self, table_name, put_items=(), delete_keys=()):
+        """Put and delete many items in a table."""
+        await self.tables.batch_write(table_name, put_items=put_items, delete_keys=delete_keys)
+
+    async def export_table(self, table_name, path, **kwargs):
+        """
+        Stream a whole table to a (optionally gzipped) file.
+
+        See :meth:`~flask_dynamo.Dynamo.export_table`.
+        """
+        return await self.tables.export_table(table_name, path, **kwargs)
+
+    async def import_table(self, table_name, path, **kwargs):
+        """
+        Load a file written by :meth:`export_table` into a table.
+
+        See :meth:`~flask_dynamo.Dynamo.import_table`.
+        """
+        return await self.tables.import_table(table_name, path, **kwargs)
@@ -0,0 +1,165 @@
+"""BatchGetItem / BatchWriteItem pipelines."""
+
+from random import uniform
+from time import sleep as _sleep
+
+from .errors import UnprocessedItemsError
+from .schema import key_getter
+
+
+#: The most keys DynamoDB accepts in a single BatchGetItem call.
+BATCH_GET_LIMIT = 100
+
+#: The most requests DynamoDB accepts in a single BatchWriteItem call.
+BATCH_WRITE_LIMIT = 25
+
+
+def freeze_key(key):
+    """Turn a key dict into something hashable, so it can be deduplicated."""
+    return tuple(sorted(key.items()))
+
+
+def backoff(attempt, base_delay=0.05, max_delay=5.0):
+    """A "full jitter" exponential backoff delay, in seconds."""
+    return uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class _Retrier(object):
+    """Tracks consecutive calls that left work unprocessed."""
+
+    def __init__(self, max_retries, sleep):
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self.attempt = 0
+
+    def __call__(self, unprocessed, remaining):
+        """
+        :param dict unprocessed: The work the last call left unprocessed.
+        :param func remaining: Returns all the work still to do (including
+            chunks that haven't been sent yet), for the error if we give up.
+        """
+        if not unprocessed:
+            self.attempt = 0
+            return
+        if self.attempt >= self.max_retries:
+            raise UnprocessedItemsError(
+                'Gave up after {} retries with unprocessed items.'.format(self.max_retries),
+                remaining(),
+            )
+        self.sleep(backoff(self.attempt))
+        self.attempt += 1
+
+
+def batch_get(connection, request_items, max_retries=10, sleep=_sleep):
+    """
+    Fetch items from one or more tables, as a stream.
+
+    Keys are deduplicated and sent in chunks of :data:`BATCH_GET_LIMIT`.
+    Unprocessed keys are retried on their own (merged into the next chunk)
+    with jittered exponential backoff.
+
+    :param connection: A boto3 DynamoDB resource.
+    :param dict request_items: Maps table names to ``{'Keys': [...], ...}``,
+        exactly like ``RequestItems`` for boto3's ``batch_get_item``.
+    :param int max_retries: How many consecutive calls may come back with
+        unprocessed keys before we give up.
+    :returns: A generator of ``(table_name, item)`` tuples, in no particular
+        order.
+    :raises: UnprocessedItemsError, with every key we didn't get to (both
+        unprocessed and never sent) in ``unprocessed``.
+    """
+    params = {}
+    pending = []
+    for table_name, request in request_items.items():
+        params[table_name] = dict((k, v) for k, v in request.items() if k != 'Keys')
+        seen = set()
+        for key in request['Keys']:
+            frozen = freeze_key(key)
+            if frozen not in seen:
+                seen.add(frozen)
+                pending.append((table_name, key))
+
+    retry = _Retrier(max_retries, sleep)
+    while pending:
+        chunk, pending = pending[:BATCH_GET_LIMIT], pending[BATCH_GET_LIMIT:]
+        response = connection.batch_get_item(RequestItems=_get_requests(chunk, params))
+        for table_name, items in response.get('Responses', {}).items():
+            for item in items:
+                yield table_name, item
+
+        unprocessed = response.get('UnprocessedKeys') or {}
+        pending = [
+            (table_name, key)
+            for table_name, request in unprocessed.items()
+            for key in request['Keys']
+        ] + pending
+        retry(unprocessed, lambda: _get_requests(pending, params))
+
+
+def _get_requests(pending, params):
+    request_items = {}
+    for table_name, key in pending:
+        if table_name not in request_items:
+            request_items[table_name] = dict(params[table_name], Keys=[])
+        request_items[table_name]['Keys'].append(key)
+    return request_items
+
+
+def batch_write(connection, request_items, key_names=None, max_retries=10, sleep=_sleep):
+    """
+    Put and delete items in one or more tables.
+
+    Requests are sent in chunks of :data:`BATCH_WRITE_LIMIT`.  Unprocessed
+    requests are retried on their own (merged into the next chunk) with
+    jittered exponential backoff.
+
+    :param connection: A boto3 DynamoDB resource.
+    :param dict request_items: Maps table names to lists of ``PutRequest`` /
+        ``DeleteRequest`` dicts, exactly like ``RequestItems`` for boto3's
+        ``batch_write_item``.
+    :param func key_names: A function which returns the key attribute names
+        for a table (or ``None`` if unknown).  When given, several requests
+        for the same key are coalesced -- the last one wins.
+    :param int max_retries: How many consecutive calls may come back with
+        unprocessed items before we give up.
+    :raises: UnprocessedItemsError, with every request we didn't get to
+        (both unprocessed and never sent) in ``unprocessed``.
+    """
+    pending = []
+    for table_name, requests in request_items.items():
+        names = key_names(table_name) if key_names else None
+        if not names:
+            pending.extend((table_name, request) for request in requests)
+            continue
+
+        coalesced = {}
+        freeze = key_getter(names)
+        for request in requests:
+            if 'PutRequest' in request:
+                item = request['PutRequest']['Item']
+            else:
+                item = request['DeleteRequest']['Key']
+            frozen = freeze(item)
+            coalesced.pop(frozen, None)
+            coalesced[frozen] = request
+        pending.extend((table_name, request) for request in coalesced.values())
+
+    retry = _Retrier(max_retries, sleep)
+    while pending:
+        chunk, pending = pending[:BATCH_WRITE_LIMIT], pending[BATCH_WRITE_LIMIT:]
+        response = connection.batch_write_item(RequestItems=_write_requests(chunk))
+
+        unprocessed = response.get('UnprocessedItems') or {}
+        pending = [
+            (table_name, request)
+            for table_name, requests in unprocessed.items()
+            for request in requests
+        ] + pending
+        retry(unprocessed, lambda: _write_requests(pending))
+
+
+def _write_requests(pending):
+    request_items = {}
+    for table_name, request in pending:
+        request_items.setdefault(table_name, []).append(request)
+    return request_items
@@ -0,0 +1,248 @@
+"""Write-behind buffering."""
+
+import atexit
+import os
+from threading import Condition, Lock, Thread
+from time import monotonic
+from weakref import WeakSet
+
+from .batch import backoff
+from .errors import UnprocessedItemsError, WriteBufferFullError
+from .schema import key_getter
+
+
+class WriteBuffer(object):
+    """
+    Buffers puts and deletes for a single table, and writes them with
+    ``BatchWriteItem`` from a background thread.
+
+    Writes to the same key are coalesced (the last one wins), so a hot key
+    only costs one write per flush.  The buffer is flushed once it holds
+    ``max_items`` keys, once its oldest write is ``max_age`` seconds old,
+    when :meth:`wake` is called, and when the process exits.
+
+    Once ``max_pending`` keys are waiting, writers block until a flush
+    makes room (or raise :class:`~flask_dynamo.errors.WriteBufferFullError`
+    if their ``timeout`` runs out first), so a slow or throttled table
+    can't make the buffer grow without bound.
+
+    Buffered writes aren't visible to reads until they've been flushed.  If
+    a flush fails, whatever wasn't written is put back in the buffer (unless
+    the key has been written again since) and retried with backoff.  A
+    background flush's error is raised from the next :meth:`flush`, unless a
+    later flush has succeeded.
+
+    :param str table_name: The table name.
+    :param func write: Writes a list of ``PutRequest`` / ``DeleteRequest``
+        dicts to the table (eg: with
+        :meth:`~flask_dynamo.manager.DynamoLazyTables.batch_write_many`).
+    :param list key_names: The table's key attribute names.
+    :param int max_items: The most keys to buffer before flushing.
+    :param float max_age: The most seconds to hold a write before flushing.
+    :param int max_pending: The most keys to buffer before blocking writers.
+    """
+
+    def __init__(self, table_name, write, key_names, max_items=100, max_age=1.0, max_pending=10000, clock=monotonic):
+        self.table_name = table_name
+        self.max_items = max_items
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self._write = write
+        self._key_names = key_names
+        self._freeze = key_getter(key_names)
+        self._clock = clock
+        self._reset()
+        _buffers.add(self)
+
+    def _reset(self):
+        self._pending = {}
+        self._oldest = None
+        self._woken = False
+        self._closed = False
+        self._retry_at = None
+        self._thread = None
+        self._cond = Condition()
+        self._write_lock = Lock()
+        #: The last error from a background flush, if any.
+        self.error = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put_item(self, Item, timeout=None):
+        """
+        Buffer a put.
+
+        :param dict Item: The item, as you'd pass to ``Table.put_item``.
+        :param float timeout: The most seconds to wait for room in the buffer
+            (optional).
+        :raises: WriteBufferFullError
+        """
+        self._add(Item, {'PutRequest': {'Item': Item}}, timeout)
+
+    def delete_item(self, Key, timeout=None):
+        """
+        Buffer a delete.
+
+        :param dict Key: The key, as you'd pass to ``Table.delete_item``.
+        :param float timeout: The most seconds to wait for room in the buffer
+            (optional).
+        :raises: WriteBufferFullError
+        """
+        self._add(Key, {'DeleteRequest': {'Key': Key}}, timeout)
+
+    def _add(self, item, request, timeout):
+        key = self._freeze(item)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('The write buffer for {} is closed.'.format(self.table_name))
+            deadline = self._clock() + timeout if timeout is not None else None
+            while key not in self._pending and len(self._pending) >= self.max_pending:
+                self._cond.notify_all()
+                remaining = deadline - self._clock() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise WriteBufferFullError('The write buffer for {} is full.'.format(self.table_name))
+                self._cond.wait(remaining)
+            self._pending[key] = request
+            if self._oldest is None:
+                self._oldest = self._clock()
+            if len(self._pending) >= self.max_items:
+                self._cond.notify_all()
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name='flask-dynamo-buffer-{}'.format(self.table_name))
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _due(self):
+        """How many seconds until we should flush (zero if we should now)."""
+        if not self._pending:
+            return None
+        if self._closed:
+            return 0
+        if self._retry_at is not None and self._retry_at > self._clock():
+            return self._retry_at - self._clock()
+        if self._woken or len(self._pending) >= self.max_items:
+            return 0
+        return max(0, self._oldest + self.max_age - self._clock())
+
+    def _run(self):
+        failures = 0
+        while True:
+            with self._cond:
+                delay = self._due()
+                while delay != 0:
+                    if self._closed:
+                        return
+                    self._cond.wait(delay)
+                    delay = self._due()
+            try:
+                self._flush()
+            except Exception as e:
+                self.error = e
+                failures += 1
+                with self._cond:
+                    if self._closed:
+                        # Leave the last try to close(), which raises.
+                        return
+                    # Back off, so a table that's down isn't hammered.
+                    self._retry_at = self._clock() + backoff(failures)
+            else:
+                # Anything that failed before was put back, and has now been
+                # written.
+                failures = 0
+                self._retry_at = None
+                self.error = None
+
+    def _flush(self):
+        # Only one flush runs at a time, so an older write to a key can never
+        # land after a newer one.
+        with self._write_lock:
+            with self._cond:
+                requests, self._pending = self._pending, {}
+                self._oldest = None
+                self._woken = False
+                self._cond.notify_all()
+            if not requests:
+                return
+            try:
+                self._write(list(requests.values()))
+            except UnprocessedItemsError as e:
+                self._requeue(e.unprocessed.get(self.table_name, ()))
+                raise
+            except Exception:
+                # We can't tell what (if anything) was written, so put it all
+                # back -- puts and deletes are safe to repeat.
+                self._requeue(requests.values())
+                raise
+
+    def _requeue(self, requests):
+        """Put unprocessed requests back, unless they've since been overwritten."""
+        with self._cond:
+            for request in requests:
+                if 'PutRequest' in request:
+                    item = request['PutRequest']['Item']
+                else:
+                    item = request['DeleteRequest']['Key']
+                key = self._freeze(item)
+                self._pending.setdefault(key, request)
+            if self._pending and self._oldest is None:
+                self._oldest = self._clock()
+
+    def wake(self):
+        """Ask the background thread to flush now, without waiting for it."""
+        with self._cond:
+            if self._pending:
+                self._woken = True
+                self._cond.notify_all()
+
+    def flush(self):
+        """
+        Write everything buffered so far, in the calling thread.
+
+        :raises: The last background flush error, if there was one.
+        """
+        self._flush()
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Stop the background thread, and flush whatever's left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+
+_buffers = WeakSet()
+
+
+def _close_buffers():
+    """Flush every buffer at exit, so buffered writes aren't lost."""
+    errors = []
+    for buffer in list(_buffers):
+        try:
+            buffer.close()
+        except Exception as e:
+            errors.append(e)
+    if errors:
+        raise errors[0]
+
+
+def _reset_buffers():
+    """
+    Empty every buffer in a freshly forked child.
+
+    The parent still owns (and will write) whatever was buffered at fork
+    time, and the child doesn't inherit the parent's flusher threads.
+    """
+    for buffer in list(_buffers):
+        buffer._reset()
+
+
+atexit.register(_close_buffers)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_buffers)
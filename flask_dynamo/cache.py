@@ -0,0 +1,257 @@
+"""Read-through item caching."""
+
+from collections import OrderedDict
+from copy import deepcopy
+from sys import getsizeof
+from threading import Lock
+from time import monotonic
+
+from flask import g, has_app_context
+
+from .batch import freeze_key
+from .proxy import TableProxy
+
+
+_MISSING = object()
+
+#: The most items kept in a request's identity map.  Long-lived app contexts
+#: (eg: CLI commands and background jobs) would otherwise grow it forever.
+IDENTITY_MAP_SIZE = 1000
+
+
+def sizeof(value):
+    """Roughly estimate how many bytes ``value`` takes up in memory."""
+    size = getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sizeof(v) for v in value)
+    return size
+
+
+class ItemCache(object):
+    """
+    A thread-safe LRU cache with per-entry TTLs, bounded by size in bytes.
+
+    Values are copied on the way in and on the way out, so callers can't
+    change each other's cached items.
+    """
+
+    def __init__(self, max_bytes, clock=monotonic):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.request_hits = 0
+        self.evictions = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._epoch = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Get a cached value, or ``default`` if it's missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[2]
+        return deepcopy(value)
+
+    def epoch(self):
+        """
+        A token for :meth:`set`.
+
+        Grab one *before* fetching a value to cache.  If anything is
+        invalidated while the fetch is in flight, the ``set`` is skipped so
+        we never cache a stale value.
+        """
+        return self._epoch
+
+    def set(self, key, value, ttl, epoch=None):
+        """Cache ``value`` for ``ttl`` seconds."""
+        value = deepcopy(value)
+        size = sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            self._remove(key)
+            self._entries[key] = (self._clock() + ttl, size, value)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key):
+        """Drop a cached value."""
+        with self._lock:
+            self._epoch += 1
+            self._remove(key)
+
+    def clear(self):
+        """Drop every cached value."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def record_request_hit(self):
+        """Count a hit in a per-request identity map."""
+        with self._lock:
+            self.request_hits += 1
+
+    def stats(self):
+        """The cache's counters, as a dict."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'request_hits': self.request_hits,
+            'evictions': self.evictions,
+            'items': len(self._entries),
+            'bytes': self.bytes,
+        }
+
+
+def _identity_map():
+    """The per-request map of items we've already fetched (or ``None``)."""
+    if not has_app_context():
+        return None
+    try:
+        return g._dynamo_identity_map
+    except AttributeError:
+        identity_map = g._dynamo_identity_map = OrderedDict()
+        return identity_map
+
+
+class CachedTable(TableProxy):
+    """
+    A boto3 Table with a read-through cache in front of ``get_item``.
+
+    Items are looked up in a per-request identity map (of up to
+    :data:`IDENTITY_MAP_SIZE` items) first, then in the process-wide
+    :class:`ItemCache`, and only then fetched from DynamoDB.  Every caller
+    gets its own copy of the item, so changing it doesn't change anyone
+    else's.
+    Only plain ``get_item(Key=...)`` calls are cached; anything fancier (eg:
+    ``ConsistentRead`` or a ``ProjectionExpression``) goes straight through.
+
+    Writes made through ``put_item``, ``update_item``, ``delete_item`` and
+    ``batch_writer`` invalidate the cached item (for ``batch_writer``, once
+    the ``with`` block exits and the last batch has been sent).  Writes made
+    any other way (eg: from another process) are only picked up once the
+    cached item expires.
+    """
+
+    def __init__(self, table, cache, ttl, key_names):
+        super(CachedTable, self).__init__(table)
+        self._cache = cache
+        self._ttl = ttl
+        self._key_names = key_names
+
+    def _cache_key(self, key):
+        return (self._table.name, freeze_key(key))
+
+    def invalidate(self, key):
+        """Drop a cached item by key."""
+        cache_key = self._cache_key(key)
+        self._cache.delete(cache_key)
+        identity_map = _identity_map()
+        if identity_map is not None:
+            identity_map.pop(cache_key, None)
+
+    def get_item(self, **kwargs):
+        if set(kwargs) != set(['Key']):
+            return self._table.get_item(**kwargs)
+
+        cache_key = self._cache_key(kwargs['Key'])
+        identity_map = _identity_map()
+        if identity_map is not None and cache_key in identity_map:
+            self._cache.record_request_hit()
+            identity_map.move_to_end(cache_key)
+            item = deepcopy(identity_map[cache_key])
+        else:
+            item = self._cache.get(cache_key, _MISSING)
+            if item is _MISSING:
+                epoch = self._cache.epoch()
+                item = self._table.get_item(**kwargs).get('Item')
+                self._cache.set(cache_key, item, self._ttl, epoch=epoch)
+            if identity_map is not None:
+                identity_map[cache_key] = deepcopy(item)
+                if len(identity_map) > IDENTITY_MAP_SIZE:
+                    identity_map.popitem(last=False)
+        return {'Item': item} if item is not None else {}
+
+    def put_item(self, **kwargs):
+        try:
+            return self._table.put_item(**kwargs)
+        finally:
+            self.invalidate(dict((name, kwargs['Item'][name]) for name in self._key_names))
+
+    def update_item(self, **kwargs):
+        try:
+            return self._table.update_item(**kwargs)
+        finally:
+            self.invalidate(kwargs['Key'])
+
+    def delete_item(self, **kwargs):
+        try:
+            return self._table.delete_item(**kwargs)
+        finally:
+            self.invalidate(kwargs['Key'])
+
+    def batch_writer(self, **kwargs):
+        return _CachedBatchWriter(self._table.batch_writer(**kwargs), self)
+
+
+class _CachedBatchWriter(object):
+    """
+    Wraps a boto3 ``BatchWriter``, and invalidates every key it wrote when
+    it's done.
+    """
+
+    def __init__(self, writer, table):
+        self._writer = writer
+        self._table = table
+        self._keys = {}
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+    def _written(self, key):
+        self._keys[freeze_key(key)] = key
+
+    def put_item(self, Item):
+        self._writer.put_item(Item=Item)
+        self._written(dict((name, Item[name]) for name in self._table._key_names))
+
+    def delete_item(self, Key):
+        self._writer.delete_item(Key=Key)
+        self._written(Key)
+
+    def __enter__(self):
+        self._writer.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            return self._writer.__exit__(exc_type, exc_value, traceback)
+        finally:
+            for key in self._keys.values():
+                self._table.invalidate(key)
+            self._keys.clear()
@@ -0,0 +1,123 @@
+"""The ``flask dynamo`` command line interface."""
+
+import os
+from glob import glob
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .profile import Profiler
+from .transfer import FORMATS
+
+
+cli = AppGroup('dynamo', help='Manage DynamoDB.')
+
+
+def _tables():
+    """The current app's blocking tables (even with ``AsyncDynamo``)."""
+    return current_app.extensions['dynamo'].blocking_tables
+
+
+@cli.command('profile')
+@click.option('--top', default=10, help='How many rows to show in each section.')
+@click.option('--reset', is_flag=True, help='Delete the dumped profiles afterwards.')
+def profile(top, reset):
+    """Show the merged DynamoDB profile from every process."""
+    path = current_app.config['DYNAMO_PROFILE_DIR']
+    report = Profiler.load(path, top_keys=current_app.config['DYNAMO_PROFILE_TOP_KEYS'])
+
+    click.echo('Scans and large queries on request paths:')
+    for flag in report['flagged'][:top]:
+        click.echo('  {count:>8}  {reason:<12} {table} {operation} ({endpoint})'.format(**flag))
+    if not report['flagged']:
+        click.echo('  (none)')
+
+    click.echo('')
+    click.echo('Filter waste (items read but not returned):')
+    for read in report['reads'][:top]:
+        wasted = read['scanned'] - read['returned']
+        click.echo('  {:>8}  {} {}{} ({} calls, {} read, {} returned)'.format(
+            wasted,
+            read['table'],
+            read['operation'],
+            ' on ' + read['index'] if read['index'] else '',
+            read['calls'],
+            read['scanned'],
+            read['returned'],
+        ))
+    if not report['reads']:
+        click.echo('  (none)')
+
+    click.echo('')
+    click.echo('Hot partition keys:')
+    for table_name, keys in sorted(report['hot_keys'].items()):
+        click.echo('  {}'.format(table_name))
+        for key, count, error in keys[:top]:
+            click.echo('    {:>8}  {}{}'.format(count, key, ' (+/- {})'.format(error) if error else ''))
+    if not report['hot_keys']:
+        click.echo('  (none)')
+
+    if reset:
+        for filename in glob(os.path.join(path, '*.json')):
+            os.remove(filename)
+
+
+@cli.command('sync')
+@click.option('--dry-run', is_flag=True, help='Only show what would change.')
+@click.option('--force', is_flag=True, help='Check every table, even ones DYNAMO_SYNC_CACHE says are up to date.')
+@click.option('--wait', is_flag=True, help='Wait for changed tables to become active.')
+def sync(dry_run, force, wait):
+    """Create or update tables to match DYNAMO_TABLES."""
+    changes = _tables().sync_all(dry_run=dry_run, force=force, wait=wait)
+    if not changes:
+        click.echo('Everything is up to date.')
+        return
+    click.echo('Planned changes:' if dry_run else 'Changes made:')
+    for change in changes:
+        click.echo('  {}'.format(change))
+
+
+def _report(count, elapsed):
+    click.echo('  {:,} items ({:,.0f} items/s)'.format(count, count / elapsed if elapsed > 0 else 0), err=True)
+
+
+_format_option = click.option(
+    '--format', 'format', type=click.Choice(FORMATS), default='json', show_default=True,
+    help='json for one plain JSON object per line, dynamodb for DynamoDB JSON.',
+)
+_gzip_option = click.option(
+    '--gzip/--no-gzip', 'compress', default=None,
+    help='Force gzip compression on or off (defaults to on for .gz files).',
+)
+_rate_option = click.option('--rate', type=float, help='The most items per second.')
+
+
+@cli.command('export')
+@click.argument('table')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@_format_option
+@_gzip_option
+@_rate_option
+@click.option('--segments', default=4, show_default=True, help='How many parallel scan segments to use.')
+def export(table, path, format, compress, rate, segments):
+    """Export every item in TABLE to PATH, one per line."""
+    count = _tables().export_table(
+        table, path, format=format, segments=segments, rate=rate, progress=_report, compress=compress,
+    )
+    click.echo('Exported {:,} items from {} to {}.'.format(count, table, path))
+
+
+@cli.command('import')
+@click.argument('table')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@_format_option
+@_gzip_option
+@_rate_option
+@click.option('--workers', type=int, help='How many writer threads to use (defaults to DYNAMO_TABLE_WORKERS).')
+def import_(table, path, format, compress, rate, workers):
+    """Import every item in PATH (written by export) into TABLE."""
+    count = _tables().import_table(
+        table, path, format=format, workers=workers, rate=rate, progress=_report, compress=compress,
+    )
+    click.echo('Imported {:,} items from {} into {}.'.format(count, path, table))
@@ -0,0 +1,291 @@
+"""Single-flight coalescing of identical concurrent reads."""
+
+from copy import deepcopy
+from threading import Event, Lock
+
+from . import batch
+from .proxy import TableProxy
+
+
+#: The most keys a single micro-batch will wait for before it's sent.
+MAX_BATCH = batch.BATCH_GET_LIMIT
+
+
+def freeze_params(value):
+    """
+    Turn request parameters into something hashable, so identical requests
+    can be recognised.
+
+    boto3's condition objects (``Key('id').eq(1)``) are frozen by their
+    structure.
+
+    :raises: TypeError if a value can't be frozen.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze_params(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_params(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze_params(v) for v in value)
+    get_expression = getattr(value, 'get_expression', None)
+    if get_expression is not None:
+        return (type(value).__name__, freeze_params(get_expression()))
+    if type(value).__module__ == 'boto3.dynamodb.conditions':
+        return (type(value).__name__, value.name)
+    hash(value)
+    return value
+
+
+class _Call(object):
+    """A call in flight, which other callers can wait on."""
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class Coalescer(object):
+    """
+    Shares in-flight reads of a table between threads.
+
+    When a thread asks for something another thread is already fetching, it
+    waits for that call and gets a copy of its result, instead of making a
+    call of its own.  Errors are shared the same way.
+
+    With a ``window``, distinct ``get_item`` calls are also collected for up
+    to ``window`` seconds (or until :data:`MAX_BATCH` keys are waiting) and
+    fetched together with a single ``BatchGetItem``.
+    """
+
+    def __init__(self, table_name, window=None, max_batch=MAX_BATCH):
+        """
+        :param str table_name: The table name.
+        :param float window: Seconds to collect ``get_item`` calls for
+            before sending them as one ``BatchGetItem`` (optional).  Without
+            it, only identical calls are combined.
+        :param int max_batch: The most keys to collect in one batch.
+        """
+        self.table_name = table_name
+        self.window = window
+        self.max_batch = max_batch
+        self.calls = 0
+        self.shared = 0
+        self.batches = 0
+        self._lock = Lock()
+        self._in_flight = {}
+        self._batch = None
+
+    def do(self, key, func):
+        """
+        Call ``func``, unless a call for ``key`` is already in flight, in
+        which case wait for that one instead.
+
+        :param key: A hashable identity for the call.
+        :param func func: Makes the call.
+        :returns: The call's result (a deep copy, for callers who didn't
+            make the call themselves).
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return deepcopy(call.wait())
+
+        try:
+            result = func()
+        except Exception as e:
+            call.finish(error=e)
+            raise
+        else:
+            call.finish(result)
+            return result
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is call:
+                    del self._in_flight[key]
+
+    def forget(self, match):
+        """
+        Stop sharing in-flight calls whose keys ``match``, so callers that
+        come along later make fresh calls.  Used after writes, so nobody
+        reads data from before their own write.
+
+        :param func match: Called with each in-flight key.
+        """
+        with self._lock:
+            for key in [key for key in self._in_flight if match(key)]:
+                del self._in_flight[key]
+
+    def batch_get(self, key, frozen, fetch):
+        """
+        Get an item as part of a micro-batch.
+
+        The first caller to arrive waits for ``window`` seconds, then fetches
+        every key that arrived in the meantime with a single call.
+
+        :param dict key: The item's key.
+        :param frozen: A hashable copy of the key.
+        :param func fetch: Called with a list of keys, and returns a dict
+            mapping their frozen copies to items.  Only the first caller's
+            ``fetch`` is used.
+        :returns: The item, or ``None``.
+        """
+        with self._lock:
+            pending = self._batch
+            leader = pending is None
+            if leader:
+                pending = self._batch = _Batch()
+            call = pending.add(key, frozen)
+            if len(pending.keys) >= self.max_batch:
+                self._batch = None
+                pending.full.set()
+        if not leader:
+            return call.wait()
+
+        pending.full.wait(self.window)
+        with self._lock:
+            if self._batch is pending:
+                self._batch = None
+            self.batches += 1
+        try:
+            items = fetch(list(pending.keys.values()))
+        except Exception as e:
+            for waiting in pending.calls.values():
+                waiting.finish(error=e)
+        else:
+            for frozen_key, waiting in pending.calls.items():
+                waiting.finish(items.get(frozen_key))
+        return call.wait()
+
+    def stats(self):
+        """The coalescer's counters, as a dict."""
+        return {
+            'calls': self.calls,
+            'shared': self.shared,
+            'batches': self.batches,
+        }
+
+
+class _Batch(object):
+
+    def __init__(self):
+        self.keys = {}
+        self.calls = {}
+        self.full = Event()
+
+    def add(self, key, frozen):
+        if frozen not in self.calls:
+            self.keys[frozen] = key
+            self.calls[frozen] = _Call()
+        return self.calls[frozen]
+
+
+class CoalescedTable(TableProxy):
+    """
+    A boto3 Table which shares identical concurrent ``get_item`` and
+    ``query`` calls between threads, using a :class:`Coalescer`.
+
+    If the coalescer has a batch window, plain ``get_item(Key=...)`` calls
+    are fetched together with ``BatchGetItem`` -- their responses only have
+    an ``Item``, without ``ResponseMetadata``.
+
+    Writes made through ``put_item``, ``update_item`` and ``delete_item``
+    stop later reads from joining calls that started before the write.
+    Requests with values that can't be compared (eg: custom objects) go
+    straight through.
+    """
+
+    def __init__(self, table, coalescer, key_names, connection):
+        """
+        :param table: The boto3 Table to wrap.
+        :param obj coalescer: The table's :class:`Coalescer`, shared by every
+            thread.
+        :param tuple key_names: The table's key attribute names.
+        :param connection: The boto3 DynamoDB resource, for ``BatchGetItem``.
+        """
+        super(CoalescedTable, self).__init__(table)
+        self._coalescer = coalescer
+        self._key_names = key_names
+        self._connection = connection
+
+    def _fetch(self, keys):
+        items = batch.batch_get(self._connection, {self._table.name: {'Keys': keys}})
+        return dict((batch.freeze_key(dict((name, item[name]) for name in self._key_names)), item) for _, item in items)
+
+    def get_item(self, **kwargs):
+        try:
+            identity = ('get_item', freeze_params(kwargs['Key']), freeze_params(kwargs))
+        except (KeyError, TypeError):
+            return self._table.get_item(**kwargs)
+
+        if self._coalescer.window and set(kwargs) == set(['Key']):
+            key = kwargs['Key']
+
+            def func():
+                item = self._coalescer.batch_get(key, batch.freeze_key(key), self._fetch)
+                return {'Item': item} if item is not None else {}
+        else:
+            def func():
+                return self._table.get_item(**kwargs)
+        return self._coalescer.do(identity, func)
+
+    def query(self, **kwargs):
+        try:
+            identity = ('query', None, freeze_params(kwargs))
+        except TypeError:
+            return self._table.query(**kwargs)
+        return self._coalescer.do(identity, lambda: self._table.query(**kwargs))
+
+    def _forget(self, key):
+        """
+        Stop reads joining calls for ``key`` (or, if the key is ``None`` or
+        can't be frozen, any get) that started before a write.
+        """
+        try:
+            frozen = freeze_params(key) if key is not None else None
+        except TypeError:
+            frozen = None
+        self._coalescer.forget(lambda identity: identity[0] == 'query' or frozen is None or identity[1] == frozen)
+
+    def put_item(self, **kwargs):
+        # Work out the key up front, so a malformed item still fails with
+        # DynamoDB's error rather than ours.
+        try:
+            key = dict((name, kwargs['Item'][name]) for name in self._key_names)
+        except (KeyError, TypeError):
+            key = None
+        try:
+            return self._table.put_item(**kwargs)
+        finally:
+            self._forget(key)
+
+    def update_item(self, **kwargs):
+        key = kwargs.get('Key')
+        try:
+            return self._table.update_item(**kwargs)
+        finally:
+            self._forget(key)
+
+    def delete_item(self, **kwargs):
+        key = kwargs.get('Key')
+        try:
+            return self._table.delete_item(**kwargs)
+        finally:
+            self._forget(key)
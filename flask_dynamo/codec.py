@@ -0,0 +1,152 @@
+"""
+DynamoDB attribute value codec.
+
+These functions convert between plain Python values and DynamoDB's wire
+format (``{'S': 'hello'}``, ``{'N': '42'}``, ...).  They do the same job as
+boto3's ``TypeSerializer`` and ``TypeDeserializer``, but skip the per-value
+method dispatch, and can optionally decode numbers as ``int`` / ``float``
+instead of ``Decimal``.
+"""
+
+from decimal import Decimal
+from math import isinf, isnan
+
+
+def _float_number(value):
+    if '.' in value or 'e' in value or 'E' in value:
+        return float(value)
+    return int(value)
+
+
+def _make_deserializer(number):
+    def deserialize(value):
+        for tag, data in value.items():
+            if tag == 'S':
+                return data
+            if tag == 'N':
+                return number(data)
+            if tag == 'M':
+                return {k: deserialize(v) for k, v in data.items()}
+            if tag == 'L':
+                return [deserialize(v) for v in data]
+            if tag == 'BOOL' or tag == 'B':
+                return data
+            if tag == 'NULL':
+                return None
+            if tag == 'SS' or tag == 'BS':
+                return set(data)
+            if tag == 'NS':
+                return set(number(n) for n in data)
+            raise TypeError('Unsupported DynamoDB type: {}'.format(tag))
+    return deserialize
+
+
+_deserialize_decimal = _make_deserializer(Decimal)
+_deserialize_float = _make_deserializer(_float_number)
+
+
+def deserializer(use_float=False):
+    """
+    Get a function that decodes a single DynamoDB attribute value.
+
+    :param bool use_float: Decode numbers as ``int`` or ``float`` instead of
+        ``Decimal``.
+    """
+    return _deserialize_float if use_float else _deserialize_decimal
+
+
+def deserialize(value, use_float=False):
+    """Decode a single DynamoDB attribute value."""
+    return deserializer(use_float)(value)
+
+
+def deserialize_item(item, use_float=False):
+    """Decode a DynamoDB item (a dict of attribute values)."""
+    decode = deserializer(use_float)
+    return {k: decode(v) for k, v in item.items()}
+
+
+def _number(value):
+    if isinstance(value, float):
+        if isinf(value) or isnan(value):
+            raise TypeError('Infinity and NaN are not supported by DynamoDB.')
+        return repr(value)
+    return str(value)
+
+
+def serialize(value):
+    """Encode a Python value as a DynamoDB attribute value."""
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': _number(value)}
+    if isinstance(value, dict):
+        return {'M': {k: serialize(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [serialize(v) for v in value]}
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    if isinstance(value, (set, frozenset)):
+        if not value:
+            raise TypeError('Empty sets are not supported by DynamoDB.')
+        if all(isinstance(v, str) for v in value):
+            return {'SS': list(value)}
+        if all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in value):
+            return {'NS': [_number(v) for v in value]}
+        if all(isinstance(v, (bytes, bytearray)) for v in value):
+            return {'BS': [bytes(v) for v in value]}
+        raise TypeError('Sets must only contain strings, numbers or bytes.')
+    # boto3's ``Binary`` wrapper.
+    value = getattr(value, 'value', value)
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    raise TypeError('Unsupported type for DynamoDB: {}'.format(type(value)))
+
+
+def serialize_item(item):
+    """Encode a dict as a DynamoDB item."""
+    return {k: serialize(v) for k, v in item.items()}
+
+
+#: The request parameters which may hold a boto3 condition object, and
+#: whether each is a key condition.
+CONDITION_PARAMS = (
+    ('KeyConditionExpression', True),
+    ('FilterExpression', False),
+    ('ConditionExpression', False),
+)
+
+
+def build_expressions(params):
+    """
+    Replace any boto3 condition objects (``Key('id').eq(1)``,
+    ``Attr('n').gt(2)``) in request parameters with expression strings, the
+    way boto3's ``Table`` resource does.
+
+    Their placeholders are merged into ``ExpressionAttributeNames`` and
+    ``ExpressionAttributeValues``, with values left as plain Python values.
+
+    :param dict params: The request parameters, which are updated in place.
+    :returns: ``params``.
+    """
+    builder = None
+    for name, is_key_condition in CONDITION_PARAMS:
+        condition = params.get(name)
+        if condition is None or isinstance(condition, str):
+            continue
+        if builder is None:
+            from boto3.dynamodb.conditions import ConditionExpressionBuilder
+            builder = ConditionExpressionBuilder()
+        built = builder.build_expression(condition, is_key_condition=is_key_condition)
+        params[name] = built.condition_expression
+        if built.attribute_name_placeholders:
+            params['ExpressionAttributeNames'] = dict(
+                params.get('ExpressionAttributeNames') or {}, **built.attribute_name_placeholders)
+        if built.attribute_value_placeholders:
+            params['ExpressionAttributeValues'] = dict(
+                params.get('ExpressionAttributeValues') or {}, **built.attribute_value_placeholders)
+    return params
@@ -7,3 +7,49 @@ class ConfigurationError(Exception):
     Flask-Dynamo.
     """
     pass
+
+
+class UnprocessedItemsError(Exception):
+    """
+    This exception is raised if a batch operation still has unprocessed
+    keys or items after all retries.
+
+    Everything that wasn't done -- whether DynamoDB left it unprocessed, or
+    it was never sent -- is available as ``unprocessed``, in the same format
+    DynamoDB returns unprocessed work.
+    """
+    def __init__(self, message, unprocessed):
+        super(UnprocessedItemsError, self).__init__(message)
+        self.unprocessed = unprocessed
+
+
+class WriteBufferFullError(Exception):
+    """
+    This exception is raised if a write buffer stays full for longer than a
+    writer was willing to wait.
+    """
+    pass
+
+
+class InvalidCursorError(ValueError):
+    """
+    This exception is raised if a pagination cursor can't be decoded, or
+    was made for a different table or index.
+    """
+    pass
+
+
+class InvalidKeyError(ValueError):
+    """
+    This exception is raised if a key (or key value) doesn't match its
+    table's schema in ``DYNAMO_TABLES``.
+    """
+    pass
+
+
+class InvalidTransactionError(ValueError):
+    """
+    This exception is raised if a transaction breaks one of DynamoDB's
+    limits (eg: on the number of actions, or their size).
+    """
+    pass
@@ -0,0 +1,162 @@
+"""Low-level client access to Dynamo Tables."""
+
+from .codec import build_expressions, deserializer, serialize_item
+from .rows import ROWS
+
+
+class FastTable(object):
+    """
+    A DynamoDB table backed by the low-level boto3 client.
+
+    This skips the resource layer entirely, and decodes items with
+    :mod:`flask_dynamo.codec`.  Keys, items and expression values are plain
+    Python values, and conditions may be boto3 ``Key()`` / ``Attr()``
+    objects, just like with boto3's ``Table`` resource.
+    """
+
+    def __init__(self, client, name, use_float=False):
+        """
+        :param client: A boto3 DynamoDB client, or a callable returning the
+            client for the current scope.
+        :param str name: The table name.
+        :param bool use_float: Decode numbers as ``int`` / ``float`` instead of
+            ``Decimal``.
+        """
+        self.name = name
+        self._get_client = client if callable(client) else lambda: client
+        self._use_float = use_float
+        self._deserialize = deserializer(use_float)
+
+    @property
+    def client(self):
+        return self._get_client()
+
+    def _item(self, item):
+        decode = self._deserialize
+        return {k: decode(v) for k, v in item.items()}
+
+    def _params(self, kwargs):
+        kwargs['TableName'] = self.name
+        build_expressions(kwargs)
+        for param in ('ExpressionAttributeValues', 'ExclusiveStartKey', 'Key', 'Item'):
+            if param in kwargs:
+                kwargs[param] = serialize_item(kwargs[param])
+        return kwargs
+
+    def get(self, key, consistent=False, **kwargs):
+        """
+        Get a single item by key.
+
+        :param dict key: The item's primary key.
+        :param bool consistent: Use a strongly consistent read.
+        :returns: The item, or ``None`` if it doesn't exist.
+        """
+        kwargs['Key'] = key
+        if consistent:
+            kwargs['ConsistentRead'] = True
+        item = self.client.get_item(**self._params(kwargs)).get('Item')
+        return None if item is None else self._item(item)
+
+    def put(self, item, **kwargs):
+        """Create or replace a single item."""
+        kwargs['Item'] = item
+        return self.client.put_item(**self._params(kwargs))
+
+    def delete(self, key, **kwargs):
+        """Delete a single item by key."""
+        kwargs['Key'] = key
+        return self.client.delete_item(**self._params(kwargs))
+
+    def _result(self, rows, use_float):
+        try:
+            result_class = ROWS[rows]
+        except KeyError:
+            raise ValueError('rows must be one of: {}.'.format(', '.join(sorted(ROWS))))
+        return result_class(deserializer(self._use_float if use_float is None else use_float))
+
+    def _decoded(self, response, rows=None, use_float=None):
+        if rows is None:
+            response['Items'] = [self._item(item) for item in response.get('Items', ())]
+        else:
+            result = self._result(rows, use_float)
+            result.add_items(response.get('Items', ()))
+            response['Items'] = result
+        if 'LastEvaluatedKey' in response:
+            response['LastEvaluatedKey'] = self._item(response['LastEvaluatedKey'])
+        return response
+
+    def query(self, rows=None, use_float=None, **kwargs):
+        """
+        Run a single Query call.  Takes the same arguments as ``Table.query``.
+
+        :param str rows: Return ``Items`` as compact ``'records'`` or
+            ``'columns'`` instead of a list of dicts (optional).  See
+            :mod:`flask_dynamo.rows`.
+        :param bool use_float: Decode numbers as ``int`` / ``float`` instead of
+            ``Decimal`` (defaults to ``DYNAMO_FAST_FLOATS``).  Only applies
+            along with ``rows``.
+        """
+        return self._decoded(self.client.query(**self._params(kwargs)), rows, use_float)
+
+    def scan(self, rows=None, use_float=None, **kwargs):
+        """Run a single Scan call.  Takes the same arguments as :meth:`query`."""
+        return self._decoded(self.client.scan(**self._params(kwargs)), rows, use_float)
+
+    def _all(self, method, rows, use_float, kwargs):
+        result = self._result(rows, use_float)
+        kwargs = self._params(kwargs)
+        call = getattr(self.client, method)
+        while True:
+            response = call(**kwargs)
+            result.add_items(response.get('Items', ()))
+            if not response.get('LastEvaluatedKey'):
+                return result
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def query_all(self, rows='records', use_float=None, **kwargs):
+        """
+        Run a query, fetching every page into one compact result set.
+
+        Items are decoded straight from DynamoDB's wire format into a
+        :class:`~flask_dynamo.rows.Records` or
+        :class:`~flask_dynamo.rows.Columns`, which take a fraction of the
+        memory of a list of dicts.  This is meant for big, read-only result
+        sets (eg: reports).
+
+        :param str rows: ``'records'`` or ``'columns'``.
+        :param bool use_float: Decode numbers as ``int`` / ``float`` instead of
+            ``Decimal`` (defaults to ``DYNAMO_FAST_FLOATS``).
+        :param kwargs: ``Query`` parameters, as for ``Table.query``.
+        """
+        return self._all('query', rows, use_float, kwargs)
+
+    def scan_all(self, rows='records', use_float=None, **kwargs):
+        """Run a scan, fetching every page into one compact result set.  See :meth:`query_all`."""
+        return self._all('scan', rows, use_float, kwargs)
+
+
+class DynamoFastTables(object):
+    """Manages client-backed access to Dynamo Tables."""
+
+    def __init__(self, client, table_config, use_float=False):
+        self._client = client
+        self._table_config = table_config
+        self._use_float = use_float
+        self._tables = {}
+
+    def __getitem__(self, name):
+        """Get the :class:`FastTable` for a table by name."""
+        try:
+            return self._tables[name]
+        except KeyError:
+            table = self._tables[name] = FastTable(self._client, name, use_float=self._use_float)
+            return table
+
+    def keys(self):
+        """The table names in our config."""
+        return [t['TableName'] for t in self._table_config]
+
+    def items(self):
+        """The table tuples (name, FastTable)."""
+        for table_name in self.keys():
+            yield (table_name, self[table_name])
@@ -0,0 +1,299 @@
+"""Hedged reads, to cut tail latency."""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from math import ceil, log
+from threading import Lock
+from time import monotonic
+from weakref import WeakSet
+
+from .proxy import TableProxy
+
+
+class LatencyHistogram(object):
+    """
+    A thread-safe histogram of recent latencies, with exponentially sized
+    buckets.
+
+    Samples are kept for between one and two ``window``\\s: every ``window``
+    seconds the older half is dropped, so percentiles follow changes in
+    latency without jumping around.
+
+    :param float smallest: The upper bound of the first bucket, in seconds.
+    :param float growth: How much bigger each bucket is than the last.
+    :param int buckets: The number of buckets.  Anything slower than the
+        last bucket is counted in it.
+    :param float window: Seconds between dropping old samples.
+    """
+
+    def __init__(self, smallest=0.0005, growth=1.2, buckets=64, window=60, clock=monotonic):
+        self.smallest = smallest
+        self.growth = growth
+        self.bounds = [smallest * growth ** i for i in range(buckets)]
+        self.window = window
+        self._current = [0] * buckets
+        self._previous = [0] * buckets
+        self._clock = clock
+        self._rotated = clock()
+        self._lock = Lock()
+
+    def _rotate(self):
+        now = self._clock()
+        if now - self._rotated >= self.window:
+            # More than two windows without a rotation means everything's stale.
+            self._previous = self._current if now - self._rotated < 2 * self.window else [0] * len(self.bounds)
+            self._current = [0] * len(self.bounds)
+            self._rotated = now
+
+    def _bucket(self, latency):
+        if latency <= self.smallest:
+            return 0
+        return min(len(self.bounds) - 1, int(ceil(log(latency / self.smallest) / log(self.growth) - 1e-9)))
+
+    def record(self, latency):
+        """Count a latency, in seconds."""
+        bucket = self._bucket(latency)
+        with self._lock:
+            self._rotate()
+            self._current[bucket] += 1
+
+    def __len__(self):
+        with self._lock:
+            self._rotate()
+            return sum(self._current) + sum(self._previous)
+
+    def percentile(self, percent):
+        """
+        The latency ``percent`` of recent samples were at or under (rounded up
+        to a bucket boundary), or ``None`` if there are no samples.
+        """
+        with self._lock:
+            self._rotate()
+            counts = [a + b for a, b in zip(self._current, self._previous)]
+        total = sum(counts)
+        if not total:
+            return None
+        target = total * percent / 100.0
+        seen = 0
+        for bound, count in zip(self.bounds, counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.bounds[-1]
+
+
+class HedgeBudget(object):
+    """
+    Caps hedged requests at a fraction of all reads.
+
+    Every read earns ``ratio`` of a token, up to ``burst`` tokens, and every
+    hedge spends a whole one -- so over time at most ``ratio`` extra requests
+    are sent per read, however slow DynamoDB gets.
+
+    :param float ratio: The most hedges per read (eg: ``0.05`` for 5%).
+    :param float burst: The most hedges that can be saved up.
+    """
+
+    def __init__(self, ratio=0.05, burst=10):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 0.0
+        self._lock = Lock()
+
+    def earn(self):
+        """Count a read."""
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def spend(self):
+        """Take a token for a hedge, if there is one."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class Hedger(object):
+    """
+    Sends a second copy of a slow read, and uses whichever answer comes back
+    first.
+
+    Each operation's latencies are tracked in a :class:`LatencyHistogram`.
+    Once there are enough samples, reads are started in a worker thread, and
+    if one hasn't finished after the ``percentile``'th latency, a hedge is
+    sent too -- as long as the :class:`HedgeBudget` allows it.  Whichever
+    succeeds first wins; the other is left to finish in the background.  If
+    the first to finish fails, we wait for the other, and only raise if both
+    fail.
+    """
+
+    def __init__(self, table_name, percentile=95, budget=0.05, min_delay=0.002, max_delay=1.0, min_samples=50,
+                 workers=32, clock=monotonic):
+        """
+        :param str table_name: The table name.
+        :param float percentile: Which latency percentile to wait for before
+            hedging.
+        :param float budget: The most hedges to send per read.
+        :param float min_delay: The least seconds to wait before hedging.
+        :param float max_delay: The most seconds to wait before hedging.
+        :param int min_samples: How many latencies to record before hedging.
+        :param int workers: The most reads in flight at once.
+        """
+        self.table_name = table_name
+        self.percentile = percentile
+        self.budget = HedgeBudget(budget)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.workers = workers
+        self.histograms = {}
+        self.reads = 0
+        self.hedges = 0
+        self.wins = 0
+        self.skipped = 0
+        self._clock = clock
+        self._lock = Lock()
+        self._pool = None
+        _hedgers.add(self)
+
+    def _after_fork(self):
+        # The parent's worker threads don't exist in the child (but the
+        # pool would still count them as idle), and any lock one of them
+        # held stays held.
+        self._pool = None
+        self._lock = Lock()
+        self.budget._lock = Lock()
+        for histogram in self.histograms.values():
+            histogram._lock = Lock()
+
+    def histogram(self, operation):
+        """The :class:`LatencyHistogram` for an operation (eg: ``'get_item'``)."""
+        try:
+            return self.histograms[operation]
+        except KeyError:
+            with self._lock:
+                return self.histograms.setdefault(operation, LatencyHistogram(clock=self._clock))
+
+    def delay(self, operation):
+        """
+        How long to wait before hedging an operation, or ``None`` if we don't
+        have enough samples yet.
+        """
+        histogram = self.histogram(operation)
+        if len(histogram) < self.min_samples:
+            return None
+        return min(self.max_delay, max(self.min_delay, histogram.percentile(self.percentile)))
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _submit(self, operation, func):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        started = self._clock()
+        future = self._pool.submit(copy_context().run, func)
+
+        def finished(future):
+            if future.exception() is None:
+                self.histogram(operation).record(self._clock() - started)
+
+        future.add_done_callback(finished)
+        return future
+
+    def call(self, operation, primary, hedge):
+        """
+        Call ``primary``, and ``hedge`` too if ``primary`` is slow.
+
+        :param str operation: The operation name, which picks the histogram.
+        :param func primary: Makes the read.
+        :param func hedge: Makes the same read another way (eg: over another
+            connection).
+        :returns: The first successful result.
+        """
+        self._count('reads')
+        self.budget.earn()
+        delay = self.delay(operation)
+        if delay is None:
+            started = self._clock()
+            result = primary()
+            self.histogram(operation).record(self._clock() - started)
+            return result
+
+        first = self._submit(operation, primary)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        if not self.budget.spend():
+            self._count('skipped')
+            return first.result()
+
+        self._count('hedges')
+        second = self._submit(operation, hedge)
+        pending = set([first, second])
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count('wins')
+                    return future.result()
+        return first.result()
+
+    def stats(self):
+        """The hedger's counters, as a dict."""
+        return {
+            'reads': self.reads,
+            'hedges': self.hedges,
+            'wins': self.wins,
+            'skipped': self.skipped,
+        }
+
+
+class HedgedTable(TableProxy):
+    """
+    A boto3 Table whose ``get_item`` and ``query`` calls are hedged by a
+    :class:`Hedger`, with hedges sent through a second Table on its own
+    connection pool (so they don't queue up behind the slow request).
+    """
+
+    def __init__(self, table, hedger, hedge_table):
+        """
+        :param table: The boto3 Table to wrap.
+        :param obj hedger: The table's :class:`Hedger`, shared by every
+            thread.
+        :param hedge_table: The same table, on another connection.
+        """
+        super(HedgedTable, self).__init__(table)
+        self._hedger = hedger
+        self._hedge_table = hedge_table
+
+    def _read(self, method, kwargs):
+        return self._hedger.call(
+            method,
+            lambda: getattr(self._table, method)(**kwargs),
+            lambda: getattr(self._hedge_table, method)(**kwargs),
+        )
+
+    def get_item(self, **kwargs):
+        return self._read('get_item', kwargs)
+
+    def query(self, **kwargs):
+        return self._read('query', kwargs)
+
+
+_hedgers = WeakSet()
+
+
+def _reset_hedgers():
+    """Give every hedger a fresh thread pool in a freshly forked child."""
+    for hedger in list(_hedgers):
+        hedger._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_hedgers)
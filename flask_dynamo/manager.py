@@ -1,22 +1,202 @@
 """Main Flask integration."""
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import count
+from math import ceil
 from os import environ
+from os.path import join
+from tempfile import gettempdir
+from threading import Lock
+from time import sleep
+from weakref import WeakSet, WeakValueDictionary, finalize
 
-from boto3.session import Session
 from flask import current_app
 
+from . import batch
+from .buffer import WriteBuffer
+from .cache import CachedTable, ItemCache
+from .cli import cli
+from .coalesce import MAX_BATCH, CoalescedTable, Coalescer
 from .errors import ConfigurationError
+from .fast import DynamoFastTables
+from .hedge import HedgedTable, Hedger
+from .memory import MemoryBackend
+from .metrics import Instrumentation, MetricsSink, request_stats
+from .paginate import ItemIterator
+from .profile import Profiler
+from .ratelimit import RateLimiter
+from .routing import RegionRouter, RoutedTable
+from .scan import ScanCheckpoint, parallel_scan
+from .schema import parse_tables
+from .sync import SchemaCache, create_params, plan_table, schema_hash
+from .transaction import Transaction, transact_get
+from .transfer import CHUNK_SIZE, export_items, import_items, open_file, read_items
+from .scopes import SCOPES, ProcessScope
+
+
+#: Hands out a unique cache key to every DynamoLazyTables.
+_owner_ids = count()
+
+#: The settings that go into the botocore client config.
+CLIENT_SETTINGS = (
+    'DYNAMO_MAX_POOL_CONNECTIONS',
+    'DYNAMO_CONNECT_TIMEOUT',
+    'DYNAMO_READ_TIMEOUT',
+    'DYNAMO_TCP_KEEPALIVE',
+    'DYNAMO_RETRY_MODE',
+    'DYNAMO_MAX_ATTEMPTS',
+)
+
+#: The per-table ``DYNAMO_HEDGE`` settings.
+HEDGE_SETTINGS = ('percentile', 'budget', 'min_delay', 'max_delay', 'min_samples', 'workers')
 
 
 class DynamoLazyTables(object):
     """Manages access to Dynamo Tables."""
-    def __init__(self, connection, table_config):
+    #: How many times to retry a table create / delete that hits DynamoDB's
+    #: limit on concurrent table operations.
+    LIMIT_RETRIES = 10
+
+    def __init__(self, connection, table_config, scope=None, client_factory=None, workers=8, wait_delay=None,
+                 wait_timeout=None, cache=None, cache_ttls=None, router=None, home_region=None,
+                 region_connection=None, buffers=None, schemas=None, sync_cache=None, coalesce=None, hedge=None,
+                 hedge_connection=None):
+        """
+        :param connection: A boto3 DynamoDB resource, or a callable returning
+            the resource for the current scope.
+        :param list table_config: The ``DYNAMO_TABLES`` setting.
+        :param obj scope: The :class:`~flask_dynamo.scopes.Scope` used to
+            cache Table resources (optional).
+        :param func client_factory: A callable that builds a new low-level
+            boto3 DynamoDB client (optional).  This is required for
+            :meth:`parallel_scan`.
+        :param int workers: The most tables to create or destroy at once.
+        :param float wait_delay: Seconds between polls when waiting on tables
+            (defaults to botocore's waiter settings).
+        :param float wait_timeout: Seconds to wait on each table before
+            giving up (defaults to botocore's waiter settings).
+        :param obj cache: The :class:`~flask_dynamo.cache.ItemCache` shared by
+            cached tables (optional).
+        :param dict cache_ttls: Maps the names of cached tables to cache TTLs
+            in seconds (optional).
+        :param obj router: A :class:`~flask_dynamo.routing.RegionRouter` to
+            route reads with (optional).
+        :param str home_region: The region writes go to.  This is required
+            along with ``router``.
+        :param func region_connection: A callable returning the DynamoDB
+            resource for a region name.  This is required along with
+            ``router``.
+        :param dict buffers: Maps the names of buffered tables to
+            :class:`~flask_dynamo.buffer.WriteBuffer` settings (optional).
+        :param dict schemas: Maps table names to their parsed
+            :class:`~flask_dynamo.schema.TableSchema` (optional).  If not
+            given, ``table_config`` is parsed.
+        :param str sync_cache: A file for :meth:`sync_all` to remember
+            synced table definitions in (optional).
+        :param dict coalesce: Maps the names of tables whose concurrent reads
+            should be shared to :class:`~flask_dynamo.coalesce.Coalescer`
+            settings (optional).
+        :param dict hedge: Maps the names of tables whose reads should be
+            hedged to :class:`~flask_dynamo.hedge.Hedger` settings (optional).
+        :param func hedge_connection: A callable returning the boto3 DynamoDB
+            resource hedged reads are sent through, for the current scope
+            (with its own connection pool), and optionally a region name.
+            This is required along with ``hedge``.
+        """
         self._table_config = table_config
-        self._connection = connection
+        self.schemas = schemas if schemas is not None else parse_tables(table_config)
+        self._get_connection = connection if callable(connection) else lambda: connection
+        self._scope = scope or ProcessScope()
+        self._client_factory = client_factory
+        self._workers = workers
+        self._waiter_config = {}
+        if wait_delay is not None:
+            self._waiter_config['Delay'] = wait_delay
+        if wait_timeout is not None:
+            self._waiter_config['MaxAttempts'] = max(1, int(ceil(wait_timeout / float(wait_delay or 20))))
+        self.cache = cache
+        self._cache_ttls = cache_ttls or {}
+        self._router = router
+        self._home_region = home_region
+        self._region_connection = region_connection
+        self._buffer_settings = buffers or {}
+        self._sync_cache = sync_cache
+        self._buffers = {}
+        self._buffers_lock = Lock()
+        self.coalescers = dict(
+            (table_name, Coalescer(
+                table_name,
+                window=settings.get('batch_window'),
+                max_batch=settings.get('max_batch', MAX_BATCH),
+            ))
+            for table_name, settings in (coalesce or {}).items()
+        )
+        self.hedgers = dict(
+            (table_name, Hedger(table_name, **settings))
+            for table_name, settings in (hedge or {}).items()
+        )
+        self._hedge_connection = hedge_connection
+        self._owner_id = next(_owner_ids)
+        # Scopes outlive the apps that share them, so take our tables with us.
+        finalize(self, self._scope.forget, self._owner_id).atexit = False
+
+    @property
+    def _connection(self):
+        return self._get_connection()
+
+    @property
+    def _tables(self):
+        # Scopes may be shared with other apps' tables, so each of us keeps
+        # our own cache in there.
+        tables = self._scope.get().tables
+        try:
+            return tables[self._owner_id]
+        except KeyError:
+            return tables.setdefault(self._owner_id, {})
 
     def __getitem__(self, name):
-        """Get the connection for a table by name."""
-        return self._connection.Table(name)
+        """
+        Get the connection for a table by name.
+
+        Table resources are cached after the first lookup, so repeated
+        lookups in a request handler don't rebuild the boto3 resource.
+        Tables listed in ``DYNAMO_CACHE`` come back wrapped in a
+        :class:`~flask_dynamo.cache.CachedTable`, tables listed in
+        ``DYNAMO_COALESCE`` in a :class:`~flask_dynamo.coalesce.CoalescedTable`
+        (underneath the cache, so cache misses are coalesced too), tables
+        listed in ``DYNAMO_HEDGE`` in a :class:`~flask_dynamo.hedge.HedgedTable`
+        (underneath both, so only real DynamoDB calls are hedged), and if
+        ``DYNAMO_READ_REGIONS`` is set, tables come back wrapped in a
+        :class:`~flask_dynamo.routing.RoutedTable`.
+        """
+        tables = self._tables
+        try:
+            return tables[name]
+        except KeyError:
+            with self._scope.lock:
+                table = self._connection.Table(name)
+            if self._router is not None:
+                table = RoutedTable(table, self._router, self._home_region, self._region_connection)
+            if name in self.hedgers:
+                table = HedgedTable(table, self.hedgers[name], self._hedge_table(name))
+            if name in self.coalescers:
+                table = CoalescedTable(table, self.coalescers[name], self.key_names(name), self._connection)
+            if name in self._cache_ttls:
+                table = CachedTable(table, self.cache, self._cache_ttls[name], self.key_names(name))
+            tables[name] = table
+            return table
+
+    def _hedge_table(self, name):
+        """A Table on the connection hedged reads are sent through."""
+        connection = self._hedge_connection()
+        with self._scope.lock:
+            table = connection.Table(name)
+        if self._router is not None:
+            # Hedges follow the router (and its failover) just like the
+            # reads they race.
+            table = RoutedTable(table, self._router, self._home_region, self._hedge_connection)
+        return table
 
     def keys(self):
         """The table names in our config."""
@@ -31,9 +211,362 @@ class DynamoLazyTables(object):
         for table_name in self.keys():
             yield (table_name, self[table_name])
 
+    def warm(self):
+        """Eagerly build and cache the Table resources for all our tables."""
+        for table_name in self.keys():
+            self[table_name]
+
+    def invalidate(self, table_name=None):
+        """
+        Drop cached Table resources.
+
+        :param str table_name: The table to drop (optional).  If not
+            specified, all cached tables are dropped.
+        """
+        if table_name is None:
+            self._tables.clear()
+        else:
+            self._tables.pop(table_name, None)
+
+    def buffer(self, table_name):
+        """
+        Get the :class:`~flask_dynamo.buffer.WriteBuffer` for a table.
+
+        Only tables listed in ``DYNAMO_WRITE_BUFFERS`` have a buffer.  Every
+        caller (in every thread) shares the same buffer, so writes from many
+        requests are batched together.
+
+        :raises: KeyError
+        """
+        try:
+            return self._buffers[table_name]
+        except KeyError:
+            if table_name not in self._buffer_settings:
+                raise KeyError('{} is not in DYNAMO_WRITE_BUFFERS.'.format(table_name))
+            with self._buffers_lock:
+                if table_name not in self._buffers:
+                    self._buffers[table_name] = WriteBuffer(
+                        table_name,
+                        partial(self._write_buffered, table_name),
+                        self.key_names(table_name),
+                        **self._buffer_settings[table_name]
+                    )
+                return self._buffers[table_name]
+
+    def _write_buffered(self, table_name, requests):
+        self.batch_write_many({table_name: requests})
+
+    def flush_buffers(self, wait=True):
+        """
+        Flush every write buffer that's been used.
+
+        :param bool wait: Write in the calling thread, and wait for it.
+            Otherwise, just ask the buffers' background threads to flush.
+        """
+        for buffer in list(self._buffers.values()):
+            if wait:
+                buffer.flush()
+            else:
+                buffer.wake()
+
+    def schema(self, table_name):
+        """
+        Get the :class:`~flask_dynamo.schema.TableSchema` for a table.
+
+        :raises: KeyError
+        """
+        try:
+            return self.schemas[table_name]
+        except KeyError:
+            raise KeyError('{} is not in DYNAMO_TABLES.'.format(table_name))
+
+    def key_names(self, table_name):
+        """
+        The key attribute names for a table, from our config.
+
+        :returns: A list of attribute names (hash key first), or ``None`` if
+            the table isn't in our config.
+        """
+        schema = self.schemas.get(table_name)
+        return list(schema.key_names) if schema is not None else None
+
+    def index_key_names(self, table_name, index_name=None):
+        """
+        The key attribute names for a table and (optionally) one of its
+        secondary indexes, from our config.
+
+        :raises: KeyError
+        """
+        return self.schema(table_name).index_key_names(index_name)
+
+    def _iter(self, method, table_name, cursor, attributes, page_size, prefetch, kwargs):
+        if page_size is not None:
+            kwargs['Limit'] = page_size
+        index_name = kwargs.get('IndexName')
+        return ItemIterator(
+            getattr(self[table_name], method),
+            table_name,
+            index_name,
+            self.index_key_names(table_name, index_name),
+            kwargs,
+            cursor=cursor,
+            attributes=attributes,
+            prefetch=prefetch,
+        )
+
+    def iter_query(self, table_name, cursor=None, attributes=None, page_size=None, prefetch=True, **kwargs):
+        """
+        Run a query, and lazily iterate over every matching item.
+
+        Pages are fetched as they're needed (with the next page fetched in the
+        background while you work through the current one), so memory use is
+        bounded by the page size rather than the number of items::
+
+            results = dynamo.tables.iter_query('posts', KeyConditionExpression=Key('author').eq('ann'))
+            page = list(islice(results, 20))
+            next_page = results.cursor
+
+        :param str table_name: The table name.
+        :param str cursor: The ``cursor`` of an earlier iterator, to resume
+            after its last item (optional).
+        :param list attributes: The attributes to fetch (optional).  Items
+            only ever include these attributes.
+        :param int page_size: The most items to fetch per call (optional).
+        :param bool prefetch: Fetch the next page in the background.
+        :param kwargs: ``Query`` parameters, as for ``Table.query``.
+        :returns: A :class:`~flask_dynamo.paginate.ItemIterator`.
+        :raises: InvalidCursorError
+        """
+        return self._iter('query', table_name, cursor, attributes, page_size, prefetch, kwargs)
+
+    def iter_scan(self, table_name, cursor=None, attributes=None, page_size=None, prefetch=True, **kwargs):
+        """
+        Run a scan, and lazily iterate over every item.
+
+        See :meth:`iter_query`.  For big tables, :meth:`parallel_scan` is
+        faster.
+        """
+        return self._iter('scan', table_name, cursor, attributes, page_size, prefetch, kwargs)
+
+    def batch_get(self, table_name, keys, **kwargs):
+        """
+        Fetch many items from a table by key, as a stream.
+
+        Keys are deduplicated, chunked to DynamoDB's limits, and unprocessed
+        keys are retried with backoff.
+
+        :param str table_name: The table name.
+        :param list keys: The keys to fetch.
+        :param kwargs: Extra request parameters for the table (eg:
+            ``ConsistentRead``, ``ProjectionExpression``).
+        :returns: A generator of items, in no particular order.
+        :raises: UnprocessedItemsError
+        """
+        kwargs['Keys'] = keys
+        for _, item in self.batch_get_many({table_name: kwargs}):
+            yield item
+
+    def batch_get_many(self, request_items, max_retries=10):
+        """
+        Fetch many items from several tables, as a stream.
+
+        :param dict request_items: Maps table names to ``{'Keys': [...]}``, like
+            boto3's ``batch_get_item``.
+        :returns: A generator of ``(table_name, item)`` tuples.
+        :raises: UnprocessedItemsError
+        """
+        return batch.batch_get(self._connection, request_items, max_retries=max_retries)
+
+    def batch_write(self, table_name, put_items=(), delete_keys=()):
+        """
+        Put and delete many items in a table.
+
+        Requests for the same key are coalesced (if a key is both put and
+        deleted, the put wins), chunked to DynamoDB's limits, and unprocessed
+        requests are retried with backoff.
+
+        :param str table_name: The table name.
+        :param list put_items: Items to put.
+        :param list delete_keys: Keys to delete.
+        :raises: UnprocessedItemsError
+        """
+        requests = [{'DeleteRequest': {'Key': key}} for key in delete_keys]
+        requests.extend({'PutRequest': {'Item': item}} for item in put_items)
+        self.batch_write_many({table_name: requests})
+
+    def batch_write_many(self, request_items, max_retries=10):
+        """
+        Put and delete many items in several tables.
+
+        :param dict request_items: Maps table names to lists of
+            ``PutRequest`` / ``DeleteRequest`` dicts, like boto3's
+            ``batch_write_item``.
+        :raises: UnprocessedItemsError
+        """
+        try:
+            batch.batch_write(self._connection, request_items, key_names=self.key_names, max_retries=max_retries)
+        finally:
+            for table_name, requests in request_items.items():
+                if table_name in self._cache_ttls:
+                    table = self[table_name]
+                    key_names = self.schemas[table_name].key_names
+                    for request in requests:
+                        if 'PutRequest' in request:
+                            item = request['PutRequest']['Item']
+                            table.invalidate(dict((name, item[name]) for name in key_names))
+                        else:
+                            table.invalidate(request['DeleteRequest']['Key'])
+
+    def transaction(self, max_retries=5):
+        """
+        Start a :class:`~flask_dynamo.transaction.Transaction`, to write many
+        items all-or-nothing.
+
+        Keys for tables in our config are checked as actions are added, and
+        items written to cached tables are invalidated once it's committed.
+
+        :param int max_retries: How many times to retry the transaction if
+            it conflicts with another one.
+        """
+        return Transaction(
+            self._connection.meta.client,
+            schemas=self.schemas,
+            max_retries=max_retries,
+            on_commit=self._invalidate_written,
+        )
+
+    def _invalidate_written(self, written):
+        for table_name, key in written:
+            if table_name in self._cache_ttls:
+                self[table_name].invalidate(key)
+
+    def transact_get(self, requests, max_retries=5):
+        """
+        Read many items as of a single point in time.  See
+        :func:`~flask_dynamo.transaction.transact_get`.
+
+        :param list requests: ``(table name, key)`` tuples, or ``(table name,
+            key, attributes)``.
+        :returns: A list with the item (or ``None``) for each request, in
+            order.
+        """
+        for request in requests:
+            if request[0] in self.schemas:
+                self.schemas[request[0]].check_key(request[1])
+        return transact_get(self._connection.meta.client, requests, max_retries=max_retries)
+
+    def parallel_scan(self, table_name, segments=4, workers=None, checkpoint=None, queue_size=None, use_float=False, **kwargs):
+        """
+        Scan a whole table using several threads, as a stream.
+
+        The table is split into ``segments`` with DynamoDB's ``Segment`` /
+        ``TotalSegments`` parameters, and scanned by ``workers`` threads
+        (each with its own client).  Pages are handed back through a bounded
+        queue, so memory use stays flat no matter how big the table is.
+
+        To make a scan resumable, pass in a
+        :class:`~flask_dynamo.scan.ScanCheckpoint` and save it (with
+        :meth:`~flask_dynamo.scan.ScanCheckpoint.to_dict`) as you go.
+
+        :param str table_name: The table name.
+        :param int segments: The number of scan segments.
+        :param int workers: The number of worker threads (defaults to one per
+            segment).
+        :param obj checkpoint: A ``ScanCheckpoint`` to resume from (optional).
+        :param int queue_size: The most pages to buffer (optional).
+        :param bool use_float: Decode numbers as ``int`` / ``float`` instead of
+            ``Decimal``.
+        :param kwargs: Extra ``Scan`` parameters (eg: ``FilterExpression``).
+        :returns: A generator of items, in no particular order.
+        """
+        if self._client_factory is None:
+            raise RuntimeError('parallel_scan requires a client_factory.')
+        if checkpoint is None:
+            checkpoint = ScanCheckpoint(segments)
+        workers = min(workers or segments, max(1, len(checkpoint.pending())))
+        clients = [self._client_factory() for _ in range(workers)]
+        return parallel_scan(
+            clients,
+            table_name,
+            segments,
+            checkpoint=checkpoint,
+            queue_size=queue_size,
+            use_float=use_float,
+            **kwargs
+        )
+
+    def export_table(self, table_name, path, format='json', segments=4, workers=None, rate=None, progress=None, compress=None, **kwargs):
+        """
+        Stream a whole table to a file, one item per line.
+
+        The table is read with :meth:`parallel_scan`, and written as it
+        arrives, so memory use stays flat however big the table is.  Files
+        whose names end in ``.gz`` are gzip-compressed.
+
+        :param str table_name: The table name.
+        :param str path: The file to write.
+        :param str format: ``'json'`` (one plain JSON object per line) or
+            ``'dynamodb'`` (DynamoDB JSON, which round-trips sets, bytes and
+            numbers exactly).
+        :param int segments: The number of scan segments.
+        :param int workers: The number of scan threads (defaults to one per
+            segment).
+        :param float rate: The most items to export per second (optional).
+        :param func progress: Called every few seconds with the number of items
+            so far and the seconds elapsed (optional).
+        :param bool compress: Force gzip compression on or off (optional).
+        :param kwargs: Extra ``Scan`` parameters (eg: ``FilterExpression``).
+        :returns: The number of items exported.
+        """
+        items = self.parallel_scan(table_name, segments=segments, workers=workers, **kwargs)
+        try:
+            with open_file(path, 'w', compress=compress) as f:
+                return export_items(items, f, format=format, rate=rate, progress=progress)
+        finally:
+            items.close()
+
+    def import_table(self, table_name, path, format='json', workers=None, chunk_size=CHUNK_SIZE, rate=None, progress=None, compress=None):
+        """
+        Load every item in a file written by :meth:`export_table` into a
+        table.
+
+        The file is read a line at a time and written in chunks with
+        :meth:`batch_write_many`, by several threads at once, so memory use
+        stays flat however big the file is.  Items with the same key as an
+        existing item replace it.
+
+        :param str table_name: The table name.
+        :param str path: The file to read.
+        :param str format: ``'json'`` or ``'dynamodb'``.
+        :param int workers: The number of writer threads (defaults to
+            ``DYNAMO_TABLE_WORKERS``).
+        :param int chunk_size: How many items each thread writes at a time.
+        :param float rate: The most items to import per second (optional).
+        :param func progress: Called every few seconds with the number of items
+            so far and the seconds elapsed (optional).
+        :param bool compress: Force gzip decompression on or off (optional).
+        :returns: The number of items imported.
+        :raises: UnprocessedItemsError
+        """
+        def write(requests):
+            self.batch_write_many({table_name: requests})
+
+        with open_file(path, 'r', compress=compress) as f:
+            return import_items(
+                write,
+                read_items(f, format=format),
+                chunk_size=chunk_size,
+                workers=workers or self._workers,
+                rate=rate,
+                progress=progress,
+            )
+
     def _wait(self, table_name, type_waiter):
         waiter = self._connection.meta.client.get_waiter(type_waiter)
-        waiter.wait(TableName=table_name)
+        if self._waiter_config:
+            waiter.wait(TableName=table_name, WaiterConfig=self._waiter_config)
+        else:
+            waiter.wait(TableName=table_name)
 
     def wait_exists(self, table_name):
         self._wait(table_name, 'table_exists')
@@ -41,27 +574,212 @@ class DynamoLazyTables(object):
     def wait_not_exists(self, table_name):
         self._wait(table_name, 'table_not_exists')
 
+    def _table_names(self):
+        """The names of all tables in DynamoDB, one ``ListTables`` page at a time."""
+        paginator = self._connection.meta.client.get_paginator('list_tables')
+        names = set()
+        for page in paginator.paginate():
+            names.update(page['TableNames'])
+        return names
+
+    def _fan_out(self, func, args):
+        """Call ``func`` on each arg using a thread pool, re-raising the first error."""
+        if not args:
+            return
+        with ThreadPoolExecutor(max_workers=min(self._workers, len(args))) as pool:
+            futures = [pool.submit(func, arg) for arg in args]
+        for future in futures:
+            future.result()
+
+    def _retry_limit_exceeded(self, func, **kwargs):
+        """
+        Call ``func``, retrying with backoff while DynamoDB says we have too
+        many table operations in flight.
+        """
+        from botocore.exceptions import ClientError
+
+        for attempt in count():
+            try:
+                return func(**kwargs)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'LimitExceededException' or attempt >= self.LIMIT_RETRIES:
+                    raise
+                sleep(batch.backoff(attempt, base_delay=1, max_delay=20))
+
+    @staticmethod
+    def _create_table_params(client):
+        return set(client.meta.service_model.operation_model('CreateTable').input_shape.members)
+
     def create_all(self, wait=False):
-        tables_name_list = [table.name for table in self._connection.tables.all()]
-        for table in self._table_config:
-            if table['TableName'] not in tables_name_list:
-                self._connection.create_table(**table)
-        if wait:
-            for table in self._table_config:
-                if table['TableName'] not in tables_name_list:
-                    self.wait_exists(table['TableName'])
+        """
+        Create all of our tables that don't already exist.
+
+        Tables are created concurrently, and (if ``wait`` is set) waited on
+        concurrently too.  Settings that ``CreateTable`` doesn't take (eg:
+        ``TimeToLiveSpecification``) are left out -- use :meth:`sync_all` to
+        apply those.
+        """
+        existing = self._table_names()
+        client = self._connection.meta.client
+        allowed = self._create_table_params(client)
+
+        def create(table):
+            self._retry_limit_exceeded(client.create_table, **create_params(table, allowed))
+            if wait:
+                self.wait_exists(table['TableName'])
+
+        self._fan_out(create, [t for t in self._table_config if t['TableName'] not in existing])
+        self.invalidate()
+
+    def _describe(self, client, table):
+        """A table's ``(description, TTL description)``, or ``(None, None)`` if it doesn't exist."""
+        from botocore.exceptions import ClientError
+
+        try:
+            description = client.describe_table(TableName=table['TableName'])['Table']
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ResourceNotFoundException':
+                raise
+            return None, None
+        ttl = None
+        if 'TimeToLiveSpecification' in table:
+            ttl = client.describe_time_to_live(TableName=table['TableName'])['TimeToLiveDescription']
+        return description, ttl
+
+    def _wait_active(self, client, table_name):
+        """Wait for a table, and all of its global secondary indexes, to be ``ACTIVE``."""
+        delay = self._waiter_config.get('Delay', 20)
+        for attempt in range(self._waiter_config.get('MaxAttempts', 25)):
+            table = client.describe_table(TableName=table_name)['Table']
+            if table['TableStatus'] == 'ACTIVE' and all(
+                index.get('IndexStatus') == 'ACTIVE' for index in table.get('GlobalSecondaryIndexes', ())
+            ):
+                return
+            sleep(delay)
+        raise TimeoutError('Timed out waiting for {} to become active.'.format(table_name))
+
+    def sync_all(self, dry_run=False, force=False, wait=False):
+        """
+        Bring all of our tables in line with ``DYNAMO_TABLES``.
+
+        Missing tables are created, and existing tables are described
+        (concurrently) and diffed against their definitions -- billing mode,
+        provisioned throughput, global secondary indexes and
+        ``TimeToLiveSpecification`` -- and only what's changed is updated.
+        Each table's changes are made one at a time, waiting for the table
+        and its indexes to be ``ACTIVE`` in between, as DynamoDB requires.
+        Differences that can't be applied to an existing table (key schemas
+        and local secondary indexes) are reported, but left alone.
+
+        If ``DYNAMO_SYNC_CACHE`` is set, tables whose definitions haven't
+        changed since they were last synced aren't even described.
+
+        :param bool dry_run: Only work out the changes, without making them.
+        :param bool force: Check every table, even ones the sync cache says
+            are up to date.
+        :param bool wait: Wait for every changed table to be ``ACTIVE``
+            before returning.
+        :returns: A list of :class:`~flask_dynamo.sync.Change` objects.
+        """
+        client = self._connection.meta.client
+        cache = SchemaCache(self._sync_cache) if self._sync_cache else None
+        hashes = cache.load() if cache is not None else {}
+
+        def cache_key(table):
+            return '{} {}'.format(client.meta.endpoint_url, table['TableName'])
+
+        tables = [t for t in self._table_config if force or hashes.get(cache_key(t)) != schema_hash(t)]
+        plans = {}
+
+        def plan(table):
+            plans[table['TableName']] = plan_table(table, *self._describe(client, table))
+
+        self._fan_out(plan, tables)
+        changes = [change for table in tables for change in plans[table['TableName']]]
+        if dry_run:
+            return changes
+
+        allowed = self._create_table_params(client)
+
+        def apply(table):
+            applied = 0
+            for change in plans[table['TableName']]:
+                if change.operation is None:
+                    continue
+                if applied:
+                    self._wait_active(client, table['TableName'])
+                params = change.params
+                if change.operation == 'create_table':
+                    params = create_params(params, allowed)
+                self._retry_limit_exceeded(getattr(client, change.operation), **params)
+                applied += 1
+            if applied and wait:
+                self._wait_active(client, table['TableName'])
+
+        self._fan_out(apply, tables)
+        self.invalidate()
+        if cache is not None:
+            for table in tables:
+                if all(change.operation is not None for change in plans[table['TableName']]):
+                    hashes[cache_key(table)] = schema_hash(table)
+            cache.save(hashes)
+        return changes
 
     def destroy_all(self, wait=False):
-        for table in self._table_config:
-            table = self._connection.Table(table['TableName'])
-            table.delete()
-        if wait:
-            for table in self._table_config:
+        """
+        Delete all of our tables.
+
+        Tables are deleted concurrently, and (if ``wait`` is set) waited on
+        concurrently too.
+        """
+        client = self._connection.meta.client
+
+        def destroy(table):
+            self._retry_limit_exceeded(client.delete_table, TableName=table['TableName'])
+            if wait:
                 self.wait_not_exists(table['TableName'])
 
+        self.invalidate()
+        self._fan_out(destroy, self._table_config)
+
+
+class _AppState(object):
+    """Everything we keep per Flask app."""
+
+    def __init__(self):
+        self.scope = None
+        self.region_scopes = {}
+        self.rate_limiter = None
+        self.instrumentation = None
+        self.profiler = None
+        self.router = None
+        self.backend = None
+        self.schemas = None
+        self.tables = None
+        #: The blocking :class:`DynamoLazyTables`, even under
+        #: :class:`~flask_dynamo.aio.AsyncDynamo` (whose ``tables`` are async).
+        self.blocking_tables = None
+        self.fast_tables = None
+        #: The thread pool :class:`~flask_dynamo.aio.AsyncDynamo` runs
+        #: blocking calls on.
+        self.executor = None
+
+    @property
+    def hooks(self):
+        """The botocore event hooks this app needs on its clients."""
+        hooks = (self.rate_limiter, self.instrumentation, self.profiler, self.backend)
+        return tuple(hook for hook in hooks if hook is not None)
+
 
 class Dynamo(object):
-    """DynamoDB engine manager."""
+    """
+    DynamoDB engine manager.
+
+    One instance can be shared by several apps (eg: with an app factory).
+    Each app gets its own tables and settings, but apps with the same
+    credentials, region, endpoint and client settings share boto3 clients
+    (and so connection pools).
+    """
 
     DEFAULT_REGION = 'us-east-1'
 
@@ -72,6 +790,11 @@ class Dynamo(object):
         :param obj app: The Flask application (optional).
         """
         self.app = app
+        self._apps = WeakSet()
+        # Each app holds on to its scopes, so a scope goes once its last
+        # app does.
+        self._pool = WeakValueDictionary()
+        self._pool_lock = Lock()
         if app is not None:
             self.init_app(app)
 
@@ -85,17 +808,99 @@ class Dynamo(object):
         self._init_settings(app)
         self._check_settings(app)
 
-        app.extensions['dynamo'] = self
+        state = app.extensions['dynamo'] = _AppState()
+        self._apps.add(app)
+        state.schemas = parse_tables(app.config['DYNAMO_TABLES'])
 
-        conn = self._connection(app=app)
+        if app.config['DYNAMO_RATE_LIMIT']:
+            state.rate_limiter = RateLimiter(app.config['DYNAMO_TABLES'])
+        if app.config['DYNAMO_METRICS']:
+            state.instrumentation = Instrumentation(app.config['DYNAMO_METRICS_SINK'])
+        if app.config['DYNAMO_PROFILE']:
+            state.profiler = Profiler(
+                app.config['DYNAMO_TABLES'],
+                sample_rate=app.config['DYNAMO_PROFILE_SAMPLE_RATE'],
+                top_keys=app.config['DYNAMO_PROFILE_TOP_KEYS'],
+                path=app.config['DYNAMO_PROFILE_DIR'],
+                dump_interval=app.config['DYNAMO_PROFILE_DUMP_INTERVAL'],
+            )
+        if app.config['DYNAMO_READ_REGIONS']:
+            state.router = RegionRouter(
+                app.config['DYNAMO_READ_REGIONS'],
+                cooldown=app.config['DYNAMO_READ_FAILOVER_COOLDOWN'],
+            )
+        if app.config['DYNAMO_BACKEND'] == 'memory':
+            state.backend = MemoryBackend(app.config['DYNAMO_TABLES'])
+        state.scope = self._pooled_scope(app)
+        if 'dynamo' not in app.cli.commands:
+            app.cli.add_command(cli)
 
-        self.tables = DynamoLazyTables(conn, app.config['DYNAMO_TABLES'])
+        state.tables = state.blocking_tables = DynamoLazyTables(
+            partial(self._connection, app=app),
+            app.config['DYNAMO_TABLES'],
+            scope=state.scope,
+            client_factory=partial(self._new_client, app=app),
+            workers=app.config['DYNAMO_TABLE_WORKERS'],
+            wait_delay=app.config['DYNAMO_WAIT_DELAY'],
+            wait_timeout=app.config['DYNAMO_WAIT_TIMEOUT'],
+            cache=ItemCache(app.config['DYNAMO_CACHE_MAX_BYTES']) if app.config['DYNAMO_CACHE'] else None,
+            cache_ttls=app.config['DYNAMO_CACHE'],
+            router=state.router,
+            home_region=self._home_region(app),
+            region_connection=lambda region: self._connection(app=app, region=region),
+            buffers=app.config['DYNAMO_WRITE_BUFFERS'],
+            schemas=state.schemas,
+            sync_cache=app.config['DYNAMO_SYNC_CACHE'],
+            coalesce=app.config['DYNAMO_COALESCE'],
+            hedge=app.config['DYNAMO_HEDGE'],
+            hedge_connection=lambda region=None: self._hedge_connection(app=app, region=region),
+        )
+        if app.config['DYNAMO_WRITE_BUFFERS']:
+            # Get buffered writes on their way after every request (or
+            # command), without making the response wait on them.
+            app.teardown_appcontext(lambda exception: state.blocking_tables.flush_buffers(wait=False))
+        state.fast_tables = DynamoFastTables(
+            partial(self._client, app=app),
+            app.config['DYNAMO_TABLES'],
+            use_float=app.config['DYNAMO_FAST_FLOATS'],
+        )
+        if app.config['DYNAMO_WARM_TABLES']:
+            self.prewarm(app=app)
 
     @staticmethod
     def _init_settings(app):
         """Initialize all of the extension settings."""
         app.config.setdefault('DYNAMO_SESSION', None)
         app.config.setdefault('DYNAMO_TABLES', [])
+        app.config.setdefault('DYNAMO_BACKEND', environ.get('DYNAMO_BACKEND', 'aws'))
+        app.config.setdefault('DYNAMO_WARM_TABLES', False)
+        app.config.setdefault('DYNAMO_CONNECTION_SCOPE', environ.get('DYNAMO_CONNECTION_SCOPE', 'process'))
+        app.config.setdefault('DYNAMO_MAX_POOL_CONNECTIONS', None)
+        app.config.setdefault('DYNAMO_CONNECT_TIMEOUT', None)
+        app.config.setdefault('DYNAMO_READ_TIMEOUT', None)
+        app.config.setdefault('DYNAMO_TCP_KEEPALIVE', None)
+        app.config.setdefault('DYNAMO_RETRY_MODE', None)
+        app.config.setdefault('DYNAMO_MAX_ATTEMPTS', None)
+        app.config.setdefault('DYNAMO_FAST_FLOATS', False)
+        app.config.setdefault('DYNAMO_TABLE_WORKERS', 8)
+        app.config.setdefault('DYNAMO_WAIT_DELAY', None)
+        app.config.setdefault('DYNAMO_WAIT_TIMEOUT', None)
+        app.config.setdefault('DYNAMO_SYNC_CACHE', environ.get('DYNAMO_SYNC_CACHE', None))
+        app.config.setdefault('DYNAMO_CACHE', {})
+        app.config.setdefault('DYNAMO_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+        app.config.setdefault('DYNAMO_WRITE_BUFFERS', {})
+        app.config.setdefault('DYNAMO_COALESCE', {})
+        app.config.setdefault('DYNAMO_HEDGE', {})
+        app.config.setdefault('DYNAMO_RATE_LIMIT', False)
+        app.config.setdefault('DYNAMO_METRICS', False)
+        app.config.setdefault('DYNAMO_METRICS_SINK', None)
+        app.config.setdefault('DYNAMO_PROFILE', False)
+        app.config.setdefault('DYNAMO_PROFILE_SAMPLE_RATE', 1.0)
+        app.config.setdefault('DYNAMO_PROFILE_TOP_KEYS', 20)
+        app.config.setdefault('DYNAMO_PROFILE_DIR', join(gettempdir(), 'flask-dynamo-profile'))
+        app.config.setdefault('DYNAMO_PROFILE_DUMP_INTERVAL', 60)
+        app.config.setdefault('DYNAMO_READ_REGIONS', [])
+        app.config.setdefault('DYNAMO_READ_FAILOVER_COOLDOWN', 30)
         app.config.setdefault('DYNAMO_ENABLE_LOCAL', environ.get('DYNAMO_ENABLE_LOCAL', False))
         app.config.setdefault('DYNAMO_LOCAL_HOST', environ.get('DYNAMO_LOCAL_HOST', None))
         app.config.setdefault('DYNAMO_LOCAL_PORT', environ.get('DYNAMO_LOCAL_PORT', None))
@@ -122,17 +927,127 @@ class Dynamo(object):
         if app.config['DYNAMO_ENABLE_LOCAL'] and not (app.config['DYNAMO_LOCAL_HOST'] and app.config['DYNAMO_LOCAL_PORT']):
             raise ConfigurationError('If you have enabled Dynamo local, you must specify the host and port.')
 
+        if app.config['DYNAMO_BACKEND'] not in ('aws', 'memory'):
+            raise ConfigurationError('DYNAMO_BACKEND must be one of: aws, memory.')
+
+        scope = app.config['DYNAMO_CONNECTION_SCOPE']
+        if scope not in SCOPES:
+            raise ConfigurationError('DYNAMO_CONNECTION_SCOPE must be one of: {}.'.format(', '.join(sorted(SCOPES))))
+
+        if scope == 'greenlet':
+            try:
+                import greenlet
+            except ImportError:
+                raise ConfigurationError('You must install greenlet to use the greenlet DYNAMO_CONNECTION_SCOPE.')
+
+        for setting in (
+            'DYNAMO_MAX_POOL_CONNECTIONS',
+            'DYNAMO_MAX_ATTEMPTS',
+            'DYNAMO_TABLE_WORKERS',
+            'DYNAMO_CACHE_MAX_BYTES',
+            'DYNAMO_PROFILE_TOP_KEYS',
+        ):
+            value = app.config[setting]
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+                raise ConfigurationError('{} must be a positive integer.'.format(setting))
+
+        for setting in (
+            'DYNAMO_CONNECT_TIMEOUT',
+            'DYNAMO_READ_TIMEOUT',
+            'DYNAMO_WAIT_DELAY',
+            'DYNAMO_WAIT_TIMEOUT',
+            'DYNAMO_PROFILE_DUMP_INTERVAL',
+            'DYNAMO_READ_FAILOVER_COOLDOWN',
+        ):
+            value = app.config[setting]
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                raise ConfigurationError('{} must be a positive number of seconds.'.format(setting))
+
+        if app.config['DYNAMO_SYNC_CACHE'] is not None and not isinstance(app.config['DYNAMO_SYNC_CACHE'], str):
+            raise ConfigurationError('DYNAMO_SYNC_CACHE must be a file path.')
+
+        table_names = [t['TableName'] for t in app.config['DYNAMO_TABLES']]
+        for table_name, ttl in app.config['DYNAMO_CACHE'].items():
+            if table_name not in table_names:
+                raise ConfigurationError('DYNAMO_CACHE table {} is not in DYNAMO_TABLES.'.format(table_name))
+            if isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl <= 0:
+                raise ConfigurationError('DYNAMO_CACHE TTLs must be a positive number of seconds.')
+
+        for table_name, settings in app.config['DYNAMO_WRITE_BUFFERS'].items():
+            if table_name not in table_names:
+                raise ConfigurationError('DYNAMO_WRITE_BUFFERS table {} is not in DYNAMO_TABLES.'.format(table_name))
+            for name, value in settings.items():
+                if name not in ('max_items', 'max_age', 'max_pending'):
+                    raise ConfigurationError('DYNAMO_WRITE_BUFFERS settings must be max_items, max_age or max_pending.')
+                types = (int, float) if name == 'max_age' else int
+                if isinstance(value, bool) or not isinstance(value, types) or value <= 0:
+                    raise ConfigurationError('DYNAMO_WRITE_BUFFERS {} must be a positive number.'.format(name))
+
+        for table_name, settings in app.config['DYNAMO_COALESCE'].items():
+            if table_name not in table_names:
+                raise ConfigurationError('DYNAMO_COALESCE table {} is not in DYNAMO_TABLES.'.format(table_name))
+            for name, value in settings.items():
+                if name not in ('batch_window', 'max_batch'):
+                    raise ConfigurationError('DYNAMO_COALESCE settings must be batch_window or max_batch.')
+                types = (int, float) if name == 'batch_window' else int
+                if isinstance(value, bool) or not isinstance(value, types) or value <= 0:
+                    raise ConfigurationError('DYNAMO_COALESCE {} must be a positive number.'.format(name))
+            if settings.get('max_batch', MAX_BATCH) > MAX_BATCH:
+                raise ConfigurationError('DYNAMO_COALESCE max_batch can be at most {}.'.format(MAX_BATCH))
+
+        for table_name, settings in app.config['DYNAMO_HEDGE'].items():
+            if table_name not in table_names:
+                raise ConfigurationError('DYNAMO_HEDGE table {} is not in DYNAMO_TABLES.'.format(table_name))
+            for name, value in settings.items():
+                if name not in HEDGE_SETTINGS:
+                    raise ConfigurationError('DYNAMO_HEDGE settings must be one of: {}.'.format(', '.join(HEDGE_SETTINGS)))
+                types = int if name in ('min_samples', 'workers') else (int, float)
+                if isinstance(value, bool) or not isinstance(value, types) or value <= 0:
+                    raise ConfigurationError('DYNAMO_HEDGE {} must be a positive number.'.format(name))
+            if not settings.get('percentile', 95) < 100 or settings.get('budget', 0.05) > 1:
+                raise ConfigurationError('DYNAMO_HEDGE percentile must be under 100, and budget at most 1.')
+
+        regions = app.config['DYNAMO_READ_REGIONS']
+        if isinstance(regions, str) or not all(isinstance(region, str) for region in regions):
+            raise ConfigurationError('DYNAMO_READ_REGIONS must be a list of region names.')
+        if regions and app.config['DYNAMO_SESSION'] is not None and not app.config['DYNAMO_SESSION'].region_name:
+            raise ConfigurationError('DYNAMO_SESSION must have a region to use DYNAMO_READ_REGIONS.')
+
+        rate = app.config['DYNAMO_PROFILE_SAMPLE_RATE']
+        if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not 0 < rate <= 1:
+            raise ConfigurationError('DYNAMO_PROFILE_SAMPLE_RATE must be a number between 0 and 1.')
+
+        sink = app.config['DYNAMO_METRICS_SINK']
+        if sink is not None and not isinstance(sink, MetricsSink):
+            raise ConfigurationError('DYNAMO_METRICS_SINK must be a flask_dynamo.metrics.MetricsSink.')
+
+        if app.config['DYNAMO_TCP_KEEPALIVE'] not in (None, True, False):
+            raise ConfigurationError('DYNAMO_TCP_KEEPALIVE must be True or False.')
+
+        if app.config['DYNAMO_RETRY_MODE'] not in (None, 'legacy', 'standard', 'adaptive'):
+            raise ConfigurationError('DYNAMO_RETRY_MODE must be one of: adaptive, legacy, standard.')
+
     def _get_app(self):
         """
         Helper method that implements the logic to look up an application.
         pass
         """
-        if current_app:
-            return current_app
+        try:
+            # Unwrap the proxy, so callers don't pay for a context lookup
+            # on every attribute access.
+            return current_app._get_current_object()
+        except RuntimeError:
+            pass
 
         if self.app is not None:
             return self.app
 
+        # Outside of an app context, we can still guess if there's only one
+        # app to choose from.
+        apps = list(self._apps)
+        if len(apps) == 1:
+            return apps[0]
+
         raise RuntimeError(
             'application not registered on dynamo instance and no application'
             'bound to current context'
@@ -153,6 +1068,10 @@ class Dynamo(object):
 
     @staticmethod
     def _init_session(app):
+        # boto3 takes a while to import, so we don't import it until we
+        # actually need a session.
+        from boto3.session import Session
+
         session_kwargs = {}
         # Only apply if manually specified: otherwise, we'll let boto
         # figure it out (boto will sniff for ec2 instance profile
@@ -165,17 +1084,114 @@ class Dynamo(object):
             session_kwargs['aws_session_token'] = app.config['AWS_SESSION_TOKEN']
         if app.config['AWS_REGION']:
             session_kwargs['region_name'] = app.config['AWS_REGION']
+        if app.config['DYNAMO_BACKEND'] == 'memory' and 'aws_access_key_id' not in session_kwargs:
+            # The memory backend doesn't check credentials, but botocore
+            # won't sign (and so won't send) a request without some.
+            session_kwargs['aws_access_key_id'] = session_kwargs['aws_secret_access_key'] = 'memory'
         return Session(**session_kwargs)
 
-    def _session(self, app=None):
-        if not app:
-            app = self._get_app()
+    @staticmethod
+    def _init_config(app):
+        """
+        Build the botocore client config from our settings.
+
+        Only settings the user has specified are passed along, so botocore's
+        own defaults apply to everything else.
+        """
+        from botocore.config import Config
+
+        config_kwargs = {}
+        if app.config['DYNAMO_MAX_POOL_CONNECTIONS'] is not None:
+            config_kwargs['max_pool_connections'] = app.config['DYNAMO_MAX_POOL_CONNECTIONS']
+        if app.config['DYNAMO_CONNECT_TIMEOUT'] is not None:
+            config_kwargs['connect_timeout'] = app.config['DYNAMO_CONNECT_TIMEOUT']
+        if app.config['DYNAMO_READ_TIMEOUT'] is not None:
+            config_kwargs['read_timeout'] = app.config['DYNAMO_READ_TIMEOUT']
+        if app.config['DYNAMO_TCP_KEEPALIVE'] is not None:
+            config_kwargs['tcp_keepalive'] = app.config['DYNAMO_TCP_KEEPALIVE']
+
+        retries = {}
+        if app.config['DYNAMO_RETRY_MODE'] is not None:
+            retries['mode'] = app.config['DYNAMO_RETRY_MODE']
+        if app.config['DYNAMO_MAX_ATTEMPTS'] is not None:
+            retries['total_max_attempts'] = app.config['DYNAMO_MAX_ATTEMPTS']
+        if retries:
+            config_kwargs['retries'] = retries
+
+        return Config(**config_kwargs) if config_kwargs else None
+
+    @classmethod
+    def _client_kwargs(cls, app, region=None):
+        """The keyword arguments used to build boto3 DynamoDB resources and clients."""
+        client_kwargs = {}
+        if app.config['DYNAMO_ENABLE_LOCAL']:
+            client_kwargs['endpoint_url'] = 'http://{}:{}'.format(
+                app.config['DYNAMO_LOCAL_HOST'],
+                app.config['DYNAMO_LOCAL_PORT'],
+            )
+        if region is not None:
+            client_kwargs['region_name'] = region
+        config = cls._init_config(app)
+        if config is not None:
+            client_kwargs['config'] = config
+        return client_kwargs
+
+    @staticmethod
+    def _home_region(app):
+        """The region our writes go to."""
+        if app.config['DYNAMO_SESSION'] is not None:
+            return app.config['DYNAMO_SESSION'].region_name
+        return app.config['AWS_REGION']
+
+    def _pooled_scope(self, app, region=None):
+        """
+        Get the shared :class:`~flask_dynamo.scopes.Scope` for an app (and
+        optionally, a region other than its home region).
+
+        Apps with the same credentials, region, endpoint, client settings and
+        event hooks share a scope, and so share boto3 clients.
+        """
+        config = app.config
+        if config['DYNAMO_SESSION'] is not None:
+            credentials = (config['DYNAMO_SESSION'],)
+        else:
+            credentials = (config['AWS_ACCESS_KEY_ID'], config['AWS_SECRET_ACCESS_KEY'], config['AWS_SESSION_TOKEN'])
+        endpoint = (config['DYNAMO_LOCAL_HOST'], config['DYNAMO_LOCAL_PORT']) if config['DYNAMO_ENABLE_LOCAL'] else None
+        key = (
+            credentials,
+            region or self._home_region(app),
+            endpoint,
+            tuple(config[setting] for setting in CLIENT_SETTINGS),
+            config['DYNAMO_CONNECTION_SCOPE'],
+            self._get_ctx(app).hooks,
+        )
+        with self._pool_lock:
+            try:
+                return self._pool[key]
+            except KeyError:
+                scope = self._pool[key] = SCOPES[config['DYNAMO_CONNECTION_SCOPE']]()
+                return scope
+
+    def _scope(self, app, region=None):
         ctx = self._get_ctx(app)
+        if region is None:
+            return ctx.scope
         try:
-            return ctx._session_instance
-        except AttributeError:
-            ctx._session_instance = app.config['DYNAMO_SESSION'] or self._init_session(app)
-            return ctx._session_instance
+            return ctx.region_scopes[region]
+        except KeyError:
+            scope = ctx.region_scopes[region] = self._pooled_scope(app, region)
+            return scope
+
+    def _session(self, app=None, region=None):
+        if not app:
+            app = self._get_app()
+        scope = self._scope(app, region)
+        state = scope.get()
+        if state.session is None:
+            with scope.lock:
+                if state.session is None:
+                    state.session = app.config['DYNAMO_SESSION'] or self._init_session(app)
+        return state.session
 
     @property
     def session(self):
@@ -183,29 +1199,27 @@ class Dynamo(object):
         Our DynamoDB session.
 
         This will be lazily created if this is the first time this is being
-        accessed.  This session is reused for performance.
+        accessed.  This session is reused for performance, within the limits
+        of ``DYNAMO_CONNECTION_SCOPE``.
         """
         return self._session()
 
-    def _connection(self, app=None):
+    def _connection(self, app=None, region=None):
         if not app:
             app = self._get_app()
 
-        ctx = self._get_ctx(app)
-        try:
-            return ctx._connection_instance
-        except AttributeError:
-            client_kwargs = {}
-            local = True if app.config['DYNAMO_ENABLE_LOCAL'] else False
-            if local:
-                client_kwargs['endpoint_url'] = 'http://{}:{}'.format(
-                    app.config['DYNAMO_LOCAL_HOST'],
-                    app.config['DYNAMO_LOCAL_PORT'],
-                )
-
-            ctx._connection_instance = self._session(app=app).resource('dynamodb', **client_kwargs)
-
-            return ctx._connection_instance
+        scope = self._scope(app, region)
+        state = scope.get()
+        if state.connection is None:
+            with scope.lock:
+                if state.connection is None:
+                    connection = self._session(app=app, region=region).resource(
+                        'dynamodb',
+                        **self._client_kwargs(app, region)
+                    )
+                    self._register_events(app, connection.meta.client)
+                    state.connection = connection
+        return state.connection
 
     @property
     def connection(self):
@@ -213,13 +1227,211 @@ class Dynamo(object):
         Our DynamoDB connection.
 
         This will be lazily created if this is the first time this is being
-        accessed.  This connection is reused for performance.
+        accessed.  This connection is reused for performance, within the
+        limits of ``DYNAMO_CONNECTION_SCOPE``.
         """
         return self._connection()
 
+    def _register_events(self, app, client):
+        """Hook our botocore event handlers into a newly built client."""
+        for hook in self._get_ctx(app).hooks:
+            hook.register(client.meta.events)
+
+    def _new_client(self, app=None, region=None):
+        """Build a new low-level client, with its own connection pool."""
+        if not app:
+            app = self._get_app()
+
+        with self._scope(app, region).lock:
+            client = self._session(app=app, region=region).client('dynamodb', **self._client_kwargs(app, region))
+        self._register_events(app, client)
+        return client
+
+    def _hedge_connection(self, app=None, region=None):
+        """
+        The resource hedged reads are sent through (optionally, in a region
+        other than the home region).  It has its own connection pool, so
+        hedges don't queue up behind slow requests, and is reused within the
+        limits of ``DYNAMO_CONNECTION_SCOPE``.
+        """
+        if not app:
+            app = self._get_app()
+
+        scope = self._scope(app, region)
+        state = scope.get()
+        if state.hedge_connection is None:
+            with scope.lock:
+                if state.hedge_connection is None:
+                    connection = self._session(app=app, region=region).resource(
+                        'dynamodb',
+                        **self._client_kwargs(app, region)
+                    )
+                    self._register_events(app, connection.meta.client)
+                    state.hedge_connection = connection
+        return state.hedge_connection
+
+    def _client(self, app=None, region=None):
+        if not app:
+            app = self._get_app()
+
+        scope = self._scope(app, region)
+        state = scope.get()
+        if state.client is None:
+            with scope.lock:
+                if state.client is None:
+                    state.client = self._new_client(app=app, region=region)
+        return state.client
+
+    @property
+    def client(self):
+        """
+        Our low-level DynamoDB client.
+
+        This shares the same session, endpoint and config as
+        :attr:`connection`, but skips the resource layer's type
+        serialization.  Like the connection, it will be lazily created and
+        reused.
+        """
+        return self._client()
+
+    @property
+    def tables(self):
+        """The :class:`DynamoLazyTables` for the current app."""
+        return self._get_ctx(self._get_app()).tables
+
+    @property
+    def fast_tables(self):
+        """The :class:`~flask_dynamo.fast.DynamoFastTables` for the current app."""
+        return self._get_ctx(self._get_app()).fast_tables
+
+    @property
+    def router(self):
+        """
+        The current app's :class:`~flask_dynamo.routing.RegionRouter`, or
+        ``None`` if ``DYNAMO_READ_REGIONS`` isn't set.
+        """
+        return self._get_ctx(self._get_app()).router
+
+    @property
+    def backend(self):
+        """
+        The current app's :class:`~flask_dynamo.memory.MemoryBackend`, or
+        ``None`` unless ``DYNAMO_BACKEND`` is ``'memory'``.
+        """
+        return self._get_ctx(self._get_app()).backend
+
+    def prewarm(self, app=None):
+        """
+        Build our session, connection, client and tables up front.
+
+        Normally all of these are built the first time they're used, so apps
+        (and ``flask`` commands) that never touch DynamoDB never pay for
+        them.  Call this from a worker startup hook (eg: gunicorn's
+        ``post_fork``) if you'd rather pay the cost before serving requests.
+        Setting ``DYNAMO_WARM_TABLES`` calls this from :meth:`init_app`.
+        """
+        if not app:
+            app = self._get_app()
+        self._connection(app=app)
+        self._client(app=app)
+        self._get_ctx(app).tables.warm()
+
+    @property
+    def request_stats(self):
+        """
+        The DynamoDB calls made so far in the current request.
+
+        This is a :class:`~flask_dynamo.metrics.RequestStats`, and is only
+        populated if ``DYNAMO_METRICS`` is enabled.
+        """
+        return request_stats()
+
     def get_table(self, table_name):
         return self.tables[table_name]
 
+    def schema(self, table_name):
+        """
+        Get the parsed schema for a table.
+
+        See :meth:`DynamoLazyTables.schema`.
+        """
+        return self.tables.schema(table_name)
+
+    def batch_get(self, table_name, keys, **kwargs):
+        """
+        Fetch many items from a table by key, as a stream.
+
+        See :meth:`DynamoLazyTables.batch_get`.
+        """
+        return self.tables.batch_get(table_name, keys, **kwargs)
+
+    def iter_query(self, table_name, **kwargs):
+        """
+        Lazily iterate over the items matching a query.
+
+        See :meth:`DynamoLazyTables.iter_query`.
+        """
+        return self.tables.iter_query(table_name, **kwargs)
+
+    def iter_scan(self, table_name, **kwargs):
+        """
+        Lazily iterate over every item in a table.
+
+        See :meth:`DynamoLazyTables.iter_scan`.
+        """
+        return self.tables.iter_scan(table_name, **kwargs)
+
+    def batch_write(self, table_name, put_items=(), delete_keys=()):
+        """
+        Put and delete many items in a table.
+
+        See :meth:`DynamoLazyTables.batch_write`.
+        """
+        self.tables.batch_write(table_name, put_items=put_items, delete_keys=delete_keys)
+
+    def buffer(self, table_name):
+        """
+        Get the write buffer for a table.
+
+        See :meth:`DynamoLazyTables.buffer`.
+        """
+        return self.tables.buffer(table_name)
+
+    def transaction(self, max_retries=5):
+        """
+        Start a transaction, to write many items all-or-nothing::
+
+            with dynamo.transaction() as txn:
+                txn['users'].put_item(Item=...)
+
+        See :meth:`DynamoLazyTables.transaction`.
+        """
+        return self.tables.transaction(max_retries=max_retries)
+
+    def transact_get(self, requests, **kwargs):
+        """
+        Read many items as of a single point in time.
+
+        See :meth:`DynamoLazyTables.transact_get`.
+        """
+        return self.tables.transact_get(requests, **kwargs)
+
+    def export_table(self, table_name, path, **kwargs):
+        """
+        Stream a whole table to a (optionally gzipped) file.
+
+        See :meth:`DynamoLazyTables.export_table`.
+        """
+        return self.tables.export_table(table_name, path, **kwargs)
+
+    def import_table(self, table_name, path, **kwargs):
+        """
+        Load a file written by :meth:`export_table` into a table.
+
+        See :meth:`DynamoLazyTables.import_table`.
+        """
+        return self.tables.import_table(table_name, path, **kwargs)
+
     def create_all(self, wait=False):
         """
         Create all user-specified DynamoDB tables.
@@ -229,6 +1441,15 @@ class Dynamo(object):
         """
         self.tables.create_all(wait=wait)
 
+    def sync_all(self, dry_run=False, force=False, wait=False):
+        """
+        Create or update all user-specified DynamoDB tables, so they match
+        ``DYNAMO_TABLES``.
+
+        See :meth:`DynamoLazyTables.sync_all`.
+        """
+        return self.tables.sync_all(dry_run=dry_run, force=force, wait=wait)
+
     def destroy_all(self, wait=False):
         """
         Destroy all user-specified DynamoDB tables.
@@ -0,0 +1,1198 @@
+"""
+An in-memory DynamoDB backend.
+
+The backend hooks into botocore's ``before-send`` event and answers requests
+itself, so nothing ever goes over the network -- but everything above the
+wire (boto3 resources, clients, waiters, batch helpers, scans) works exactly
+as it does against the real thing.
+
+Items are kept in DynamoDB's wire format.  Every table and index keeps its
+items in per-partition lists sorted by range key, so queries are answered
+with a binary search rather than a full scan.
+"""
+
+import json
+import re
+from base64 import b64decode
+from bisect import bisect_left, bisect_right, insort
+from copy import deepcopy
+from decimal import Decimal
+from threading import RLock
+from zlib import crc32
+
+
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+TRANSACT_LIMIT = 100
+
+#: The DynamoDB operations we support, and the methods that run them.
+OPERATIONS = {
+    'CreateTable': 'create_table',
+    'DeleteTable': 'delete_table',
+    'DescribeTable': 'describe_table',
+    'UpdateTable': 'update_table',
+    'DescribeTimeToLive': 'describe_time_to_live',
+    'UpdateTimeToLive': 'update_time_to_live',
+    'ListTables': 'list_tables',
+    'GetItem': 'get_item',
+    'PutItem': 'put_item',
+    'DeleteItem': 'delete_item',
+    'UpdateItem': 'update_item',
+    'TransactWriteItems': 'transact_write_items',
+    'TransactGetItems': 'transact_get_items',
+    'Query': 'query',
+    'Scan': 'scan',
+    'BatchGetItem': 'batch_get_item',
+    'BatchWriteItem': 'batch_write_item',
+}
+
+
+class BackendError(Exception):
+    """An error to send back to the client, as DynamoDB would."""
+
+    def __init__(self, code, message, **fields):
+        super(BackendError, self).__init__(message)
+        self.code = code
+        self.message = message
+        self.fields = fields
+
+
+def _validation(message, *args):
+    return BackendError('ValidationException', message.format(*args))
+
+
+class _Max(object):
+    """Sorts after everything."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_MAX = _Max()
+
+
+def _number(value):
+    """Format a Decimal as a DynamoDB number string."""
+    if value == value.to_integral_value():
+        return str(int(value))
+    return format(value.normalize(), 'f')
+
+
+def _sortable(value):
+    """A sort key for a scalar (key) attribute value."""
+    (kind, raw), = value.items()
+    if kind == 'N':
+        return (kind, Decimal(raw))
+    if kind == 'B':
+        return (kind, b64decode(raw))
+    return (kind, raw)
+
+
+def _plain(value):
+    """A hashable, comparable copy of any attribute value."""
+    (kind, raw), = value.items()
+    if kind == 'N':
+        return (kind, Decimal(raw))
+    if kind == 'NS':
+        return (kind, frozenset(Decimal(v) for v in raw))
+    if kind in ('SS', 'BS'):
+        return (kind, frozenset(raw))
+    if kind == 'L':
+        return (kind, tuple(_plain(v) for v in raw))
+    if kind == 'M':
+        return (kind, tuple(sorted(((k, _plain(v)) for k, v in raw.items()), key=lambda pair: pair[0])))
+    return (kind, raw)
+
+
+# Expressions.
+
+_TOKEN = re.compile(r'\s*(?:(<>|<=|>=|[=<>(),.\[\]+-])|(#[\w]+)|(:[\w]+)|(\d+)|([A-Za-z_][\w]*))')
+_KEYWORDS = frozenset(['AND', 'OR', 'NOT', 'BETWEEN', 'IN', 'SET', 'REMOVE', 'ADD', 'DELETE'])
+
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise _validation('Invalid expression: unexpected input at {!r}', expression[position:])
+        position = match.end()
+        symbol, name, value, number, word = match.groups()
+        if symbol:
+            tokens.append(('symbol', symbol))
+        elif name:
+            tokens.append(('name', name))
+        elif value:
+            tokens.append(('value', value))
+        elif number:
+            tokens.append(('number', int(number)))
+        elif word.upper() in _KEYWORDS:
+            tokens.append(('keyword', word.upper()))
+        else:
+            tokens.append(('word', word))
+    return tokens
+
+
+def _get(item, path):
+    """Follow a document path into an item, returning ``None`` if it's missing."""
+    value = {'M': item}
+    for element in path:
+        if isinstance(element, int):
+            if 'L' not in value or element >= len(value['L']):
+                return None
+            value = value['L'][element]
+        else:
+            if 'M' not in value or element not in value['M']:
+                return None
+            value = value['M'][element]
+    return value
+
+
+def _set(item, path, new_value):
+    parent = _get(item, path[:-1]) if len(path) > 1 else {'M': item}
+    if parent is None:
+        raise _validation('The document path provided in the update expression is invalid for update')
+    last = path[-1]
+    if isinstance(last, int):
+        if 'L' not in parent:
+            raise _validation('The document path provided in the update expression is invalid for update')
+        if last >= len(parent['L']):
+            parent['L'].append(new_value)
+        else:
+            parent['L'][last] = new_value
+    else:
+        if 'M' not in parent:
+            raise _validation('The document path provided in the update expression is invalid for update')
+        parent['M'][last] = new_value
+
+
+def _remove(item, path):
+    parent = _get(item, path[:-1]) if len(path) > 1 else {'M': item}
+    if parent is None:
+        return
+    last = path[-1]
+    if isinstance(last, int):
+        if 'L' in parent and last < len(parent['L']):
+            del parent['L'][last]
+    elif 'M' in parent:
+        parent['M'].pop(last, None)
+
+
+def _compare(operator, left, right):
+    if left is None or right is None:
+        return operator == '<>' and (left is not None or right is not None)
+    if operator == '=':
+        return _plain(left) == _plain(right)
+    if operator == '<>':
+        return _plain(left) != _plain(right)
+    kind = next(iter(left))
+    if kind not in ('N', 'S', 'B') or kind != next(iter(right)):
+        return False
+    left, right = _sortable(left), _sortable(right)
+    if operator == '<':
+        return left < right
+    if operator == '<=':
+        return left <= right
+    if operator == '>':
+        return left > right
+    return left >= right
+
+
+def _size(value):
+    if value is None:
+        return None
+    (kind, raw), = value.items()
+    if kind == 'B':
+        return {'N': str(len(b64decode(raw)))}
+    if kind in ('S', 'SS', 'NS', 'BS', 'L', 'M'):
+        return {'N': str(len(raw))}
+    return None
+
+
+def _contains(container, value):
+    if container is None or value is None:
+        return False
+    (kind, raw), = container.items()
+    if kind == 'S':
+        return 'S' in value and value['S'] in raw
+    if kind in ('SS', 'NS', 'BS'):
+        element = _plain(value)
+        return element[0] == kind[0] and element[1] in _plain(container)[1]
+    if kind == 'L':
+        return _plain(value) in [_plain(v) for v in raw]
+    return False
+
+
+def _begins_with(value, prefix):
+    if value is None or prefix is None:
+        return False
+    if 'S' in value and 'S' in prefix:
+        return value['S'].startswith(prefix['S'])
+    if 'B' in value and 'B' in prefix:
+        return b64decode(value['B']).startswith(b64decode(prefix['B']))
+    return False
+
+
+class _Parser(object):
+    """
+    A recursive descent parser for DynamoDB expressions.
+
+    Expressions are compiled to plain Python closures over an item, so they
+    can be parsed once and evaluated many times.
+    """
+
+    def __init__(self, expression, names=None, values=None):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    # Token helpers.
+
+    def peek(self, offset=0):
+        try:
+            return self.tokens[self.position + offset]
+        except IndexError:
+            return (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def accept(self, kind, text=None):
+        token = self.peek()
+        if token[0] == kind and (text is None or token[1] == text):
+            self.position += 1
+            return token
+        return None
+
+    def expect(self, kind, text=None):
+        token = self.accept(kind, text)
+        if token is None:
+            raise _validation('Invalid expression: expected {} but found {!r}', text or kind, self.peek()[1])
+        return token
+
+    def done(self):
+        if self.position != len(self.tokens):
+            raise _validation('Invalid expression: unexpected {!r}', self.peek()[1])
+
+    # Paths and operands.
+
+    def name(self):
+        kind, text = self.next()
+        if kind == 'name':
+            try:
+                return self.names[text]
+            except KeyError:
+                raise _validation('An expression attribute name used in the document path is not defined: {}', text)
+        if kind == 'word':
+            return text
+        raise _validation('Invalid expression: expected an attribute name but found {!r}', text)
+
+    def path(self):
+        path = [self.name()]
+        while True:
+            if self.accept('symbol', '.'):
+                path.append(self.name())
+            elif self.accept('symbol', '['):
+                path.append(self.expect('number')[1])
+                self.expect('symbol', ']')
+            else:
+                return path
+
+    def value(self):
+        text = self.expect('value')[1]
+        try:
+            return self.values[text]
+        except KeyError:
+            raise _validation('An expression attribute value used in expression is not defined: {}', text)
+
+    def operand(self):
+        """Compile an operand to a function of an item."""
+        kind, text = self.peek()
+        if kind == 'value':
+            value = self.value()
+            return lambda item: value
+        if kind == 'word' and self.peek(1) == ('symbol', '('):
+            self.next()
+            self.next()
+            if text == 'size':
+                path = self.path()
+                self.expect('symbol', ')')
+                return lambda item: _size(_get(item, path))
+            if text == 'if_not_exists':
+                path = self.path()
+                self.expect('symbol', ',')
+                default = self.operand()
+                self.expect('symbol', ')')
+                return lambda item: _get(item, path) if _get(item, path) is not None else default(item)
+            if text == 'list_append':
+                left = self.operand()
+                self.expect('symbol', ',')
+                right = self.operand()
+                self.expect('symbol', ')')
+                return lambda item: {'L': (left(item) or {'L': []})['L'] + (right(item) or {'L': []})['L']}
+            raise _validation('Invalid function name; function: {}', text)
+        path = self.path()
+        return lambda item: _get(item, path)
+
+    # Conditions.
+
+    def condition(self):
+        left = self.conjunction()
+        while self.accept('keyword', 'OR'):
+            right = self.conjunction()
+            left = (lambda a, b: lambda item: a(item) or b(item))(left, right)
+        return left
+
+    def conjunction(self):
+        left = self.negation()
+        while self.accept('keyword', 'AND'):
+            right = self.negation()
+            left = (lambda a, b: lambda item: a(item) and b(item))(left, right)
+        return left
+
+    def negation(self):
+        if self.accept('keyword', 'NOT'):
+            inner = self.negation()
+            return lambda item: not inner(item)
+        return self.primary()
+
+    def primary(self):
+        if self.accept('symbol', '('):
+            inner = self.condition()
+            self.expect('symbol', ')')
+            return inner
+
+        kind, text = self.peek()
+        if kind == 'word' and self.peek(1) == ('symbol', '(') and text != 'size':
+            return self.function()
+
+        left = self.operand()
+        if self.accept('keyword', 'BETWEEN'):
+            low = self.operand()
+            self.expect('keyword', 'AND')
+            high = self.operand()
+            return lambda item: _compare('>=', left(item), low(item)) and _compare('<=', left(item), high(item))
+        if self.accept('keyword', 'IN'):
+            self.expect('symbol', '(')
+            options = [self.operand()]
+            while self.accept('symbol', ','):
+                options.append(self.operand())
+            self.expect('symbol', ')')
+            return lambda item: any(_compare('=', left(item), option(item)) for option in options)
+        operator = self.expect('symbol')[1]
+        if operator not in ('=', '<>', '<', '<=', '>', '>='):
+            raise _validation('Invalid expression: unexpected {!r}', operator)
+        right = self.operand()
+        return lambda item: _compare(operator, left(item), right(item))
+
+    def function(self):
+        name = self.next()[1]
+        self.expect('symbol', '(')
+        path = self.path()
+        if name == 'attribute_exists':
+            self.expect('symbol', ')')
+            return lambda item: _get(item, path) is not None
+        if name == 'attribute_not_exists':
+            self.expect('symbol', ')')
+            return lambda item: _get(item, path) is None
+        self.expect('symbol', ',')
+        argument = self.operand()
+        self.expect('symbol', ')')
+        if name == 'attribute_type':
+            return lambda item: _get(item, path) is not None and argument(item).get('S') in _get(item, path)
+        if name == 'begins_with':
+            return lambda item: _begins_with(_get(item, path), argument(item))
+        if name == 'contains':
+            return lambda item: _contains(_get(item, path), argument(item))
+        raise _validation('Invalid function name; function: {}', name)
+
+    # Update expressions.
+
+    def update(self):
+        """
+        Compile an update expression.
+
+        :returns: A function that applies the update to an item in place,
+            and the top-level attribute names it touches.
+        """
+        actions = []
+        touched = set()
+        while self.peek()[0] is not None:
+            clause = self.expect('keyword')[1]
+            while True:
+                path = self.path()
+                touched.add(path[0])
+                if clause == 'SET':
+                    self.expect('symbol', '=')
+                    actions.append(self.set_action(path))
+                elif clause == 'REMOVE':
+                    actions.append((lambda p: lambda item: _remove(item, p))(path))
+                elif clause in ('ADD', 'DELETE'):
+                    value = self.value()
+                    actions.append(self.add_action(clause, path, value))
+                else:
+                    raise _validation('Invalid UpdateExpression: unexpected {}', clause)
+                if not self.accept('symbol', ','):
+                    break
+
+        def apply(item):
+            for action in actions:
+                action(item)
+        return apply, touched
+
+    def set_action(self, path):
+        left = self.operand()
+        operator = self.accept('symbol', '+') or self.accept('symbol', '-')
+        if operator:
+            right = self.operand()
+            sign = 1 if operator[1] == '+' else -1
+
+            def compute(item):
+                a, b = left(item), right(item)
+                if a is None or b is None or 'N' not in a or 'N' not in b:
+                    raise _validation('An operand in the update expression has an incorrect data type')
+                return {'N': _number(Decimal(a['N']) + sign * Decimal(b['N']))}
+        else:
+            compute = left
+
+        def action(item):
+            value = compute(item)
+            if value is None:
+                raise _validation('The provided expression refers to an attribute that does not exist in the item')
+            _set(item, path, deepcopy(value))
+        return action
+
+    @staticmethod
+    def add_action(clause, path, value):
+        (kind, raw), = value.items()
+
+        def action(item):
+            current = _get(item, path)
+            if clause == 'ADD' and kind == 'N':
+                total = Decimal(current['N']) if current is not None else Decimal(0)
+                _set(item, path, {'N': _number(total + Decimal(raw))})
+            elif kind in ('SS', 'NS', 'BS'):
+                existing = list(current[kind]) if current is not None and kind in current else []
+                if clause == 'ADD':
+                    merged = existing + [v for v in raw if v not in existing]
+                    _set(item, path, {kind: merged})
+                elif current is not None:
+                    remaining = [v for v in existing if v not in raw]
+                    if remaining:
+                        _set(item, path, {kind: remaining})
+                    else:
+                        _remove(item, path)
+            else:
+                raise _validation('Invalid UpdateExpression: Incorrect operand type for operator or function')
+        return action
+
+
+def compile_condition(expression, names=None, values=None):
+    """Compile a condition (or filter) expression to a function of an item."""
+    parser = _Parser(expression, names, values)
+    condition = parser.condition()
+    parser.done()
+    return condition
+
+
+def compile_update(expression, names=None, values=None):
+    """Compile an update expression; see :meth:`_Parser.update`."""
+    parser = _Parser(expression, names, values)
+    update = parser.update()
+    parser.done()
+    return update
+
+
+def _projector(expression, names=None):
+    """Compile a projection expression to a function of an item."""
+    parser = _Parser(expression, names)
+    paths = [parser.path()]
+    while parser.accept('symbol', ','):
+        paths.append(parser.path())
+    parser.done()
+
+    def project(item):
+        result = {}
+        for path in paths:
+            value = _get(item, path)
+            if value is None:
+                continue
+            target = result
+            for i, element in enumerate(path[:-1]):
+                if isinstance(path[i + 1], int) or isinstance(element, int):
+                    # Lists are projected whole.
+                    target[path[0]] = deepcopy(item[path[0]])
+                    break
+                target = target.setdefault(element, {'M': {}})['M']
+            else:
+                target[path[-1]] = deepcopy(value)
+        return result
+    return project
+
+
+# Tables.
+
+class _Index(object):
+    """
+    A table's (or secondary index's) items, partitioned by hash key and
+    sorted by range key.
+
+    Partitions hold ``(range key, primary key)`` entries, so items with the
+    same index key are still ordered deterministically.
+    """
+
+    def __init__(self, name, key_schema, projection=None):
+        self.name = name
+        self.hash_key = [k['AttributeName'] for k in key_schema if k['KeyType'] == 'HASH'][0]
+        ranges = [k['AttributeName'] for k in key_schema if k['KeyType'] == 'RANGE']
+        self.range_key = ranges[0] if ranges else None
+        self.projection = projection or {'ProjectionType': 'ALL'}
+        self.partitions = {}
+
+    def entry(self, item, primary_key):
+        if self.hash_key not in item or (self.range_key and self.range_key not in item):
+            return None, None
+        range_value = _sortable(item[self.range_key]) if self.range_key else None
+        return _sortable(item[self.hash_key]), (range_value, primary_key)
+
+    def add(self, item, primary_key):
+        hash_value, entry = self.entry(item, primary_key)
+        if hash_value is not None:
+            insort(self.partitions.setdefault(hash_value, []), entry)
+
+    def remove(self, item, primary_key):
+        hash_value, entry = self.entry(item, primary_key)
+        if hash_value is None:
+            return
+        partition = self.partitions[hash_value]
+        del partition[bisect_left(partition, entry)]
+        if not partition:
+            del self.partitions[hash_value]
+
+    def project(self, item, key_names):
+        """
+        An item as this index holds it, with only its projected attributes
+        (plus the table's ``key_names``).
+        """
+        if self.projection.get('ProjectionType', 'ALL') == 'ALL':
+            return item
+        names = set(key_names)
+        names.update(name for name in (self.hash_key, self.range_key) if name)
+        names.update(self.projection.get('NonKeyAttributes', ()))
+        return dict((name, value) for name, value in item.items() if name in names)
+
+    def ordered(self):
+        """Every ``(hash key, entry)`` in the index, in scan order."""
+        for hash_value in sorted(self.partitions):
+            for entry in self.partitions[hash_value]:
+                yield hash_value, entry
+
+
+class MemoryTable(object):
+    """A single in-memory table."""
+
+    def __init__(self, definition):
+        self.ttl = definition.pop('TimeToLiveSpecification', None)
+        self.definition = definition
+        self.name = definition['TableName']
+        self.primary = _Index(None, definition['KeySchema'])
+        self.key_names = [self.primary.hash_key] + ([self.primary.range_key] if self.primary.range_key else [])
+        self.indexes = {}
+        for index in list(definition.get('GlobalSecondaryIndexes', ())) + list(definition.get('LocalSecondaryIndexes', ())):
+            self.indexes[index['IndexName']] = _Index(index['IndexName'], index['KeySchema'], index.get('Projection'))
+        self.items = {}
+
+    def add_index(self, definition):
+        """Add a global secondary index, and fill it from the table's items."""
+        index = self.indexes[definition['IndexName']] = _Index(
+            definition['IndexName'],
+            definition['KeySchema'],
+            definition.get('Projection'),
+        )
+        for primary_key, item in self.items.items():
+            index.add(item, primary_key)
+        self.definition.setdefault('GlobalSecondaryIndexes', []).append(definition)
+
+    def remove_index(self, index_name):
+        """Drop a global secondary index."""
+        del self.indexes[index_name]
+        self.definition['GlobalSecondaryIndexes'] = [
+            index for index in self.definition['GlobalSecondaryIndexes'] if index['IndexName'] != index_name
+        ]
+
+    def index(self, name):
+        if name is None:
+            return self.primary
+        try:
+            return self.indexes[name]
+        except KeyError:
+            raise _validation('The table does not have the specified index: {}', name)
+
+    def primary_key(self, key, exact=True):
+        """The (hashable) primary key of a key or item."""
+        if exact and set(key) != set(self.key_names):
+            raise _validation('The provided key element does not match the schema')
+        try:
+            return tuple(_sortable(key[name]) for name in self.key_names)
+        except KeyError:
+            raise _validation('One or more parameter values were invalid: Missing the key {} in the item', self.key_names)
+
+    def key_of(self, item, index=None):
+        """The key attributes of an item, for ``LastEvaluatedKey``."""
+        names = list(self.key_names)
+        if index is not None:
+            names += [name for name in (index.hash_key, index.range_key) if name and name not in names]
+        return dict((name, item[name]) for name in names)
+
+    def get(self, key):
+        return self.items.get(self.primary_key(key))
+
+    def put(self, item):
+        primary_key = self.primary_key(item, exact=False)
+        old = self.items.get(primary_key)
+        if old is not None:
+            self._unindex(old, primary_key)
+        self.items[primary_key] = item
+        self.primary.add(item, primary_key)
+        for index in self.indexes.values():
+            index.add(item, primary_key)
+        return old
+
+    def delete(self, key):
+        primary_key = self.primary_key(key)
+        old = self.items.pop(primary_key, None)
+        if old is not None:
+            self._unindex(old, primary_key)
+        return old
+
+    def _unindex(self, item, primary_key):
+        self.primary.remove(item, primary_key)
+        for index in self.indexes.values():
+            index.remove(item, primary_key)
+
+    def describe(self):
+        description = deepcopy(self.definition)
+        description['BillingModeSummary'] = {'BillingMode': description.pop('BillingMode', 'PROVISIONED')}
+        description.pop('Tags', None)
+        description.update(
+            TableStatus='ACTIVE',
+            ItemCount=len(self.items),
+            TableSizeBytes=0,
+            TableArn='arn:aws:dynamodb:memory:000000000000:table/{}'.format(self.name),
+        )
+        for index in description.get('GlobalSecondaryIndexes', ()):
+            index['IndexStatus'] = 'ACTIVE'
+        return description
+
+
+def _key_terms(parser):
+    """Parse a key condition into ``(path, operator, operands)`` terms."""
+    terms = []
+    while True:
+        if parser.accept('symbol', '('):
+            terms.extend(_key_terms(parser))
+            parser.expect('symbol', ')')
+        elif parser.peek() == ('word', 'begins_with'):
+            parser.next()
+            parser.expect('symbol', '(')
+            path = parser.path()
+            parser.expect('symbol', ',')
+            terms.append((path, 'begins_with', [parser.value()]))
+            parser.expect('symbol', ')')
+        else:
+            path = parser.path()
+            if parser.accept('keyword', 'BETWEEN'):
+                low = parser.value()
+                parser.expect('keyword', 'AND')
+                terms.append((path, 'between', [low, parser.value()]))
+            else:
+                terms.append((path, parser.expect('symbol')[1], [parser.value()]))
+        if not parser.accept('keyword', 'AND'):
+            return terms
+
+
+def _key_condition(index, expression, names, values):
+    """
+    Split a key condition into the hash key value, and the bounds of the
+    range key condition (if any).
+    """
+    parser = _Parser(expression, names, values)
+    terms = _key_terms(parser)
+    parser.done()
+    hash_value = None
+    bounds = None
+    for path, operator, operands in terms:
+        if path == [index.hash_key] and operator == '=' and hash_value is None:
+            hash_value = _sortable(operands[0])
+        elif index.range_key and path == [index.range_key] and bounds is None:
+            bounds = (operator, [_sortable(v) for v in operands])
+        else:
+            raise _validation('Query key condition not supported')
+    if hash_value is None:
+        raise _validation('Query condition missed key schema element: {}', index.hash_key)
+    return hash_value, bounds
+
+
+def _range_slice(partition, bounds):
+    """Binary search a partition for the entries matching a range condition."""
+    if bounds is None:
+        return partition
+    operator, operands = bounds
+    value = operands[0]
+    if operator == '=':
+        return partition[bisect_left(partition, (value,)):bisect_right(partition, (value, _MAX))]
+    if operator == '<':
+        return partition[:bisect_left(partition, (value,))]
+    if operator == '<=':
+        return partition[:bisect_right(partition, (value, _MAX))]
+    if operator == '>':
+        return partition[bisect_right(partition, (value, _MAX)):]
+    if operator == '>=':
+        return partition[bisect_left(partition, (value,)):]
+    if operator == 'between':
+        return partition[bisect_left(partition, (value,)):bisect_right(partition, (operands[1], _MAX))]
+    if operator == 'begins_with':
+        start = bisect_left(partition, (value,))
+        end = start
+        while end < len(partition) and partition[end][0][0] == value[0] and partition[end][0][1].startswith(value[1]):
+            end += 1
+        return partition[start:end]
+    raise _validation('Invalid operator used in KeyConditionExpression: {}', operator)
+
+
+class _Raw(object):
+
+    def __init__(self, data):
+        self.data = data
+
+    def stream(self, **kwargs):
+        yield self.data
+
+
+class MemoryBackend(object):
+    """
+    An in-process stand-in for DynamoDB.
+
+    Supports table management (create, delete, describe, list, update, and
+    time to live settings -- though items never actually expire), single item
+    reads and writes (with condition, update and projection expressions),
+    queries and scans on tables and secondary indexes (with filter
+    expressions, pagination and parallel scan segments), batch reads and
+    writes, and transactions.
+
+    :param list table_config: Tables to create up front (eg: the
+        ``DYNAMO_TABLES`` setting).
+    """
+
+    def __init__(self, table_config=()):
+        self.table_config = list(table_config)
+        self.tables = {}
+        self.lock = RLock()
+        self.reset()
+
+    def reset(self):
+        """Drop every table, then recreate the ones from ``table_config``."""
+        with self.lock:
+            self.tables = {}
+            self.tokens = {}
+            for definition in self.table_config:
+                self.create_table(deepcopy(definition))
+
+    def register(self, events):
+        """
+        Answer a client's requests from this backend.
+
+        :param obj events: A client's ``meta.events``.
+        """
+        events.register('before-send.dynamodb', self._before_send)
+
+    def _before_send(self, request, **kwargs):
+        from botocore.awsrequest import AWSResponse
+
+        target = request.headers['X-Amz-Target']
+        if isinstance(target, bytes):
+            target = target.decode('utf-8')
+        body = request.body or b'{}'
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        status, response = self.handle(target.split('.')[-1], json.loads(body))
+        return AWSResponse(
+            request.url,
+            status,
+            {'Content-Type': 'application/x-amz-json-1.0'},
+            _Raw(json.dumps(response).encode('utf-8')),
+        )
+
+    def handle(self, operation, body):
+        """
+        Run a single operation.
+
+        :param str operation: The operation name (eg: ``GetItem``).
+        :param dict body: The request, in DynamoDB's wire format.
+        :returns: An ``(HTTP status, response)`` tuple.
+        """
+        if operation not in OPERATIONS:
+            return 400, {'__type': 'com.amazonaws.dynamodb.v20120810#UnknownOperationException'}
+        method = getattr(self, OPERATIONS[operation])
+        try:
+            with self.lock:
+                response = method(body)
+        except BackendError as e:
+            response = {'__type': 'com.amazonaws.dynamodb.v20120810#' + e.code, 'message': e.message}
+            response.update(e.fields)
+            return 400, response
+        return 200, response
+
+    def table(self, name):
+        try:
+            return self.tables[name]
+        except KeyError:
+            raise BackendError('ResourceNotFoundException', 'Requested resource not found: Table: {} not found'.format(name))
+
+    @staticmethod
+    def _capacity(body, table_name, units=1.0):
+        if body.get('ReturnConsumedCapacity', 'NONE') == 'NONE':
+            return {}
+        return {'ConsumedCapacity': {'TableName': table_name, 'CapacityUnits': units}}
+
+    @staticmethod
+    def _check(table, body, item):
+        expression = body.get('ConditionExpression')
+        if expression and not compile_condition(
+            expression,
+            body.get('ExpressionAttributeNames'),
+            body.get('ExpressionAttributeValues'),
+        )(item or {}):
+            raise BackendError('ConditionalCheckFailedException', 'The conditional request failed')
+
+    # Tables.
+
+    def create_table(self, body):
+        if body['TableName'] in self.tables:
+            raise BackendError('ResourceInUseException', 'Table already exists: {}'.format(body['TableName']))
+        table = self.tables[body['TableName']] = MemoryTable(body)
+        return {'TableDescription': table.describe()}
+
+    def delete_table(self, body):
+        table = self.table(body['TableName'])
+        del self.tables[table.name]
+        return {'TableDescription': table.describe()}
+
+    def describe_table(self, body):
+        return {'Table': self.table(body['TableName']).describe()}
+
+    def update_table(self, body):
+        table = self.table(body['TableName'])
+        definition = table.definition
+        updates = body.get('GlobalSecondaryIndexUpdates', ())
+        if len([u for u in updates if 'Create' in u or 'Delete' in u]) > 1:
+            raise BackendError(
+                'LimitExceededException',
+                'Subscriber limit exceeded: Only 1 online index can be created or deleted simultaneously per table',
+            )
+        if 'AttributeDefinitions' in body:
+            attributes = dict((a['AttributeName'], a) for a in definition['AttributeDefinitions'])
+            attributes.update((a['AttributeName'], a) for a in body['AttributeDefinitions'])
+            definition['AttributeDefinitions'] = list(attributes.values())
+        if 'BillingMode' in body:
+            definition['BillingMode'] = body['BillingMode']
+            if body['BillingMode'] == 'PAY_PER_REQUEST':
+                definition.pop('ProvisionedThroughput', None)
+                for index in definition.get('GlobalSecondaryIndexes', ()):
+                    index.pop('ProvisionedThroughput', None)
+        if 'ProvisionedThroughput' in body:
+            definition['ProvisionedThroughput'] = body['ProvisionedThroughput']
+        for update in updates:
+            if 'Create' in update:
+                if update['Create']['IndexName'] in table.indexes:
+                    raise _validation('Attempting to create an index which already exists')
+                table.add_index(update['Create'])
+            elif 'Delete' in update:
+                if update['Delete']['IndexName'] not in table.indexes:
+                    raise BackendError('ResourceNotFoundException', 'Requested resource not found')
+                table.remove_index(update['Delete']['IndexName'])
+            elif 'Update' in update:
+                for index in definition.get('GlobalSecondaryIndexes', ()):
+                    if index['IndexName'] == update['Update']['IndexName']:
+                        index['ProvisionedThroughput'] = update['Update']['ProvisionedThroughput']
+        return {'TableDescription': table.describe()}
+
+    def describe_time_to_live(self, body):
+        ttl = self.table(body['TableName']).ttl
+        if ttl and ttl.get('Enabled'):
+            return {'TimeToLiveDescription': {'TimeToLiveStatus': 'ENABLED', 'AttributeName': ttl['AttributeName']}}
+        return {'TimeToLiveDescription': {'TimeToLiveStatus': 'DISABLED'}}
+
+    def update_time_to_live(self, body):
+        table = self.table(body['TableName'])
+        spec = body['TimeToLiveSpecification']
+        enabled = bool(table.ttl and table.ttl.get('Enabled'))
+        if spec['Enabled'] == enabled:
+            raise _validation('TimeToLive is already {}', 'enabled' if enabled else 'disabled')
+        table.ttl = spec
+        return {'TimeToLiveSpecification': spec}
+
+    def list_tables(self, body):
+        names = sorted(self.tables)
+        start = body.get('ExclusiveStartTableName')
+        if start:
+            names = names[bisect_right(names, start):]
+        limit = body.get('Limit', 100)
+        response = {'TableNames': names[:limit]}
+        if len(names) > limit:
+            response['LastEvaluatedTableName'] = names[limit - 1]
+        return response
+
+    # Items.
+
+    def get_item(self, body):
+        table = self.table(body['TableName'])
+        item = table.get(body['Key'])
+        response = self._capacity(body, table.name, 0.5)
+        if item is not None:
+            if 'ProjectionExpression' in body:
+                item = _projector(body['ProjectionExpression'], body.get('ExpressionAttributeNames'))(item)
+            response['Item'] = item
+        return response
+
+    def put_item(self, body):
+        table = self.table(body['TableName'])
+        old = table.items.get(table.primary_key(body['Item'], exact=False))
+        self._check(table, body, old)
+        table.put(body['Item'])
+        response = self._capacity(body, table.name)
+        if body.get('ReturnValues') == 'ALL_OLD' and old is not None:
+            response['Attributes'] = old
+        return response
+
+    def delete_item(self, body):
+        table = self.table(body['TableName'])
+        self._check(table, body, table.get(body['Key']))
+        old = table.delete(body['Key'])
+        response = self._capacity(body, table.name)
+        if body.get('ReturnValues') == 'ALL_OLD' and old is not None:
+            response['Attributes'] = old
+        return response
+
+    def update_item(self, body):
+        table = self.table(body['TableName'])
+        old = table.get(body['Key'])
+        self._check(table, body, old)
+        item = deepcopy(old) if old is not None else deepcopy(body['Key'])
+        touched = set()
+        if body.get('UpdateExpression'):
+            apply, touched = compile_update(
+                body['UpdateExpression'],
+                body.get('ExpressionAttributeNames'),
+                body.get('ExpressionAttributeValues'),
+            )
+            apply(item)
+        if touched & set(table.key_names):
+            raise _validation('Cannot update attribute {}. This attribute is part of the key', sorted(touched & set(table.key_names))[0])
+        table.put(item)
+
+        response = self._capacity(body, table.name)
+        returns = body.get('ReturnValues', 'NONE')
+        if returns == 'ALL_NEW':
+            response['Attributes'] = item
+        elif returns == 'ALL_OLD' and old is not None:
+            response['Attributes'] = old
+        elif returns == 'UPDATED_NEW':
+            response['Attributes'] = dict((k, v) for k, v in item.items() if k in touched)
+        elif returns == 'UPDATED_OLD' and old is not None:
+            response['Attributes'] = dict((k, v) for k, v in old.items() if k in touched)
+        return response
+
+    # Transactions.
+
+    @staticmethod
+    def _transact_items(body):
+        actions = body.get('TransactItems') or []
+        if not 1 <= len(actions) <= TRANSACT_LIMIT:
+            raise _validation('TransactItems must have between 1 and {} items', TRANSACT_LIMIT)
+        return [list(action.items())[0] for action in actions]
+
+    def transact_write_items(self, body):
+        actions = self._transact_items(body)
+        token = body.get('ClientRequestToken')
+        if token is not None:
+            digest = json.dumps(body['TransactItems'], sort_keys=True)
+            if token in self.tokens:
+                if self.tokens[token] != digest:
+                    raise BackendError(
+                        'IdempotentParameterMismatchException',
+                        'Request token has been used before with different parameters',
+                    )
+                return {}
+
+        # Check everything up front, so nothing is written unless all of it
+        # can be.
+        seen = set()
+        reasons = []
+        for kind, request in actions:
+            table = self.table(request['TableName'])
+            if kind == 'Put':
+                primary_key = table.primary_key(request['Item'], exact=False)
+            else:
+                primary_key = table.primary_key(request['Key'])
+            if (table.name, primary_key) in seen:
+                raise _validation('Transaction request cannot include multiple operations on one item')
+            seen.add((table.name, primary_key))
+            if kind == 'Update' and request.get('UpdateExpression'):
+                touched = compile_update(request['UpdateExpression'], request.get('ExpressionAttributeNames'), request.get('ExpressionAttributeValues'))[1]
+                if touched & set(table.key_names):
+                    raise _validation('Cannot update attribute {}. This attribute is part of the key', sorted(touched & set(table.key_names))[0])
+            try:
+                self._check(table, request, table.items.get(primary_key))
+                reasons.append({'Code': 'None'})
+            except BackendError as e:
+                reasons.append({'Code': 'ConditionalCheckFailed', 'Message': e.message})
+        if any(reason['Code'] != 'None' for reason in reasons):
+            raise BackendError(
+                'TransactionCanceledException',
+                'Transaction cancelled, please refer cancellation reasons for specific reasons [{}]'.format(
+                    ', '.join(reason['Code'] for reason in reasons)
+                ),
+                CancellationReasons=reasons,
+            )
+
+        for kind, request in actions:
+            request = dict((k, v) for k, v in request.items() if k != 'ConditionExpression')
+            if kind == 'Put':
+                self.put_item(request)
+            elif kind == 'Update':
+                self.update_item(request)
+            elif kind == 'Delete':
+                self.delete_item(request)
+        if token is not None:
+            self.tokens[token] = digest
+        return {}
+
+    def transact_get_items(self, body):
+        responses = []
+        for kind, request in self._transact_items(body):
+            item = self.get_item(request).get('Item')
+            responses.append({'Item': item} if item is not None else {})
+        return {'Responses': responses}
+
+    # Queries and scans.
+
+    def _read(self, table, index, entries, body):
+        """Page through ``(order key, primary key)`` entries, DynamoDB style."""
+        limit = body.get('Limit')
+        names = body.get('ExpressionAttributeNames')
+        values = body.get('ExpressionAttributeValues')
+        condition = compile_condition(body['FilterExpression'], names, values) if body.get('FilterExpression') else None
+        project = _projector(body['ProjectionExpression'], names) if body.get('ProjectionExpression') else None
+
+        items = []
+        scanned = 0
+        last = None
+        for order_key, primary_key in entries:
+            if limit is not None and scanned >= limit:
+                response = {'LastEvaluatedKey': table.key_of(last, index)}
+                break
+            last = index.project(table.items[primary_key], table.key_names)
+            scanned += 1
+            if condition is None or condition(last):
+                items.append(project(last) if project else last)
+        else:
+            response = {}
+
+        response.update(Count=len(items), ScannedCount=scanned)
+        if body.get('Select') != 'COUNT':
+            response['Items'] = items
+        response.update(self._capacity(body, table.name, max(0.5, scanned / 2.0)))
+        return response
+
+    def _start_key(self, table, index, body):
+        """The position of ``ExclusiveStartKey`` within an index."""
+        start = body.get('ExclusiveStartKey')
+        if not start:
+            return None
+        hash_value, entry = index.entry(start, table.primary_key(dict((n, start[n]) for n in table.key_names)))
+        if hash_value is None:
+            raise _validation('The provided starting key is invalid')
+        return hash_value, entry
+
+    def query(self, body):
+        table = self.table(body['TableName'])
+        index = table.index(body.get('IndexName'))
+        hash_value, bounds = _key_condition(
+            index,
+            body['KeyConditionExpression'],
+            body.get('ExpressionAttributeNames'),
+            body.get('ExpressionAttributeValues'),
+        )
+        entries = _range_slice(index.partitions.get(hash_value, []), bounds)
+        forward = body.get('ScanIndexForward', True)
+        start = self._start_key(table, index, body)
+        if start is not None:
+            position = bisect_right(entries, start[1]) if forward else bisect_left(entries, start[1])
+            entries = entries[position:] if forward else entries[:position]
+        if not forward:
+            entries = entries[::-1]
+        return self._read(table, index, ((entry, entry[1]) for entry in entries), body)
+
+    def scan(self, body):
+        table = self.table(body['TableName'])
+        index = table.index(body.get('IndexName'))
+        entries = index.ordered()
+        if 'TotalSegments' in body:
+            segment, total = body['Segment'], body['TotalSegments']
+            entries = (
+                (hash_value, entry) for hash_value, entry in entries
+                if crc32(repr(hash_value).encode('utf-8')) % total == segment
+            )
+        start = self._start_key(table, index, body)
+        if start is not None:
+            entries = (pair for pair in entries if pair > start)
+        return self._read(table, index, ((pair, pair[1][1]) for pair in entries), body)
+
+    # Batches.
+
+    def batch_get_item(self, body):
+        if sum(len(request['Keys']) for request in body['RequestItems'].values()) > BATCH_GET_LIMIT:
+            raise _validation('Too many items requested for the BatchGetItem call')
+        responses = {}
+        capacity = []
+        for table_name, request in body['RequestItems'].items():
+            table = self.table(table_name)
+            project = None
+            if 'ProjectionExpression' in request:
+                project = _projector(request['ProjectionExpression'], request.get('ExpressionAttributeNames'))
+            found = responses.setdefault(table_name, [])
+            for key in request['Keys']:
+                item = table.get(key)
+                if item is not None:
+                    found.append(project(item) if project else item)
+            capacity.append({'TableName': table_name, 'CapacityUnits': len(request['Keys']) / 2.0})
+        response = {'Responses': responses, 'UnprocessedKeys': {}}
+        if body.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+            response['ConsumedCapacity'] = capacity
+        return response
+
+    def batch_write_item(self, body):
+        if sum(len(requests) for requests in body['RequestItems'].values()) > BATCH_WRITE_LIMIT:
+            raise _validation('Too many items requested for the BatchWriteItem call')
+        capacity = []
+        for table_name, requests in body['RequestItems'].items():
+            table = self.table(table_name)
+            for request in requests:
+                if 'PutRequest' in request:
+                    table.put(request['PutRequest']['Item'])
+                else:
+                    table.delete(request['DeleteRequest']['Key'])
+            capacity.append({'TableName': table_name, 'CapacityUnits': float(len(requests))})
+        response = {'UnprocessedItems': {}}
+        if body.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+            response['ConsumedCapacity'] = capacity
+        return response
@@ -0,0 +1,283 @@
+"""Per-request DynamoDB instrumentation."""
+
+import socket
+from time import perf_counter
+
+from flask import g, has_app_context
+
+
+class OperationStats(object):
+    """Aggregated stats for one operation against one table."""
+
+    __slots__ = ('calls', 'errors', 'retries', 'latency', 'bytes_sent', 'bytes_received', 'capacity')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.latency = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.capacity = 0.0
+
+    def to_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+
+class RequestStats(object):
+    """
+    Every DynamoDB call made while handling a single Flask request.
+
+    Stats are keyed by ``(table_name, operation)``.  Calls that span several
+    tables (eg: ``BatchGetItem``) are keyed by the table names joined with
+    ``+``, and the capacity they consume is charged to each table separately
+    (see :meth:`charge`).
+    """
+
+    def __init__(self):
+        self.operations = {}
+
+    def record(self, table_name, operation, latency, retries, bytes_sent, bytes_received, capacity, error):
+        try:
+            stats = self.operations[(table_name, operation)]
+        except KeyError:
+            stats = self.operations[(table_name, operation)] = OperationStats()
+        stats.calls += 1
+        stats.errors += int(error)
+        stats.retries += retries
+        stats.latency += latency
+        stats.bytes_sent += bytes_sent
+        stats.bytes_received += bytes_received
+        stats.capacity += capacity
+
+    def charge(self, table_name, operation, capacity):
+        """Add capacity consumed by part of a call spanning several tables."""
+        try:
+            stats = self.operations[(table_name, operation)]
+        except KeyError:
+            stats = self.operations[(table_name, operation)] = OperationStats()
+        stats.capacity += capacity
+
+    def _total(self, name):
+        return sum(getattr(stats, name) for stats in self.operations.values())
+
+    @property
+    def calls(self):
+        """The total number of calls."""
+        return self._total('calls')
+
+    @property
+    def latency(self):
+        """The total time spent waiting on DynamoDB, in seconds."""
+        return self._total('latency')
+
+    @property
+    def capacity(self):
+        """The total capacity units consumed."""
+        return self._total('capacity')
+
+    def to_dict(self):
+        """A JSON-friendly copy of these stats."""
+        return dict(
+            ('{}:{}'.format(table_name, operation), stats.to_dict())
+            for (table_name, operation), stats in self.operations.items()
+        )
+
+
+class MetricsSink(object):
+    """
+    Base class for metrics sinks.
+
+    Subclass this and override :meth:`record` to ship DynamoDB metrics to
+    statsd, Prometheus, or whatever else you use.  ``record`` is called
+    synchronously after every call, so it should be quick.
+    """
+
+    def record(self, table_name, operation, latency, retries, bytes_sent, bytes_received, capacity, error):
+        """
+        Record a single DynamoDB call.
+
+        :param str table_name: The table (or ``+``-joined tables) involved.
+        :param str operation: The operation name (eg: ``GetItem``).
+        :param float latency: The call's latency in seconds, including retries.
+        :param int retries: How many times botocore retried the call.
+        :param int bytes_sent: The size of the request body.
+        :param int bytes_received: The size of the response body.
+        :param float capacity: The capacity units consumed by ``table_name``.
+            For calls spanning several tables, each table's capacity is
+            passed to :meth:`charge` instead.
+        :param bool error: Whether the call failed.
+        """
+        raise NotImplementedError
+
+    def charge(self, table_name, operation, capacity):
+        """
+        Record the capacity one table consumed in a call spanning several
+        tables (eg: ``BatchGetItem``).  The call itself has already been
+        passed to :meth:`record`.  By default, this does nothing.
+
+        :param str table_name: The table.
+        :param str operation: The operation name (eg: ``BatchGetItem``).
+        :param float capacity: The capacity units consumed.
+        """
+
+
+class StatsdSink(MetricsSink):
+    """
+    Send metrics to statsd over UDP, with DogStatsD-style tags.
+
+    :param str host: The statsd host.
+    :param int port: The statsd port.
+    :param str prefix: A prefix for every metric name.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='dynamodb'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def record(self, table_name, operation, latency, retries, bytes_sent, bytes_received, capacity, error):
+        tags = '|#table:{},operation:{}'.format(table_name, operation)
+        lines = [
+            '{}.latency:{:.3f}|ms{}'.format(self.prefix, latency * 1000, tags),
+            '{}.calls:1|c{}'.format(self.prefix, tags),
+            '{}.bytes_sent:{}|c{}'.format(self.prefix, bytes_sent, tags),
+            '{}.bytes_received:{}|c{}'.format(self.prefix, bytes_received, tags),
+        ]
+        if retries:
+            lines.append('{}.retries:{}|c{}'.format(self.prefix, retries, tags))
+        if capacity:
+            lines.append('{}.capacity:{}|c{}'.format(self.prefix, capacity, tags))
+        if error:
+            lines.append('{}.errors:1|c{}'.format(self.prefix, tags))
+        self._send(lines)
+
+    def charge(self, table_name, operation, capacity):
+        tags = '|#table:{},operation:{}'.format(table_name, operation)
+        self._send(['{}.capacity:{}|c{}'.format(self.prefix, capacity, tags)])
+
+    def _send(self, lines):
+        try:
+            self._socket.sendto('\n'.join(lines).encode('utf-8'), self.address)
+        except socket.error:
+            pass
+
+
+def request_stats():
+    """
+    The :class:`RequestStats` for the current request (or app context).
+
+    :returns: The stats, or ``None`` if we're outside an app context.
+    """
+    if not has_app_context():
+        return None
+    try:
+        return g._dynamo_stats
+    except AttributeError:
+        stats = g._dynamo_stats = RequestStats()
+        return stats
+
+
+def _table_name(params):
+    if 'TableName' in params:
+        return params['TableName']
+    if 'RequestItems' in params:
+        return '+'.join(sorted(params['RequestItems']))
+    if 'TransactItems' in params:
+        return '+'.join(sorted(set(
+            request['TableName'] for item in params['TransactItems'] for request in item.values()
+        )))
+    return ''
+
+
+def _capacity(parsed, table_name):
+    """The capacity units a call consumed, by table."""
+    consumed = parsed.get('ConsumedCapacity')
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    capacity = {}
+    for c in consumed or ():
+        name = c.get('TableName', table_name)
+        capacity[name] = capacity.get(name, 0) + c.get('CapacityUnits', 0)
+    return capacity
+
+
+class _Call(object):
+
+    __slots__ = ('table_name', 'operation', 'bytes_sent', 'started')
+
+    def __init__(self, table_name, operation):
+        self.table_name = table_name
+        self.operation = operation
+        self.bytes_sent = 0
+        self.started = None
+
+
+class Instrumentation(object):
+    """
+    Records every DynamoDB call into per-request :class:`RequestStats`, and
+    (optionally) a :class:`MetricsSink`.
+
+    :param obj sink: A :class:`MetricsSink` (optional).
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+
+    def register(self, events):
+        """
+        Hook this instrumentation into a client's botocore event system.
+
+        :param obj events: A client's ``meta.events``.
+        """
+        def before_build(params, model, context=None, **kwargs):
+            if model.input_shape is not None and 'ReturnConsumedCapacity' in model.input_shape.members:
+                params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+            if context is not None:
+                context['flask_dynamo_metrics'] = _Call(_table_name(params), model.name)
+
+        def before_call(params, context=None, **kwargs):
+            call = (context or {}).get('flask_dynamo_metrics')
+            if call is not None:
+                call.bytes_sent = len(params.get('body') or b'')
+                call.started = perf_counter()
+
+        def after_call(http_response, parsed, context=None, **kwargs):
+            call = (context or {}).get('flask_dynamo_metrics')
+            if call is not None:
+                retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+                received = len(http_response.content or b'') if http_response is not None else 0
+                self._finish(call, retries, received, _capacity(parsed, call.table_name), 'Error' in parsed)
+
+        def after_call_error(context=None, **kwargs):
+            call = (context or {}).get('flask_dynamo_metrics')
+            if call is not None:
+                self._finish(call, 0, 0, {}, True)
+
+        events.register('before-parameter-build.dynamodb', before_build)
+        events.register('before-call.dynamodb', before_call)
+        events.register('after-call.dynamodb', after_call)
+        events.register('after-call-error.dynamodb', after_call_error)
+
+    def _finish(self, call, retries, bytes_received, capacity, error):
+        latency = perf_counter() - call.started if call.started is not None else 0.0
+        own = capacity.pop(call.table_name, 0.0)
+        self.record(call.table_name, call.operation, latency, retries, call.bytes_sent, bytes_received, own, error)
+        for table_name, units in sorted(capacity.items()):
+            self.charge(table_name, call.operation, units)
+
+    def record(self, table_name, operation, latency, retries, bytes_sent, bytes_received, capacity, error):
+        """Record a call in the current request's stats, and in our sink."""
+        stats = request_stats()
+        if stats is not None:
+            stats.record(table_name, operation, latency, retries, bytes_sent, bytes_received, capacity, error)
+        if self.sink is not None:
+            self.sink.record(table_name, operation, latency, retries, bytes_sent, bytes_received, capacity, error)
+
+    def charge(self, table_name, operation, capacity):
+        """Charge one table's share of a multi-table call's capacity."""
+        stats = request_stats()
+        if stats is not None:
+            stats.charge(table_name, operation, capacity)
+        if self.sink is not None:
+            self.sink.charge(table_name, operation, capacity)
@@ -0,0 +1,218 @@
+"""Streaming Query / Scan pagination."""
+
+import json
+from base64 import b64decode, b64encode, urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from contextvars import copy_context
+from decimal import Decimal, InvalidOperation
+from threading import Event, Thread
+
+from .errors import InvalidCursorError
+
+
+#: The :attr:`ItemIterator.cursor` of an iterator that has handed out every
+#: item.  Resuming from it gives an empty iterator, rather than starting over.
+END_CURSOR = 'end'
+
+
+def encode_cursor(table_name, index_name, key):
+    """
+    Encode a key as an opaque, URL-safe cursor.
+
+    :param str table_name: The table the key is from.
+    :param str index_name: The index the key is from (or ``None``).
+    :param dict key: The key attributes (plain Python values).
+    """
+    attributes = {}
+    for name, value in key.items():
+        value = getattr(value, 'value', value)
+        if isinstance(value, str):
+            attributes[name] = ['S', value]
+        elif isinstance(value, (bytes, bytearray)):
+            attributes[name] = ['B', b64encode(bytes(value)).decode('ascii')]
+        else:
+            attributes[name] = ['N', str(value)]
+    data = json.dumps({'t': table_name, 'i': index_name, 'k': attributes}, separators=(',', ':'), sort_keys=True)
+    return urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(table_name, index_name, cursor):
+    """
+    Decode a cursor made by :func:`encode_cursor`.
+
+    :returns: The key, as an ``ExclusiveStartKey``.
+    :raises: InvalidCursorError
+    """
+    try:
+        data = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8'))
+        if data['t'] != table_name or data['i'] != index_name:
+            raise InvalidCursorError('This cursor is for a different table or index.')
+        key = {}
+        for name, (kind, value) in data['k'].items():
+            if kind == 'S':
+                key[name] = value
+            elif kind == 'N':
+                key[name] = Decimal(value)
+            elif kind == 'B':
+                key[name] = b64decode(value)
+            else:
+                raise InvalidCursorError('Invalid cursor.')
+        return key
+    except (BinasciiError, InvalidOperation, KeyError, TypeError, ValueError, AttributeError) as e:
+        if isinstance(e, InvalidCursorError):
+            raise
+        raise InvalidCursorError('Invalid cursor.')
+
+
+def _projected_names(expression, names):
+    """The top-level attribute names a projection expression asks for."""
+    paths = (path.strip().split('.')[0].split('[')[0] for path in expression.split(','))
+    return set(names.get(path, path) for path in paths)
+
+
+class _Prefetch(object):
+    """Runs a call on a background thread (in a copy of the caller's context)."""
+
+    def __init__(self, func, kwargs):
+        self._done = Event()
+        self._result = None
+        self._error = None
+        context = copy_context()
+        thread = Thread(target=context.run, args=(self._run, func, kwargs))
+        thread.daemon = True
+        thread.start()
+
+    def _run(self, func, kwargs):
+        try:
+            self._result = func(**kwargs)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def result(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class ItemIterator(object):
+    """
+    Lazily iterates over the items from a Query or Scan.
+
+    Items are fetched a page at a time, and (if ``prefetch`` is set) the next
+    page is fetched in the background while the caller works through the
+    current one.  Items are let go of as they're handed out, so at most two
+    pages are held in memory at once, no matter how many items there are.
+
+    :attr:`cursor` is an opaque string marking the position after the last
+    item handed out, which can be passed back in (eg: from an API client) to
+    pick up where this iterator left off.  It's ``None`` before any item has
+    been handed out, and :data:`END_CURSOR` once every item has.
+    """
+
+    def __init__(self, fetch, table_name, index_name, key_names, kwargs, cursor=None, attributes=None, prefetch=True):
+        """
+        :param func fetch: The ``query`` or ``scan`` method of a Table.
+        :param str table_name: The table name.
+        :param str index_name: The index name (or ``None``).
+        :param list key_names: The key attribute names for the table and
+            index, which every item needs for :attr:`cursor`.
+        :param dict kwargs: The ``Query`` / ``Scan`` parameters.
+        :param str cursor: A :attr:`cursor` to resume from (optional).
+        :param list attributes: The attributes to fetch (optional).  This is
+            turned into a ``ProjectionExpression``.
+        :param bool prefetch: Fetch the next page in the background.
+        :raises: InvalidCursorError
+        """
+        self.table_name = table_name
+        self.index_name = index_name
+        self._fetch = fetch
+        self._key_names = key_names
+        self._prefetch = prefetch
+        self._kwargs = self._project(dict(kwargs), attributes)
+        if cursor and cursor != END_CURSOR:
+            self._kwargs['ExclusiveStartKey'] = decode_cursor(table_name, index_name, cursor)
+        self._cursor = cursor or None
+        self._items = []
+        self._position = 0
+        self._next = None
+        self._done = cursor == END_CURSOR
+        #: How many pages have been fetched so far.
+        self.pages = 0
+
+    def _project(self, kwargs, attributes):
+        """
+        Build the projection, making sure it includes the key attributes
+        (which are stripped back out of items, if they weren't asked for).
+        """
+        self._strip = ()
+        if attributes is not None:
+            names = dict(kwargs.get('ExpressionAttributeNames') or {})
+            placeholders = []
+            for i, name in enumerate(attributes):
+                names['#fdp{}'.format(i)] = name
+                placeholders.append('#fdp{}'.format(i))
+            kwargs['ProjectionExpression'] = ', '.join(placeholders)
+            kwargs['ExpressionAttributeNames'] = names
+        if kwargs.get('ProjectionExpression'):
+            names = dict(kwargs.get('ExpressionAttributeNames') or {})
+            missing = [name for name in self._key_names if name not in _projected_names(kwargs['ProjectionExpression'], names)]
+            for i, name in enumerate(missing):
+                names['#fdk{}'.format(i)] = name
+                kwargs['ProjectionExpression'] += ', #fdk{}'.format(i)
+            kwargs['ExpressionAttributeNames'] = names
+            self._strip = frozenset(missing)
+        return kwargs
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self._position >= len(self._items):
+            if self._done:
+                raise StopIteration
+            self._load()
+        item = self._items[self._position]
+        self._items[self._position] = None
+        self._position += 1
+        self._cursor = item
+        if self._strip:
+            item = dict((k, v) for k, v in item.items() if k not in self._strip)
+        return item
+
+    def _load(self):
+        if self._next is not None:
+            response = self._next.result()
+        else:
+            response = self._fetch(**self._kwargs)
+        self.pages += 1
+        last_key = response.get('LastEvaluatedKey')
+        self._items = response.get('Items', [])
+        self._position = 0
+        self._done = last_key is None
+        self._next = None
+        if last_key is not None:
+            self._kwargs['ExclusiveStartKey'] = last_key
+            if self._prefetch:
+                self._next = _Prefetch(self._fetch, dict(self._kwargs))
+
+    @property
+    def done(self):
+        """Whether every item has been handed out."""
+        return self._done and self._position >= len(self._items)
+
+    @property
+    def cursor(self):
+        """
+        An opaque cursor for resuming after the last item handed out:
+        ``None`` if nothing has been handed out yet, or :data:`END_CURSOR`
+        once everything has.
+        """
+        if self.done:
+            return END_CURSOR
+        if isinstance(self._cursor, dict):
+            key = dict((name, self._cursor[name]) for name in self._key_names)
+            self._cursor = encode_cursor(self.table_name, self.index_name, key)
+        return self._cursor
@@ -0,0 +1,303 @@
+"""A sampling profiler for scans, filter waste and hot partition keys."""
+
+import atexit
+import json
+import logging
+import os
+import re
+from glob import glob
+from random import random
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import monotonic
+from weakref import WeakSet
+
+from flask import has_request_context, request
+
+from .schema import parse_tables
+
+
+READ_OPERATIONS = frozenset(['Scan', 'Query'])
+KEY_OPERATIONS = frozenset(['GetItem', 'PutItem', 'UpdateItem', 'DeleteItem', 'Query'])
+_EQUALITY = re.compile(r'(#?[\w.]+)\s*=\s*(:\w+)')
+
+logger = logging.getLogger(__name__)
+
+
+class SpaceSaving(object):
+    """
+    The Space-Saving heavy hitters sketch.
+
+    Tracks (approximately) the most frequent keys in a stream using at most
+    ``capacity`` counters.  When a new key arrives and every counter is in
+    use, it takes over the smallest counter, and inherits its count as an
+    upper bound on its error.  Any key seen more than ``total / capacity``
+    times is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, key, count=1):
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = count
+            self.errors[key] = 0
+        else:
+            smallest = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(smallest)
+            del self.errors[smallest]
+            self.counts[key] = floor + count
+            self.errors[key] = floor
+
+    def top(self, n=None):
+        """The ``(key, count, error)`` tuples, most frequent first."""
+        ranked = sorted(self.counts.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [(key, count, self.errors[key]) for key, count in ranked[:n]]
+
+    def merge(self, top):
+        """Fold in the :meth:`top` of another sketch (eg: from another process)."""
+        for key, count, error in top:
+            self.counts[key] = self.counts.get(key, 0) + count
+            self.errors[key] = self.errors.get(key, 0) + error
+        for key, _, _ in self.top()[self.capacity:]:
+            del self.counts[key]
+            del self.errors[key]
+
+
+def _unwrap(value):
+    """Turn a (possibly wire format) key value into a string."""
+    if isinstance(value, dict) and len(value) == 1:
+        value = next(iter(value.values()))
+    return str(value)
+
+
+class Profiler(object):
+    """
+    Watches DynamoDB calls for common performance problems.
+
+    - Scans (and big unbounded Queries) made while handling a request.
+    - Filter waste: items DynamoDB read (and billed) versus items returned.
+    - Hot partition keys, per table, using a :class:`SpaceSaving` sketch.
+
+    Only a ``sample_rate`` fraction of calls are looked at.  Each process
+    periodically (and at exit) dumps its profile to ``path`` as ``<pid>.json``, and
+    :meth:`load` merges them back together.
+
+    :param list table_config: The ``DYNAMO_TABLES`` setting.
+    :param float sample_rate: The fraction of calls to profile.
+    :param int top_keys: The number of hot keys to track per table.
+    :param str path: The directory to dump profiles to.
+    :param int dump_interval: The most seconds between dumps.
+    :param int large_query: Unbounded Queries reading this many items are
+        flagged.
+    """
+
+    def __init__(self, table_config, sample_rate=1.0, top_keys=20, path=None, dump_interval=60, large_query=1000,
+                 clock=monotonic, random=random):
+        self.sample_rate = sample_rate
+        self.top_keys = top_keys
+        self.path = path
+        self.dump_interval = dump_interval
+        self.large_query = large_query
+        self.flagged = {}
+        self.reads = {}
+        self.sketches = {}
+        self._hash_keys = {}
+        for schema in parse_tables(table_config).values():
+            self._hash_keys[(schema.name, None)] = schema.hash_key
+            for index in schema.indexes.values():
+                self._hash_keys[(schema.name, index.name)] = index.hash_key
+        self._clock = clock
+        self._random = random
+        self._dumped = clock()
+        self._lock = Lock()
+        self._dump_lock = Lock()
+        _profilers.add(self)
+
+    def _partition_key(self, operation, params):
+        hash_key = self._hash_keys.get((params.get('TableName'), params.get('IndexName')))
+        if hash_key is None:
+            return None
+        if operation == 'Query':
+            names = params.get('ExpressionAttributeNames', {})
+            values = params.get('ExpressionAttributeValues', {})
+            for name, value in _EQUALITY.findall(params.get('KeyConditionExpression') or ''):
+                if names.get(name, name) == hash_key and value in values:
+                    return _unwrap(values[value])
+            return None
+        key = params.get('Item') if operation == 'PutItem' else params.get('Key')
+        if key and hash_key in key:
+            return _unwrap(key[hash_key])
+
+    def before_call(self, operation, params):
+        """
+        Decide whether to sample a call, and note its hot key.
+
+        :returns: What :meth:`after_call` needs, or ``None`` if the call
+            isn't sampled.
+        """
+        if self._random() >= self.sample_rate:
+            return None
+        table_name = params.get('TableName')
+        if operation in KEY_OPERATIONS:
+            key = self._partition_key(operation, params)
+            if key is not None:
+                with self._lock:
+                    try:
+                        sketch = self.sketches[table_name]
+                    except KeyError:
+                        sketch = self.sketches[table_name] = SpaceSaving(self.top_keys)
+                    sketch.add(key)
+        if operation not in READ_OPERATIONS:
+            return None
+        endpoint = None
+        if has_request_context():
+            endpoint = '{} {}'.format(request.method, request.url_rule.rule if request.url_rule else request.path)
+        return (table_name, params.get('IndexName'), 'Limit' in params, endpoint)
+
+    def after_call(self, operation, sample, parsed):
+        """Record a sampled Scan or Query's results."""
+        table_name, index_name, limited, endpoint = sample
+        scanned = parsed.get('ScannedCount', 0)
+        returned = parsed.get('Count', 0)
+        reason = None
+        if endpoint is not None:
+            if operation == 'Scan':
+                reason = 'scan'
+            elif not limited and ('LastEvaluatedKey' in parsed or scanned >= self.large_query):
+                reason = 'large query'
+
+        with self._lock:
+            reads = self.reads.setdefault((table_name, operation, index_name), [0, 0, 0])
+            reads[0] += 1
+            reads[1] += scanned
+            reads[2] += returned
+            if reason is not None:
+                flag = (table_name, operation, endpoint, reason)
+                self.flagged[flag] = self.flagged.get(flag, 0) + 1
+
+    def register(self, events):
+        """
+        Hook this profiler into a client's botocore event system.
+
+        :param obj events: A client's ``meta.events``.
+        """
+        def before_build(params, model, context=None, **kwargs):
+            sample = self.before_call(model.name, params)
+            if sample is not None and context is not None:
+                context['flask_dynamo_profile'] = sample
+
+        def after_call(parsed, model, context=None, **kwargs):
+            if context is not None and 'flask_dynamo_profile' in context and 'Error' not in parsed:
+                self.after_call(model.name, context['flask_dynamo_profile'], parsed)
+            if self.path and self._clock() - self._dumped >= self.dump_interval:
+                self._dump_from_call()
+
+        events.register('before-parameter-build.dynamodb', before_build)
+        events.register('after-call.dynamodb', after_call)
+
+    def report(self):
+        """This process' profile, as a JSON-friendly dict."""
+        with self._lock:
+            return {
+                'sample_rate': self.sample_rate,
+                'flagged': [
+                    {'table': t, 'operation': o, 'endpoint': e, 'reason': r, 'count': c}
+                    for (t, o, e, r), c in self.flagged.items()
+                ],
+                'reads': [
+                    {'table': t, 'operation': o, 'index': i, 'calls': calls, 'scanned': scanned, 'returned': returned}
+                    for (t, o, i), (calls, scanned, returned) in self.reads.items()
+                ],
+                'hot_keys': dict(
+                    (table_name, [list(top) for top in sketch.top()])
+                    for table_name, sketch in self.sketches.items()
+                ),
+            }
+
+    def dump(self):
+        """Write this process' profile to ``<path>/<pid>.json``."""
+        with self._dump_lock:
+            self._dump()
+
+    def _dump(self):
+        self._dumped = self._clock()
+        os.makedirs(self.path, exist_ok=True)
+        with NamedTemporaryFile('w', dir=self.path, suffix='.tmp', delete=False) as f:
+            json.dump(self.report(), f)
+        try:
+            os.replace(f.name, os.path.join(self.path, '{}.json'.format(os.getpid())))
+        except OSError:
+            os.remove(f.name)
+            raise
+
+    def _dump_from_call(self):
+        """
+        Dump from inside a DynamoDB call, unless another thread already is.
+
+        Errors are logged rather than raised, so a full disk never breaks
+        the call itself.
+        """
+        if not self._dump_lock.acquire(False):
+            return
+        try:
+            if self._clock() - self._dumped >= self.dump_interval:
+                self._dump()
+        except Exception:
+            logger.exception('Unable to dump the DynamoDB profile to %s.', self.path)
+        finally:
+            self._dump_lock.release()
+
+    @classmethod
+    def load(cls, path, top_keys=20):
+        """
+        Merge every profile dumped to ``path`` into one ranked report.
+
+        Flagged calls are ranked by count, reads by wasted items (scanned but
+        not returned), and hot keys by count.
+        """
+        flagged, reads, sketches = {}, {}, {}
+        for filename in sorted(glob(os.path.join(path, '*.json'))):
+            with open(filename) as f:
+                report = json.load(f)
+            for flag in report['flagged']:
+                key = (flag['table'], flag['operation'], flag['endpoint'], flag['reason'])
+                flagged[key] = flagged.get(key, 0) + flag['count']
+            for read in report['reads']:
+                total = reads.setdefault((read['table'], read['operation'], read['index']), [0, 0, 0])
+                total[0] += read['calls']
+                total[1] += read['scanned']
+                total[2] += read['returned']
+            for table_name, top in report['hot_keys'].items():
+                sketches.setdefault(table_name, SpaceSaving(top_keys)).merge(top)
+
+        return {
+            'flagged': [
+                {'table': t, 'operation': o, 'endpoint': e, 'reason': r, 'count': c}
+                for (t, o, e, r), c in sorted(flagged.items(), key=lambda pair: -pair[1])
+            ],
+            'reads': [
+                {'table': t, 'operation': o, 'index': i, 'calls': calls, 'scanned': scanned, 'returned': returned}
+                for (t, o, i), (calls, scanned, returned) in sorted(reads.items(), key=lambda pair: pair[1][2] - pair[1][1])
+            ],
+            'hot_keys': dict((table_name, sketch.top()) for table_name, sketch in sketches.items()),
+        }
+
+
+_profilers = WeakSet()
+
+
+def _dump_profilers():
+    """Dump every profiler at exit, logging (rather than raising) errors."""
+    for profiler in list(_profilers):
+        try:
+            profiler.dump()
+        except Exception:
+            logger.exception('Unable to dump the DynamoDB profile to %s.', profiler.path)
+
+
+atexit.register(_dump_profilers)
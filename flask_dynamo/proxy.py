@@ -0,0 +1,19 @@
+"""Table proxies."""
+
+
+class TableProxy(object):
+    """
+    Base class for objects that wrap a boto3 Table.
+
+    Anything a proxy doesn't override is passed straight through to the
+    wrapped table, so proxies can be stacked on top of each other.
+    """
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getattr__(self, name):
+        return getattr(self._table, name)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._table)
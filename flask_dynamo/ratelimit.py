@@ -0,0 +1,206 @@
+"""Client-side rate limiting."""
+
+from threading import Lock
+from time import monotonic, sleep as _sleep
+
+
+READ_OPERATIONS = frozenset(['GetItem', 'Query', 'Scan', 'BatchGetItem', 'TransactGetItems'])
+WRITE_OPERATIONS = frozenset(['PutItem', 'UpdateItem', 'DeleteItem', 'BatchWriteItem', 'TransactWriteItems'])
+THROTTLE_CODES = frozenset([
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+])
+
+
+class TokenBucket(object):
+    """
+    A thread-safe token bucket with an adaptive refill rate.
+
+    Tokens refill at ``rate`` per second, up to ``capacity``.  Callers may
+    take more tokens than are available, in which case the bucket goes into
+    debt and later callers wait for it to be paid off -- this lets us charge
+    the *actual* capacity a call consumed after the fact.
+
+    The rate is halved every time DynamoDB throttles us, and creeps back up
+    towards ``max_rate`` on every successful call.
+    """
+
+    def __init__(self, rate, capacity=None, min_rate=None, clock=monotonic, sleep=_sleep):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate is not None else self.max_rate / 16
+        self.capacity = float(capacity) if capacity is not None else self.max_rate
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, units=1):
+        """Block until the bucket isn't in debt, then take ``units`` tokens."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens > 0:
+                    self.tokens -= units
+                    return
+                delay = -self.tokens / self.rate + 1e-3
+            self._sleep(delay)
+
+    def charge(self, units):
+        """Take (or, if negative, give back) tokens without blocking."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - units)
+
+    def throttled(self):
+        """Back off after being throttled by DynamoDB."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self):
+        """Recover a little of our rate after a successful call."""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter(object):
+    """
+    Token buckets for every table and index in ``DYNAMO_TABLES``.
+
+    Buckets are sized from each table's (and global secondary index's)
+    ``ProvisionedThroughput``.  Tables without provisioned throughput (eg:
+    ``PAY_PER_REQUEST`` tables) are not limited.
+
+    The limiter hooks into botocore's event system (see :meth:`register`):
+    it takes an estimated number of tokens before each call, then corrects
+    the estimate with the ``ConsumedCapacity`` DynamoDB sends back.
+    """
+
+    def __init__(self, table_config, clock=monotonic, sleep=_sleep):
+        self.buckets = {}
+        for table in table_config:
+            self._add(table['TableName'], None, table.get('ProvisionedThroughput'), clock, sleep)
+            for index in table.get('GlobalSecondaryIndexes', ()):
+                self._add(table['TableName'], index['IndexName'], index.get('ProvisionedThroughput'), clock, sleep)
+
+    def _add(self, table_name, index_name, throughput, clock, sleep):
+        if not throughput:
+            return
+        for kind, setting in (('read', 'ReadCapacityUnits'), ('write', 'WriteCapacityUnits')):
+            if throughput.get(setting):
+                self.buckets[(table_name, index_name, kind)] = TokenBucket(throughput[setting], clock=clock, sleep=sleep)
+
+    def bucket(self, table_name, index_name, kind):
+        """Get the bucket for a table (or index), or ``None`` if it isn't limited."""
+        return self.buckets.get((table_name, index_name, kind))
+
+    @staticmethod
+    def _kind(operation):
+        if operation in READ_OPERATIONS:
+            return 'read'
+        if operation in WRITE_OPERATIONS:
+            return 'write'
+
+    @staticmethod
+    def _estimate(operation, params):
+        """Guess how many units a call will consume, by table (and index)."""
+        if operation in ('BatchGetItem', 'BatchWriteItem'):
+            return dict(
+                ((table_name, None), float(len(request['Keys'] if operation == 'BatchGetItem' else request)))
+                for table_name, request in params.get('RequestItems', {}).items()
+            )
+        if operation in ('TransactGetItems', 'TransactWriteItems'):
+            estimate = {}
+            for item in params.get('TransactItems', ()):
+                for request in item.values():
+                    key = (request['TableName'], None)
+                    estimate[key] = estimate.get(key, 0) + 2.0
+            return estimate
+        if 'TableName' not in params:
+            return {}
+        return {(params['TableName'], params.get('IndexName')): 1.0}
+
+    def before_call(self, operation, params):
+        """
+        Wait for capacity before a call.
+
+        :returns: The estimate we charged, to pass to :meth:`after_call`.
+        """
+        kind = self._kind(operation)
+        if kind is None:
+            return {}
+        estimate = self._estimate(operation, params)
+        for (table_name, index_name), units in estimate.items():
+            bucket = self.bucket(table_name, index_name, kind)
+            if bucket is not None:
+                bucket.acquire(units)
+        return estimate
+
+    def after_call(self, operation, estimate, parsed):
+        """Correct our estimate with the capacity a call actually consumed."""
+        kind = self._kind(operation)
+        if kind is None:
+            return
+        consumed = parsed.get('ConsumedCapacity')
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+
+        actual = {}
+        for capacity in consumed or ():
+            table_name = capacity['TableName']
+            table_units = capacity.get('Table', {}).get('CapacityUnits', capacity.get('CapacityUnits', 0))
+            actual[(table_name, None)] = actual.get((table_name, None), 0) + table_units
+            for index_name, index in capacity.get('GlobalSecondaryIndexes', {}).items():
+                key = (table_name, index_name)
+                actual[key] = actual.get(key, 0) + index.get('CapacityUnits', 0)
+
+        for key in set(estimate) | set(actual):
+            bucket = self.bucket(key[0], key[1], kind)
+            if bucket is None:
+                continue
+            if key in actual:
+                bucket.charge(actual[key] - estimate.get(key, 0))
+            bucket.succeeded()
+
+    def throttled(self, operation, params):
+        """Back off every bucket involved in a throttled call."""
+        kind = self._kind(operation)
+        for table_name, index_name in self._estimate(operation, params):
+            bucket = self.bucket(table_name, index_name, kind)
+            if bucket is not None:
+                bucket.throttled()
+
+    def register(self, events):
+        """
+        Hook this limiter into a client's botocore event system.
+
+        :param obj events: A client's ``meta.events``.
+        """
+        def before_build(params, model, context=None, **kwargs):
+            # This has to happen here rather than in provide-client-params,
+            # where botocore swaps in a copy of the params.
+            if model.input_shape is not None and 'ReturnConsumedCapacity' in model.input_shape.members:
+                params.setdefault('ReturnConsumedCapacity', 'INDEXES')
+            if context is not None:
+                context['flask_dynamo_rate'] = (params, self.before_call(model.name, params))
+
+        def needs_retry(response, operation, request_dict, **kwargs):
+            if response is not None and response[1].get('Error', {}).get('Code') in THROTTLE_CODES:
+                params = request_dict.get('context', {}).get('flask_dynamo_rate', ({}, None))[0]
+                self.throttled(operation.name, params)
+
+        def after_call(parsed, model, context=None, **kwargs):
+            if context is not None and 'flask_dynamo_rate' in context and 'Error' not in parsed:
+                self.after_call(model.name, context['flask_dynamo_rate'][1], parsed)
+
+        events.register('before-parameter-build.dynamodb', before_build)
+        events.register('needs-retry.dynamodb', needs_retry)
+        events.register('after-call.dynamodb', after_call)
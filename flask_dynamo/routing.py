@@ -0,0 +1,157 @@
+"""Multi-region read routing."""
+
+from threading import Lock
+from time import monotonic
+
+from .proxy import TableProxy
+from .ratelimit import THROTTLE_CODES
+
+
+def is_failover_error(error):
+    """
+    Whether an error means we should retry a read in another region.
+
+    That's connection errors, timeouts, throttling and server errors --
+    anything else (eg: a bad request) would fail in every region.
+    """
+    from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return True
+    if isinstance(error, ClientError):
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+        return status >= 500 or error.response.get('Error', {}).get('Code') in THROTTLE_CODES
+    return False
+
+
+class RegionRouter(object):
+    """
+    Picks which region to read from.
+
+    Regions are tried in preference order (nearest first), skipping any that
+    recently failed, and demoting any that are much slower than the fastest
+    healthy region.  Latencies are tracked as moving averages, and are
+    forgotten after a while so that slow regions get re-measured.
+
+    :param list regions: The region names, in order of preference.
+    :param float cooldown: Seconds to avoid a region for after it fails.
+    :param float slow_factor: Regions more than this many times slower than
+        the fastest healthy region are demoted.
+    :param float probe_interval: Seconds after which a region's latency is
+        forgotten.
+    """
+
+    #: The weight given to each new latency sample.
+    ALPHA = 0.2
+
+    def __init__(self, regions, cooldown=30, slow_factor=2.0, probe_interval=60, clock=monotonic):
+        self.regions = list(regions)
+        self.cooldown = cooldown
+        self.slow_factor = slow_factor
+        self.probe_interval = probe_interval
+        self.latency = dict.fromkeys(self.regions)
+        self._measured = dict.fromkeys(self.regions, 0)
+        self._down_until = dict.fromkeys(self.regions, 0)
+        self._clock = clock
+        self._lock = Lock()
+
+    def order(self):
+        """The regions to try, best first."""
+        now = self._clock()
+        with self._lock:
+            for region in self.regions:
+                if self.latency[region] is not None and now - self._measured[region] > self.probe_interval:
+                    self.latency[region] = None
+            healthy = [r for r in self.regions if self._down_until[r] <= now]
+            down = sorted((r for r in self.regions if self._down_until[r] > now), key=self._down_until.get)
+            known = [self.latency[r] for r in healthy if self.latency[r] is not None]
+            if not known:
+                return healthy + down
+            limit = min(known) * self.slow_factor
+            fast = [r for r in healthy if self.latency[r] is None or self.latency[r] <= limit]
+            slow = sorted((r for r in healthy if r not in fast), key=self.latency.get)
+            return fast + slow + down
+
+    def succeeded(self, region, latency):
+        """Record a successful read's latency."""
+        with self._lock:
+            previous = self.latency[region]
+            self.latency[region] = latency if previous is None else previous + self.ALPHA * (latency - previous)
+            self._measured[region] = self._clock()
+            self._down_until[region] = 0
+
+    def failed(self, region):
+        """Take a region out of rotation for a while."""
+        with self._lock:
+            self._down_until[region] = self._clock() + self.cooldown
+
+    def call(self, func):
+        """
+        Call ``func(region)``, failing over to the next region on errors.
+
+        :raises: The last region's error, if every region fails.
+        """
+        error = None
+        for region in self.order():
+            started = self._clock()
+            try:
+                result = func(region)
+            except Exception as e:
+                if not is_failover_error(e):
+                    raise
+                self.failed(region)
+                error = e
+                continue
+            self.succeeded(region, self._clock() - started)
+            return result
+        raise error
+
+
+class RoutedTable(TableProxy):
+    """
+    A boto3 Table whose eventually consistent reads are routed by a
+    :class:`RegionRouter`.
+
+    ``get_item``, ``query`` and ``scan`` go to the best replica region of a
+    global table.  Strongly consistent reads (``ConsistentRead=True``) and
+    all writes go to the table's home region, since that's the only place
+    they are consistent.
+    """
+
+    def __init__(self, table, router, home_region, connection_factory):
+        """
+        :param obj table: The Table in the home region.
+        :param obj router: The :class:`RegionRouter`.
+        :param str home_region: The home region name.
+        :param func connection_factory: Returns the DynamoDB resource for a
+            region name.
+        """
+        super(RoutedTable, self).__init__(table)
+        self._router = router
+        self._home_region = home_region
+        self._connection_factory = connection_factory
+        self._replicas = {}
+
+    def replica(self, region):
+        """The Table in a given region."""
+        if region == self._home_region:
+            return self._table
+        try:
+            return self._replicas[region]
+        except KeyError:
+            table = self._replicas[region] = self._connection_factory(region).Table(self._table.name)
+            return table
+
+    def _read(self, method, kwargs):
+        if kwargs.get('ConsistentRead'):
+            return getattr(self._table, method)(**kwargs)
+        return self._router.call(lambda region: getattr(self.replica(region), method)(**kwargs))
+
+    def get_item(self, **kwargs):
+        return self._read('get_item', kwargs)
+
+    def query(self, **kwargs):
+        return self._read('query', kwargs)
+
+    def scan(self, **kwargs):
+        return self._read('scan', kwargs)
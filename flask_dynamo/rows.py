@@ -0,0 +1,217 @@
+"""Compact result sets."""
+
+from array import array
+from collections.abc import Mapping
+
+
+class _Missing(object):
+
+    def __repr__(self):
+        return 'MISSING'
+
+    def __bool__(self):
+        return False
+
+
+#: Stands in for attributes an item doesn't have.
+MISSING = _Missing()
+
+
+class Schema(object):
+    """The attribute names seen so far in a result set, in order."""
+
+    __slots__ = ('names', 'index')
+
+    def __init__(self, names=()):
+        self.names = []
+        self.index = {}
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        """Add an attribute name, and return its position."""
+        position = self.index[name] = len(self.names)
+        self.names.append(name)
+        return position
+
+
+class Row(Mapping):
+    """
+    A single item, stored as a tuple of values.
+
+    Attribute names live once in the result set's :class:`Schema` rather
+    than in every item.  Rows are read-only mappings (``row['name']``,
+    ``row.get('name')``, ``'name' in row``...), and attributes can also be
+    read as Python attributes (``row.name``) when their names allow it.
+    Use :meth:`to_dict` for a plain ``dict`` copy.
+    """
+
+    __slots__ = ('_schema', '_values')
+
+    def __init__(self, schema, values):
+        self._schema = schema
+        self._values = values
+
+    def __getitem__(self, name):
+        position = self._schema.index.get(name)
+        if position is None or position >= len(self._values) or self._values[position] is MISSING:
+            raise KeyError(name)
+        return self._values[position]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __iter__(self):
+        for name, value in zip(self._schema.names, self._values):
+            if value is not MISSING:
+                yield name
+
+    def __len__(self):
+        return sum(1 for value in self._values if value is not MISSING)
+
+    def __repr__(self):
+        return 'Row({!r})'.format(self.to_dict())
+
+    def to_dict(self):
+        """A plain ``dict`` copy of this item."""
+        return dict((name, value) for name, value in zip(self._schema.names, self._values) if value is not MISSING)
+
+
+class Records(list):
+    """
+    A list of :class:`Row` objects, decoded straight from DynamoDB's wire
+    format.
+
+    :param func decode: Decodes a single attribute value (see
+        :func:`flask_dynamo.codec.deserializer`).
+    """
+
+    def __init__(self, decode):
+        super(Records, self).__init__()
+        self.schema = Schema()
+        self._decode = decode
+
+    def add_items(self, items):
+        """Decode and append wire format items."""
+        schema = self.schema
+        index = schema.index
+        decode = self._decode
+        append = self.append
+        for item in items:
+            values = [MISSING] * len(schema.names)
+            for name, value in item.items():
+                position = index.get(name)
+                if position is None:
+                    position = schema.add(name)
+                    values.append(MISSING)
+                values[position] = decode(value)
+            append(Row(schema, tuple(values)))
+
+    def to_dicts(self):
+        """A list of plain ``dict`` items."""
+        return [row.to_dict() for row in self]
+
+
+class Columns(object):
+    """
+    A column-oriented result set, decoded straight from DynamoDB's wire
+    format.
+
+    Each attribute is stored as one column.  When numbers are decoded as
+    ``int`` / ``float``, columns holding nothing but ``int`` (or nothing but
+    ``float``) values are kept in an :class:`array.array`, at 8 bytes a
+    value -- everything else is kept in a list, with :data:`MISSING` for
+    items that don't have the attribute.
+
+    :param func decode: Decodes a single attribute value (see
+        :func:`flask_dynamo.codec.deserializer`).
+    """
+
+    def __init__(self, decode):
+        self.columns = {}
+        self._length = 0
+        self._decode = decode
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def names(self):
+        """The attribute names, in the order they were first seen."""
+        return list(self.columns)
+
+    def column(self, name):
+        """Get a column (an ``array`` or a ``list``) by attribute name."""
+        return self.columns[name]
+
+    def add_items(self, items):
+        """Decode and append wire format items."""
+        columns = self.columns
+        decode = self._decode
+        for item in items:
+            length = self._length
+            for name, value in item.items():
+                value = decode(value)
+                column = columns.get(name)
+                if column is None:
+                    columns[name] = self._new_column(value, length)
+                    continue
+                if type(column) is array and not self._fits(column, value):
+                    column = columns[name] = list(column)
+                column.append(value)
+            self._length = length = length + 1
+            for name, column in columns.items():
+                if len(column) < length:
+                    if type(column) is array:
+                        column = columns[name] = list(column)
+                    column.append(MISSING)
+
+    @staticmethod
+    def _new_column(value, length):
+        if not length:
+            if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+                return array('q', [value])
+            if type(value) is float:
+                return array('d', [value])
+        column = [MISSING] * length
+        column.append(value)
+        return column
+
+    @staticmethod
+    def _fits(column, value):
+        if column.typecode == 'q':
+            return type(value) is int and -2 ** 63 <= value < 2 ** 63
+        return type(value) is float
+
+    def __getitem__(self, position):
+        """Get a single item, as a ``dict``."""
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError(position)
+        item = {}
+        for name, column in self.columns.items():
+            value = column[position]
+            if value is not MISSING:
+                item[name] = value
+        return item
+
+    def __iter__(self):
+        for position in range(self._length):
+            yield self[position]
+
+    def to_dicts(self):
+        """A list of plain ``dict`` items."""
+        return list(self)
+
+
+#: The compact result modes, by name.
+ROWS = {
+    'records': Records,
+    'columns': Columns,
+}
@@ -0,0 +1,167 @@
+"""Parallel segmented scans."""
+
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+
+from .codec import build_expressions, deserializer, serialize_item
+
+
+class ScanCheckpoint(object):
+    """
+    Resumable per-segment positions for a parallel scan.
+
+    A segment's position is only moved forward once every item from that
+    page has been handed to the caller, so resuming from a checkpoint never
+    skips items (though it may repeat some from a partially consumed page).
+    Positions are kept in DynamoDB's wire format.
+    """
+
+    def __init__(self, total_segments, positions=None, done=None):
+        self.total_segments = total_segments
+        self.positions = dict(positions or {})
+        self.done = set(done or ())
+
+    @property
+    def finished(self):
+        """``True`` once every segment has been scanned."""
+        return len(self.done) == self.total_segments
+
+    def pending(self):
+        """The segments that still need scanning."""
+        return [s for s in range(self.total_segments) if s not in self.done]
+
+    def to_dict(self):
+        """A JSON-friendly copy of this checkpoint."""
+        return {
+            'total_segments': self.total_segments,
+            'positions': dict((str(s), key) for s, key in self.positions.items()),
+            'done': sorted(self.done),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a checkpoint saved with :meth:`to_dict`."""
+        return cls(
+            data['total_segments'],
+            positions=dict((int(s), key) for s, key in data['positions'].items()),
+            done=data['done'],
+        )
+
+
+class _Page(object):
+
+    def __init__(self, segment, items, last_key):
+        self.segment = segment
+        self.items = items
+        self.last_key = last_key
+
+
+class _Failure(object):
+
+    def __init__(self, error):
+        self.error = error
+
+
+_DONE = object()
+
+
+def _put(queue, stop, value):
+    """Put into a bounded queue, giving up if the scan has been stopped."""
+    while not stop.is_set():
+        try:
+            queue.put(value, timeout=0.1)
+            return True
+        except Full:
+            pass
+    return False
+
+
+def _worker(client, table_name, segments, checkpoint, scan_kwargs, results, stop):
+    try:
+        while not stop.is_set():
+            try:
+                segment = segments.get_nowait()
+            except Empty:
+                break
+
+            kwargs = dict(scan_kwargs, TableName=table_name, Segment=segment, TotalSegments=checkpoint.total_segments)
+            start_key = checkpoint.positions.get(segment)
+            while not stop.is_set():
+                if start_key:
+                    kwargs['ExclusiveStartKey'] = start_key
+                response = client.scan(**kwargs)
+                start_key = response.get('LastEvaluatedKey')
+                if not _put(results, stop, _Page(segment, response.get('Items', []), start_key)):
+                    return
+                if not start_key:
+                    break
+    except Exception as e:
+        _put(results, stop, _Failure(e))
+    finally:
+        _put(results, stop, _DONE)
+
+
+def parallel_scan(clients, table_name, segments, checkpoint=None, queue_size=None, use_float=False, **scan_kwargs):
+    """
+    Scan a table with several threads, streaming items back as they arrive.
+
+    Each client gets its own worker thread, which scans segments until none
+    are left.  Pages are handed back through a bounded queue, so workers
+    pause when the caller falls behind and memory stays flat.
+
+    :param list clients: One low-level boto3 DynamoDB client per worker.
+    :param str table_name: The table name.
+    :param int segments: The total number of scan segments.
+    :param obj checkpoint: A :class:`ScanCheckpoint` to resume from and keep
+        up to date (optional).
+    :param int queue_size: The most pages to buffer (defaults to two per
+        worker).
+    :param bool use_float: Decode numbers as ``int`` / ``float`` instead of
+        ``Decimal``.
+    :param scan_kwargs: Extra ``Scan`` parameters (eg: ``FilterExpression``).
+        ``ExpressionAttributeValues`` may use plain Python values, and
+        ``FilterExpression`` may be a boto3 ``Attr()`` condition.
+    :returns: A generator of items.
+    """
+    if checkpoint is None:
+        checkpoint = ScanCheckpoint(segments)
+    elif checkpoint.total_segments != segments:
+        raise ValueError('The checkpoint was made for {} segments, not {}.'.format(checkpoint.total_segments, segments))
+    build_expressions(scan_kwargs)
+    if 'ExpressionAttributeValues' in scan_kwargs:
+        scan_kwargs['ExpressionAttributeValues'] = serialize_item(scan_kwargs['ExpressionAttributeValues'])
+
+    pending = Queue()
+    for segment in checkpoint.pending():
+        pending.put(segment)
+
+    clients = clients[:max(1, pending.qsize())]
+    results = Queue(maxsize=queue_size or 2 * len(clients))
+    stop = Event()
+    threads = [
+        Thread(target=_worker, args=(client, table_name, pending, checkpoint, scan_kwargs, results, stop))
+        for client in clients
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    decode = deserializer(use_float)
+    running = len(threads)
+    try:
+        while running:
+            result = results.get()
+            if result is _DONE:
+                running -= 1
+            elif isinstance(result, _Failure):
+                raise result.error
+            else:
+                for item in result.items:
+                    yield dict((k, decode(v)) for k, v in item.items())
+                if result.last_key:
+                    checkpoint.positions[result.segment] = result.last_key
+                else:
+                    checkpoint.positions.pop(result.segment, None)
+                    checkpoint.done.add(result.segment)
+    finally:
+        stop.set()
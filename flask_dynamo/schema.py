@@ -0,0 +1,415 @@
+"""Parsed table schemas, with precompiled keys and expressions."""
+
+from numbers import Number
+from operator import itemgetter
+
+from .errors import ConfigurationError, InvalidKeyError
+
+
+#: The Python types allowed for each key attribute type.
+KEY_TYPES = {
+    'S': (str,),
+    'N': (Number,),
+    'B': (bytes, bytearray),
+}
+
+#: The range key operators a key condition can use, and how many values
+#: each takes.
+KEY_OPERATORS = {
+    '=': 1,
+    '<': 1,
+    '<=': 1,
+    '>': 1,
+    '>=': 1,
+    'between': 2,
+    'begins_with': 1,
+}
+
+#: The most compiled expressions cached per table.  Once a table has this
+#: many, its cache is emptied and starts over.
+MAX_COMPILED = 512
+
+
+def key_getter(names):
+    """
+    Build a function which pulls a hashable key out of an item.
+
+    Keys are compared in ``names`` order, so this is only meant for comparing
+    keys from the same table (eg: to coalesce writes).
+
+    :param list names: The key attribute names.
+    """
+    return itemgetter(*names)
+
+
+def merge_params(*params):
+    """
+    Merge several sets of request parameters (eg: from
+    :meth:`TableSchema.key_condition` and :meth:`TableSchema.projection`),
+    combining their ``ExpressionAttributeNames`` and
+    ``ExpressionAttributeValues``.
+    """
+    merged = {}
+    for part in params:
+        for name, value in part.items():
+            if name in ('ExpressionAttributeNames', 'ExpressionAttributeValues'):
+                merged.setdefault(name, {}).update(value)
+            else:
+                merged[name] = value
+    return merged
+
+
+class Expression(object):
+    """
+    A compiled expression: the expression string and its attribute name
+    placeholders, built once and filled in with new values on every call.
+    """
+
+    __slots__ = ('param', 'expression', 'names', 'placeholders')
+
+    def __init__(self, param, expression, names, placeholders=()):
+        """
+        :param str param: The request parameter the expression goes in (eg:
+            ``'UpdateExpression'``).
+        :param str expression: The expression.
+        :param dict names: The ``ExpressionAttributeNames`` it uses.
+        :param list placeholders: The value placeholders, in the order
+            values are given to :meth:`params`.
+        """
+        self.param = param
+        self.expression = expression
+        self.names = names
+        self.placeholders = tuple(placeholders)
+
+    def params(self, values=()):
+        """
+        Build the request parameters.
+
+        :param list values: The values for :attr:`placeholders`, in order.
+        """
+        params = {self.param: self.expression, 'ExpressionAttributeNames': dict(self.names)}
+        if self.placeholders:
+            params['ExpressionAttributeValues'] = dict(zip(self.placeholders, values))
+        return params
+
+    def __repr__(self):
+        return 'Expression({!r})'.format(self.expression)
+
+
+class IndexSchema(object):
+    """The key schema of a secondary index."""
+
+    def __init__(self, definition):
+        self.name = definition['IndexName']
+        self.hash_key, self.range_key = _key_schema(definition)
+        self.key_names = tuple(name for name in (self.hash_key, self.range_key) if name)
+        self.projection = definition.get('Projection', {}).get('ProjectionType', 'ALL')
+
+
+class TableSchema(object):
+    """
+    The schema of a table, parsed from its ``DYNAMO_TABLES`` entry.
+
+    Key extraction is compiled once, and expressions built by
+    :meth:`key_condition`, :meth:`projection`, :meth:`update` and
+    :meth:`condition` are cached by the attribute names they use -- so
+    repeated calls only have to fill in new values.  Keys and key values
+    are checked against the table's ``AttributeDefinitions`` (where given),
+    so mistakes are raised as :class:`~flask_dynamo.errors.InvalidKeyError`
+    before anything is sent to DynamoDB.
+    """
+
+    def __init__(self, definition):
+        """
+        :param dict definition: The table's ``DYNAMO_TABLES`` entry.
+        :raises: ConfigurationError
+        """
+        self.name = definition.get('TableName')
+        if not self.name:
+            raise ConfigurationError('Every table in DYNAMO_TABLES needs a TableName.')
+        self.attribute_types = dict(
+            (a['AttributeName'], a['AttributeType']) for a in definition.get('AttributeDefinitions', ())
+        )
+        self.hash_key, self.range_key = _key_schema(definition)
+        self.key_names = tuple(name for name in (self.hash_key, self.range_key) if name)
+        self.indexes = {}
+        for index in list(definition.get('GlobalSecondaryIndexes', ())) + list(definition.get('LocalSecondaryIndexes', ())):
+            self.indexes[index['IndexName']] = IndexSchema(index)
+        if self.attribute_types:
+            for names, owner in [(self.key_names, self.name)] + [(i.key_names, i.name) for i in self.indexes.values()]:
+                for name in names:
+                    if self.attribute_types.get(name) not in KEY_TYPES:
+                        raise ConfigurationError('{} has no (valid) AttributeDefinitions entry for {}.'.format(owner, name))
+        self.freeze = key_getter(self.key_names)
+        self._compiled = {}
+
+    def __repr__(self):
+        return 'TableSchema({!r})'.format(self.name)
+
+    def index(self, index_name):
+        """
+        Get the :class:`IndexSchema` for a secondary index.
+
+        :raises: KeyError
+        """
+        try:
+            return self.indexes[index_name]
+        except KeyError:
+            raise KeyError('{} has no index {} in DYNAMO_TABLES.'.format(self.name, index_name))
+
+    def index_key_names(self, index_name=None):
+        """
+        The key attribute names for this table and (optionally) one of its
+        secondary indexes.
+
+        :raises: KeyError
+        """
+        names = list(self.key_names)
+        if index_name is not None:
+            names.extend(name for name in self.index(index_name).key_names if name not in names)
+        return names
+
+    def _check_value(self, name, value):
+        types = KEY_TYPES.get(self.attribute_types.get(name))
+        if types is None:
+            return
+        value = getattr(value, 'value', value)
+        if not isinstance(value, types) or isinstance(value, bool):
+            raise InvalidKeyError('{}.{} must be of type {}, not {}.'.format(
+                self.name, name, self.attribute_types[name], type(value).__name__,
+            ))
+
+    def key(self, item):
+        """
+        Pull the primary key out of an item.
+
+        :param dict item: An item (or anything else with the key attributes).
+        :returns: The key, as a ``dict``.
+        :raises: InvalidKeyError
+        """
+        key = {}
+        for name in self.key_names:
+            try:
+                value = item[name]
+            except KeyError:
+                raise InvalidKeyError('{} keys need a {} attribute.'.format(self.name, name))
+            self._check_value(name, value)
+            key[name] = value
+        return key
+
+    def check_key(self, key):
+        """
+        Make sure a ``Key`` has exactly this table's key attributes, with the
+        right types.
+
+        :returns: The key.
+        :raises: InvalidKeyError
+        """
+        if len(key) != len(self.key_names):
+            raise InvalidKeyError('{} keys must have exactly: {}.'.format(self.name, ', '.join(self.key_names)))
+        return self.key(key)
+
+    def _cached(self, signature, build):
+        try:
+            return self._compiled[signature]
+        except KeyError:
+            if len(self._compiled) >= MAX_COMPILED:
+                self._compiled.clear()
+            compiled = self._compiled[signature] = build()
+            return compiled
+
+    def key_condition(self, hash_value, op=None, *range_values, **kwargs):
+        """
+        Build the ``KeyConditionExpression`` for a query.
+
+        :param hash_value: The hash key value.
+        :param str op: The range key operator (optional): one of ``=``,
+            ``<``, ``<=``, ``>``, ``>=``, ``between`` or ``begins_with``.
+        :param range_values: The range key value(s) for ``op``.
+        :param str index: The index to query (optional).
+        :returns: The request parameters.
+        :raises: InvalidKeyError
+        """
+        index_name = kwargs.pop('index', None)
+        if kwargs:
+            raise TypeError('Unexpected arguments: {}.'.format(', '.join(sorted(kwargs))))
+        keys = self if index_name is None else self.index(index_name)
+        if op is not None:
+            if KEY_OPERATORS.get(op) is None:
+                raise ValueError('op must be one of: {}.'.format(', '.join(sorted(KEY_OPERATORS))))
+            if not keys.range_key:
+                raise InvalidKeyError('{} has no range key.'.format(index_name or self.name))
+            if len(range_values) != KEY_OPERATORS[op]:
+                raise TypeError('{} takes {} value(s).'.format(op, KEY_OPERATORS[op]))
+        elif range_values:
+            raise TypeError('Range key values need an op.')
+        self._check_value(keys.hash_key, hash_value)
+        for value in range_values:
+            self._check_value(keys.range_key, value)
+        compiled = self._cached(('key_condition', index_name, op), lambda: self._compile_key_condition(keys, op))
+        params = compiled.params((hash_value,) + range_values)
+        if index_name is not None:
+            params['IndexName'] = index_name
+        return params
+
+    @staticmethod
+    def _compile_key_condition(keys, op):
+        names = {'#fdq0': keys.hash_key}
+        expression = '#fdq0 = :fdq0'
+        placeholders = [':fdq0']
+        if op is not None:
+            names['#fdq1'] = keys.range_key
+            if op == 'between':
+                expression += ' AND #fdq1 BETWEEN :fdq1 AND :fdq2'
+                placeholders.extend([':fdq1', ':fdq2'])
+            elif op == 'begins_with':
+                expression += ' AND begins_with(#fdq1, :fdq1)'
+                placeholders.append(':fdq1')
+            else:
+                expression += ' AND #fdq1 {} :fdq1'.format(op)
+                placeholders.append(':fdq1')
+        return Expression('KeyConditionExpression', expression, names, placeholders)
+
+    def projection(self, attributes):
+        """
+        Build the ``ProjectionExpression`` for a list of top-level attributes.
+
+        :returns: The request parameters.
+        """
+        attributes = tuple(attributes)
+        compiled = self._cached(('projection', attributes), lambda: self._compile_projection(attributes))
+        return compiled.params()
+
+    @staticmethod
+    def _compile_projection(attributes):
+        names = dict(('#fdp{}'.format(i), name) for i, name in enumerate(attributes))
+        return Expression('ProjectionExpression', ', '.join(names), names)
+
+    def query(self, hash_value, op=None, *range_values, **kwargs):
+        """
+        Build the parameters for a query: :meth:`key_condition` plus (if
+        ``attributes`` is given) :meth:`projection`.
+
+        :param list attributes: The attributes to fetch (optional).
+        """
+        attributes = kwargs.pop('attributes', None)
+        params = self.key_condition(hash_value, op, *range_values, **kwargs)
+        if attributes is not None:
+            params = merge_params(params, self.projection(attributes))
+        return params
+
+    def update(self, set=None, remove=(), add=None, delete=None):
+        """
+        Build the ``UpdateExpression`` for an update.
+
+        :param dict set: Attributes to set, and their new values.
+        :param list remove: Attributes to remove.
+        :param dict add: Numbers to add to attributes (or sets to add to
+            set attributes).
+        :param dict delete: Sets to take away from set attributes.
+        :returns: The request parameters.
+        :raises: InvalidKeyError
+        """
+        set, add, delete = set or {}, add or {}, delete or {}
+        signature = ('update', tuple(set), tuple(remove), tuple(add), tuple(delete))
+        compiled = self._cached(signature, lambda: self._compile_update(*signature[1:]))
+        return compiled.params(list(set.values()) + list(add.values()) + list(delete.values()))
+
+    def _compile_update(self, set, remove, add, delete):
+        for name in set + remove + add + delete:
+            if name in self.key_names:
+                raise InvalidKeyError('{}.{} is a key attribute, and can\'t be updated.'.format(self.name, name))
+        names = {}
+        placeholders = []
+        clauses = []
+        for action, attributes, template in (
+            ('SET', set, '{name} = {value}'),
+            ('REMOVE', remove, '{name}'),
+            ('ADD', add, '{name} {value}'),
+            ('DELETE', delete, '{name} {value}'),
+        ):
+            if not attributes:
+                continue
+            parts = []
+            for attribute in attributes:
+                name = '#fdu{}'.format(len(names))
+                names[name] = attribute
+                value = None
+                if action != 'REMOVE':
+                    value = ':fdu{}'.format(len(placeholders))
+                    placeholders.append(value)
+                parts.append(template.format(name=name, value=value))
+            clauses.append('{} {}'.format(action, ', '.join(parts)))
+        if not clauses:
+            raise ValueError('An update needs at least one attribute.')
+        return Expression('UpdateExpression', ' '.join(clauses), names, placeholders)
+
+    def condition(self, exists=(), not_exists=(), equals=None):
+        """
+        Build a ``ConditionExpression`` from simple checks, all of which have
+        to hold.
+
+        :param list exists: Attributes which have to exist.
+        :param list not_exists: Attributes which mustn't exist.
+        :param dict equals: Attributes which have to have these values (eg:
+            for optimistic locking on a version number).
+        :returns: The request parameters.
+        """
+        equals = equals or {}
+        signature = ('condition', tuple(exists), tuple(not_exists), tuple(equals))
+        compiled = self._cached(signature, lambda: self._compile_condition(*signature[1:]))
+        return compiled.params(list(equals.values()))
+
+    @staticmethod
+    def _compile_condition(exists, not_exists, equals):
+        names = {}
+        placeholders = []
+        terms = []
+        for attributes, template in (
+            (exists, 'attribute_exists({name})'),
+            (not_exists, 'attribute_not_exists({name})'),
+            (equals, '{name} = {value}'),
+        ):
+            for attribute in attributes:
+                name = '#fdc{}'.format(len(names))
+                names[name] = attribute
+                value = ':fdc{}'.format(len(placeholders))
+                if '{value}' in template:
+                    placeholders.append(value)
+                terms.append(template.format(name=name, value=value))
+        if not terms:
+            raise ValueError('A condition needs at least one check.')
+        return Expression('ConditionExpression', ' AND '.join(terms), names, placeholders)
+
+    def if_exists(self):
+        """A ``ConditionExpression`` which only lets a write through if the item exists."""
+        return self.condition(exists=(self.hash_key,))
+
+    def if_not_exists(self):
+        """A ``ConditionExpression`` which only lets a write through if the item doesn't exist."""
+        return self.condition(not_exists=(self.hash_key,))
+
+
+def _key_schema(definition):
+    """The (hash key, range key) names from a table or index definition."""
+    hash_key = range_key = None
+    for key in definition.get('KeySchema', ()):
+        if key.get('KeyType') == 'HASH':
+            hash_key = key['AttributeName']
+        elif key.get('KeyType') == 'RANGE':
+            range_key = key['AttributeName']
+    if hash_key is None:
+        raise ConfigurationError('{} needs a HASH key in its KeySchema.'.format(
+            definition.get('IndexName') or definition.get('TableName'),
+        ))
+    return hash_key, range_key
+
+
+def parse_tables(table_config):
+    """
+    Parse every table in ``DYNAMO_TABLES``.
+
+    :returns: A ``dict`` mapping table names to :class:`TableSchema` objects.
+    :raises: ConfigurationError
+    """
+    return dict((schema.name, schema) for schema in map(TableSchema, table_config))
@@ -0,0 +1,149 @@
+"""Connection scopes."""
+
+import os
+from threading import RLock, local
+from weakref import WeakKeyDictionary, WeakSet
+
+
+class ScopeState(object):
+    """The boto3 objects owned by a single scope."""
+
+    def __init__(self):
+        self.session = None
+        self.connection = None
+        self.client = None
+        #: The resource hedged reads are sent through.
+        self.hedge_connection = None
+        #: Cached tables, by owner.
+        self.tables = {}
+
+
+class Scope(object):
+    """
+    Base class for connection scopes.
+
+    A scope decides which boto3 session, resource and table objects a caller
+    gets back.  Looking up the state for the current scope never takes a
+    lock -- the lock is only used while boto3 objects are being built.
+    """
+
+    def __init__(self):
+        self.lock = RLock()
+        self._known_states = WeakSet()
+        _scopes.add(self)
+
+    def _new_state(self):
+        state = ScopeState()
+        with self.lock:
+            self._known_states.add(state)
+        return state
+
+    def get(self):
+        """Get the :class:`ScopeState` for the current scope."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Drop all state, forcing boto3 objects to be rebuilt."""
+        raise NotImplementedError
+
+    def forget(self, owner):
+        """Drop an owner's cached tables from every state in this scope."""
+        with self.lock:
+            states = list(self._known_states)
+        for state in states:
+            state.tables.pop(owner, None)
+
+    def _after_fork(self):
+        self.lock = RLock()
+        self._known_states = WeakSet()
+        self.clear()
+
+
+class ProcessScope(Scope):
+    """Share one set of boto3 objects across every thread in a process."""
+
+    def __init__(self):
+        self._state = None
+        super(ProcessScope, self).__init__()
+
+    def get(self):
+        state = self._state
+        if state is None:
+            with self.lock:
+                if self._state is None:
+                    self._state = self._new_state()
+                state = self._state
+        return state
+
+    def clear(self):
+        self._state = None
+
+
+class ThreadScope(Scope):
+    """Give every thread its own set of boto3 objects."""
+
+    def __init__(self):
+        self._local = local()
+        super(ThreadScope, self).__init__()
+
+    def get(self):
+        try:
+            return self._local.state
+        except AttributeError:
+            state = self._local.state = self._new_state()
+            return state
+
+    def clear(self):
+        self._local = local()
+
+
+class GreenletScope(Scope):
+    """
+    Give every greenlet its own set of boto3 objects.
+
+    State is released along with the greenlet that owns it, so this works
+    best with long-lived greenlets (eg: a worker pool).
+    """
+
+    def __init__(self):
+        from greenlet import getcurrent
+        self._getcurrent = getcurrent
+        self._states = WeakKeyDictionary()
+        super(GreenletScope, self).__init__()
+
+    def get(self):
+        current = self._getcurrent()
+        try:
+            return self._states[current]
+        except KeyError:
+            state = self._states[current] = self._new_state()
+            return state
+
+    def clear(self):
+        self._states = WeakKeyDictionary()
+
+
+SCOPES = {
+    'process': ProcessScope,
+    'thread': ThreadScope,
+    'greenlet': GreenletScope,
+}
+
+_scopes = WeakSet()
+
+
+def _reset_scopes():
+    """
+    Drop all state in a freshly forked child.
+
+    This stops pre-forking servers (eg: gunicorn with ``--preload``) from
+    sharing a parent's HTTP connection pool across workers, and replaces any
+    lock that was held by another thread at fork time.
+    """
+    for scope in list(_scopes):
+        scope._after_fork()
+
+
+# Windows can't fork, so there's nothing to reset there.
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_scopes)
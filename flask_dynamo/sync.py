@@ -0,0 +1,229 @@
+"""Incremental table schema sync."""
+
+import json
+import os
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+
+
+#: The ``DYNAMO_TABLES`` keys which aren't ``CreateTable`` parameters, but
+#: which :meth:`~flask_dynamo.manager.DynamoLazyTables.sync_all` applies
+#: with calls of their own.
+SYNC_ONLY_KEYS = frozenset(['TimeToLiveSpecification'])
+
+
+class Change(object):
+    """
+    A single call needed to bring a table in line with ``DYNAMO_TABLES``.
+
+    Changes which DynamoDB can't make to an existing table (eg: to its key
+    schema) have no :attr:`operation`, and are only reported.
+    """
+
+    def __init__(self, table_name, operation, params, description):
+        """
+        :param str table_name: The table name.
+        :param str operation: The client method to call (eg:
+            ``'update_table'``), or ``None`` if this needs to be done by hand.
+        :param dict params: The parameters to call it with.
+        :param str description: What the change does, for humans.
+        """
+        self.table_name = table_name
+        self.operation = operation
+        self.params = params
+        self.description = description
+
+    def __repr__(self):
+        return 'Change({!r}, {!r})'.format(self.table_name, self.description)
+
+    def __str__(self):
+        prefix = '{}: '.format(self.table_name)
+        if self.operation is None:
+            prefix += '(manual) '
+        return prefix + self.description
+
+
+def create_params(definition, allowed=None):
+    """
+    The ``CreateTable`` parameters from a ``DYNAMO_TABLES`` entry.
+
+    :param dict definition: The table's ``DYNAMO_TABLES`` entry.
+    :param set allowed: The parameter names ``CreateTable`` accepts
+        (optional).  If given, anything else is dropped -- otherwise just
+        :data:`SYNC_ONLY_KEYS` are.
+    """
+    return dict(
+        (name, value) for name, value in definition.items()
+        if name not in SYNC_ONLY_KEYS and (allowed is None or name in allowed)
+    )
+
+
+def schema_hash(definition):
+    """A stable hash of a ``DYNAMO_TABLES`` entry."""
+    data = json.dumps(definition, sort_keys=True, separators=(',', ':'), default=str)
+    return sha256(data.encode('utf-8')).hexdigest()
+
+
+def _throughput(throughput):
+    throughput = throughput or {}
+    return (throughput.get('ReadCapacityUnits'), throughput.get('WriteCapacityUnits'))
+
+
+def _keys(definition):
+    return sorted((k['AttributeName'], k['KeyType']) for k in definition['KeySchema'])
+
+
+def _index_shape(index):
+    """What can't change about a secondary index without rebuilding it."""
+    projection = index.get('Projection', {})
+    return (
+        _keys(index),
+        projection.get('ProjectionType', 'ALL'),
+        sorted(projection.get('NonKeyAttributes', ())),
+    )
+
+
+def plan_table(definition, table=None, ttl=None):
+    """
+    Work out the calls needed to bring a table in line with its definition.
+
+    Billing mode and throughput changes (for the table and any indexes which
+    are staying) go in a single ``UpdateTable`` call.  Indexes are deleted,
+    then created, one ``UpdateTable`` call each, since DynamoDB only allows
+    one index to be created or deleted at a time.  Indexes whose key schema
+    or projection changed are deleted and recreated.
+
+    :param dict definition: The table's ``DYNAMO_TABLES`` entry.
+    :param dict table: The table's ``DescribeTable`` description, or ``None``
+        if the table doesn't exist.
+    :param dict ttl: The table's ``DescribeTimeToLive`` description
+        (optional).  Only needed if ``definition`` has a
+        ``TimeToLiveSpecification``.
+    :returns: A list of :class:`Change` objects, in the order they need to
+        be made.
+    """
+    name = definition['TableName']
+    changes = []
+    if table is None:
+        changes.append(Change(name, 'create_table', create_params(definition), 'create table'))
+        ttl = {'TimeToLiveStatus': 'DISABLED'}
+    else:
+        changes.extend(_plan_keys(definition, table))
+        changes.extend(_plan_capacity(definition, table))
+        changes.extend(_plan_indexes(definition, table))
+    changes.extend(_plan_ttl(definition, ttl))
+    return changes
+
+
+def _plan_keys(definition, table):
+    name = definition['TableName']
+    if _keys(definition) != _keys(table):
+        yield Change(name, None, {}, 'key schema differs, and can only be changed by recreating the table')
+    desired = dict((i['IndexName'], _index_shape(i)) for i in definition.get('LocalSecondaryIndexes', ()))
+    current = dict((i['IndexName'], _index_shape(i)) for i in table.get('LocalSecondaryIndexes', ()))
+    if desired != current:
+        yield Change(name, None, {}, 'local secondary indexes differ, and can only be changed by recreating the table')
+
+
+def _plan_capacity(definition, table):
+    name = definition['TableName']
+    mode = definition.get('BillingMode', 'PROVISIONED')
+    current_mode = table.get('BillingModeSummary', {}).get('BillingMode', 'PROVISIONED')
+    params = {}
+    descriptions = []
+    if mode != current_mode:
+        params['BillingMode'] = mode
+        descriptions.append('billing mode {} -> {}'.format(current_mode, mode))
+    if mode == 'PROVISIONED':
+        throughput = definition.get('ProvisionedThroughput')
+        if throughput and (mode != current_mode or _throughput(throughput) != _throughput(table.get('ProvisionedThroughput'))):
+            params['ProvisionedThroughput'] = throughput
+            descriptions.append('throughput {} -> {}'.format(
+                '/'.join(map(str, _throughput(table.get('ProvisionedThroughput')))),
+                '/'.join(map(str, _throughput(throughput))),
+            ))
+        current = dict((i['IndexName'], i) for i in table.get('GlobalSecondaryIndexes', ()))
+        updates = []
+        for index in definition.get('GlobalSecondaryIndexes', ()):
+            existing = current.get(index['IndexName'])
+            if existing is None or _index_shape(existing) != _index_shape(index):
+                continue
+            throughput = index.get('ProvisionedThroughput')
+            if throughput and (mode != current_mode or _throughput(throughput) != _throughput(existing.get('ProvisionedThroughput'))):
+                updates.append({'Update': {'IndexName': index['IndexName'], 'ProvisionedThroughput': throughput}})
+                descriptions.append('index {} throughput -> {}'.format(index['IndexName'], '/'.join(map(str, _throughput(throughput)))))
+        if updates:
+            params['GlobalSecondaryIndexUpdates'] = updates
+    if params:
+        params['TableName'] = name
+        yield Change(name, 'update_table', params, ', '.join(descriptions))
+
+
+def _plan_indexes(definition, table):
+    name = definition['TableName']
+    desired = dict((i['IndexName'], i) for i in definition.get('GlobalSecondaryIndexes', ()))
+    current = dict((i['IndexName'], i) for i in table.get('GlobalSecondaryIndexes', ()))
+    rebuilt = set(n for n in desired if n in current and _index_shape(desired[n]) != _index_shape(current[n]))
+    for index_name in sorted(current):
+        if index_name not in desired or index_name in rebuilt:
+            yield Change(name, 'update_table', {
+                'TableName': name,
+                'GlobalSecondaryIndexUpdates': [{'Delete': {'IndexName': index_name}}],
+            }, 'delete index {}'.format(index_name))
+    for index_name in sorted(desired):
+        if index_name not in current or index_name in rebuilt:
+            create = dict((k, v) for k, v in desired[index_name].items() if k != 'ProvisionedThroughput')
+            if definition.get('BillingMode', 'PROVISIONED') == 'PROVISIONED' and 'ProvisionedThroughput' in desired[index_name]:
+                create['ProvisionedThroughput'] = desired[index_name]['ProvisionedThroughput']
+            yield Change(name, 'update_table', {
+                'TableName': name,
+                'AttributeDefinitions': definition['AttributeDefinitions'],
+                'GlobalSecondaryIndexUpdates': [{'Create': create}],
+            }, 'create index {}'.format(index_name))
+
+
+def _plan_ttl(definition, ttl):
+    name = definition['TableName']
+    spec = definition.get('TimeToLiveSpecification')
+    if spec is None:
+        return
+    ttl = ttl or {}
+    enabled = ttl.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING')
+    attribute = ttl.get('AttributeName')
+    if enabled and (not spec.get('Enabled') or attribute != spec['AttributeName']):
+        yield Change(name, 'update_time_to_live', {
+            'TableName': name,
+            'TimeToLiveSpecification': {'Enabled': False, 'AttributeName': attribute},
+        }, 'disable TTL on {}'.format(attribute))
+        enabled = False
+    if spec.get('Enabled') and not enabled:
+        yield Change(name, 'update_time_to_live', {
+            'TableName': name,
+            'TimeToLiveSpecification': {'Enabled': True, 'AttributeName': spec['AttributeName']},
+        }, 'enable TTL on {}'.format(spec['AttributeName']))
+
+
+class SchemaCache(object):
+    """
+    Remembers the :func:`schema_hash` of every table definition that's been
+    synced, in a JSON file, so unchanged tables can be skipped.
+
+    :param str path: The cache file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def save(self, hashes):
+        """Atomically replace the cache file."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with NamedTemporaryFile('w', dir=directory, delete=False) as f:
+            json.dump(hashes, f, sort_keys=True, indent=2)
+        os.replace(f.name, self.path)
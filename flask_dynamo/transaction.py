@@ -0,0 +1,266 @@
+"""TransactWriteItems / TransactGetItems helpers."""
+
+from collections.abc import Mapping
+from numbers import Number
+from time import sleep as _sleep
+from uuid import uuid4
+
+from .batch import backoff
+from .errors import InvalidTransactionError
+
+
+#: The most actions DynamoDB accepts in a single transaction.
+TRANSACT_LIMIT = 100
+
+#: The most bytes of items DynamoDB accepts in a single transaction.
+TRANSACT_SIZE_LIMIT = 4 * 1024 * 1024
+
+#: The biggest item DynamoDB will store, in bytes.
+ITEM_SIZE_LIMIT = 400 * 1024
+
+#: Cancellation reasons worth retrying a transaction for.
+RETRYABLE_REASONS = frozenset([
+    'TransactionConflict',
+    'ThrottlingError',
+    'ProvisionedThroughputExceeded',
+])
+
+def value_size(value):
+    """
+    The approximate size of an attribute value, in bytes, as DynamoDB counts
+    it.
+    """
+    value = getattr(value, 'value', value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, Number):
+        return len(str(value).lstrip('-').replace('.', '').lstrip('0')) // 2 + 2
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (set, frozenset)):
+        return sum(value_size(v) for v in value)
+    if isinstance(value, Mapping):
+        return 3 + item_size(value) + len(value)
+    return 3 + sum(value_size(v) + 1 for v in value)
+
+
+def item_size(item):
+    """The approximate size of an item, in bytes."""
+    return sum(len(name.encode('utf-8')) + value_size(value) for name, value in item.items())
+
+
+def _is_retryable(error):
+    code = error.response['Error']['Code']
+    if code == 'TransactionInProgressException':
+        return True
+    if code != 'TransactionCanceledException':
+        return False
+    reasons = [reason.get('Code', 'None') for reason in error.response.get('CancellationReasons', ())]
+    failed = [reason for reason in reasons if reason != 'None']
+    return bool(failed) and all(reason in RETRYABLE_REASONS for reason in failed)
+
+
+def _call(func, params, max_retries, sleep, on_retry=None):
+    """Call ``func``, retrying conflicted transactions with backoff."""
+    from botocore.exceptions import ClientError
+
+    attempt = 0
+    while True:
+        try:
+            return func(**params)
+        except ClientError as e:
+            if not _is_retryable(e) or attempt >= max_retries:
+                raise
+        sleep(backoff(attempt))
+        attempt += 1
+        if on_retry is not None:
+            on_retry(params)
+
+
+class TransactionTable(object):
+    """
+    One table's view of a :class:`Transaction`.
+
+    Its methods take the same arguments as boto3's ``Table`` methods, and
+    add an action to the transaction instead of running it.
+    """
+
+    def __init__(self, transaction, table_name):
+        self._transaction = transaction
+        self.name = table_name
+
+    def put_item(self, **kwargs):
+        self._transaction.add('Put', self.name, kwargs)
+
+    def update_item(self, **kwargs):
+        self._transaction.add('Update', self.name, kwargs)
+
+    def delete_item(self, **kwargs):
+        self._transaction.add('Delete', self.name, kwargs)
+
+    def condition_check(self, **kwargs):
+        """Require a condition to hold on an item, without changing it."""
+        self._transaction.add('ConditionCheck', self.name, kwargs)
+
+
+class Transaction(object):
+    """
+    Collects writes to any number of items, then commits them all at once
+    with a single ``TransactWriteItems`` call -- either every write goes
+    through, or none of them do.
+
+    Used as a context manager, the transaction is committed when the block
+    finishes, and thrown away if it raises::
+
+        with dynamo.transaction() as txn:
+            txn['accounts'].update_item(Key=..., UpdateExpression=..., ...)
+            txn['ledger'].put_item(Item=..., ConditionExpression=...)
+
+    Limits are checked as actions are added, so a transaction that's too big
+    (too many actions, too many bytes, an item over 400KB, or two actions on
+    one item) raises :class:`~flask_dynamo.errors.InvalidTransactionError`
+    without a round-trip.  Transactions cancelled because of a conflict with
+    another transaction (or throttling) are retried with jittered
+    exponential backoff; any other cancellation (eg: a failed condition) is
+    raised as boto3's ``TransactionCanceledException``.
+
+    Every attempt is sent with a fresh ``ClientRequestToken``, so retries of
+    the same attempt (eg: botocore's retries after a timeout) are idempotent.
+    """
+
+    def __init__(self, client, schemas=None, max_retries=5, on_commit=None, sleep=_sleep):
+        """
+        :param client: A boto3 DynamoDB resource's client (which takes and
+            returns plain Python values).
+        :param dict schemas: Maps table names to their
+            :class:`~flask_dynamo.schema.TableSchema` (optional).  Keys for
+            these tables are checked before anything is sent.
+        :param int max_retries: How many times to retry a conflicted
+            transaction.
+        :param func on_commit: Called with a list of ``(table name, key)``
+            tuples for the items written to tables in ``schemas``, once the
+            transaction is done (optional).
+        """
+        self._client = client
+        self._schemas = schemas or {}
+        self.max_retries = max_retries
+        self._on_commit = on_commit
+        self._sleep = sleep
+        self._actions = []
+        self._keys = set()
+        self._written = []
+        self._size = 0
+        self.committed = False
+
+    def __len__(self):
+        return len(self._actions)
+
+    def __getitem__(self, table_name):
+        """Get a :class:`TransactionTable` to add actions for a table."""
+        return TransactionTable(self, table_name)
+
+    table = __getitem__
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+    def add(self, kind, table_name, params):
+        """
+        Add an action.
+
+        :param str kind: ``Put``, ``Update``, ``Delete`` or
+            ``ConditionCheck``.
+        :param str table_name: The table name.
+        :param dict params: The action's parameters, as for boto3's
+            ``Table`` methods.
+        :raises: InvalidTransactionError, InvalidKeyError
+        """
+        if self.committed:
+            raise InvalidTransactionError('This transaction has already been committed.')
+        if len(self._actions) >= TRANSACT_LIMIT:
+            raise InvalidTransactionError('Transactions can have at most {} actions.'.format(TRANSACT_LIMIT))
+
+        key = params['Item'] if kind == 'Put' else params['Key']
+        schema = self._schemas.get(table_name)
+        if schema is not None:
+            key = schema.key(key) if kind == 'Put' else schema.check_key(key)
+            identity = (table_name, schema.freeze(key))
+            if identity in self._keys:
+                raise InvalidTransactionError('Transactions can only have one action per item ({} {}).'.format(table_name, key))
+        else:
+            identity = None
+
+        size = item_size(params['Item']) if kind == 'Put' else item_size(params['Key'])
+        if kind == 'Put' and size > ITEM_SIZE_LIMIT:
+            raise InvalidTransactionError('Items can be at most {} bytes ({} is {}).'.format(ITEM_SIZE_LIMIT, table_name, size))
+        if self._size + size > TRANSACT_SIZE_LIMIT:
+            raise InvalidTransactionError('Transactions can be at most {} bytes.'.format(TRANSACT_SIZE_LIMIT))
+
+        self._size += size
+        if identity is not None:
+            self._keys.add(identity)
+        self._actions.append({kind: dict(params, TableName=table_name)})
+        if kind != 'ConditionCheck' and schema is not None:
+            self._written.append((table_name, key))
+
+    def commit(self):
+        """
+        Send every action in one ``TransactWriteItems`` call.
+
+        Transactions with no actions don't make a call at all.
+        """
+        if self.committed:
+            raise InvalidTransactionError('This transaction has already been committed.')
+        self.committed = True
+        if not self._actions:
+            return
+        params = {'TransactItems': self._actions, 'ClientRequestToken': str(uuid4())}
+        try:
+            _call(self._client.transact_write_items, params, self.max_retries, self._sleep, self._new_token)
+        finally:
+            if self._on_commit is not None:
+                self._on_commit(self._written)
+
+    @staticmethod
+    def _new_token(params):
+        params['ClientRequestToken'] = str(uuid4())
+
+
+def transact_get(client, requests, max_retries=5, sleep=_sleep):
+    """
+    Read many items, as of a single point in time, with
+    ``TransactGetItems``.
+
+    Up to :data:`TRANSACT_LIMIT` items are read per call.  If there are
+    more, they're read in several transactions, so the result is only
+    consistent within each group of :data:`TRANSACT_LIMIT`.  Conflicted
+    reads are retried with jittered exponential backoff.
+
+    :param client: A boto3 DynamoDB resource's client.
+    :param list requests: ``(table name, key)`` tuples, or ``(table name,
+        key, attributes)`` to only fetch some attributes.
+    :param int max_retries: How many times to retry each conflicted call.
+    :returns: A list with the item (or ``None``) for each request, in order.
+    """
+    actions = []
+    for request in requests:
+        table_name, key = request[0], request[1]
+        get = {'TableName': table_name, 'Key': key}
+        if len(request) > 2 and request[2] is not None:
+            names = dict(('#fdp{}'.format(i), name) for i, name in enumerate(request[2]))
+            get['ProjectionExpression'] = ', '.join(names)
+            get['ExpressionAttributeNames'] = names
+        actions.append({'Get': get})
+
+    items = []
+    for start in range(0, len(actions), TRANSACT_LIMIT):
+        params = {'TransactItems': actions[start:start + TRANSACT_LIMIT]}
+        response = _call(client.transact_get_items, params, max_retries, sleep)
+        items.extend(result.get('Item') for result in response['Responses'])
+    return items
@@ -0,0 +1,233 @@
+"""Streaming bulk import / export between tables and local files."""
+
+import gzip
+import json
+from base64 import b64decode, b64encode
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from decimal import Decimal
+from time import monotonic, sleep as _sleep
+
+from .codec import deserialize_item, serialize_item
+from .ratelimit import TokenBucket
+
+
+#: The file formats we can read and write.  ``json`` is one plain JSON
+#: object per line; ``dynamodb`` is one ``{"Item": {...}}`` object per line,
+#: with values in DynamoDB's wire format (like DynamoDB's own S3 exports).
+FORMATS = ('json', 'dynamodb')
+
+#: How many items to hand to ``batch_write_many`` at a time when importing.
+CHUNK_SIZE = 500
+
+
+def open_file(path, mode='r', compress=None):
+    """
+    Open a text file for streaming items, gzip-compressed if the name ends
+    in ``.gz``.
+
+    :param str path: The file name.
+    :param str mode: ``'r'`` or ``'w'``.
+    :param bool compress: Force compression on or off (defaults to guessing
+        from the file name).
+    """
+    if compress is None:
+        compress = path.endswith('.gz')
+    if compress:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    value = getattr(value, 'value', value)
+    if isinstance(value, (bytes, bytearray)):
+        return b64encode(value).decode('ascii')
+    raise TypeError('Unsupported type for JSON: {}'.format(type(value)))
+
+
+def _decode_binary(value):
+    """Turn the base64 strings in a wire format value back into bytes."""
+    for tag, data in value.items():
+        if tag == 'B':
+            return {'B': b64decode(data)}
+        if tag == 'BS':
+            return {'BS': [b64decode(v) for v in data]}
+        if tag == 'M':
+            return {'M': {k: _decode_binary(v) for k, v in data.items()}}
+        if tag == 'L':
+            return {'L': [_decode_binary(v) for v in data]}
+    return value
+
+
+def _check_format(format):
+    if format not in FORMATS:
+        raise ValueError('Unknown format {!r}, expected one of {}.'.format(format, ', '.join(FORMATS)))
+
+
+def dump_item(item, format='json'):
+    """
+    Encode an item as a single line of JSON.
+
+    With the ``json`` format, sets become lists, bytes become base64 strings
+    and numbers lose any precision a ``float`` can't hold -- use
+    ``dynamodb`` to round-trip items exactly.
+
+    :param dict item: The item, as plain Python values.
+    :param str format: One of :data:`FORMATS`.
+    """
+    if format == 'dynamodb':
+        item = {'Item': serialize_item(item)}
+    elif format != 'json':
+        _check_format(format)
+    return json.dumps(item, default=_default, separators=(',', ':')) + '\n'
+
+
+def load_item(line, format='json'):
+    """
+    Decode a single line written by :func:`dump_item`.
+
+    Numbers with a fraction are decoded as ``Decimal``, ready to be written
+    with boto3.
+    """
+    if format == 'dynamodb':
+        item = json.loads(line)
+        item = item.get('Item', item)
+        return deserialize_item(dict((k, _decode_binary(v)) for k, v in item.items()))
+    return json.loads(line, parse_float=Decimal)
+
+
+def read_items(fileobj, format='json'):
+    """A generator of the items in a file, read one line at a time."""
+    _check_format(format)
+    for line in fileobj:
+        if line.strip():
+            yield load_item(line, format)
+
+
+class Progress(object):
+    """
+    Counts items, and reports the total and throughput every few seconds.
+
+    :param func callback: Called with the number of items so far and the
+        seconds elapsed (optional).
+    :param float interval: The least seconds between reports.
+    """
+
+    def __init__(self, callback=None, interval=5.0, clock=monotonic):
+        self.callback = callback
+        self.interval = interval
+        self.count = 0
+        self._clock = clock
+        self.started = self._reported = clock()
+
+    @property
+    def elapsed(self):
+        return self._clock() - self.started
+
+    @property
+    def rate(self):
+        """Items per second so far."""
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def add(self, count):
+        self.count += count
+        if self.callback is not None and self._clock() - self._reported >= self.interval:
+            self._reported = self._clock()
+            self.callback(self.count, self.elapsed)
+
+    def finish(self):
+        if self.callback is not None:
+            self.callback(self.count, self.elapsed)
+        return self.count
+
+
+def _limiter(rate, clock, sleep):
+    if not rate:
+        return None
+    return TokenBucket(rate, min_rate=rate, clock=clock, sleep=sleep)
+
+
+def export_items(items, fileobj, format='json', rate=None, progress=None, clock=monotonic, sleep=_sleep):
+    """
+    Write items to a file, one per line.
+
+    :param items: An iterable of items (eg: from
+        :meth:`~flask_dynamo.manager.DynamoLazyTables.parallel_scan`).  It's
+        only read as fast as the file is written, and no faster than
+        ``rate``.
+    :param fileobj: A text file, from :func:`open_file`.
+    :param str format: One of :data:`FORMATS`.
+    :param float rate: The most items to write per second (optional).
+    :param func progress: Called every few seconds with the number of items
+        written and the seconds elapsed (optional).
+    :returns: The number of items written.
+    """
+    _check_format(format)
+    limiter = _limiter(rate, clock, sleep)
+    counter = Progress(progress, clock=clock)
+    for item in items:
+        if limiter is not None:
+            limiter.acquire()
+        fileobj.write(dump_item(item, format))
+        counter.add(1)
+    return counter.finish()
+
+
+def import_items(write, items, chunk_size=CHUNK_SIZE, workers=4, rate=None, progress=None, clock=monotonic, sleep=_sleep):
+    """
+    Write items in chunks, with several threads.
+
+    At most two chunks per worker are held in memory at once, however many
+    items there are.  Chunks are written in no particular order, so if the
+    same key appears more than once, which copy wins is undefined.
+
+    :param func write: Called with each chunk, as a list of ``PutRequest``
+        dicts (eg: a wrapper around
+        :meth:`~flask_dynamo.manager.DynamoLazyTables.batch_write_many`).
+    :param items: An iterable of items (eg: from :func:`read_items`).
+    :param int chunk_size: How many items to pass to ``write`` at a time.
+    :param int workers: The number of writer threads.
+    :param float rate: The most items to write per second (optional).
+    :param func progress: Called every few seconds with the number of items
+        written and the seconds elapsed (optional).
+    :returns: The number of items written.
+    """
+    limiter = _limiter(rate, clock, sleep)
+    counter = Progress(progress, clock=clock)
+    in_flight = set()
+
+    def collect(futures):
+        for future in futures:
+            in_flight.discard(future)
+            counter.add(future.result())
+
+    def write_chunk(chunk):
+        write(chunk)
+        return len(chunk)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            chunk = []
+            for item in items:
+                chunk.append({'PutRequest': {'Item': item}})
+                if len(chunk) < chunk_size:
+                    continue
+                if limiter is not None:
+                    limiter.acquire(len(chunk))
+                if len(in_flight) >= 2 * workers:
+                    collect(wait(in_flight, return_when=FIRST_COMPLETED).done)
+                in_flight.add(pool.submit(write_chunk, chunk))
+                chunk = []
+            if chunk:
+                if limiter is not None:
+                    limiter.acquire(len(chunk))
+                in_flight.add(pool.submit(write_chunk, chunk))
+            collect(wait(in_flight).done)
+        finally:
+            for future in in_flight:
+                future.cancel()
+    return counter.finish()
@@ -52,6 +52,7 @@ setup(
 
     # Package dependencies:
     install_requires = ['boto3>=1.1.4', 'Flask>=0.10.1'],
+    python_requires = '>=3.7',
 
     # Metadata for PyPI:
     author = 'Randall Degges',
@@ -74,12 +75,14 @@ setup(
         'Topic :: Software Development :: Libraries :: Python Modules',
         'Topic :: Database',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: Implementation :: CPython',
         'Programming Language :: Python :: Implementation :: PyPy',
     ],
 
@@ -0,0 +1,34 @@
+"""Shared test fixtures."""
+
+
+import pytest
+from fakedynamo import FakeDynamo
+from flask import Flask
+
+
+@pytest.fixture
+def fake_dynamo():
+    fake = FakeDynamo().start()
+    try:
+        yield fake
+    finally:
+        fake.stop()
+
+@pytest.fixture
+def fake_app(fake_dynamo):
+    """An app pointed at the fake DynamoDB endpoint, with a ``users`` table."""
+    app = Flask(__name__)
+    app.config['AWS_ACCESS_KEY_ID'] = 'test'
+    app.config['AWS_SECRET_ACCESS_KEY'] = 'test'
+    app.config['DYNAMO_ENABLE_LOCAL'] = True
+    app.config['DYNAMO_LOCAL_HOST'] = '127.0.0.1'
+    app.config['DYNAMO_LOCAL_PORT'] = fake_dynamo.port
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='users',
+            KeySchema=[dict(AttributeName='username', KeyType='HASH')],
+            AttributeDefinitions=[dict(AttributeName='username', AttributeType='S')],
+            ProvisionedThroughput=dict(ReadCapacityUnits=5, WriteCapacityUnits=5),
+        ),
+    ]
+    return app
@@ -0,0 +1,243 @@
+"""
+A tiny in-process fake of the DynamoDB HTTP API, for tests.
+
+It speaks just enough of the JSON protocol for the operations flask-dynamo
+uses.  Items are stored in DynamoDB's wire format, and expressions are not
+evaluated (except for simple hash key equality in Query).
+"""
+
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from zlib import crc32
+
+
+class FakeError(Exception):
+
+    def __init__(self, code, message, status=400):
+        super(FakeError, self).__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+def freeze(key):
+    return tuple(sorted((name, json.dumps(value, sort_keys=True)) for name, value in key.items()))
+
+
+class FakeTable(object):
+
+    def __init__(self, request):
+        self.name = request['TableName']
+        self.request = request
+        self.key_names = [k['AttributeName'] for k in request['KeySchema']]
+        self.items = {}
+
+    def key(self, item):
+        try:
+            return dict((name, item[name]) for name in self.key_names)
+        except KeyError:
+            raise FakeError('ValidationException', 'Missing key attributes')
+
+    def sorted_items(self):
+        return [self.items[k] for k in sorted(self.items)]
+
+    def describe(self):
+        description = dict(self.request, TableStatus='ACTIVE', ItemCount=len(self.items))
+        description['TableArn'] = 'arn:aws:dynamodb:us-east-1:000000000000:table/{}'.format(self.name)
+        return description
+
+
+class FakeDynamo(object):
+    """
+    The fake DynamoDB service.
+
+    :param float latency: Seconds to sleep before answering each request.
+    """
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.tables = {}
+        self.calls = []
+        self.failures = {}
+        self.lock = Lock()
+        self.server = None
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately, so without this each
+            # response waits on a delayed ACK.
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])) or b'{}')
+                operation = self.headers['X-Amz-Target'].split('.')[-1]
+                status, response = fake.handle(operation, body)
+                data = json.dumps(response).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/x-amz-json-1.0')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def handle(self, operation, body):
+        if self.latency:
+            time.sleep(self.latency() if callable(self.latency) else self.latency)
+        with self.lock:
+            self.calls.append((operation, body))
+            try:
+                if self.failures.get(operation):
+                    raise FakeError(self.failures[operation].pop(0), 'Injected failure')
+                method = getattr(self, re.sub(r'(?<!^)([A-Z])', r'_\1', operation).lower(), None)
+                if method is None:
+                    raise FakeError('UnknownOperationException', operation)
+                response = method(body)
+                if body.get('ReturnConsumedCapacity', 'NONE') != 'NONE' and 'TableName' in body:
+                    response['ConsumedCapacity'] = {'TableName': body['TableName'], 'CapacityUnits': 1.0}
+                return 200, response
+            except FakeError as e:
+                return e.status, {'__type': 'com.amazonaws.dynamodb.v20120810#' + e.code, 'message': e.message}
+
+    def fail(self, operation, code, times=1):
+        """Make the next ``times`` calls to ``operation`` fail with ``code``."""
+        self.failures.setdefault(operation, []).extend([code] * times)
+
+    def calls_to(self, operation):
+        return [body for name, body in self.calls if name == operation]
+
+    def table(self, name):
+        try:
+            return self.tables[name]
+        except KeyError:
+            raise FakeError('ResourceNotFoundException', 'Requested resource not found')
+
+    def create_table(self, body):
+        if body['TableName'] in self.tables:
+            raise FakeError('ResourceInUseException', 'Table already exists')
+        table = self.tables[body['TableName']] = FakeTable(body)
+        return {'TableDescription': table.describe()}
+
+    def delete_table(self, body):
+        table = self.table(body['TableName'])
+        del self.tables[table.name]
+        return {'TableDescription': table.describe()}
+
+    def describe_table(self, body):
+        return {'Table': self.table(body['TableName']).describe()}
+
+    def list_tables(self, body):
+        names = sorted(self.tables)
+        start = body.get('ExclusiveStartTableName')
+        if start:
+            names = [name for name in names if name > start]
+        limit = body.get('Limit', 100)
+        response = {'TableNames': names[:limit]}
+        if len(names) > limit:
+            response['LastEvaluatedTableName'] = names[limit - 1]
+        return response
+
+    def put_item(self, body):
+        table = self.table(body['TableName'])
+        table.items[freeze(table.key(body['Item']))] = body['Item']
+        return {}
+
+    def get_item(self, body):
+        table = self.table(body['TableName'])
+        item = table.items.get(freeze(body['Key']))
+        return {'Item': item} if item is not None else {}
+
+    def update_item(self, body):
+        """Only supports ``SET name = :value, ...`` update expressions."""
+        table = self.table(body['TableName'])
+        key = freeze(body['Key'])
+        item = dict(table.items.get(key, body['Key']))
+        names = body.get('ExpressionAttributeNames', {})
+        values = body.get('ExpressionAttributeValues', {})
+        assignments = re.match(r'^\s*SET\s+(.*)$', body['UpdateExpression']).group(1)
+        for assignment in assignments.split(','):
+            name, value = [part.strip() for part in assignment.split('=')]
+            item[names.get(name, name)] = values[value]
+        table.items[key] = item
+        return {}
+
+    def delete_item(self, body):
+        table = self.table(body['TableName'])
+        table.items.pop(freeze(body['Key']), None)
+        return {}
+
+    def _page(self, table, items, body):
+        start = body.get('ExclusiveStartKey')
+        if start:
+            start = freeze(start)
+            items = [item for item in items if freeze(table.key(item)) > start]
+        limit = body.get('Limit')
+        response = {}
+        if limit and len(items) > limit:
+            items = items[:limit]
+            response['LastEvaluatedKey'] = table.key(items[-1])
+        response.update(Items=items, Count=len(items), ScannedCount=len(items))
+        return response
+
+    def scan(self, body):
+        table = self.table(body['TableName'])
+        items = table.sorted_items()
+        if 'TotalSegments' in body:
+            hash_key = table.key_names[0]
+            items = [
+                item for item in items
+                if crc32(json.dumps(item[hash_key]).encode('utf-8')) % body['TotalSegments'] == body['Segment']
+            ]
+        return self._page(table, items, body)
+
+    def query(self, body):
+        table = self.table(body['TableName'])
+        match = re.match(r'^\s*(#?\w+)\s*=\s*(:\w+)\s*$', body['KeyConditionExpression'])
+        if not match:
+            raise FakeError('ValidationException', 'Only hash key equality is supported')
+        name = body.get('ExpressionAttributeNames', {}).get(match.group(1), match.group(1))
+        value = body['ExpressionAttributeValues'][match.group(2)]
+        items = [item for item in table.sorted_items() if item.get(name) == value]
+        return self._page(table, items, body)
+
+    def batch_get_item(self, body):
+        responses = {}
+        for table_name, request in body['RequestItems'].items():
+            table = self.table(table_name)
+            found = responses.setdefault(table_name, [])
+            for key in request['Keys']:
+                item = table.items.get(freeze(key))
+                if item is not None:
+                    found.append(item)
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def batch_write_item(self, body):
+        for table_name, requests in body['RequestItems'].items():
+            table = self.table(table_name)
+            for request in requests:
+                if 'PutRequest' in request:
+                    item = request['PutRequest']['Item']
+                    table.items[freeze(table.key(item))] = item
+                else:
+                    table.items.pop(freeze(request['DeleteRequest']['Key']), None)
+        return {'UnprocessedItems': {}}
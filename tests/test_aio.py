@@ -0,0 +1,127 @@
+"""Tests for our asyncio support."""
+
+
+import asyncio
+import gc
+
+import pytest
+from flask import Flask
+from flask_dynamo import AsyncDynamo, ConfigurationError
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_invalid_workers(fake_app):
+    fake_app.config['DYNAMO_ASYNC_WORKERS'] = 0
+    with pytest.raises(ConfigurationError):
+        AsyncDynamo(fake_app)
+
+def test_executor_per_app(fake_app):
+    dynamo = AsyncDynamo()
+    other = Flask(__name__)
+    other.config.update(fake_app.config)
+    fake_app.config['DYNAMO_ASYNC_WORKERS'] = 2
+    other.config['DYNAMO_ASYNC_WORKERS'] = 3
+    dynamo.init_app(fake_app)
+    dynamo.init_app(other)
+    executor = dynamo._get_ctx(other).executor
+    assert dynamo._get_ctx(fake_app).executor._max_workers == 2
+    assert executor._max_workers == 3
+
+    # The pool is shut down when its app goes away.
+    del other
+    gc.collect()
+    assert executor._shutdown
+
+def test_async_tables(fake_app, fake_dynamo):
+    fake_app.config['DYNAMO_ASYNC_WORKERS'] = 4
+    dynamo = AsyncDynamo(fake_app)
+
+    async def scenario():
+        await dynamo.create_all(wait=True)
+        assert 'users' in fake_dynamo.tables
+
+        table = dynamo.tables['users']
+        assert table.name == 'users'
+        await asyncio.gather(*[
+            table.put_item(Item={'username': 'user-{}'.format(i)})
+            for i in range(10)
+        ])
+        response = await dynamo.get_table('users').get_item(Key={'username': 'user-3'})
+        assert response['Item'] == {'username': 'user-3'}
+
+        await dynamo.batch_write('users', delete_keys=[{'username': 'user-0'}])
+        keys = [{'username': 'user-{}'.format(i)} for i in range(10)]
+        found = [item async for item in dynamo.batch_get('users', keys)]
+        assert len(found) == 9
+
+        await dynamo.destroy_all(wait=True)
+        assert 'users' not in fake_dynamo.tables
+
+    run(scenario())
+
+def test_async_transaction():
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [dict(
+        TableName='users',
+        KeySchema=[dict(AttributeName='username', KeyType='HASH')],
+        AttributeDefinitions=[dict(AttributeName='username', AttributeType='S')],
+        BillingMode='PAY_PER_REQUEST',
+    )]
+    dynamo = AsyncDynamo(app)
+
+    async def scenario():
+        async with dynamo.transaction() as txn:
+            txn['users'].put_item(Item={'username': 'a'})
+            txn['users'].put_item(Item={'username': 'b'})
+        items = await dynamo.transact_get([('users', {'username': 'a'}), ('users', {'username': 'c'})])
+        assert items == [{'username': 'a'}, None]
+
+    with app.app_context():
+        run(scenario())
+
+def test_request_stats(fake_app, fake_dynamo):
+    fake_app.config['DYNAMO_METRICS'] = True
+    dynamo = AsyncDynamo(fake_app)
+
+    async def scenario():
+        await dynamo.create_all()
+        await dynamo.tables['users'].get_item(Key={'username': 'rdegges'})
+        return dynamo.request_stats.to_dict()
+
+    with fake_app.test_request_context():
+        stats = run(scenario())
+    assert stats['users:GetItem']['calls'] == 1
+
+def test_async_iterators(fake_app, fake_dynamo, tmpdir):
+    dynamo = AsyncDynamo(fake_app)
+
+    async def scenario():
+        await dynamo.create_all()
+        await dynamo.batch_write('users', put_items=[{'username': 'user-{}'.format(i)} for i in range(10)])
+
+        results = dynamo.iter_scan('users', page_size=3)
+        first = []
+        async for item in results:
+            first.append(item)
+            if len(first) == 4:
+                break
+        assert results.cursor is not None
+        rest = [item async for item in dynamo.iter_scan('users', cursor=results.cursor, page_size=3)]
+        assert len(first) + len(rest) == 10
+
+        scan = dynamo.tables.parallel_scan('users', segments=2)
+        assert len([item async for item in scan]) == 10
+
+        path = str(tmpdir.join('users.json'))
+        assert await dynamo.export_table('users', path) == 10
+        await dynamo.destroy_all()
+        await dynamo.create_all()
+        assert await dynamo.import_table('users', path) == 10
+
+    with fake_app.app_context():
+        run(scenario())
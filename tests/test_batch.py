@@ -0,0 +1,115 @@
+"""Tests for our batch pipelines."""
+
+
+import pytest
+from flask_dynamo import UnprocessedItemsError
+from flask_dynamo.batch import batch_get, batch_write
+from flask_dynamo.manager import DynamoLazyTables
+
+
+class FakeConnection(object):
+    """Records batch calls, and leaves the first ``unprocessed`` keys unprocessed."""
+
+    def __init__(self, unprocessed=0):
+        self.unprocessed = unprocessed
+        self.calls = []
+
+    def batch_get_item(self, RequestItems):
+        self.calls.append(RequestItems)
+        responses, unprocessed = {}, {}
+        for table_name, request in RequestItems.items():
+            for key in request['Keys']:
+                if self.unprocessed:
+                    self.unprocessed -= 1
+                    unprocessed.setdefault(table_name, {'Keys': []})['Keys'].append(key)
+                else:
+                    responses.setdefault(table_name, []).append(dict(key, found=True))
+        return {'Responses': responses, 'UnprocessedKeys': unprocessed}
+
+    def batch_write_item(self, RequestItems):
+        self.calls.append(RequestItems)
+        unprocessed = {}
+        for table_name, requests in RequestItems.items():
+            for request in requests:
+                if self.unprocessed:
+                    self.unprocessed -= 1
+                    unprocessed.setdefault(table_name, []).append(request)
+        return {'UnprocessedItems': unprocessed}
+
+
+def no_sleep(delay):
+    pass
+
+def test_batch_get_chunks_and_dedupes():
+    conn = FakeConnection()
+    keys = [{'id': i} for i in range(250)] + [{'id': 0}]
+    items = list(batch_get(conn, {'users': {'Keys': keys, 'ConsistentRead': True}}))
+    assert len(items) == 250
+    assert [len(call['users']['Keys']) for call in conn.calls] == [100, 100, 50]
+    assert all(call['users']['ConsistentRead'] for call in conn.calls)
+
+def test_batch_get_multiple_tables():
+    conn = FakeConnection()
+    items = list(batch_get(conn, {
+        'users': {'Keys': [{'id': 1}, {'id': 2}]},
+        'groups': {'Keys': [{'name': 'admins'}]},
+    }))
+    assert sorted(table_name for table_name, _ in items) == ['groups', 'users', 'users']
+    assert len(conn.calls) == 1
+
+def test_batch_get_retries_only_unprocessed():
+    conn = FakeConnection(unprocessed=3)
+    delays = []
+    items = list(batch_get(conn, {'users': {'Keys': [{'id': i} for i in range(10)]}}, sleep=delays.append))
+    assert len(items) == 10
+    assert len(conn.calls[1]['users']['Keys']) == 3
+    assert len(delays) == 1
+
+def test_batch_get_gives_up():
+    conn = FakeConnection(unprocessed=1000)
+    with pytest.raises(UnprocessedItemsError) as error:
+        list(batch_get(conn, {'users': {'Keys': [{'id': 1}]}}, max_retries=2, sleep=no_sleep))
+    assert error.value.unprocessed == {'users': {'Keys': [{'id': 1}]}}
+    assert len(conn.calls) == 3
+
+def test_batch_get_gives_up_with_unsent_keys():
+    conn = FakeConnection(unprocessed=1000)
+    keys = [{'id': i} for i in range(250)]
+    with pytest.raises(UnprocessedItemsError) as error:
+        list(batch_get(conn, {'users': {'Keys': keys, 'ConsistentRead': True}}, max_retries=2, sleep=no_sleep))
+    unprocessed = error.value.unprocessed['users']
+    assert sorted(key['id'] for key in unprocessed['Keys']) == list(range(250))
+    assert unprocessed['ConsistentRead']
+
+def test_batch_get_streams():
+    conn = FakeConnection()
+    items = batch_get(conn, {'users': {'Keys': [{'id': i} for i in range(150)]}})
+    next(items)
+    assert len(conn.calls) == 1
+
+def test_batch_write_chunks_and_retries():
+    conn = FakeConnection(unprocessed=5)
+    requests = [{'PutRequest': {'Item': {'id': i}}} for i in range(30)]
+    batch_write(conn, {'users': requests}, sleep=no_sleep)
+    assert [len(call['users']) for call in conn.calls] == [25, 10]
+
+def test_batch_write_gives_up_with_unsent_requests():
+    conn = FakeConnection(unprocessed=5)
+    requests = [{'PutRequest': {'Item': {'id': i}}} for i in range(30)]
+    with pytest.raises(UnprocessedItemsError) as error:
+        batch_write(conn, {'users': requests}, max_retries=0, sleep=no_sleep)
+    assert len(conn.calls) == 1
+    unprocessed = error.value.unprocessed['users']
+    assert sorted(r['PutRequest']['Item']['id'] for r in unprocessed) == [0, 1, 2, 3, 4] + list(range(25, 30))
+
+def test_batch_write_coalesces_keys():
+    conn = FakeConnection()
+    tables = DynamoLazyTables(conn, [{
+        'TableName': 'users',
+        'KeySchema': [{'AttributeName': 'id', 'KeyType': 'HASH'}],
+    }])
+    tables.batch_write('users', put_items=[{'id': 1, 'v': 'a'}, {'id': 1, 'v': 'b'}], delete_keys=[{'id': 1}, {'id': 2}])
+    assert conn.calls == [{'users': [
+        {'DeleteRequest': {'Key': {'id': 2}}},
+        {'PutRequest': {'Item': {'id': 1, 'v': 'b'}}},
+    ]}]
@@ -0,0 +1,221 @@
+"""Tests for write-behind buffering."""
+
+
+import asyncio
+from threading import Event
+from time import sleep
+
+import pytest
+from flask import Flask
+from flask_dynamo import AsyncDynamo, ConfigurationError, Dynamo, UnprocessedItemsError, WriteBufferFullError
+from flask_dynamo.buffer import WriteBuffer
+
+
+class Recorder(object):
+    """A fake ``write`` function, which remembers every flush."""
+
+    def __init__(self, block=None):
+        self.flushes = []
+        self.block = block
+
+    def __call__(self, requests):
+        if self.block is not None:
+            self.block.wait()
+        self.flushes.append(requests)
+
+
+def wait_for(condition, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        sleep(0.01)
+    raise AssertionError('Timed out.')
+
+
+@pytest.fixture
+def buffered_app():
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='events',
+            KeySchema=[dict(AttributeName='id', KeyType='HASH')],
+            AttributeDefinitions=[dict(AttributeName='id', AttributeType='S')],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+    ]
+    app.config['DYNAMO_WRITE_BUFFERS'] = {'events': {'max_items': 1000, 'max_age': 60}}
+    return app
+
+
+def test_coalesces_writes():
+    write = Recorder()
+    buffer = WriteBuffer('events', write, ['id'], max_age=60)
+    buffer.put_item(Item={'id': 'a', 'n': 1})
+    buffer.put_item(Item={'id': 'b', 'n': 1})
+    buffer.put_item(Item={'id': 'a', 'n': 2})
+    buffer.delete_item(Key={'id': 'b'})
+    assert len(buffer) == 2
+    buffer.flush()
+    assert write.flushes == [[
+        {'PutRequest': {'Item': {'id': 'a', 'n': 2}}},
+        {'DeleteRequest': {'Key': {'id': 'b'}}},
+    ]]
+    assert len(buffer) == 0
+
+
+def test_flushes_when_full():
+    write = Recorder()
+    buffer = WriteBuffer('events', write, ['id'], max_items=3, max_age=60)
+    for i in range(3):
+        buffer.put_item(Item={'id': str(i)})
+    wait_for(lambda: write.flushes)
+    assert len(write.flushes[0]) == 3
+
+
+def test_flushes_when_old():
+    write = Recorder()
+    buffer = WriteBuffer('events', write, ['id'], max_age=0.05)
+    buffer.put_item(Item={'id': 'a'})
+    wait_for(lambda: write.flushes)
+
+
+def test_wake():
+    write = Recorder()
+    buffer = WriteBuffer('events', write, ['id'], max_age=60)
+    buffer.put_item(Item={'id': 'a'})
+    buffer.wake()
+    wait_for(lambda: write.flushes)
+
+
+def test_backpressure():
+    unblock = Event()
+    write = Recorder(block=unblock)
+    buffer = WriteBuffer('events', write, ['id'], max_items=2, max_age=60, max_pending=2)
+    buffer.put_item(Item={'id': 'a'})
+    buffer.put_item(Item={'id': 'b'})
+    # The flusher takes a and b, and gets stuck writing them.
+    wait_for(lambda: len(buffer) == 0)
+    buffer.put_item(Item={'id': 'c'})
+    buffer.put_item(Item={'id': 'd'})
+    # Rewriting a buffered key doesn't need room.
+    buffer.put_item(Item={'id': 'c', 'n': 2}, timeout=0)
+    with pytest.raises(WriteBufferFullError):
+        buffer.put_item(Item={'id': 'e'}, timeout=0.05)
+    unblock.set()
+    buffer.put_item(Item={'id': 'e'}, timeout=2)
+    buffer.close()
+    written = [r['PutRequest']['Item']['id'] for requests in write.flushes for r in requests]
+    assert sorted(written) == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_requeues_unprocessed():
+    calls = []
+
+    def write(requests):
+        calls.append(requests)
+        if len(calls) == 1:
+            raise UnprocessedItemsError('Nope.', {'events': requests[:1]})
+
+    buffer = WriteBuffer('events', write, ['id'], max_age=60)
+    buffer.put_item(Item={'id': 'a', 'n': 1})
+    buffer.put_item(Item={'id': 'b'})
+    with pytest.raises(UnprocessedItemsError):
+        buffer.flush()
+    assert len(buffer) == 1
+    buffer.flush()
+    assert calls[1] == [{'PutRequest': {'Item': {'id': 'a', 'n': 1}}}]
+
+
+def test_requeues_on_other_errors():
+    calls = []
+
+    def write(requests):
+        calls.append(requests)
+        if len(calls) == 1:
+            raise ConnectionError('Nope.')
+
+    buffer = WriteBuffer('events', write, ['id'], max_age=60)
+    buffer.put_item(Item={'id': 'a', 'n': 1})
+    buffer.put_item(Item={'id': 'b'})
+    with pytest.raises(ConnectionError):
+        buffer.flush()
+    assert len(buffer) == 2
+    buffer.put_item(Item={'id': 'a', 'n': 2})
+    buffer.flush()
+    assert calls[1] == [{'PutRequest': {'Item': {'id': 'a', 'n': 2}}}, {'PutRequest': {'Item': {'id': 'b'}}}]
+
+
+def test_background_errors_are_raised_on_flush():
+    failing = [True]
+    write = Recorder()
+
+    def flaky(requests):
+        if failing[0]:
+            raise ValueError('Boom.')
+        write(requests)
+
+    buffer = WriteBuffer('events', flaky, ['id'], max_items=1, max_age=60)
+    buffer.put_item(Item={'id': 'a'})
+    wait_for(lambda: buffer.error is not None)
+    with pytest.raises(ValueError):
+        buffer.flush()
+    # Failed writes are retried in the background, with backoff.
+    failing[0] = False
+    wait_for(lambda: write.flushes, timeout=5)
+    assert write.flushes == [[{'PutRequest': {'Item': {'id': 'a'}}}]]
+
+
+def test_close():
+    write = Recorder()
+    buffer = WriteBuffer('events', write, ['id'], max_age=60)
+    buffer.put_item(Item={'id': 'a'})
+    buffer.close()
+    assert len(write.flushes) == 1
+    with pytest.raises(RuntimeError):
+        buffer.put_item(Item={'id': 'b'})
+
+
+def test_dynamo_buffer(buffered_app):
+    dynamo = Dynamo(buffered_app)
+    with buffered_app.app_context():
+        buffer = dynamo.buffer('events')
+        assert dynamo.tables.buffer('events') is buffer
+        for i in range(30):
+            buffer.put_item(Item={'id': str(i % 10), 'n': i})
+        assert dynamo.tables['events'].scan()['Count'] == 0
+        dynamo.tables.flush_buffers()
+        items = dynamo.tables['events'].scan()['Items']
+        assert sorted(int(item['n']) for item in items) == list(range(20, 30))
+
+        with pytest.raises(KeyError):
+            dynamo.buffer('users')
+
+
+def test_teardown_wakes_buffers(buffered_app):
+    dynamo = Dynamo(buffered_app)
+    with buffered_app.app_context():
+        dynamo.buffer('events').put_item(Item={'id': 'a'})
+    with buffered_app.app_context():
+        wait_for(lambda: 'Item' in dynamo.tables['events'].get_item(Key={'id': 'a'}))
+
+
+def test_async_teardown_wakes_buffers(buffered_app):
+    dynamo = AsyncDynamo(buffered_app)
+    with buffered_app.app_context():
+        dynamo.buffer('events').put_item(Item={'id': 'a'})
+    with buffered_app.app_context():
+        wait_for(lambda: 'Item' in dynamo.tables._tables['events'].get_item(Key={'id': 'a'}))
+        asyncio.run(dynamo.tables.flush_buffers())
+
+
+@pytest.mark.parametrize('buffers', [
+    {'users': {}},
+    {'events': {'max_items': 0}},
+    {'events': {'max_age': '1'}},
+    {'events': {'size': 10}},
+])
+def test_invalid_buffers(buffered_app, buffers):
+    buffered_app.config['DYNAMO_WRITE_BUFFERS'] = buffers
+    with pytest.raises(ConfigurationError):
+        Dynamo(buffered_app)
@@ -0,0 +1,134 @@
+"""Tests for our item cache."""
+
+
+import pytest
+from flask import g
+from flask_dynamo import ConfigurationError, Dynamo
+from flask_dynamo.cache import CachedTable, ItemCache
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_ttl():
+    clock = FakeClock()
+    cache = ItemCache(1024 * 1024, clock=clock)
+    cache.set('a', {'v': 1}, ttl=10)
+    assert cache.get('a') == {'v': 1}
+    clock.now = 11
+    assert cache.get('a') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    assert len(cache) == 0
+
+def test_lru_eviction_by_bytes():
+    cache = ItemCache(2000)
+    for i in range(20):
+        cache.set(i, {'payload': 'x' * 100}, ttl=60)
+    assert cache.bytes <= 2000
+    assert cache.evictions > 0
+    assert cache.get(19) is not None
+    assert cache.get(0) is None
+
+def test_copies_values():
+    cache = ItemCache(1024 * 1024)
+    item = {'tags': ['a']}
+    cache.set('a', item, ttl=60)
+    item['tags'].append('b')
+    cache.get('a')['tags'].append('c')
+    assert cache.get('a') == {'tags': ['a']}
+
+def test_stale_set_is_skipped():
+    cache = ItemCache(1024 * 1024)
+    epoch = cache.epoch()
+    cache.delete('a')
+    cache.set('a', {'v': 'stale'}, ttl=60, epoch=epoch)
+    assert cache.get('a') is None
+
+@pytest.fixture
+def cached_app(fake_app):
+    fake_app.config['DYNAMO_CACHE'] = {'users': 60}
+    return fake_app
+
+@pytest.fixture
+def dynamo(cached_app):
+    dynamo = Dynamo(cached_app)
+    with cached_app.app_context():
+        dynamo.create_all()
+        dynamo.tables['users'].put_item(Item={'username': 'rdegges', 'visits': 1})
+    return dynamo
+
+def test_invalid_cache_settings(fake_app):
+    fake_app.config['DYNAMO_CACHE'] = {'groups': 60}
+    with pytest.raises(ConfigurationError):
+        Dynamo(fake_app)
+    fake_app.config['DYNAMO_CACHE'] = {'users': 0}
+    with pytest.raises(ConfigurationError):
+        Dynamo(fake_app)
+
+def test_cached_get_item(cached_app, dynamo, fake_dynamo):
+    with cached_app.app_context():
+        table = dynamo.tables['users']
+        assert isinstance(table, CachedTable)
+        assert table.get_item(Key={'username': 'rdegges'})['Item']['visits'] == 1
+        assert table.get_item(Key={'username': 'rdegges'})['Item']['visits'] == 1
+        assert table.get_item(Key={'username': 'nobody'}) == {}
+        assert table.get_item(Key={'username': 'nobody'}) == {}
+    assert len(fake_dynamo.calls_to('GetItem')) == 2
+    assert dynamo.tables.cache.stats()['request_hits'] == 2
+
+    with cached_app.app_context():
+        table.get_item(Key={'username': 'rdegges'})
+        table.get_item(Key={'username': 'rdegges'}, ConsistentRead=True)
+    assert len(fake_dynamo.calls_to('GetItem')) == 3
+    assert dynamo.tables.cache.stats()['hits'] == 1
+
+def test_identity_map_copies_and_caps(cached_app, dynamo, monkeypatch):
+    monkeypatch.setattr('flask_dynamo.cache.IDENTITY_MAP_SIZE', 2)
+    with cached_app.app_context():
+        table = dynamo.tables['users']
+        table.get_item(Key={'username': 'rdegges'})['Item']['visits'] = 100
+        item = table.get_item(Key={'username': 'rdegges'})['Item']
+        assert item['visits'] == 1
+        item['visits'] = 200
+        assert table.get_item(Key={'username': 'rdegges'})['Item']['visits'] == 1
+
+        for username in ('a', 'b', 'c'):
+            table.get_item(Key={'username': username})
+        assert len(g._dynamo_identity_map) == 2
+
+def test_writes_invalidate(cached_app, dynamo, fake_dynamo):
+    with cached_app.app_context():
+        table = dynamo.tables['users']
+        table.get_item(Key={'username': 'rdegges'})
+        table.put_item(Item={'username': 'rdegges', 'visits': 2})
+        assert table.get_item(Key={'username': 'rdegges'})['Item']['visits'] == 2
+
+        table.update_item(
+            Key={'username': 'rdegges'},
+            UpdateExpression='SET visits = :v',
+            ExpressionAttributeValues={':v': 3},
+        )
+        table.get_item(Key={'username': 'rdegges'})
+
+        dynamo.batch_write('users', delete_keys=[{'username': 'rdegges'}])
+        assert table.get_item(Key={'username': 'rdegges'}) == {}
+    assert len(fake_dynamo.calls_to('GetItem')) == 4
+
+def test_batch_writer_invalidates(cached_app, dynamo):
+    with cached_app.app_context():
+        table = dynamo.tables['users']
+        table.get_item(Key={'username': 'rdegges'})
+        with table.batch_writer() as writer:
+            writer.put_item(Item={'username': 'rdegges', 'visits': 2})
+            writer.put_item(Item={'username': 'jdoe', 'visits': 1})
+        assert table.get_item(Key={'username': 'rdegges'})['Item']['visits'] == 2
+
+        with table.batch_writer() as writer:
+            writer.delete_item(Key={'username': 'rdegges'})
+        assert table.get_item(Key={'username': 'rdegges'}) == {}
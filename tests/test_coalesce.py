@@ -0,0 +1,216 @@
+"""Tests for single-flight read coalescing."""
+
+
+from threading import Event, Thread
+from time import sleep
+
+import pytest
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError, ParamValidationError
+from flask import Flask
+from flask_dynamo import ConfigurationError, Dynamo
+from flask_dynamo.cache import CachedTable
+from flask_dynamo.coalesce import CoalescedTable, freeze_params
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='users',
+            KeySchema=[dict(AttributeName='id', KeyType='HASH')],
+            AttributeDefinitions=[dict(AttributeName='id', AttributeType='S')],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+        dict(
+            TableName='posts',
+            KeySchema=[dict(AttributeName='author', KeyType='HASH'), dict(AttributeName='n', KeyType='RANGE')],
+            AttributeDefinitions=[
+                dict(AttributeName='author', AttributeType='S'),
+                dict(AttributeName='n', AttributeType='N'),
+            ],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+    ]
+    app.config['DYNAMO_COALESCE'] = {'users': {}, 'posts': {}}
+    return app
+
+
+@pytest.fixture
+def dynamo(app):
+    dynamo = Dynamo(app)
+    with app.app_context():
+        for id in 'abcde':
+            dynamo.tables['users'].put_item(Item={'id': id, 'name': id.upper()})
+        yield dynamo
+
+
+def hold_calls(dynamo, fail=False):
+    """Record calls, holding reads until ``release`` is set."""
+    backend = dynamo.backend
+    handle = backend.handle
+    calls = []
+    release = Event()
+
+    def held(operation, body):
+        if operation in ('GetItem', 'Query', 'BatchGetItem'):
+            calls.append(operation)
+            release.wait(5)
+            if fail:
+                return 400, {
+                    '__type': 'com.amazonaws.dynamodb.v20120810#ResourceNotFoundException',
+                    'message': 'Requested resource not found',
+                }
+        return handle(operation, body)
+
+    backend.handle = held
+    return calls, release
+
+
+def in_threads(func, count):
+    """Call ``func`` in ``count`` threads, returning their results (or errors)."""
+    results = [None] * count
+
+    def run(i):
+        try:
+            results[i] = func(i)
+        except Exception as e:
+            results[i] = e
+
+    threads = [Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_for(condition):
+    for _ in range(500):
+        if condition():
+            return
+        sleep(0.01)
+    raise AssertionError('Timed out.')
+
+
+def join(threads):
+    for thread in threads:
+        thread.join(5)
+
+def test_identical_gets_share_a_call(dynamo):
+    table = dynamo.tables['users']
+    coalescer = dynamo.tables.coalescers['users']
+    calls, release = hold_calls(dynamo)
+    threads, results = in_threads(lambda i: table.get_item(Key={'id': 'a'}), 10)
+    wait_for(lambda: coalescer.shared == 9)
+    release.set()
+    join(threads)
+
+    assert calls == ['GetItem']
+    assert all(result['Item'] == {'id': 'a', 'name': 'A'} for result in results)
+    assert len(set(id(result['Item']) for result in results)) == 10
+    assert coalescer.stats() == {'calls': 1, 'shared': 9, 'batches': 0}
+
+def test_different_requests_dont_share(dynamo):
+    table = dynamo.tables['users']
+    calls, release = hold_calls(dynamo)
+    release.set()
+    requests = [{'Key': {'id': 'a'}}, {'Key': {'id': 'b'}}, {'Key': {'id': 'a'}, 'ConsistentRead': True}]
+    threads, results = in_threads(lambda i: table.get_item(**requests[i]), 3)
+    join(threads)
+    assert len(calls) == 3
+    assert [result['Item']['id'] for result in results] == ['a', 'b', 'a']
+
+def test_errors_are_shared(dynamo):
+    table = dynamo.tables['users']
+    coalescer = dynamo.tables.coalescers['users']
+    calls, release = hold_calls(dynamo, fail=True)
+    threads, results = in_threads(lambda i: table.get_item(Key={'id': 'a'}), 4)
+    wait_for(lambda: coalescer.shared == 3)
+    release.set()
+    join(threads)
+    assert all(isinstance(result, Exception) for result in results)
+    assert coalescer.calls == 1
+
+def test_query(dynamo):
+    posts = dynamo.tables['posts']
+    for n in range(3):
+        posts.put_item(Item={'author': 'ann', 'n': n})
+    coalescer = dynamo.tables.coalescers['posts']
+    calls, release = hold_calls(dynamo)
+    threads, results = in_threads(lambda i: posts.query(KeyConditionExpression=Key('author').eq('ann')), 5)
+    wait_for(lambda: coalescer.shared == 4)
+    release.set()
+    join(threads)
+    assert calls == ['Query']
+    assert all(result['Count'] == 3 for result in results)
+
+def test_writes_start_fresh_calls(dynamo):
+    table = dynamo.tables['users']
+    coalescer = dynamo.tables.coalescers['users']
+    calls, release = hold_calls(dynamo)
+    threads, results = in_threads(lambda i: table.get_item(Key={'id': 'a'}), 1)
+    wait_for(lambda: len(calls) == 1)
+    table.put_item(Item={'id': 'a', 'name': 'Ann'})
+    more, fresh = in_threads(lambda i: table.get_item(Key={'id': 'a'}), 1)
+    wait_for(lambda: len(calls) == 2)
+    release.set()
+    join(threads + more)
+    assert coalescer.shared == 0
+    assert fresh[0]['Item']['name'] == 'Ann'
+
+def test_write_errors_arent_replaced(dynamo):
+    table = dynamo.tables['users']
+    with pytest.raises(ClientError) as e:
+        table.put_item(Item={'name': 'Nobody'})
+    assert e.value.response['Error']['Code'] == 'ValidationException'
+    for method in (table.update_item, table.delete_item):
+        with pytest.raises(ParamValidationError):
+            method()
+
+def test_micro_batching(app):
+    # Batches go as soon as they're full, or once the window is up.
+    app.config['DYNAMO_COALESCE'] = {'users': {'batch_window': 0.1, 'max_batch': 5}}
+    dynamo = Dynamo(app)
+    with app.app_context():
+        table = dynamo.tables['users']
+        for id in 'abcde':
+            table.put_item(Item={'id': id, 'name': id.upper()})
+        calls, release = hold_calls(dynamo)
+        release.set()
+        threads, results = in_threads(lambda i: table.get_item(Key={'id': 'abcde'[i]}), 5)
+        join(threads)
+        assert calls == ['BatchGetItem']
+        assert [result['Item']['name'] for result in results] == list('ABCDE')
+        assert table.get_item(Key={'id': 'nope'}) == {}
+        assert dynamo.tables.coalescers['users'].batches == 2
+        # Anything fancier than a plain key goes through GetItem.
+        assert table.get_item(Key={'id': 'a'}, ProjectionExpression='id')['Item'] == {'id': 'a'}
+        assert calls == ['BatchGetItem', 'BatchGetItem', 'GetItem']
+
+def test_stacks_under_the_cache(app):
+    app.config['DYNAMO_CACHE'] = {'users': 60}
+    dynamo = Dynamo(app)
+    with app.app_context():
+        table = dynamo.tables['users']
+        assert isinstance(table, CachedTable)
+        assert isinstance(table._table, CoalescedTable)
+        assert isinstance(dynamo.tables['posts'], CoalescedTable)
+
+def test_freeze_params():
+    assert freeze_params({'b': [1, {'c': 2}], 'a': set(['x'])}) == freeze_params({'a': set(['x']), 'b': [1, {'c': 2}]})
+    assert freeze_params(Key('a').eq(1)) == freeze_params(Key('a').eq(1))
+    assert freeze_params(Key('a').eq(1)) != freeze_params(Key('a').eq(2))
+    with pytest.raises(TypeError):
+        freeze_params({'a': bytearray(b'x')})
+
+@pytest.mark.parametrize('settings', [
+    {'nope': {}},
+    {'users': {'window': 1}},
+    {'users': {'batch_window': 0}},
+    {'users': {'max_batch': 101}},
+])
+def test_invalid_settings(app, settings):
+    app.config['DYNAMO_COALESCE'] = settings
+    with pytest.raises(ConfigurationError):
+        Dynamo(app)
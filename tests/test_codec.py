@@ -0,0 +1,54 @@
+"""Tests for our attribute value codec."""
+
+
+from decimal import Decimal
+
+import pytest
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+from flask_dynamo import codec
+
+
+ITEM = {
+    'name': 'rdegges',
+    'age': Decimal('30'),
+    'score': Decimal('99.5'),
+    'admin': False,
+    'avatar': b'\x00\x01',
+    'nickname': None,
+    'tags': set(['a', 'b']),
+    'lucky': set([Decimal('7'), Decimal('13')]),
+    'profile': {'emails': ['r@rdegges.com'], 'depth': {'more': Decimal('1')}},
+}
+
+def test_serialize_matches_boto3():
+    serializer = TypeSerializer()
+    for value in ITEM.values():
+        expected = serializer.serialize(value)
+        actual = codec.serialize(value)
+        for tag in ('SS', 'NS'):
+            if tag in expected:
+                expected[tag], actual[tag] = sorted(expected[tag]), sorted(actual[tag])
+        assert actual == expected
+
+def test_deserialize_matches_boto3():
+    deserializer = TypeDeserializer()
+    wire = TypeSerializer().serialize(ITEM)['M']
+    expected = {k: deserializer.deserialize(v) for k, v in wire.items()}
+    expected['avatar'] = expected['avatar'].value
+    assert codec.deserialize_item(wire) == expected
+
+def test_deserialize_floats():
+    wire = codec.serialize_item({'count': 3, 'ratio': 0.25, 'big': Decimal('1e3'), 'ns': set([1, 2.5])})
+    item = codec.deserialize_item(wire, use_float=True)
+    assert item == {'count': 3, 'ratio': 0.25, 'big': 1000.0, 'ns': set([1, 2.5])}
+    assert type(item['count']) is int
+    assert type(item['ratio']) is float
+
+def test_serialize_floats_and_binary():
+    assert codec.serialize(0.1) == {'N': '0.1'}
+    assert codec.serialize(Binary(b'x')) == {'B': b'x'}
+
+@pytest.mark.parametrize('value', [float('inf'), float('nan'), set(), set([1, 'a']), object()])
+def test_serialize_invalid(value):
+    with pytest.raises(TypeError):
+        codec.serialize(value)
@@ -0,0 +1,105 @@
+"""Tests for our client-backed tables."""
+
+
+from decimal import Decimal
+
+import pytest
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.stub import Stubber
+from flask import Flask
+from flask_dynamo import Dynamo
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['AWS_ACCESS_KEY_ID'] = 'test'
+    app.config['AWS_SECRET_ACCESS_KEY'] = 'test'
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='users',
+            KeySchema=[dict(AttributeName='username', KeyType='HASH')],
+            AttributeDefinitions=[dict(AttributeName='username', AttributeType='S')],
+            ProvisionedThroughput=dict(ReadCapacityUnits=5, WriteCapacityUnits=5),
+        ),
+    ]
+    return app
+
+@pytest.fixture
+def stubber(app):
+    dynamo = Dynamo(app)
+    with app.app_context():
+        with Stubber(dynamo.client) as stubber:
+            yield dynamo, stubber
+
+def test_client(app):
+    app.config['DYNAMO_MAX_POOL_CONNECTIONS'] = 32
+    dynamo = Dynamo(app)
+    with app.app_context():
+        assert dynamo.client is dynamo.client
+        assert dynamo.client.meta.config.max_pool_connections == 32
+        assert dynamo.client.meta.region_name == dynamo.connection.meta.client.meta.region_name
+
+def test_get(stubber):
+    dynamo, stubber = stubber
+    stubber.add_response(
+        'get_item',
+        {'Item': {'username': {'S': 'rdegges'}, 'age': {'N': '30'}}},
+        {'TableName': 'users', 'Key': {'username': {'S': 'rdegges'}}, 'ConsistentRead': True},
+    )
+    stubber.add_response('get_item', {}, {'TableName': 'users', 'Key': {'username': {'S': 'nobody'}}})
+
+    assert dynamo.fast_tables['users'].get({'username': 'rdegges'}, consistent=True) == {
+        'username': 'rdegges',
+        'age': Decimal('30'),
+    }
+    assert dynamo.fast_tables['users'].get({'username': 'nobody'}) is None
+
+def test_get_floats(app):
+    app.config['DYNAMO_FAST_FLOATS'] = True
+    dynamo = Dynamo(app)
+    with app.app_context(), Stubber(dynamo.client) as stubber:
+        stubber.add_response('get_item', {'Item': {'age': {'N': '30'}, 'ratio': {'N': '0.5'}}})
+        assert dynamo.fast_tables['users'].get({'username': 'rdegges'}) == {'age': 30, 'ratio': 0.5}
+
+def test_put(stubber):
+    dynamo, stubber = stubber
+    stubber.add_response('put_item', {}, {'TableName': 'users', 'Item': {'username': {'S': 'rdegges'}, 'age': {'N': '30'}}})
+    dynamo.fast_tables['users'].put({'username': 'rdegges', 'age': 30})
+
+def test_query(stubber):
+    dynamo, stubber = stubber
+    stubber.add_response(
+        'query',
+        {'Items': [{'username': {'S': 'rdegges'}}], 'LastEvaluatedKey': {'username': {'S': 'rdegges'}}},
+        {
+            'TableName': 'users',
+            'KeyConditionExpression': 'username = :u',
+            'ExpressionAttributeValues': {':u': {'S': 'rdegges'}},
+        },
+    )
+    response = dynamo.fast_tables['users'].query(
+        KeyConditionExpression='username = :u',
+        ExpressionAttributeValues={':u': 'rdegges'},
+    )
+    assert response['Items'] == [{'username': 'rdegges'}]
+    assert response['LastEvaluatedKey'] == {'username': 'rdegges'}
+
+def test_query_conditions(stubber):
+    dynamo, stubber = stubber
+    stubber.add_response(
+        'query',
+        {'Items': [{'username': {'S': 'rdegges'}}]},
+        {
+            'TableName': 'users',
+            'KeyConditionExpression': '#n0 = :v0',
+            'FilterExpression': '#n1 > :v1',
+            'ExpressionAttributeNames': {'#n0': 'username', '#n1': 'age'},
+            'ExpressionAttributeValues': {':v0': {'S': 'rdegges'}, ':v1': {'N': '21'}},
+        },
+    )
+    response = dynamo.fast_tables['users'].query(
+        KeyConditionExpression=Key('username').eq('rdegges'),
+        FilterExpression=Attr('age').gt(21),
+    )
+    assert response['Items'] == [{'username': 'rdegges'}]
@@ -0,0 +1,256 @@
+"""Tests for hedged reads."""
+
+
+import os
+from threading import Event, Thread
+from time import monotonic, sleep
+
+import pytest
+from flask import Flask
+from flask_dynamo import ConfigurationError, Dynamo
+from flask_dynamo.hedge import HedgeBudget, HedgedTable, Hedger, LatencyHistogram, _reset_hedgers
+from flask_dynamo.routing import RoutedTable
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def warm(hedger, latency=0.001, samples=10):
+    for _ in range(samples):
+        hedger.histogram('get_item').record(latency)
+        hedger.budget.earn()
+
+def test_histogram():
+    clock = FakeClock()
+    histogram = LatencyHistogram(window=60, clock=clock)
+    assert histogram.percentile(99) is None
+    for _ in range(90):
+        histogram.record(0.001)
+    for _ in range(10):
+        histogram.record(0.1)
+    assert 0.001 <= histogram.percentile(50) < 0.0012
+    assert 0.1 <= histogram.percentile(95) < 0.12
+    assert histogram.percentile(100) < 0.12
+    histogram.record(1000)
+    assert histogram.percentile(100) == histogram.bounds[-1]
+
+    # Samples are dropped after one to two windows.
+    clock.now = 61
+    histogram.record(0.5)
+    assert len(histogram) == 102
+    clock.now = 122
+    assert len(histogram) == 1
+    clock.now = 400
+    assert len(histogram) == 0
+
+def test_budget():
+    budget = HedgeBudget(ratio=0.25, burst=2)
+    for _ in range(3):
+        budget.earn()
+    assert not budget.spend()
+    budget.earn()
+    assert budget.spend()
+    assert not budget.spend()
+    for _ in range(100):
+        budget.earn()
+    assert budget.spend() and budget.spend()
+    assert not budget.spend()
+
+def test_hedge_wins():
+    hedger = Hedger('users', budget=1, min_samples=10)
+    warm(hedger)
+    release = Event()
+
+    def slow():
+        release.wait(5)
+        return 'primary'
+
+    try:
+        assert hedger.call('get_item', slow, lambda: 'hedge') == 'hedge'
+    finally:
+        release.set()
+    assert hedger.stats() == {'reads': 1, 'hedges': 1, 'wins': 1, 'skipped': 0}
+
+def test_fast_reads_arent_hedged():
+    hedger = Hedger('users', budget=1, min_samples=10)
+    assert hedger.delay('get_item') is None
+    warm(hedger)
+    assert hedger.delay('get_item') == hedger.min_delay
+    assert hedger.call('get_item', lambda: 'primary', lambda: 'hedge') == 'primary'
+    assert hedger.hedges == 0
+
+def test_errors():
+    hedger = Hedger('users', budget=1, min_samples=10)
+    warm(hedger)
+    release = Event()
+
+    def slow_failure():
+        release.wait(5)
+        raise ValueError('primary')
+
+    def hedge_failure():
+        release.set()
+        raise KeyError('hedge')
+
+    # If the hedge fails, we still get the primary's answer...
+    assert hedger.call('get_item', lambda: release.wait(5) and 'primary', hedge_failure) == 'primary'
+    release.clear()
+    # ...and if both fail, the primary's error.
+    with pytest.raises(ValueError):
+        hedger.call('get_item', slow_failure, hedge_failure)
+
+    # Errors before the hedge delay aren't hedged at all.
+    def failure():
+        raise ValueError('primary')
+
+    with pytest.raises(ValueError):
+        hedger.call('get_item', failure, lambda: 'hedge')
+    assert hedger.hedges == 2
+
+def test_reset_after_fork():
+    hedger = Hedger('users', budget=1, min_samples=10)
+    warm(hedger)
+    assert hedger.call('get_item', lambda: 'primary', lambda: 'hedge') == 'primary'
+    pool = hedger._pool
+    assert pool is not None
+
+    _reset_hedgers()
+    assert hedger._pool is None
+    assert hedger.call('get_item', lambda: 'primary', lambda: 'hedge') == 'primary'
+    assert hedger._pool is not pool
+    pool.shutdown()
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_hedged_reads_in_forked_child():
+    # Without a hedge to start a second worker, nothing runs the primary.
+    hedger = Hedger('users', budget=0.01, min_samples=10)
+    warm(hedger)
+    assert hedger.call('get_item', lambda: 'primary', lambda: 'hedge') == 'primary'
+    sleep(0.05)  # Let the worker go idle.
+
+    pid = os.fork()
+    if not pid:
+        try:
+            hedger.call('get_item', lambda: 'primary', lambda: 'hedge')
+        finally:
+            os._exit(0)
+
+    # The parent's workers are gone, so the child would hang without a fresh pool.
+    deadline = monotonic() + 5
+    while not os.waitpid(pid, os.WNOHANG)[0]:
+        if monotonic() > deadline:
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+            pytest.fail('hedged read hung in the forked child')
+        sleep(0.01)
+
+
+@pytest.fixture
+def hedged_app(fake_app):
+    fake_app.config['DYNAMO_HEDGE'] = {'users': {'min_samples': 10, 'budget': 1, 'min_delay': 0.05, 'max_delay': 0.1}}
+    return fake_app
+
+
+@pytest.fixture
+def dynamo(hedged_app):
+    dynamo = Dynamo(hedged_app)
+    with hedged_app.app_context():
+        dynamo.create_all()
+        dynamo.tables['users'].put_item(Item={'username': 'ann'})
+        yield dynamo
+
+
+def slow_once(fake_dynamo, seconds):
+    """Make the next request to the fake endpoint take ``seconds``."""
+    delays = [seconds]
+    fake_dynamo.latency = lambda: delays.pop() if delays else 0
+
+def test_hedged_reads(dynamo, fake_dynamo):
+    table = dynamo.tables['users']
+    assert isinstance(table, HedgedTable)
+    assert table._hedge_table.meta.client is not dynamo.connection.meta.client
+    hedger = dynamo.tables.hedgers['users']
+    for _ in range(10):
+        assert table.get_item(Key={'username': 'ann'})['Item'] == {'username': 'ann'}
+    assert hedger.hedges == 0
+
+    slow_once(fake_dynamo, 1.0)
+    started = monotonic()
+    assert table.get_item(Key={'username': 'ann'})['Item'] == {'username': 'ann'}
+    assert monotonic() - started < 0.5
+    assert hedger.stats() == {'reads': 11, 'hedges': 1, 'wins': 1, 'skipped': 0}
+
+def test_hedge_connection_per_scope(hedged_app):
+    hedged_app.config['DYNAMO_CONNECTION_SCOPE'] = 'thread'
+    dynamo = Dynamo(hedged_app)
+    clients = []
+
+    def hedge_client():
+        with hedged_app.app_context():
+            clients.append(dynamo.tables['users']._hedge_table.meta.client)
+
+    hedge_client()
+    hedge_client()
+    thread = Thread(target=hedge_client)
+    thread.start()
+    thread.join()
+    assert clients[0] is clients[1]
+    assert clients[2] is not clients[0]
+
+def test_hedges_follow_the_router(hedged_app, fake_dynamo):
+    hedged_app.config['AWS_REGION'] = 'us-east-1'
+    hedged_app.config['DYNAMO_READ_REGIONS'] = ['us-west-2', 'us-east-1']
+    dynamo = Dynamo(hedged_app)
+    with hedged_app.app_context():
+        table = dynamo.tables['users']
+        hedge_table = table._hedge_table
+        assert isinstance(hedge_table, RoutedTable)
+        assert hedge_table._router is dynamo.router
+        replica = hedge_table.replica('us-west-2')
+        assert replica.meta.client.meta.region_name == 'us-west-2'
+        assert replica.meta.client is not table._table.replica('us-west-2').meta.client
+        assert hedge_table.replica('us-east-1').meta.client is not dynamo.connection.meta.client
+
+        # With the nearest region down, hedges fail over with everything else.
+        dynamo.create_all()
+        dynamo.router.failed('us-west-2')
+        hedge_table.get_item(Key={'username': 'ann'})
+        assert dynamo.router.latency['us-west-2'] is None
+        assert dynamo.router.latency['us-east-1'] is not None
+
+def test_hedge_budget(hedged_app, fake_dynamo):
+    hedged_app.config['DYNAMO_HEDGE']['users']['budget'] = 0.01
+    dynamo = Dynamo(hedged_app)
+    with hedged_app.app_context():
+        dynamo.create_all()
+        table = dynamo.tables['users']
+        for _ in range(10):
+            table.get_item(Key={'username': 'ann'})
+
+        slow_once(fake_dynamo, 0.3)
+        started = monotonic()
+        assert 'Item' not in table.get_item(Key={'username': 'ann'})
+        assert monotonic() - started >= 0.3
+        assert dynamo.tables.hedgers['users'].stats()['skipped'] == 1
+
+@pytest.mark.parametrize('settings', [
+    {'nope': {}},
+    {'users': {'delay': 1}},
+    {'users': {'percentile': 100}},
+    {'users': {'budget': 2}},
+    {'users': {'workers': 1.5}},
+])
+def test_invalid_settings(settings):
+    app = Flask(__name__)
+    app.config['DYNAMO_TABLES'] = [
+        dict(TableName='users', KeySchema=[dict(AttributeName='id', KeyType='HASH')]),
+    ]
+    app.config['DYNAMO_HEDGE'] = settings
+    with pytest.raises(ConfigurationError):
+        Dynamo(app)
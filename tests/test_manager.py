@@ -2,10 +2,12 @@
 from __future__ import print_function
 
 
+import gc
 from os import environ
 from uuid import uuid4
 
 import pytest
+from botocore.exceptions import ClientError
 from flask import Flask, current_app
 from flask_dynamo import Dynamo, ConfigurationError
 
@@ -93,3 +95,215 @@ def test_table_access(active_dynamo, app):
         for table_name, table in active_dynamo.tables.items():
             assert active_dynamo.tables[table_name].name == table_name
             assert current_app.extensions['dynamo'].tables[table_name].name == table_name
+
+def test_table_cache(app, dynamo):
+    with app.app_context():
+        table_name = dynamo.tables.keys()[0]
+        assert dynamo.tables[table_name] is dynamo.tables[table_name]
+        assert dynamo.get_table(table_name) is dynamo.tables[table_name]
+
+def test_table_cache_invalidate(app, dynamo):
+    with app.app_context():
+        phones, users = dynamo.tables.keys()
+        table = dynamo.tables[phones]
+        dynamo.tables[users]
+        dynamo.tables.invalidate(phones)
+        assert dynamo.tables[phones] is not table
+        assert users in dynamo.tables._tables
+        dynamo.tables.invalidate()
+        assert not dynamo.tables._tables
+
+def test_warm_tables(app):
+    app.config['DYNAMO_WARM_TABLES'] = True
+    dynamo = Dynamo(app)
+    assert sorted(dynamo.tables._tables) == sorted(dynamo.tables.keys())
+
+def test_lazy_connection(app):
+    dynamo = Dynamo(app)
+    state = dynamo._get_ctx(app).scope.get()
+    assert state.session is None
+    assert state.connection is None
+
+def test_prewarm(app):
+    dynamo = Dynamo(app)
+    with app.app_context():
+        dynamo.prewarm()
+    state = dynamo._get_ctx(app).scope.get()
+    assert state.connection is not None
+    assert state.client is not None
+    assert sorted(state.tables[dynamo.tables._owner_id]) == sorted(dynamo.tables.keys())
+
+def test_lazy_boto3_import():
+    import subprocess
+    import sys
+
+    code = 'import sys, flask_dynamo; print(any(m.split(".")[0] in ("boto3", "botocore") for m in sys.modules))'
+    assert subprocess.check_output([sys.executable, '-c', code]).strip() == b'False'
+
+def test_invalid_connection_scope(app):
+    app.config['DYNAMO_CONNECTION_SCOPE'] = 'request'
+    with pytest.raises(ConfigurationError):
+        Dynamo(app)
+
+def test_thread_connection_scope(app):
+    from threading import Thread
+
+    app.config['DYNAMO_CONNECTION_SCOPE'] = 'thread'
+    dynamo = Dynamo(app)
+    table_name = dynamo.tables.keys()[0]
+    found = []
+
+    def lookup():
+        with app.app_context():
+            found.append((dynamo.connection, dynamo.tables[table_name]))
+
+    with app.app_context():
+        connection, table = dynamo.connection, dynamo.tables[table_name]
+        assert dynamo.connection is connection
+        thread = Thread(target=lookup)
+        thread.start()
+        thread.join()
+        assert found[0][0] is not connection
+        assert found[0][1] is not table
+
+def make_tenant(tables, **config):
+    app = Flask(__name__)
+    app.config['AWS_ACCESS_KEY_ID'] = 'test'
+    app.config['AWS_SECRET_ACCESS_KEY'] = 'test'
+    app.config['DYNAMO_TABLES'] = tables
+    app.config.update(config)
+    return app
+
+def test_shared_across_apps():
+    dynamo = Dynamo()
+    first = make_tenant([make_table('first', 'id', 'S')])
+    second = make_tenant([make_table('second', 'id', 'S')])
+    dynamo.init_app(first)
+    dynamo.init_app(second)
+
+    with first.app_context():
+        assert dynamo.tables.keys() == ['first']
+        connection = dynamo.connection
+    with second.app_context():
+        assert dynamo.tables.keys() == ['second']
+        assert dynamo.connection is connection
+        assert dynamo.tables['second'].name == 'second'
+
+    with pytest.raises(RuntimeError):
+        dynamo.tables
+
+def test_client_pool_keys():
+    dynamo = Dynamo()
+    apps = [
+        make_tenant([]),
+        make_tenant([], AWS_REGION='eu-west-1'),
+        make_tenant([], AWS_SECRET_ACCESS_KEY='other'),
+        make_tenant([], DYNAMO_MAX_POOL_CONNECTIONS=50),
+        make_tenant([], DYNAMO_METRICS=True),
+    ]
+    for app in apps:
+        dynamo.init_app(app)
+    connections = []
+    for app in apps:
+        with app.app_context():
+            connections.append(dynamo.connection)
+    assert len(set(map(id, connections))) == len(apps)
+
+def test_pool_released_with_apps():
+    dynamo = Dynamo()
+    first = make_tenant([make_table('users', 'id', 'S')])
+    dynamo.init_app(first)
+    with first.app_context():
+        dynamo.tables['users']
+    scope = first.extensions['dynamo'].scope
+
+    apps = [make_tenant([make_table('users', 'id', 'S')]) for _ in range(50)]
+    for app in apps:
+        dynamo.init_app(app)
+        with app.app_context():
+            dynamo.tables['users']
+    assert len(scope.get().tables) == 51
+    del apps, app
+    gc.collect()
+    assert len(scope.get().tables) == 1
+    assert len(dynamo._pool) == 1
+
+    del first, scope
+    gc.collect()
+    assert len(dynamo._pool) == 0
+
+def test_invalid_read_regions(app):
+    app.config['DYNAMO_READ_REGIONS'] = 'us-west-2'
+    with pytest.raises(ConfigurationError):
+        Dynamo(app)
+
+def test_client_config_defaults(app, dynamo):
+    assert Dynamo._init_config(app) is None
+
+def test_client_config(app):
+    app.config['DYNAMO_MAX_POOL_CONNECTIONS'] = 32
+    app.config['DYNAMO_CONNECT_TIMEOUT'] = 2
+    app.config['DYNAMO_READ_TIMEOUT'] = 5.5
+    app.config['DYNAMO_TCP_KEEPALIVE'] = True
+    app.config['DYNAMO_RETRY_MODE'] = 'standard'
+    app.config['DYNAMO_MAX_ATTEMPTS'] = 4
+    dynamo = Dynamo(app)
+    with app.app_context():
+        config = dynamo.connection.meta.client.meta.config
+        assert config.max_pool_connections == 32
+        assert config.connect_timeout == 2
+        assert config.read_timeout == 5.5
+        assert config.tcp_keepalive is True
+        assert config.retries['mode'] == 'standard'
+        assert config.retries['total_max_attempts'] == 4
+
+@pytest.mark.parametrize('setting, value', [
+    ('DYNAMO_MAX_POOL_CONNECTIONS', 0),
+    ('DYNAMO_MAX_POOL_CONNECTIONS', '10'),
+    ('DYNAMO_MAX_ATTEMPTS', True),
+    ('DYNAMO_CONNECT_TIMEOUT', -1),
+    ('DYNAMO_READ_TIMEOUT', '5'),
+    ('DYNAMO_TCP_KEEPALIVE', 'yes'),
+    ('DYNAMO_RETRY_MODE', 'fast'),
+])
+def test_invalid_client_config(app, setting, value):
+    app.config[setting] = value
+    with pytest.raises(ConfigurationError):
+        Dynamo(app)
+
+def test_create_and_destroy_all_concurrently(fake_app, fake_dynamo):
+    fake_app.config['DYNAMO_TABLES'] = [make_table('table-%d' % i, 'id', 'S') for i in range(12)]
+    fake_app.config['DYNAMO_WAIT_DELAY'] = 0.01
+    fake_app.config['DYNAMO_WAIT_TIMEOUT'] = 1
+    fake_dynamo.fail('CreateTable', 'LimitExceededException')
+    dynamo = Dynamo(fake_app)
+
+    with fake_app.app_context():
+        dynamo.tables.LIMIT_RETRIES = 1
+        dynamo.create_all(wait=True)
+        assert sorted(fake_dynamo.tables) == sorted(dynamo.tables.keys())
+        assert len(fake_dynamo.calls_to('CreateTable')) == 13
+        assert len(fake_dynamo.calls_to('DescribeTable')) == 12
+
+        dynamo.destroy_all(wait=True)
+        assert not fake_dynamo.tables
+
+def test_create_all_skips_existing_tables(fake_app, fake_dynamo):
+    fake_app.config['DYNAMO_TABLES'].append(make_table('zzz-new', 'id', 'S'))
+    for i in range(120):
+        fake_dynamo.create_table(make_table('existing-%03d' % i, 'id', 'S'))
+    fake_dynamo.create_table(fake_app.config['DYNAMO_TABLES'][0])
+    dynamo = Dynamo(fake_app)
+
+    with fake_app.app_context():
+        dynamo.create_all()
+    assert len(fake_dynamo.calls_to('ListTables')) == 2
+    assert [body['TableName'] for body in fake_dynamo.calls_to('CreateTable')] == ['zzz-new']
+
+def test_create_all_gives_up(fake_app, fake_dynamo):
+    fake_dynamo.fail('CreateTable', 'LimitExceededException', times=5)
+    dynamo = Dynamo(fake_app)
+    with fake_app.app_context():
+        dynamo.tables.LIMIT_RETRIES = 0
+        with pytest.raises(ClientError):
+            dynamo.create_all()
@@ -0,0 +1,264 @@
+"""Tests for the in-memory backend."""
+
+
+import pytest
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from flask import Flask
+from flask_dynamo import ConfigurationError, Dynamo
+from flask_dynamo.memory import MemoryBackend, compile_condition, compile_update
+
+
+@pytest.fixture
+def memory_app():
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='posts',
+            KeySchema=[dict(AttributeName='author', KeyType='HASH'), dict(AttributeName='posted', KeyType='RANGE')],
+            AttributeDefinitions=[
+                dict(AttributeName='author', AttributeType='S'),
+                dict(AttributeName='posted', AttributeType='N'),
+                dict(AttributeName='topic', AttributeType='S'),
+            ],
+            GlobalSecondaryIndexes=[
+                dict(
+                    IndexName='topic',
+                    KeySchema=[dict(AttributeName='topic', KeyType='HASH'), dict(AttributeName='posted', KeyType='RANGE')],
+                    Projection=dict(ProjectionType='ALL'),
+                ),
+            ],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+    ]
+    return app
+
+
+@pytest.fixture
+def dynamo(memory_app):
+    return Dynamo(memory_app)
+
+
+@pytest.fixture
+def posts(memory_app, dynamo):
+    with memory_app.app_context():
+        table = dynamo.tables['posts']
+        for i in range(10):
+            item = {'author': 'ann' if i % 2 else 'bob', 'posted': i, 'title': 'post {}'.format(i)}
+            if i < 6:
+                item['topic'] = 'news' if i % 3 else 'tech'
+            table.put_item(Item=item)
+        yield table
+
+def test_invalid_backend(memory_app):
+    memory_app.config['DYNAMO_BACKEND'] = 'sqlite'
+    with pytest.raises(ConfigurationError):
+        Dynamo(memory_app)
+
+def test_tables_are_created(memory_app):
+    dynamo = Dynamo(memory_app)
+    with memory_app.app_context():
+        assert isinstance(dynamo.backend, MemoryBackend)
+        assert dynamo.client.list_tables()['TableNames'] == ['posts']
+        assert dynamo.client.describe_table(TableName='posts')['Table']['TableStatus'] == 'ACTIVE'
+
+def test_backends_are_per_app(memory_app):
+    dynamo = Dynamo()
+    other = Flask('other')
+    other.config.update(memory_app.config)
+    dynamo.init_app(memory_app)
+    dynamo.init_app(other)
+    with memory_app.app_context():
+        dynamo.tables['posts'].put_item(Item={'author': 'ann', 'posted': 1})
+    with other.app_context():
+        assert 'Item' not in dynamo.tables['posts'].get_item(Key={'author': 'ann', 'posted': 1})
+
+def test_unknown_operations():
+    backend = MemoryBackend([{
+        'TableName': 'users',
+        'KeySchema': [{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [{'AttributeName': 'id', 'AttributeType': 'S'}],
+    }])
+    backend.handle('PutItem', {'TableName': 'users', 'Item': {'id': {'S': 'a'}}})
+    for operation in ('Reset', 'Register', 'Table', 'Handle', 'ExecuteStatement', '_Check'):
+        status, response = backend.handle(operation, {})
+        assert status == 400
+        assert response['__type'].endswith('#UnknownOperationException')
+    assert backend.handle('Scan', {'TableName': 'users'})[1]['Count'] == 1
+
+def test_get_put_delete(posts):
+    assert posts.get_item(Key={'author': 'ann', 'posted': 1})['Item']['title'] == 'post 1'
+    old = posts.put_item(Item={'author': 'ann', 'posted': 1, 'title': 'edited'}, ReturnValues='ALL_OLD')
+    assert old['Attributes']['title'] == 'post 1'
+    posts.delete_item(Key={'author': 'ann', 'posted': 1})
+    assert 'Item' not in posts.get_item(Key={'author': 'ann', 'posted': 1})
+
+def test_condition_failed(posts):
+    with pytest.raises(ClientError) as e:
+        posts.put_item(Item={'author': 'ann', 'posted': 1}, ConditionExpression=Attr('posted').not_exists())
+    assert e.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+def test_bad_key(posts):
+    with pytest.raises(ClientError) as e:
+        posts.get_item(Key={'author': 'ann'})
+    assert e.value.response['Error']['Code'] == 'ValidationException'
+
+def test_query_range_conditions(posts):
+    def query(condition, **kwargs):
+        response = posts.query(KeyConditionExpression=Key('author').eq('ann') & condition, **kwargs)
+        return [item['posted'] for item in response['Items']]
+
+    assert query(Key('posted').gt(3)) == [5, 7, 9]
+    assert query(Key('posted').lte(3)) == [1, 3]
+    assert query(Key('posted').between(3, 7)) == [3, 5, 7]
+    assert query(Key('posted').between(3, 7), ScanIndexForward=False) == [7, 5, 3]
+    assert query(Key('posted').eq(4)) == []
+
+def test_query_pages(posts):
+    pages = []
+    kwargs = {'KeyConditionExpression': Key('author').eq('bob'), 'Limit': 2}
+    while True:
+        response = posts.query(**kwargs)
+        pages.append([item['posted'] for item in response['Items']])
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    assert pages == [[0, 2], [4, 6], [8]]
+
+def test_query_index(posts):
+    response = posts.query(IndexName='topic', KeyConditionExpression=Key('topic').eq('news'), ScanIndexForward=False)
+    assert [item['posted'] for item in response['Items']] == [5, 4, 2, 1]
+
+    # Items drop out of an index when they lose its key.
+    posts.update_item(Key={'author': 'bob', 'posted': 4}, UpdateExpression='REMOVE topic')
+    response = posts.query(IndexName='topic', KeyConditionExpression=Key('topic').eq('news'))
+    assert [item['posted'] for item in response['Items']] == [1, 2, 5]
+
+def test_query_filter_and_projection(posts):
+    response = posts.query(
+        KeyConditionExpression=Key('author').eq('ann'),
+        FilterExpression=Attr('topic').exists(),
+        ProjectionExpression='title',
+    )
+    assert response['Items'] == [{'title': 'post 1'}, {'title': 'post 3'}, {'title': 'post 5'}]
+    assert response['ScannedCount'] == 5
+
+def test_begins_with():
+    backend = MemoryBackend([dict(
+        TableName='files',
+        KeySchema=[dict(AttributeName='bucket', KeyType='HASH'), dict(AttributeName='path', KeyType='RANGE')],
+    )])
+    for path in ('a/1', 'a/2', 'ab', 'b/1'):
+        backend.handle('PutItem', {'TableName': 'files', 'Item': {'bucket': {'S': 'x'}, 'path': {'S': path}}})
+    status, response = backend.handle('Query', {
+        'TableName': 'files',
+        'KeyConditionExpression': 'bucket = :b AND begins_with(#p, :prefix)',
+        'ExpressionAttributeNames': {'#p': 'path'},
+        'ExpressionAttributeValues': {':b': {'S': 'x'}, ':prefix': {'S': 'a/'}},
+    })
+    assert status == 200
+    assert [item['path']['S'] for item in response['Items']] == ['a/1', 'a/2']
+
+def test_index_projections():
+    backend = MemoryBackend([dict(
+        TableName='users',
+        KeySchema=[dict(AttributeName='id', KeyType='HASH')],
+        GlobalSecondaryIndexes=[
+            dict(IndexName='keys', KeySchema=[dict(AttributeName='email', KeyType='HASH')],
+                 Projection=dict(ProjectionType='KEYS_ONLY')),
+            dict(IndexName='include', KeySchema=[dict(AttributeName='email', KeyType='HASH')],
+                 Projection=dict(ProjectionType='INCLUDE', NonKeyAttributes=['name'])),
+        ],
+    )])
+    item = {'id': {'S': '1'}, 'email': {'S': 'a@b.c'}, 'name': {'S': 'Ann'}, 'secret': {'S': 'x'}}
+    backend.handle('PutItem', {'TableName': 'users', 'Item': item})
+    for index_name, expected in (('keys', ['email', 'id']), ('include', ['email', 'id', 'name'])):
+        _, response = backend.handle('Query', {
+            'TableName': 'users',
+            'IndexName': index_name,
+            'KeyConditionExpression': 'email = :e',
+            'ExpressionAttributeValues': {':e': {'S': 'a@b.c'}},
+        })
+        assert sorted(response['Items'][0]) == expected
+        _, response = backend.handle('Scan', {'TableName': 'users', 'IndexName': index_name})
+        assert sorted(response['Items'][0]) == expected
+
+def test_scan_segments(posts, dynamo):
+    seen = []
+    for segment in range(3):
+        response = posts.scan(Segment=segment, TotalSegments=3)
+        seen.extend(item['posted'] for item in response['Items'])
+    assert sorted(seen) == list(range(10))
+    assert sorted(item['posted'] for item in dynamo.tables.parallel_scan('posts', segments=3)) == list(range(10))
+
+def test_update_expressions(posts):
+    response = posts.update_item(
+        Key={'author': 'ann', 'posted': 1},
+        UpdateExpression='SET #t = :t, views = if_not_exists(views, :zero) + :one, tags = list_append(:tags, :tags) '
+                         'ADD likes :one REMOVE topic',
+        ExpressionAttributeNames={'#t': 'title'},
+        ExpressionAttributeValues={':t': 'new', ':zero': 0, ':one': 1, ':tags': ['a']},
+        ReturnValues='ALL_NEW',
+    )
+    assert response['Attributes'] == {
+        'author': 'ann', 'posted': 1, 'title': 'new', 'views': 1, 'tags': ['a', 'a'], 'likes': 1,
+    }
+
+def test_update_key_attribute(posts):
+    with pytest.raises(ClientError):
+        posts.update_item(Key={'author': 'ann', 'posted': 1}, UpdateExpression='SET posted = :p', ExpressionAttributeValues={':p': 2})
+
+def test_batches(memory_app):
+    dynamo = Dynamo(memory_app)
+    with memory_app.app_context():
+        dynamo.batch_write('posts', put_items=[{'author': 'cat', 'posted': i} for i in range(60)])
+        keys = [{'author': 'cat', 'posted': i} for i in range(0, 60, 2)]
+        assert sorted(item['posted'] for item in dynamo.batch_get('posts', keys)) == list(range(0, 60, 2))
+        dynamo.batch_write('posts', delete_keys=keys)
+        assert dynamo.tables['posts'].scan(Select='COUNT')['Count'] == 30
+
+def test_create_and_destroy_all(memory_app):
+    dynamo = Dynamo(memory_app)
+    with memory_app.app_context():
+        dynamo.destroy_all(wait=True)
+        assert dynamo.client.list_tables()['TableNames'] == []
+        dynamo.create_all(wait=True)
+        assert dynamo.client.list_tables()['TableNames'] == ['posts']
+
+def test_reset(posts, dynamo):
+    dynamo.backend.reset()
+    assert posts.scan()['Count'] == 0
+
+@pytest.mark.parametrize('expression, expected', [
+    ('a = :one', True),
+    ('a <> :one', False),
+    ('missing <> :one', True),
+    ('a BETWEEN :one AND :two', True),
+    ('a IN (:two, :one)', True),
+    ('NOT (a > :one) AND attribute_exists(s)', True),
+    ('a > :one OR begins_with(s, :s)', True),
+    ('begins_with(s, :s)', True),
+    ('contains(l, :one)', True),
+    ('contains(m.inner, :s)', False),
+    ('size(l) = :two', True),
+    ('attribute_type(a, :n)', True),
+    ('attribute_not_exists(m.inner)', False),
+    ('l[1] = :two', True),
+])
+def test_conditions(expression, expected):
+    values = {':one': {'N': '1'}, ':two': {'N': '2'}, ':s': {'S': 'x'}, ':n': {'S': 'N'}}
+    item = {
+        'a': {'N': '1'},
+        's': {'S': 'xyz'},
+        'l': {'L': [{'N': '1'}, {'N': '2'}]},
+        'm': {'M': {'inner': {'S': 'y'}}},
+    }
+    assert compile_condition(expression, values=values)(item) is expected
+
+def test_set_updates():
+    item = {'tags': {'SS': ['a', 'b']}}
+    apply, touched = compile_update('ADD tags :c DELETE tags :a', values={':a': {'SS': ['a']}, ':c': {'SS': ['c']}})
+    apply(item)
+    assert item == {'tags': {'SS': ['b', 'c']}}
+    assert touched == set(['tags'])
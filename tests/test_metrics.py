@@ -0,0 +1,124 @@
+"""Tests for our per-request instrumentation."""
+
+
+import pytest
+from flask_dynamo import ConfigurationError, Dynamo
+from flask_dynamo.metrics import MetricsSink, RequestStats
+
+
+class ListSink(MetricsSink):
+
+    def __init__(self):
+        self.records = []
+
+    def record(self, *args):
+        self.records.append(args)
+
+    def charge(self, *args):
+        self.records.append(('charge',) + args)
+
+
+def test_request_stats():
+    stats = RequestStats()
+    stats.record('users', 'GetItem', 0.5, 1, 10, 20, 0.5, False)
+    stats.record('users', 'GetItem', 0.25, 0, 10, 20, 0.5, True)
+    stats.record('users', 'PutItem', 0.25, 0, 30, 2, 1.0, False)
+    assert stats.calls == 3
+    assert stats.latency == 1.0
+    assert stats.capacity == 2.0
+    assert stats.to_dict()['users:GetItem'] == {
+        'calls': 2,
+        'errors': 1,
+        'retries': 1,
+        'latency': 0.75,
+        'bytes_sent': 20,
+        'bytes_received': 40,
+        'capacity': 1.0,
+    }
+
+def test_settings(fake_app):
+    fake_app.config['DYNAMO_METRICS_SINK'] = object()
+    with pytest.raises(ConfigurationError):
+        Dynamo(fake_app)
+
+def test_disabled(fake_app, fake_dynamo):
+    dynamo = Dynamo(fake_app)
+    with fake_app.app_context():
+        dynamo.create_all()
+        dynamo.tables['users'].get_item(Key={'username': 'rdegges'})
+        assert dynamo.request_stats.calls == 0
+    assert 'ReturnConsumedCapacity' not in fake_dynamo.calls_to('GetItem')[0]
+
+def test_per_request(fake_app, fake_dynamo):
+    sink = ListSink()
+    fake_app.config['DYNAMO_METRICS'] = True
+    fake_app.config['DYNAMO_METRICS_SINK'] = sink
+    dynamo = Dynamo(fake_app)
+    with fake_app.app_context():
+        dynamo.create_all()
+
+    fake_dynamo.fail('GetItem', 'ProvisionedThroughputExceededException')
+    with fake_app.test_request_context():
+        dynamo.tables['users'].put_item(Item={'username': 'rdegges'})
+        dynamo.tables['users'].get_item(Key={'username': 'rdegges'})
+        dynamo.batch_write('users', put_items=[{'username': 'jdoe'}])
+
+        stats = dynamo.request_stats.to_dict()
+        assert sorted(stats) == ['users:BatchWriteItem', 'users:GetItem', 'users:PutItem']
+        assert stats['users:GetItem']['calls'] == 1
+        assert stats['users:GetItem']['retries'] == 1
+        assert stats['users:GetItem']['capacity'] == 1.0
+        assert stats['users:GetItem']['bytes_sent'] > 0
+        assert stats['users:GetItem']['bytes_received'] > 0
+        assert stats['users:GetItem']['latency'] > 0
+
+    with fake_app.test_request_context():
+        assert dynamo.request_stats.calls == 0
+
+    assert [(r[0], r[1]) for r in sink.records[-3:]] == [
+        ('users', 'PutItem'),
+        ('users', 'GetItem'),
+        ('users', 'BatchWriteItem'),
+    ]
+    assert fake_dynamo.calls_to('GetItem')[-1]['ReturnConsumedCapacity'] == 'TOTAL'
+
+def test_capacity_per_table(fake_app):
+    sink = ListSink()
+    fake_app.config['DYNAMO_BACKEND'] = 'memory'
+    fake_app.config['DYNAMO_METRICS'] = True
+    fake_app.config['DYNAMO_METRICS_SINK'] = sink
+    fake_app.config['DYNAMO_TABLES'].append(dict(
+        TableName='orders',
+        KeySchema=[dict(AttributeName='id', KeyType='HASH')],
+        AttributeDefinitions=[dict(AttributeName='id', AttributeType='S')],
+    ))
+    dynamo = Dynamo(fake_app)
+    with fake_app.app_context():
+        dynamo.create_all()
+
+    with fake_app.test_request_context():
+        dynamo.connection.batch_get_item(RequestItems={
+            'users': {'Keys': [{'username': 'a'}, {'username': 'b'}]},
+            'orders': {'Keys': [{'id': '1'}, {'id': '2'}, {'id': '3'}, {'id': '4'}]},
+        })
+        stats = dynamo.request_stats.to_dict()
+        assert stats['orders+users:BatchGetItem']['calls'] == 1
+        assert stats['orders+users:BatchGetItem']['capacity'] == 0
+        assert stats['orders+users:BatchGetItem']['bytes_sent'] > 0
+        assert stats['users:BatchGetItem']['calls'] == 0
+        assert stats['users:BatchGetItem']['capacity'] == 1.0
+        assert stats['orders:BatchGetItem']['capacity'] == 2.0
+        assert dynamo.request_stats.capacity == 3.0
+
+    assert sink.records[-2:] == [
+        ('charge', 'orders', 'BatchGetItem', 2.0),
+        ('charge', 'users', 'BatchGetItem', 1.0),
+    ]
+
+def test_errors(fake_app, fake_dynamo):
+    fake_app.config['DYNAMO_METRICS'] = True
+    dynamo = Dynamo(fake_app)
+    with fake_app.test_request_context():
+        with pytest.raises(Exception):
+            dynamo.tables['users'].get_item(Key={'username': 'rdegges'})
+        assert dynamo.request_stats.to_dict()['users:GetItem']['errors'] == 1
@@ -0,0 +1,153 @@
+"""Tests for streaming Query / Scan pagination."""
+
+
+from itertools import islice
+from time import sleep
+
+import pytest
+from boto3.dynamodb.conditions import Attr, Key
+from flask import Flask
+from flask_dynamo import Dynamo, InvalidCursorError
+from flask_dynamo.paginate import END_CURSOR, ItemIterator, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def dynamo():
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='posts',
+            KeySchema=[dict(AttributeName='author', KeyType='HASH'), dict(AttributeName='posted', KeyType='RANGE')],
+            AttributeDefinitions=[
+                dict(AttributeName='author', AttributeType='S'),
+                dict(AttributeName='posted', AttributeType='N'),
+                dict(AttributeName='topic', AttributeType='S'),
+            ],
+            GlobalSecondaryIndexes=[
+                dict(
+                    IndexName='topic',
+                    KeySchema=[dict(AttributeName='topic', KeyType='HASH')],
+                    Projection=dict(ProjectionType='ALL'),
+                ),
+            ],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+    ]
+    dynamo = Dynamo(app)
+    with app.app_context():
+        dynamo.batch_write('posts', put_items=[
+            {'author': 'ann', 'posted': i, 'topic': 'news', 'title': 'post {}'.format(i), 'body': 'x' * 100}
+            for i in range(25)
+        ])
+        yield dynamo
+
+def test_cursor_round_trip():
+    key = {'id': 'a', 'n': 3, 'b': b'\x00\xff'}
+    cursor = encode_cursor('posts', None, key)
+    assert '=' not in cursor and '/' not in cursor
+    assert decode_cursor('posts', None, cursor) == key
+
+@pytest.mark.parametrize('cursor', ['nope', encode_cursor('users', None, {'id': 'a'}), encode_cursor('posts', 'topic', {'id': 'a'})])
+def test_invalid_cursors(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor('posts', None, cursor)
+
+def test_iter_query(dynamo):
+    results = dynamo.iter_query('posts', KeyConditionExpression=Key('author').eq('ann'), page_size=4)
+    assert [item['posted'] for item in results] == list(range(25))
+    assert results.pages == 7
+    assert results.done
+    assert results.cursor == END_CURSOR
+
+def test_resume_from_cursor(dynamo):
+    seen = []
+    cursor = None
+    while True:
+        results = dynamo.iter_query('posts', cursor=cursor, KeyConditionExpression=Key('author').eq('ann'), page_size=4)
+        assert results.cursor == cursor
+        page = list(islice(results, 10))
+        seen.extend(item['posted'] for item in page)
+        cursor = results.cursor
+        if results.done:
+            break
+    assert seen == list(range(25))
+
+def test_resume_when_exhausted(dynamo):
+    results = dynamo.iter_query('posts', KeyConditionExpression=Key('author').eq('ann'))
+    assert results.cursor is None
+    list(results)
+
+    # Saving the cursor after the last page doesn't start over.
+    results = dynamo.iter_query('posts', cursor=results.cursor, KeyConditionExpression=Key('author').eq('ann'))
+    assert results.done
+    assert list(results) == []
+    assert results.pages == 0
+    assert results.cursor == END_CURSOR
+
+def test_attributes(dynamo):
+    results = dynamo.iter_query(
+        'posts',
+        attributes=['title'],
+        KeyConditionExpression=Key('author').eq('ann'),
+        ScanIndexForward=False,
+        page_size=5,
+    )
+    first = list(islice(results, 3))
+    assert first == [{'title': 'post 24'}, {'title': 'post 23'}, {'title': 'post 22'}]
+
+    # Key attributes are fetched behind the scenes, so cursors still work.
+    results = dynamo.iter_query(
+        'posts',
+        cursor=results.cursor,
+        ProjectionExpression='posted',
+        KeyConditionExpression=Key('author').eq('ann'),
+        ScanIndexForward=False,
+    )
+    assert next(results) == {'posted': 21}
+
+def test_iter_scan(dynamo):
+    results = dynamo.iter_scan('posts', FilterExpression=Attr('posted').gte(20), page_size=3)
+    assert sorted(item['posted'] for item in results) == [20, 21, 22, 23, 24]
+
+def test_iter_query_index(dynamo):
+    results = dynamo.iter_query('posts', IndexName='topic', KeyConditionExpression=Key('topic').eq('news'), page_size=2)
+    first = list(islice(results, 3))
+    rest = list(dynamo.iter_query(
+        'posts',
+        IndexName='topic',
+        cursor=results.cursor,
+        KeyConditionExpression=Key('topic').eq('news'),
+    ))
+    assert sorted(item['posted'] for item in first + rest) == list(range(25))
+
+    with pytest.raises(InvalidCursorError):
+        dynamo.iter_query('posts', cursor=results.cursor, KeyConditionExpression=Key('author').eq('ann'))
+
+def test_unknown_table(dynamo):
+    with pytest.raises(KeyError):
+        dynamo.iter_scan('users')
+
+def test_prefetch():
+    calls = []
+
+    def fetch(**kwargs):
+        calls.append(kwargs.get('ExclusiveStartKey'))
+        start = kwargs.get('ExclusiveStartKey', {'id': -1})['id'] + 1
+        items = [{'id': i} for i in range(start, min(start + 2, 6))]
+        return {'Items': items, 'LastEvaluatedKey': items[-1]} if start + 2 < 6 else {'Items': items}
+
+    results = ItemIterator(fetch, 'things', None, ['id'], {})
+    assert next(results) == {'id': 0}
+    for _ in range(100):
+        if len(calls) == 2:
+            break
+        sleep(0.01)
+    assert calls == [None, {'id': 1}]
+    assert [item['id'] for item in results] == [1, 2, 3, 4, 5]
+
+    results = ItemIterator(fetch, 'things', None, ['id'], {}, prefetch=False)
+    calls[:] = []
+    next(results)
+    sleep(0.05)
+    assert len(calls) == 1
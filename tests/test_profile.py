@@ -0,0 +1,155 @@
+"""Tests for our profiler."""
+
+
+import gc
+import json
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask_dynamo import ConfigurationError, Dynamo
+from flask_dynamo.profile import Profiler, SpaceSaving, _dump_profilers, _profilers
+
+
+def test_space_saving():
+    sketch = SpaceSaving(3)
+    for key in 'aaaaabbbcd' + 'e' * 4:
+        sketch.add(key)
+    top = sketch.top()
+    assert len(top) == 3
+    assert top[:2] == [('e', 6, 2), ('a', 5, 0)]
+
+def test_space_saving_merge():
+    left, right = SpaceSaving(2), SpaceSaving(2)
+    for key in 'aab':
+        left.add(key)
+    for key in 'accc':
+        right.add(key)
+    left.merge(right.top())
+    assert left.top() == [('a', 3, 0), ('c', 3, 0)]
+
+def test_partition_keys():
+    profiler = Profiler([{
+        'TableName': 'users',
+        'KeySchema': [{'AttributeName': 'username', 'KeyType': 'HASH'}],
+        'GlobalSecondaryIndexes': [{
+            'IndexName': 'by-email',
+            'KeySchema': [{'AttributeName': 'email', 'KeyType': 'HASH'}],
+        }],
+    }])
+    profiler.before_call('GetItem', {'TableName': 'users', 'Key': {'username': {'S': 'rdegges'}}})
+    profiler.before_call('PutItem', {'TableName': 'users', 'Item': {'username': 'rdegges', 'age': 1}})
+    profiler.before_call('Query', {
+        'TableName': 'users',
+        'IndexName': 'by-email',
+        'KeyConditionExpression': '#e = :e',
+        'ExpressionAttributeNames': {'#e': 'email'},
+        'ExpressionAttributeValues': {':e': {'S': 'r@rdegges.com'}},
+    })
+    assert profiler.sketches['users'].top() == [('rdegges', 2, 0), ('r@rdegges.com', 1, 0)]
+
+def test_sampling():
+    profiler = Profiler([], sample_rate=0.5, random=lambda: 0.9)
+    assert profiler.before_call('Scan', {'TableName': 'users'}) is None
+
+def test_settings(fake_app):
+    fake_app.config['DYNAMO_PROFILE_SAMPLE_RATE'] = 0
+    with pytest.raises(ConfigurationError):
+        Dynamo(fake_app)
+
+@pytest.fixture
+def profiled_app(fake_app, tmpdir):
+    fake_app.config['DYNAMO_PROFILE'] = True
+    fake_app.config['DYNAMO_PROFILE_DIR'] = str(tmpdir)
+    return fake_app
+
+def test_profile(profiled_app, fake_dynamo, tmpdir):
+    dynamo = Dynamo(profiled_app)
+
+    @profiled_app.route('/users')
+    def users():
+        dynamo.tables['users'].scan(FilterExpression='age > :a', ExpressionAttributeValues={':a': 1})
+        return ''
+
+    with profiled_app.app_context():
+        dynamo.create_all()
+        for username in ('rdegges', 'jdoe', 'jdoe'):
+            dynamo.tables['users'].put_item(Item={'username': username})
+        dynamo.tables['users'].scan()
+
+    profiled_app.test_client().get('/users')
+    profiled_app.test_client().get('/users')
+    dynamo._get_ctx(profiled_app).profiler.dump()
+
+    report = Profiler.load(str(tmpdir))
+    assert report['flagged'] == [
+        {'table': 'users', 'operation': 'Scan', 'endpoint': 'GET /users', 'reason': 'scan', 'count': 2},
+    ]
+    assert report['reads'] == [
+        {'table': 'users', 'operation': 'Scan', 'index': None, 'calls': 3, 'scanned': 6, 'returned': 6},
+    ]
+    assert report['hot_keys']['users'][0] == ('jdoe', 2, 0)
+
+    result = profiled_app.test_cli_runner().invoke(args=['dynamo', 'profile', '--reset'])
+    assert result.exit_code == 0
+    assert 'GET /users' in result.output
+    assert 'jdoe' in result.output
+    assert not tmpdir.listdir()
+
+def test_dump_errors_are_logged(profiled_app, fake_dynamo, tmpdir, caplog):
+    profiled_app.config['DYNAMO_PROFILE_DIR'] = str(tmpdir.join('users.json'))
+    profiled_app.config['DYNAMO_PROFILE_DUMP_INTERVAL'] = 1e-6
+    tmpdir.join('users.json').write('')
+    dynamo = Dynamo(profiled_app)
+    with profiled_app.app_context():
+        dynamo.create_all()
+        dynamo.tables['users'].get_item(Key={'username': 'rdegges'})
+    assert 'Unable to dump' in caplog.text
+    dynamo._get_ctx(profiled_app).profiler.path = str(tmpdir)
+
+def test_dump_at_exit(profiled_app, fake_dynamo, tmpdir, caplog):
+    dynamo = Dynamo(profiled_app)
+    with profiled_app.app_context():
+        dynamo.create_all()
+        dynamo.tables['users'].scan()
+    profiler = dynamo._get_ctx(profiled_app).profiler
+    _dump_profilers()
+    assert Profiler.load(str(tmpdir))['reads'][0]['calls'] == 1
+
+    # Errors are logged, not raised...
+    profiler.path = str(tmpdir.join('{}.json'.format(os.getpid())))
+    _dump_profilers()
+    assert 'Unable to dump' in caplog.text
+
+    profiler.path = str(tmpdir)
+
+def test_exit_hook_holds_no_profilers():
+    profiler = Profiler([])
+    assert profiler in _profilers
+    ref = weakref.ref(profiler)
+    del profiler
+    gc.collect()
+    assert ref() is None
+
+def test_concurrent_dumps(profiled_app, fake_dynamo, tmpdir):
+    profiled_app.config['DYNAMO_PROFILE_DUMP_INTERVAL'] = 1e-6
+    dynamo = Dynamo(profiled_app)
+    with profiled_app.app_context():
+        dynamo.create_all()
+        table = dynamo.tables['users']
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: table.get_item(Key={'username': str(i)}), range(200)))
+    assert [path.basename for path in tmpdir.listdir()] == ['{}.json'.format(os.getpid())]
+
+def test_load_merges(tmpdir):
+    for pid, count in ((1, 2), (2, 3)):
+        tmpdir.join('{}.json'.format(pid)).write(json.dumps({
+            'sample_rate': 1.0,
+            'flagged': [],
+            'reads': [{'table': 'users', 'operation': 'Query', 'index': None, 'calls': 1, 'scanned': 10, 'returned': 1}],
+            'hot_keys': {'users': [['rdegges', count, 0]]},
+        }))
+    report = Profiler.load(str(tmpdir))
+    assert report['reads'][0]['scanned'] == 20
+    assert report['hot_keys']['users'] == [('rdegges', 5, 0)]
@@ -0,0 +1,102 @@
+"""Tests for our rate limiter."""
+
+
+import pytest
+from flask_dynamo import Dynamo
+from flask_dynamo.ratelimit import RateLimiter, TokenBucket
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_bucket_bursts_then_waits(clock):
+    bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+    for _ in range(10):
+        bucket.acquire()
+    assert clock.slept == 0
+    bucket.acquire()
+    assert 0 < clock.slept <= 0.11
+
+def test_bucket_debt(clock):
+    bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+    bucket.acquire(1)
+    bucket.charge(29)
+    bucket.acquire(1)
+    assert clock.slept == pytest.approx(2, abs=0.01)
+
+def test_bucket_adapts(clock):
+    bucket = TokenBucket(16, clock=clock, sleep=clock.sleep)
+    bucket.throttled()
+    bucket.throttled()
+    assert bucket.rate == 4
+    for _ in range(100):
+        bucket.succeeded()
+    assert bucket.rate == 16
+    for _ in range(100):
+        bucket.throttled()
+    assert bucket.rate == 1
+
+def make_config():
+    return [{
+        'TableName': 'users',
+        'ProvisionedThroughput': {'ReadCapacityUnits': 10, 'WriteCapacityUnits': 5},
+        'GlobalSecondaryIndexes': [{
+            'IndexName': 'by-email',
+            'ProvisionedThroughput': {'ReadCapacityUnits': 2, 'WriteCapacityUnits': 2},
+        }],
+    }, {
+        'TableName': 'events',
+        'BillingMode': 'PAY_PER_REQUEST',
+    }]
+
+def test_limiter_buckets():
+    limiter = RateLimiter(make_config())
+    assert limiter.bucket('users', None, 'read').max_rate == 10
+    assert limiter.bucket('users', None, 'write').max_rate == 5
+    assert limiter.bucket('users', 'by-email', 'read').max_rate == 2
+    assert limiter.bucket('events', None, 'read') is None
+
+def test_limiter_consumed_capacity(clock):
+    limiter = RateLimiter(make_config(), clock=clock, sleep=clock.sleep)
+    estimate = limiter.before_call('PutItem', {'TableName': 'users', 'Item': {}})
+    assert estimate == {('users', None): 1.0}
+    limiter.after_call('PutItem', estimate, {'ConsumedCapacity': {
+        'TableName': 'users',
+        'CapacityUnits': 4.0,
+        'Table': {'CapacityUnits': 3.0},
+        'GlobalSecondaryIndexes': {'by-email': {'CapacityUnits': 1.0}},
+    }})
+    assert limiter.bucket('users', None, 'write').tokens == 2
+    assert limiter.bucket('users', 'by-email', 'write').tokens == 1
+
+def test_limiter_batch_estimate(clock):
+    limiter = RateLimiter(make_config(), clock=clock, sleep=clock.sleep)
+    limiter.before_call('BatchGetItem', {'RequestItems': {'users': {'Keys': [{}] * 4}, 'events': {'Keys': [{}]}}})
+    assert limiter.bucket('users', None, 'read').tokens == 6
+
+def test_limiter_hooks(fake_app, fake_dynamo):
+    fake_app.config['DYNAMO_RATE_LIMIT'] = True
+    dynamo = Dynamo(fake_app)
+    with fake_app.app_context():
+        dynamo.create_all()
+        dynamo.tables['users'].put_item(Item={'username': 'rdegges'})
+        assert fake_dynamo.calls_to('PutItem')[0]['ReturnConsumedCapacity'] == 'INDEXES'
+
+        fake_dynamo.fail('GetItem', 'ProvisionedThroughputExceededException')
+        dynamo.fast_tables['users'].get({'username': 'rdegges'})
+        # Halved by the throttle, then nudged back up by the successful retry.
+        assert dynamo._get_ctx(fake_app).rate_limiter.bucket('users', None, 'read').rate == 2.75
@@ -0,0 +1,94 @@
+"""Tests for multi-region read routing."""
+
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from flask_dynamo import Dynamo
+from flask_dynamo.routing import RegionRouter, RoutedTable, is_failover_error
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def client_error(code, status):
+    return ClientError({'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': status}}, 'GetItem')
+
+def test_failover_errors():
+    assert is_failover_error(EndpointConnectionError(endpoint_url='http://nowhere'))
+    assert is_failover_error(client_error('InternalServerError', 500))
+    assert is_failover_error(client_error('ProvisionedThroughputExceededException', 400))
+    assert not is_failover_error(client_error('ValidationException', 400))
+    assert not is_failover_error(ValueError())
+
+def test_router_prefers_nearest():
+    router = RegionRouter(['us-west-2', 'us-east-1'], clock=FakeClock())
+    assert router.order() == ['us-west-2', 'us-east-1']
+
+def test_router_cooldown():
+    clock = FakeClock()
+    router = RegionRouter(['us-west-2', 'us-east-1', 'eu-west-1'], cooldown=30, clock=clock)
+    router.failed('us-west-2')
+    router.failed('us-east-1')
+    assert router.order() == ['eu-west-1', 'us-west-2', 'us-east-1']
+    clock.now = 31
+    assert router.order() == ['us-west-2', 'us-east-1', 'eu-west-1']
+
+def test_router_demotes_slow_regions():
+    clock = FakeClock()
+    router = RegionRouter(['us-west-2', 'us-east-1'], probe_interval=60, clock=clock)
+    router.succeeded('us-west-2', 0.5)
+    router.succeeded('us-east-1', 0.1)
+    assert router.order() == ['us-east-1', 'us-west-2']
+    clock.now = 61
+    assert router.order() == ['us-west-2', 'us-east-1']
+
+def test_router_call_fails_over():
+    router = RegionRouter(['us-west-2', 'us-east-1'], clock=FakeClock())
+    tried = []
+
+    def read(region):
+        tried.append(region)
+        if region == 'us-west-2':
+            raise client_error('InternalServerError', 500)
+        return region
+
+    assert router.call(read) == 'us-east-1'
+    assert router.call(read) == 'us-east-1'
+    assert tried == ['us-west-2', 'us-east-1', 'us-east-1']
+
+def test_router_call_raises():
+    router = RegionRouter(['us-west-2', 'us-east-1'], clock=FakeClock())
+
+    def read(region):
+        raise client_error('ValidationException', 400)
+
+    with pytest.raises(ClientError):
+        router.call(read)
+    assert router.order() == ['us-west-2', 'us-east-1']
+
+def test_routed_tables(fake_app, fake_dynamo):
+    fake_app.config['AWS_REGION'] = 'us-east-1'
+    fake_app.config['DYNAMO_READ_REGIONS'] = ['us-west-2', 'us-east-1']
+    fake_app.config['DYNAMO_MAX_ATTEMPTS'] = 1
+    dynamo = Dynamo(fake_app)
+    with fake_app.app_context():
+        dynamo.create_all()
+        table = dynamo.tables['users']
+        assert isinstance(table, RoutedTable)
+        table.put_item(Item={'username': 'rdegges'})
+
+        fake_dynamo.fail('GetItem', 'ProvisionedThroughputExceededException')
+        assert table.get_item(Key={'username': 'rdegges'})['Item'] == {'username': 'rdegges'}
+        assert dynamo.router.order() == ['us-east-1', 'us-west-2']
+        assert table.replica('us-east-1') is table._table
+        assert table.replica('us-west-2').meta.client.meta.region_name == 'us-west-2'
+
+        fake_dynamo.fail('GetItem', 'ProvisionedThroughputExceededException')
+        with pytest.raises(ClientError):
+            table.get_item(Key={'username': 'rdegges'}, ConsistentRead=True)
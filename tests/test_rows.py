@@ -0,0 +1,130 @@
+"""Tests for compact result sets."""
+
+
+import tracemalloc
+from array import array
+from decimal import Decimal
+
+import pytest
+from boto3.dynamodb.conditions import Key
+from flask import Flask
+from flask_dynamo import Dynamo
+from flask_dynamo.codec import deserializer, serialize_item
+from flask_dynamo.rows import MISSING, Columns, Records
+
+
+ITEMS = [
+    {'id': 'a', 'n': 1, 'price': 1.5, 'tags': {'x'}},
+    {'id': 'b', 'n': 2, 'price': 2.5},
+    {'id': 'c', 'n': 3, 'price': 3.5, 'note': 'hi'},
+]
+
+
+def wire(items):
+    return [serialize_item(item) for item in items]
+
+
+@pytest.fixture
+def dynamo():
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='sales',
+            KeySchema=[dict(AttributeName='store', KeyType='HASH'), dict(AttributeName='n', KeyType='RANGE')],
+            AttributeDefinitions=[
+                dict(AttributeName='store', AttributeType='S'),
+                dict(AttributeName='n', AttributeType='N'),
+            ],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+    ]
+    dynamo = Dynamo(app)
+    with app.app_context():
+        dynamo.batch_write('sales', put_items=[
+            {'store': 'nyc', 'n': i, 'amount': Decimal('{}.25'.format(i)), 'sku': 'sku-{}'.format(i % 7)}
+            for i in range(250)
+        ])
+        yield dynamo
+
+def test_records():
+    records = Records(deserializer(True))
+    records.add_items(wire(ITEMS))
+    assert len(records) == 3
+    assert records.schema.names == ['id', 'n', 'price', 'tags', 'note']
+    first, _, last = records
+    assert first['n'] == 1 and first.price == 1.5
+    assert 'note' not in first
+    assert first.get('note') is None
+    with pytest.raises(KeyError):
+        first['note']
+    with pytest.raises(AttributeError):
+        first.note
+    assert dict(last) == ITEMS[2]
+    assert records.to_dicts() == ITEMS
+    assert first == ITEMS[0]
+
+def test_columns():
+    columns = Columns(deserializer(True))
+    columns.add_items(wire(ITEMS))
+    assert len(columns) == 3
+    assert columns.column('n') == array('q', [1, 2, 3])
+    assert columns.column('price') == array('d', [1.5, 2.5, 3.5])
+    assert columns.column('note') == [MISSING, MISSING, 'hi']
+    assert columns[-1] == ITEMS[2]
+    assert columns.to_dicts() == ITEMS
+
+def test_columns_fall_back_to_lists():
+    columns = Columns(deserializer(True))
+    columns.add_items(wire([{'n': 1}, {'n': 2.5}, {'m': 1}]))
+    assert columns.column('n') == [1, 2.5, MISSING]
+    columns = Columns(deserializer(False))
+    columns.add_items(wire([{'n': 1}]))
+    assert columns.column('n') == [Decimal('1')]
+
+def test_query_rows(dynamo):
+    table = dynamo.fast_tables['sales']
+    response = table.query(rows='records', KeyConditionExpression='store = :s', ExpressionAttributeValues={':s': 'nyc'}, Limit=10)
+    assert isinstance(response['Items'], Records)
+    assert [row['n'] for row in response['Items']] == list(range(10))
+    assert response['LastEvaluatedKey'] == {'store': 'nyc', 'n': 9}
+
+    with pytest.raises(ValueError):
+        table.scan(rows='pandas')
+
+def test_query_all(dynamo):
+    table = dynamo.fast_tables['sales']
+    records = table.query_all(KeyConditionExpression='store = :s', ExpressionAttributeValues={':s': 'nyc'}, Limit=100)
+    assert len(records) == 250
+    assert records[3].amount == Decimal('3.25')
+
+    columns = table.scan_all(rows='columns', use_float=True, Limit=100)
+    assert sum(columns.column('amount')) == sum(i + 0.25 for i in range(250))
+    assert isinstance(columns.column('amount'), array)
+
+def _allocated(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+def test_memory():
+    items = wire([
+        {'id': 'item-{}'.format(i), 'n': i, 'price': i + 0.5, 'qty': i % 10, 'rating': Decimal('4.5')}
+        for i in range(2000)
+    ])
+    decode = deserializer(False)
+
+    dicts, _ = _allocated(lambda: [dict((k, decode(v)) for k, v in item.items()) for item in items])
+
+    def compact(result_class, use_float):
+        result = result_class(deserializer(use_float))
+        result.add_items(items)
+        return result
+
+    # Decimals are big, so most of the savings come with use_float.
+    assert _allocated(lambda: compact(Records, False))[0] < dicts
+    assert _allocated(lambda: compact(Records, True))[0] < dicts * 0.3
+    assert _allocated(lambda: compact(Columns, True))[0] < dicts * 0.1
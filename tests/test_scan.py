@@ -0,0 +1,65 @@
+"""Tests for our parallel scans."""
+
+
+import json
+import time
+
+import pytest
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from flask_dynamo import Dynamo
+from flask_dynamo.scan import ScanCheckpoint
+
+
+@pytest.fixture
+def dynamo(fake_app):
+    dynamo = Dynamo(fake_app)
+    with fake_app.app_context():
+        dynamo.create_all()
+        dynamo.batch_write('users', put_items=[{'username': 'user-{}'.format(i), 'n': i} for i in range(200)])
+        yield dynamo
+
+def test_parallel_scan(dynamo, fake_dynamo):
+    items = list(dynamo.tables.parallel_scan('users', segments=4, workers=2, Limit=10))
+    assert sorted(item['n'] for item in items) == list(range(200))
+    segments = set(call['Segment'] for call in fake_dynamo.calls_to('Scan'))
+    assert segments == set(range(4))
+
+def test_parallel_scan_floats(dynamo):
+    items = list(dynamo.tables.parallel_scan('users', segments=2, use_float=True))
+    assert all(type(item['n']) is int for item in items)
+
+def test_parallel_scan_filter(dynamo, fake_dynamo):
+    list(dynamo.tables.parallel_scan('users', segments=2, FilterExpression=Attr('n').lt(10)))
+    for call in fake_dynamo.calls_to('Scan'):
+        assert call['FilterExpression'] == '#n0 < :v0'
+        assert call['ExpressionAttributeNames'] == {'#n0': 'n'}
+        assert call['ExpressionAttributeValues'] == {':v0': {'N': '10'}}
+
+def test_parallel_scan_resume(dynamo):
+    checkpoint = ScanCheckpoint(3)
+    seen = set()
+    scan = dynamo.tables.parallel_scan('users', segments=3, checkpoint=checkpoint, Limit=7)
+    for item in scan:
+        seen.add(item['n'])
+        if len(seen) == 50:
+            break
+    scan.close()
+    assert not checkpoint.finished
+
+    checkpoint = ScanCheckpoint.from_dict(json.loads(json.dumps(checkpoint.to_dict())))
+    for item in dynamo.tables.parallel_scan('users', segments=3, checkpoint=checkpoint, Limit=7):
+        seen.add(item['n'])
+    assert seen == set(range(200))
+    assert checkpoint.finished
+
+def test_parallel_scan_bounded_queue(dynamo, fake_dynamo):
+    scan = dynamo.tables.parallel_scan('users', segments=1, queue_size=1, Limit=10)
+    next(scan)
+    time.sleep(0.2)
+    assert len(fake_dynamo.calls_to('Scan')) <= 3
+    scan.close()
+
+def test_parallel_scan_errors(dynamo):
+    with pytest.raises(ClientError):
+        list(dynamo.tables.parallel_scan('missing', segments=2))
@@ -0,0 +1,161 @@
+"""Tests for parsed table schemas."""
+
+
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from flask_dynamo import ConfigurationError, Dynamo, InvalidKeyError
+from flask_dynamo.schema import TableSchema, merge_params
+
+
+POSTS = dict(
+    TableName='posts',
+    KeySchema=[
+        dict(AttributeName='author', KeyType='HASH'),
+        dict(AttributeName='posted', KeyType='RANGE'),
+    ],
+    AttributeDefinitions=[
+        dict(AttributeName='author', AttributeType='S'),
+        dict(AttributeName='posted', AttributeType='N'),
+        dict(AttributeName='slug', AttributeType='S'),
+    ],
+    GlobalSecondaryIndexes=[
+        dict(
+            IndexName='by_slug',
+            KeySchema=[dict(AttributeName='slug', KeyType='HASH')],
+            Projection=dict(ProjectionType='ALL'),
+        ),
+    ],
+    BillingMode='PAY_PER_REQUEST',
+)
+
+
+@pytest.fixture
+def schema():
+    return TableSchema(POSTS)
+
+
+@pytest.fixture
+def dynamo():
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [POSTS]
+    dynamo = Dynamo(app)
+    with app.app_context():
+        dynamo.create_all()
+        yield dynamo
+
+def test_parse(schema):
+    assert schema.hash_key == 'author'
+    assert schema.range_key == 'posted'
+    assert schema.key_names == ('author', 'posted')
+    assert schema.index('by_slug').key_names == ('slug',)
+    assert schema.index_key_names('by_slug') == ['author', 'posted', 'slug']
+    with pytest.raises(KeyError):
+        schema.index('nope')
+
+@pytest.mark.parametrize('definition', [
+    dict(KeySchema=[dict(AttributeName='id', KeyType='HASH')]),
+    dict(TableName='t', KeySchema=[dict(AttributeName='id', KeyType='RANGE')]),
+    dict(
+        TableName='t',
+        KeySchema=[dict(AttributeName='id', KeyType='HASH')],
+        AttributeDefinitions=[dict(AttributeName='other', AttributeType='S')],
+    ),
+])
+def test_invalid_schemas(definition):
+    with pytest.raises(ConfigurationError):
+        TableSchema(definition)
+
+def test_invalid_schemas_fail_init_app():
+    app = Flask(__name__)
+    app.config['DYNAMO_TABLES'] = [dict(TableName='t', KeySchema=[])]
+    with pytest.raises(ConfigurationError):
+        Dynamo(app)
+
+def test_key(schema):
+    item = {'author': 'ann', 'posted': 3, 'title': 'Hi'}
+    assert schema.key(item) == {'author': 'ann', 'posted': 3}
+    assert schema.freeze(item) == ('ann', 3)
+    with pytest.raises(InvalidKeyError):
+        schema.key({'author': 'ann'})
+    with pytest.raises(InvalidKeyError):
+        schema.key({'author': 'ann', 'posted': '3'})
+    with pytest.raises(InvalidKeyError):
+        schema.key({'author': 'ann', 'posted': True})
+    with pytest.raises(InvalidKeyError):
+        schema.check_key(item)
+
+def test_key_condition(schema):
+    assert schema.key_condition('ann', 'between', 1, 5) == {
+        'KeyConditionExpression': '#fdq0 = :fdq0 AND #fdq1 BETWEEN :fdq1 AND :fdq2',
+        'ExpressionAttributeNames': {'#fdq0': 'author', '#fdq1': 'posted'},
+        'ExpressionAttributeValues': {':fdq0': 'ann', ':fdq1': 1, ':fdq2': 5},
+    }
+    assert schema.key_condition('hi', index='by_slug')['IndexName'] == 'by_slug'
+    with pytest.raises(InvalidKeyError):
+        schema.key_condition(1)
+    with pytest.raises(InvalidKeyError):
+        schema.key_condition('hi', '>', 1, index='by_slug')
+    with pytest.raises(ValueError):
+        schema.key_condition('ann', '!=', 1)
+    with pytest.raises(TypeError):
+        schema.key_condition('ann', 'between', 1)
+
+def test_expressions_are_cached(schema):
+    first = schema.update(set={'title': 'a'}, remove=['draft'])
+    second = schema.update(set={'title': 'b'}, remove=['draft'])
+    assert first['UpdateExpression'] is second['UpdateExpression']
+    assert second['ExpressionAttributeValues'] == {':fdu0': 'b'}
+    # Callers get their own copies, which they're free to change.
+    first['ExpressionAttributeNames']['#x'] = 'x'
+    assert '#x' not in schema.update(set={'title': 'c'}, remove=['draft'])['ExpressionAttributeNames']
+
+def test_update(schema):
+    assert schema.update(set={'title': 'Hi'}, remove=['draft'], add={'views': 1}) == {
+        'UpdateExpression': 'SET #fdu0 = :fdu0 REMOVE #fdu1 ADD #fdu2 :fdu1',
+        'ExpressionAttributeNames': {'#fdu0': 'title', '#fdu1': 'draft', '#fdu2': 'views'},
+        'ExpressionAttributeValues': {':fdu0': 'Hi', ':fdu1': 1},
+    }
+    with pytest.raises(InvalidKeyError):
+        schema.update(set={'posted': 4})
+    with pytest.raises(ValueError):
+        schema.update()
+
+def test_condition(schema):
+    assert schema.condition(exists=['title'], equals={'version': 2}) == {
+        'ConditionExpression': 'attribute_exists(#fdc0) AND #fdc1 = :fdc0',
+        'ExpressionAttributeNames': {'#fdc0': 'title', '#fdc1': 'version'},
+        'ExpressionAttributeValues': {':fdc0': 2},
+    }
+    assert schema.if_not_exists()['ConditionExpression'] == 'attribute_not_exists(#fdc0)'
+
+def test_with_tables(dynamo):
+    schema = dynamo.schema('posts')
+    assert dynamo.tables.schema('posts') is schema
+    assert dynamo.tables.key_names('posts') == ['author', 'posted']
+    table = dynamo.tables['posts']
+    for posted in range(5):
+        table.put_item(Item={'author': 'ann', 'posted': posted, 'title': str(posted), 'version': 1}, **schema.if_not_exists())
+
+    items = table.query(**schema.query('ann', '>=', 3, attributes=['title']))['Items']
+    assert items == [{'title': '3'}, {'title': '4'}]
+
+    key = schema.key({'author': 'ann', 'posted': 4})
+    table.update_item(Key=key, **merge_params(
+        schema.update(set={'title': 'Four'}, add={'version': 1}),
+        schema.condition(equals={'version': 1}),
+    ))
+    assert table.get_item(Key=key, **schema.projection(['title', 'version']))['Item'] == {
+        'title': 'Four',
+        'version': Decimal(2),
+    }
+
+    fast = dynamo.fast_tables['posts']
+    assert len(fast.query(**schema.query('ann'))['Items']) == 5
+
+def test_schemas_are_shared(dynamo):
+    assert dynamo.tables.schemas['posts'] is dynamo.schema('posts')
+    with pytest.raises(KeyError):
+        dynamo.schema('users')
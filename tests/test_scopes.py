@@ -0,0 +1,48 @@
+"""Tests for our connection scopes."""
+
+
+from threading import Thread
+
+from flask_dynamo.scopes import ProcessScope, ThreadScope, _reset_scopes
+
+
+def state_in_thread(scope):
+    states = []
+    thread = Thread(target=lambda: states.append(scope.get()))
+    thread.start()
+    thread.join()
+    return states[0]
+
+def test_process_scope():
+    scope = ProcessScope()
+    assert scope.get() is scope.get()
+    assert state_in_thread(scope) is scope.get()
+
+def test_thread_scope():
+    scope = ThreadScope()
+    assert scope.get() is scope.get()
+    assert state_in_thread(scope) is not scope.get()
+
+def test_clear():
+    for scope in (ProcessScope(), ThreadScope()):
+        state = scope.get()
+        scope.clear()
+        assert scope.get() is not state
+
+def test_reset_after_fork():
+    scope = ProcessScope()
+    state = scope.get()
+    lock = scope.lock
+    _reset_scopes()
+    assert scope.get() is not state
+    assert scope.lock is not lock
+
+def test_forget():
+    scope = ThreadScope()
+    scope.get().tables[1] = {}
+    scope.get().tables[2] = {}
+    other = state_in_thread(scope)
+    other.tables[1] = {}
+    scope.forget(1)
+    assert list(scope.get().tables) == [2]
+    assert other.tables == {}
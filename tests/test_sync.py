@@ -0,0 +1,158 @@
+"""Tests for incremental table schema sync."""
+
+
+from copy import deepcopy
+
+import pytest
+from flask import Flask
+from flask_dynamo import AsyncDynamo, Dynamo
+from flask_dynamo.sync import plan_table
+
+
+USERS = dict(
+    TableName='users',
+    KeySchema=[dict(AttributeName='username', KeyType='HASH')],
+    AttributeDefinitions=[
+        dict(AttributeName='username', AttributeType='S'),
+        dict(AttributeName='email', AttributeType='S'),
+    ],
+    ProvisionedThroughput=dict(ReadCapacityUnits=5, WriteCapacityUnits=5),
+)
+
+
+def users(**changes):
+    definition = deepcopy(USERS)
+    definition.update(changes)
+    return definition
+
+
+BY_EMAIL = dict(
+    IndexName='by_email',
+    KeySchema=[dict(AttributeName='email', KeyType='HASH')],
+    Projection=dict(ProjectionType='KEYS_ONLY'),
+    ProvisionedThroughput=dict(ReadCapacityUnits=5, WriteCapacityUnits=5),
+)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [users()]
+    return app
+
+
+def deploy(app, tables):
+    """Change DYNAMO_TABLES, as if a new version of the app was deployed."""
+    dynamo = Dynamo(app)
+    old = app.extensions['dynamo'].backend
+    app.config['DYNAMO_TABLES'] = tables
+    dynamo.init_app(app)
+    new = app.extensions['dynamo'].backend
+    new.tables = old.tables
+    calls = []
+    handle = new.handle
+
+    def record(operation, body):
+        calls.append(operation)
+        return handle(operation, body)
+
+    new.handle = record
+    return dynamo, calls
+
+def test_plan_nothing_to_do(app):
+    table = Dynamo(app).backend.describe_table({'TableName': 'users'})['Table']
+    assert plan_table(users(), table) == []
+
+def test_plan_missing_table():
+    changes = plan_table(users(TimeToLiveSpecification=dict(Enabled=True, AttributeName='expires')))
+    assert [c.operation for c in changes] == ['create_table', 'update_time_to_live']
+    assert 'TimeToLiveSpecification' not in changes[0].params
+
+def test_plan_changed_index():
+    current = users(GlobalSecondaryIndexes=[BY_EMAIL], BillingModeSummary=dict(BillingMode='PROVISIONED'))
+    index = dict(BY_EMAIL, Projection=dict(ProjectionType='ALL'))
+    changes = plan_table(users(GlobalSecondaryIndexes=[index]), current)
+    assert [c.description for c in changes] == ['delete index by_email', 'create index by_email']
+
+def test_plan_key_schema_is_manual():
+    changes = plan_table(users(KeySchema=[dict(AttributeName='email', KeyType='HASH')]), users())
+    assert len(changes) == 1
+    assert changes[0].operation is None
+    assert str(changes[0]).startswith('users: (manual)')
+
+def test_sync(app):
+    dynamo, calls = deploy(app, [
+        users(
+            ProvisionedThroughput=dict(ReadCapacityUnits=10, WriteCapacityUnits=5),
+            GlobalSecondaryIndexes=[BY_EMAIL],
+            TimeToLiveSpecification=dict(Enabled=True, AttributeName='expires'),
+        ),
+        dict(
+            TableName='posts',
+            KeySchema=[dict(AttributeName='id', KeyType='HASH')],
+            AttributeDefinitions=[dict(AttributeName='id', AttributeType='S')],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+    ])
+    with app.app_context():
+        planned = dynamo.sync_all(dry_run=True)
+        assert [str(c) for c in planned] == [
+            'users: throughput 5/5 -> 10/5',
+            'users: create index by_email',
+            'users: enable TTL on expires',
+            'posts: create table',
+        ]
+        assert 'UpdateTable' not in calls
+
+        dynamo.sync_all()
+        assert calls.count('UpdateTable') == 2
+        assert calls.count('UpdateTimeToLive') == 1
+        assert calls.count('CreateTable') == 1
+
+        users_table = dynamo.tables['users']
+        assert users_table.provisioned_throughput['ReadCapacityUnits'] == 10
+        assert [i['IndexName'] for i in users_table.global_secondary_indexes] == ['by_email']
+        ttl = dynamo.client.describe_time_to_live(TableName='users')['TimeToLiveDescription']
+        assert ttl == {'TimeToLiveStatus': 'ENABLED', 'AttributeName': 'expires'}
+        assert dynamo.sync_all() == []
+
+def test_sync_billing_mode(app):
+    dynamo, calls = deploy(app, [users(BillingMode='PAY_PER_REQUEST')])
+    with app.app_context():
+        assert [str(c) for c in dynamo.sync_all()] == ['users: billing mode PROVISIONED -> PAY_PER_REQUEST']
+        assert dynamo.tables['users'].billing_mode_summary['BillingMode'] == 'PAY_PER_REQUEST'
+
+def test_sync_cache(app, tmpdir):
+    app.config['DYNAMO_SYNC_CACHE'] = str(tmpdir.join('sync.json'))
+    dynamo, calls = deploy(app, [users(GlobalSecondaryIndexes=[BY_EMAIL])])
+    with app.app_context():
+        assert len(dynamo.sync_all()) == 1
+        del calls[:]
+        assert dynamo.sync_all() == []
+        assert calls == []
+        dynamo.sync_all(force=True)
+        assert 'DescribeTable' in calls
+
+def test_create_all_skips_sync_only_settings(app):
+    app.config['DYNAMO_TABLES'] = [users(TimeToLiveSpecification=dict(Enabled=True, AttributeName='expires'))]
+    dynamo = Dynamo(app)
+    with app.app_context():
+        dynamo.backend.tables = {}
+        dynamo.create_all()
+        assert 'users' in dynamo.backend.tables
+
+def test_sync_command(app):
+    dynamo, calls = deploy(app, [users(GlobalSecondaryIndexes=[BY_EMAIL])])
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['dynamo', 'sync', '--dry-run'])
+    assert 'Planned changes:\n  users: create index by_email' in result.output
+    result = runner.invoke(args=['dynamo', 'sync'])
+    assert 'Changes made:' in result.output
+    assert 'Everything is up to date.' in runner.invoke(args=['dynamo', 'sync']).output
+
+def test_sync_command_async(app):
+    AsyncDynamo(app)
+    result = app.test_cli_runner().invoke(args=['dynamo', 'sync', '--dry-run'])
+    assert result.exit_code == 0, result.output
+    assert 'Everything is up to date.' in result.output
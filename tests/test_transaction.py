@@ -0,0 +1,192 @@
+"""Tests for transactions."""
+
+
+from decimal import Decimal
+
+import pytest
+from botocore.exceptions import ClientError
+from flask import Flask
+from flask_dynamo import Dynamo, InvalidKeyError, InvalidTransactionError
+from flask_dynamo.transaction import item_size
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='accounts',
+            KeySchema=[dict(AttributeName='id', KeyType='HASH')],
+            AttributeDefinitions=[dict(AttributeName='id', AttributeType='S')],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+        dict(
+            TableName='ledger',
+            KeySchema=[dict(AttributeName='account', KeyType='HASH'), dict(AttributeName='n', KeyType='RANGE')],
+            AttributeDefinitions=[
+                dict(AttributeName='account', AttributeType='S'),
+                dict(AttributeName='n', AttributeType='N'),
+            ],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+    ]
+    return app
+
+
+@pytest.fixture
+def dynamo(app):
+    dynamo = Dynamo(app)
+    with app.app_context():
+        accounts = dynamo.tables['accounts']
+        accounts.put_item(Item={'id': 'a', 'balance': 100})
+        accounts.put_item(Item={'id': 'b', 'balance': 0})
+        yield dynamo
+
+
+def record_calls(dynamo, fail=0):
+    """Record every TransactWriteItems request, failing the first few with a conflict."""
+    backend = dynamo.backend
+    handle = backend.handle
+    calls = []
+
+    def record(operation, body):
+        if operation == 'TransactWriteItems':
+            calls.append(body)
+            if len(calls) <= fail:
+                return 400, {
+                    '__type': 'com.amazonaws.dynamodb.v20120810#TransactionCanceledException',
+                    'message': 'Transaction cancelled',
+                    'CancellationReasons': [{'Code': 'TransactionConflict'}],
+                }
+        return handle(operation, body)
+
+    backend.handle = record
+    return calls
+
+
+def transfer(txn, amount):
+    txn['accounts'].update_item(
+        Key={'id': 'a'},
+        UpdateExpression='SET balance = balance - :amount',
+        ConditionExpression='balance >= :amount',
+        ExpressionAttributeValues={':amount': amount},
+    )
+    txn['accounts'].update_item(
+        Key={'id': 'b'},
+        UpdateExpression='SET balance = balance + :amount',
+        ExpressionAttributeValues={':amount': amount},
+    )
+    txn['ledger'].put_item(Item={'account': 'a', 'n': 1, 'amount': -amount})
+
+def balances(dynamo):
+    return [dynamo.tables['accounts'].get_item(Key={'id': id})['Item']['balance'] for id in 'ab']
+
+def test_commit(dynamo):
+    calls = record_calls(dynamo)
+    with dynamo.transaction() as txn:
+        transfer(txn, 30)
+        assert len(txn) == 3
+    assert txn.committed
+    assert len(calls) == 1
+    assert calls[0]['ClientRequestToken']
+    assert balances(dynamo) == [70, 30]
+    assert 'Item' in dynamo.tables['ledger'].get_item(Key={'account': 'a', 'n': 1})
+
+def test_cancelled(dynamo):
+    with pytest.raises(ClientError) as error:
+        with dynamo.transaction() as txn:
+            transfer(txn, 500)
+    assert error.value.response['Error']['Code'] == 'TransactionCanceledException'
+    assert [r['Code'] for r in error.value.response['CancellationReasons']] == ['ConditionalCheckFailed', 'None', 'None']
+    assert balances(dynamo) == [100, 0]
+
+def test_exception_discards(dynamo):
+    calls = record_calls(dynamo)
+    with pytest.raises(ValueError):
+        with dynamo.transaction() as txn:
+            transfer(txn, 30)
+            raise ValueError('Nope.')
+    assert calls == []
+    assert balances(dynamo) == [100, 0]
+
+def test_empty_transaction(dynamo):
+    calls = record_calls(dynamo)
+    with dynamo.transaction():
+        pass
+    assert calls == []
+
+def test_retries_conflicts(dynamo):
+    calls = record_calls(dynamo, fail=2)
+    with dynamo.transaction() as txn:
+        transfer(txn, 30)
+    assert len(calls) == 3
+    assert len(set(call['ClientRequestToken'] for call in calls)) == 3
+    assert balances(dynamo) == [70, 30]
+
+def test_gives_up(dynamo):
+    calls = record_calls(dynamo, fail=10)
+    with pytest.raises(ClientError):
+        with dynamo.transaction(max_retries=1) as txn:
+            transfer(txn, 30)
+    assert len(calls) == 2
+
+def test_limits(dynamo):
+    txn = dynamo.transaction()
+    for i in range(100):
+        txn['ledger'].put_item(Item={'account': 'a', 'n': i})
+    with pytest.raises(InvalidTransactionError):
+        txn['ledger'].put_item(Item={'account': 'a', 'n': 100})
+
+    txn = dynamo.transaction()
+    txn['accounts'].delete_item(Key={'id': 'a'})
+    with pytest.raises(InvalidTransactionError):
+        txn['accounts'].condition_check(Key={'id': 'a'}, ConditionExpression='attribute_exists(id)')
+    with pytest.raises(InvalidTransactionError):
+        txn['accounts'].put_item(Item={'id': 'c', 'blob': b'x' * 500 * 1024})
+    with pytest.raises(InvalidKeyError):
+        txn['ledger'].put_item(Item={'account': 'a', 'n': '1'})
+    with pytest.raises(InvalidKeyError):
+        txn['accounts'].delete_item(Key={'id': 'a', 'balance': 1})
+
+    txn.commit()
+    with pytest.raises(InvalidTransactionError):
+        txn.commit()
+
+def test_item_size():
+    assert item_size({'id': 'abc', 'n': 12345, 'ok': True}) == 2 + 3 + 1 + 4 + 2 + 1
+    assert item_size({'m': {'a': 'b'}}) == 1 + 3 + 2 + 1
+
+def test_invalidates_cache(app):
+    app.config['DYNAMO_CACHE'] = {'accounts': 60}
+    dynamo = Dynamo(app)
+    with app.app_context():
+        dynamo.tables['accounts'].put_item(Item={'id': 'a', 'balance': 100})
+        dynamo.tables['accounts'].put_item(Item={'id': 'b', 'balance': 0})
+        assert balances(dynamo) == [100, 0]
+        with dynamo.transaction() as txn:
+            transfer(txn, 30)
+        assert balances(dynamo) == [70, 30]
+
+def test_transact_get(dynamo):
+    for start in (0, 75):
+        with dynamo.transaction() as txn:
+            for i in range(start, start + 75):
+                txn['ledger'].put_item(Item={'account': 'a', 'n': i, 'amount': i, 'note': 'x'})
+    requests = [('ledger', {'account': 'a', 'n': i}, ['amount']) for i in range(149, -1, -1)]
+    requests.append(('accounts', {'id': 'nope'}))
+    calls = []
+    handle = dynamo.backend.handle
+
+    def record(operation, body):
+        calls.append(operation)
+        return handle(operation, body)
+
+    dynamo.backend.handle = record
+    items = dynamo.transact_get(requests)
+    assert calls == ['TransactGetItems', 'TransactGetItems']
+    assert items[0] == {'amount': Decimal(149)}
+    assert items[149] == {'amount': 0}
+    assert items[150] is None
+    with pytest.raises(InvalidKeyError):
+        dynamo.transact_get([('ledger', {'account': 'a'})])
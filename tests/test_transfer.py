@@ -0,0 +1,176 @@
+"""Tests for bulk import / export."""
+
+
+import gzip
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from flask_dynamo import AsyncDynamo, Dynamo
+from flask_dynamo.transfer import Progress, dump_item, export_items, import_items, load_item
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['DYNAMO_BACKEND'] = 'memory'
+    app.config['DYNAMO_TABLES'] = [
+        dict(
+            TableName='users',
+            KeySchema=[dict(AttributeName='id', KeyType='HASH')],
+            AttributeDefinitions=[dict(AttributeName='id', AttributeType='N')],
+            BillingMode='PAY_PER_REQUEST',
+        ),
+    ]
+    return app
+
+
+@pytest.fixture
+def dynamo(app):
+    dynamo = Dynamo(app)
+    with app.app_context():
+        yield dynamo
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+ITEM = {
+    'id': Decimal(1),
+    'name': 'ann',
+    'score': Decimal('1.5'),
+    'tags': set(['a', 'b']),
+    'avatar': b'\x00\xff',
+    'profile': {'langs': ['en', Decimal(2)], 'bio': None, 'admin': False},
+}
+
+def test_dynamodb_format_round_trips():
+    line = dump_item(ITEM, 'dynamodb')
+    assert line.endswith('\n') and line.count('\n') == 1
+    assert line.startswith('{"Item":{')
+    assert load_item(line, 'dynamodb') == ITEM
+
+def test_json_format():
+    line = dump_item(ITEM)
+    assert load_item(line) == {
+        'id': 1,
+        'name': 'ann',
+        'score': Decimal('1.5'),
+        'tags': ['a', 'b'],
+        'avatar': 'AP8=',
+        'profile': {'langs': ['en', 2], 'bio': None, 'admin': False},
+    }
+    with pytest.raises(ValueError):
+        dump_item(ITEM, 'csv')
+
+@pytest.mark.parametrize('format', ['json', 'dynamodb'])
+@pytest.mark.parametrize('filename', ['users.ndjson', 'users.ndjson.gz'])
+def test_round_trip(dynamo, tmpdir, format, filename):
+    table = dynamo.tables['users']
+    for i in range(250):
+        table.put_item(Item={'id': i, 'name': 'user {}'.format(i), 'score': Decimal('0.5') * i})
+    path = str(tmpdir.join(filename))
+
+    assert dynamo.export_table('users', path, format=format, segments=3) == 250
+    if filename.endswith('.gz'):
+        with gzip.open(path, 'rt') as f:
+            assert len(f.readlines()) == 250
+
+    dynamo.destroy_all()
+    dynamo.create_all()
+    assert dynamo.import_table('users', path, format=format, chunk_size=40) == 250
+    items = sorted(table.scan()['Items'], key=lambda item: item['id'])
+    assert len(items) == 250
+    assert items[7] == {'id': 7, 'name': 'user 7', 'score': Decimal('3.5')}
+
+def test_import_chunks_and_errors():
+    chunks = []
+
+    def write(requests):
+        chunks.append(len(requests))
+
+    items = ({'id': i} for i in range(1050))
+    assert import_items(write, items, chunk_size=500, workers=2) == 1050
+    assert sorted(chunks) == [50, 500, 500]
+
+    def fail(requests):
+        raise RuntimeError('Nope.')
+
+    with pytest.raises(RuntimeError):
+        import_items(fail, ({'id': i} for i in range(10000)), chunk_size=10, workers=2)
+
+def test_rate_cap():
+    clock = FakeClock()
+    count = import_items(
+        lambda requests: None,
+        ({'id': i} for i in range(1000)),
+        chunk_size=100,
+        workers=1,
+        rate=100,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    assert count == 1000
+    assert 8 <= clock.now <= 10
+
+    clock = FakeClock()
+    lines = []
+
+    class File(object):
+        write = lines.append
+
+    export_items(({'id': i} for i in range(500)), File(), rate=250, clock=clock, sleep=clock.sleep)
+    assert len(lines) == 500
+    assert 0.9 <= clock.now <= 2
+
+def test_progress():
+    clock = FakeClock()
+    reports = []
+    progress = Progress(lambda count, elapsed: reports.append((count, elapsed)), interval=5, clock=clock)
+    for _ in range(12):
+        clock.now += 1
+        progress.add(100)
+    assert reports == [(500, 5), (1000, 10)]
+    assert progress.rate == 100
+    assert progress.finish() == 1200
+    assert reports[-1] == (1200, 12)
+
+def test_commands(app, dynamo, tmpdir):
+    table = dynamo.tables['users']
+    for i in range(20):
+        table.put_item(Item={'id': i, 'tags': set(['x'])})
+    path = str(tmpdir.join('users.json.gz'))
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['dynamo', 'export', 'users', path, '--format', 'dynamodb', '--segments', '2'])
+    assert result.exit_code == 0, result.output
+    assert 'Exported 20 items from users to {}.'.format(path) in result.output
+
+    dynamo.destroy_all()
+    dynamo.create_all()
+    result = runner.invoke(args=['dynamo', 'import', 'users', path, '--format', 'dynamodb', '--rate', '1000'])
+    assert result.exit_code == 0, result.output
+    assert 'Imported 20 items from {} into users.'.format(path) in result.output
+    assert table.get_item(Key={'id': 3})['Item'] == {'id': 3, 'tags': set(['x'])}
+
+def test_commands_async(app, tmpdir):
+    AsyncDynamo(app)
+    with app.app_context():
+        app.extensions['dynamo'].blocking_tables['users'].put_item(Item={'id': 1})
+    path = str(tmpdir.join('users.json'))
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['dynamo', 'export', 'users', path])
+    assert result.exit_code == 0, result.output
+    assert 'Exported 1 items' in result.output
+    result = runner.invoke(args=['dynamo', 'import', 'users', path])
+    assert result.exit_code == 0, result.output
+    assert 'Imported 1 items' in result.output